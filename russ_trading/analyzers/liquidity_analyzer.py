@@ -192,18 +192,13 @@ class LiquidityAnalyzer:
         try:
             # 尝试从 akshare 获取 (仅A股)
             if '.SS' in symbol or '.SZ' in symbol:
-                import akshare as ak
+                from src.data_sources.a_share_snapshot import get_a_share_snapshot
 
                 # 移除后缀
                 code = symbol.replace('.SS', '').replace('.SZ', '')
 
-                # 获取实时行情
-                df = ak.stock_zh_a_spot_em()
-                row = df[df['代码'] == code]
-
-                if not row.empty:
-                    turnover_rate = row['换手率'].values[0]
-                    return turnover_rate / 100  # 转为小数
+                # 从共享的全市场行情快照中查询
+                return get_a_share_snapshot().turnover_rate(code)
 
             # 其他市场返回 None
             return None
@@ -16,14 +16,15 @@ Updated: 2025-10-25 (添加重试和缓存机制)
 
 import logging
 import time
-import json
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import wraps
 import akshare as ak
 import efinance as ef
 
+from src.utils.cache_service import CacheService, get_namespace
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,37 +62,23 @@ class MarketDepthAnalyzer:
         初始化分析器
 
         Args:
-            cache_dir: 缓存目录路径，默认为 data/cache
+            cache_dir: 缓存目录路径，默认使用进程共享的缓存服务
         """
         self.logger = logger
 
-        # 设置缓存目录
+        # 板块轮动等结果缓存在 market_depth 命名空间(内存+磁盘), 实时获取失败时回退使用
         if cache_dir is None:
-            project_root = Path(__file__).parent.parent
-            cache_dir = project_root / 'data' / 'cache'
-
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.cache = get_namespace('market_depth')
+        else:
+            self.cache = CacheService(cache_dir=Path(cache_dir)).namespace('market_depth')
+        self.cache_dir = self.cache.directory
 
         self.logger.info(f"缓存目录: {self.cache_dir}")
 
-    def _get_cache_path(self, cache_name: str) -> Path:
-        """获取缓存文件路径"""
-        return self.cache_dir / f"{cache_name}.json"
-
     def _save_cache(self, cache_name: str, data: Dict) -> None:
         """保存数据到缓存"""
-        try:
-            cache_path = self._get_cache_path(cache_name)
-            cache_data = {
-                'timestamp': datetime.now().isoformat(),
-                'data': data
-            }
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            self.logger.debug(f"缓存已保存: {cache_name}")
-        except Exception as e:
-            self.logger.warning(f"保存缓存失败: {e}")
+        self.cache.set(cache_name, data)
+        self.logger.debug(f"缓存已保存: {cache_name}")
 
     def _load_cache(self, cache_name: str, max_age_hours: int = 24) -> Optional[Dict]:
         """
@@ -104,29 +91,15 @@ class MarketDepthAnalyzer:
         Returns:
             缓存的数据，如果缓存过期或不存在则返回 None
         """
-        try:
-            cache_path = self._get_cache_path(cache_name)
-            if not cache_path.exists():
-                return None
-
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-
-            # 检查缓存是否过期
-            cache_time = datetime.fromisoformat(cache_data['timestamp'])
-            age = datetime.now() - cache_time
-
-            if age > timedelta(hours=max_age_hours):
-                self.logger.debug(f"缓存已过期: {cache_name} (年龄: {age})")
-                return None
-
-            self.logger.info(f"使用缓存数据: {cache_name} (缓存时间: {cache_time.strftime('%Y-%m-%d %H:%M:%S')})")
-            return cache_data['data']
-
-        except Exception as e:
-            self.logger.warning(f"加载缓存失败: {e}")
+        data = self.cache.get(cache_name, max_age=max_age_hours * 3600)
+        if data is None:
+            self.logger.debug(f"无可用缓存: {cache_name}")
             return None
 
+        self.logger.info(f"使用缓存数据: {cache_name}")
+        # 调用方会修改返回的字典, 不能直接改动缓存中的对象
+        return dict(data)
+
     def analyze_sector_rotation(self, date: str = None) -> Dict:
         """
         分析板块轮动（支持缓存和重试）
@@ -238,9 +211,11 @@ class MarketDepthAnalyzer:
 
     @retry_on_error(max_retries=3, delay=2)
     def _fetch_realtime_quotes_with_retry(self):
-        """带重试的实时行情数据获取"""
+        """带重试的实时行情数据获取(共享全市场快照, 刷新间隔内不重复下载)"""
+        from src.data_sources.a_share_snapshot import get_a_share_snapshot
+
         self.logger.info("正在获取实时行情数据...")
-        return ak.stock_zh_a_spot_em()
+        return get_a_share_snapshot().get_frame()
 
     def _analyze_rotation_signal(self, data: Dict) -> str:
         """分析轮动信号"""
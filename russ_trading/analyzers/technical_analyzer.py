@@ -15,8 +15,13 @@ import numpy as np
 from typing import Dict, List, Optional
 import logging
 
+from strategies.trading.signal_generators.indicator_panel import get_indicator_panel
+
 logger = logging.getLogger(__name__)
 
+# 共享指标面板的列 -> 本模块使用的中文数据列名/指标列名
+PANEL_PRICE_COLUMNS = {'开盘': 'open', '最高': 'high', '最低': 'low', '收盘': 'close', '成交量': 'volume'}
+
 
 class TechnicalAnalyzer:
     """技术指标分析器"""
@@ -25,6 +30,26 @@ class TechnicalAnalyzer:
         """初始化技术分析器"""
         pass
 
+    @staticmethod
+    def _fill_from_panel(df: pd.DataFrame, panel_key: str, requests: List) -> pd.DataFrame:
+        """
+        从共享指标面板填充指标列 (口径与本类逐项计算一致, 同一K线各分析器只算一次)
+
+        Args:
+            df: 中文列名的日线数据
+            panel_key: 共享面板键 (panel_key(市场, 代码))
+            requests: [(指标名, 参数, {面板列: 本模块列})]
+        """
+        bars = df.rename(columns=PANEL_PRICE_COLUMNS)
+        if '日期' in bars.columns:
+            bars = bars.set_index('日期')
+        panel = get_indicator_panel(panel_key, bars)
+        for name, params, columns in requests:
+            frame = panel.series(name, **params)
+            for source, target in columns.items():
+                df[target] = frame[source].values
+        return df
+
     def calculate_macd(self, df: pd.DataFrame, fast=12, slow=26, signal=9) -> pd.DataFrame:
         """
         计算MACD指标
@@ -223,13 +248,14 @@ class TechnicalAnalyzer:
             logger.error(f"分析量价关系失败: {e}")
             return {'status': '分析失败'}
 
-    def analyze_index(self, symbol: str, df: pd.DataFrame) -> Dict:
+    def analyze_index(self, symbol: str, df: pd.DataFrame, panel_key: Optional[str] = None) -> Dict:
         """
         综合分析指数技术指标
 
         Args:
             symbol: 指数代码
             df: 历史数据DataFrame
+            panel_key: 共享指标面板键, 提供时MACD/RSI取自该标的的共享面板
 
         Returns:
             综合技术分析结果
@@ -243,8 +269,14 @@ class TechnicalAnalyzer:
                 }
 
             # 计算技术指标
-            df = self.calculate_macd(df)
-            df = self.calculate_rsi(df)
+            if panel_key:
+                df = self._fill_from_panel(df, panel_key, [
+                    ('macd', {}, {'macd': 'MACD', 'macd_signal': 'Signal', 'macd_histogram': 'Histogram'}),
+                    ('rsi', {}, {'rsi': 'RSI'}),
+                ])
+            else:
+                df = self.calculate_macd(df)
+                df = self.calculate_rsi(df)
 
             # 获取最新值
             latest = df.iloc[-1]
@@ -440,12 +472,13 @@ class TechnicalAnalyzer:
             logger.error(f"检测量价背离失败: {e}")
             return {'has_divergence': False}
 
-    def get_enhanced_signals(self, df: pd.DataFrame) -> Dict:
+    def get_enhanced_signals(self, df: pd.DataFrame, panel_key: Optional[str] = None) -> Dict:
         """
         获取增强型技术信号 (机构级7指标)
 
         Args:
             df: 历史数据DataFrame
+            panel_key: 共享指标面板键, 提供时RSI/MA/ATR取自该标的的共享面板
 
         Returns:
             包含所有新增指标的字典
@@ -455,9 +488,14 @@ class TechnicalAnalyzer:
                 return {'status': '数据不足', 'has_data': False}
 
             # 计算所有新指标
-            df = self.calculate_rsi(df)
-            df = self.calculate_ma(df, [5, 10, 20, 60])
-            df = self.calculate_atr(df)
+            if panel_key:
+                df = self._fill_from_panel(df, panel_key, [('rsi', {}, {'rsi': 'RSI'})] + [
+                    ('ma', {'period': period}, {f'ma{period}': f'MA{period}'}) for period in (5, 10, 20, 60)
+                ] + [('atr', {}, {'atr': 'ATR'})])
+            else:
+                df = self.calculate_rsi(df)
+                df = self.calculate_ma(df, [5, 10, 20, 60])
+                df = self.calculate_atr(df)
             df = self.calculate_volume_ratio(df)
             df = self.calculate_vwap(df)
 
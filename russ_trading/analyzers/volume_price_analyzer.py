@@ -17,6 +17,8 @@ import numpy as np
 import logging
 from typing import Dict, List, Optional, Tuple
 
+from src.utils.extrema import local_maxima, local_minima
+
 logger = logging.getLogger(__name__)
 
 
@@ -157,7 +159,7 @@ class VolumePriceAnalyzer:
             换手率(小数形式,如0.025表示2.5%),非A股返回None
         """
         try:
-            import akshare as ak
+            from src.data_sources.a_share_snapshot import get_a_share_snapshot
 
             # 清理代码格式
             code = symbol.replace('.SS', '').replace('.SZ', '').replace('.HK', '')
@@ -166,15 +168,8 @@ class VolumePriceAnalyzer:
             if len(code) != 6 or not code.isdigit():
                 return None
 
-            # 获取实时行情
-            df = ak.stock_zh_a_spot_em()
-            row = df[df['代码'] == code]
-
-            if not row.empty:
-                turnover_rate = row['换手率'].values[0]
-                return float(turnover_rate) / 100  # 转为小数
-
-            return None
+            # 从共享的全市场行情快照中查询
+            return get_a_share_snapshot().turnover_rate(code)
 
         except Exception as e:
             logger.debug(f"获取换手率失败 {symbol}: {str(e)}")
@@ -660,12 +655,7 @@ class VolumePriceAnalyzer:
         Returns:
             峰值点索引列表
         """
-        peaks = []
-        for i in range(order, len(data) - order):
-            if all(data[i] > data[i-j] for j in range(1, order+1)) and \
-               all(data[i] > data[i+j] for j in range(1, order+1)):
-                peaks.append(i)
-        return peaks
+        return local_maxima(data, order, strict=True).tolist()
 
     def _find_troughs(self, data: np.ndarray, order: int = 3) -> List[int]:
         """
@@ -678,12 +668,7 @@ class VolumePriceAnalyzer:
         Returns:
             谷值点索引列表
         """
-        troughs = []
-        for i in range(order, len(data) - order):
-            if all(data[i] < data[i-j] for j in range(1, order+1)) and \
-               all(data[i] < data[i+j] for j in range(1, order+1)):
-                troughs.append(i)
-        return troughs
+        return local_minima(data, order, strict=True).tolist()
 
     def _calculate_vp_score(self, result: Dict) -> int:
         """
@@ -4,14 +4,18 @@
 策略引擎模块
 
 包含回测和优化引擎:
-- BacktestEngine: 回测引擎
+- BacktestEngineEnhanced: 增强版回测引擎
+- PortfolioBacktester: 组合级多资产回测引擎
 - BaseSwingOptimizer: 波段优化器
 """
 
-from .backtest_engine_enhanced import BacktestEngine
+from .backtest_engine_enhanced import BacktestEngineEnhanced, BacktestConfig
+from .portfolio_backtester import PortfolioBacktester
 from .base_swing_optimizer import BaseSwingOptimizer
 
 __all__ = [
-    'BacktestEngine',
+    'BacktestEngineEnhanced',
+    'BacktestConfig',
+    'PortfolioBacktester',
     'BaseSwingOptimizer',
 ]
@@ -15,17 +15,24 @@ Created: 2025-10-20
 
 import sys
 import os
+import json
+import itertools
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Callable
+from typing import Dict, List, Optional, Tuple, Callable, Any
 from datetime import datetime, timedelta
 import logging
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
 from enum import Enum
 
 # 添加父目录到路径以便导入其他模块
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from strategies.trading.backtesting.array_backtest import (
+    backtest_arrays, daily_returns_from_values, encode_signals, trade_to_dict
+)
+
 try:
     from russ_trading.managers.risk_manager import RiskManager
 except ImportError:
@@ -74,9 +81,60 @@ class StressTestScenario:
     duration_days: int = 1          # 持续天数
 
 
+class _BandHistogram:
+    """
+    蒙特卡洛分位数带的每日对数收益直方图
+
+    分箱范围只由历史收益率和天数决定, 各块计数直接相加, 合并结果与分块方式无关;
+    超出范围的值计入两端分箱, 分位数再限定在当日最小/最大值之间
+    """
+
+    def __init__(self, returns_array: np.ndarray, n_days: int, bins: int, sigmas: float):
+        log_returns = np.log1p(np.maximum(returns_array, -1 + 1e-12))
+        days = np.arange(n_days + 1)
+        half = sigmas * max(float(np.std(log_returns)), 1e-12) * np.sqrt(days) + 1e-12
+        self.bins = bins
+        self.low = days * float(np.mean(log_returns)) - half
+        self.width = 2 * half / bins
+        self.counts = np.zeros((n_days + 1, bins), dtype=np.int64)
+        self.minimum = np.full(n_days + 1, np.inf)
+        self.maximum = np.full(n_days + 1, -np.inf)
+        self._offsets = days[None, :] * bins
+
+    def add(self, log_equity: np.ndarray) -> None:
+        """累计一块路径 (路径数 × (n_days + 1)) 的对数收益"""
+        index = np.clip(np.floor((log_equity - self.low) / self.width), 0, self.bins - 1).astype(np.int64)
+        self.counts += np.bincount(
+            (index + self._offsets).ravel(), minlength=self.counts.size
+        ).reshape(self.counts.shape)
+        self.minimum = np.minimum(self.minimum, log_equity.min(axis=0))
+        self.maximum = np.maximum(self.maximum, log_equity.max(axis=0))
+
+    def percentiles(self, percentiles) -> np.ndarray:
+        """各分位数的每日对数收益 (len(percentiles) × (n_days + 1)), 分箱内线性插值"""
+        cumulative = np.cumsum(self.counts, axis=1)
+        total = cumulative[:, -1]
+        rows = np.arange(len(total))
+        result = []
+        for pct in percentiles:
+            rank = pct / 100 * (total - 1)
+            position = np.minimum((cumulative <= rank[:, None]).sum(axis=1), self.bins - 1)
+            before = np.where(position > 0, cumulative[rows, position - 1], 0)
+            inside = np.clip((rank - before + 0.5) / np.maximum(self.counts[rows, position], 1), 0, 1)
+            value = self.low + (position + inside) * self.width
+            result.append(np.clip(value, self.minimum, self.maximum))
+        return np.array(result)
+
+
 class BacktestEngineEnhanced:
     """增强版回测引擎"""
 
+    # 蒙特卡洛权益路径分位数带
+    MC_BAND_PERCENTILES = (5, 25, 50, 75, 95)
+    # 分位数带直方图: 每日对数收益的分箱数与覆盖范围(历史日对数收益标准差的倍数 × sqrt(天数))
+    MC_BAND_BINS = 4096
+    MC_BAND_SIGMAS = 10
+
     def __init__(self, config: Optional[BacktestConfig] = None):
         """
         初始化增强版回测引擎
@@ -117,82 +175,25 @@ class BacktestEngineEnhanced:
         if dates is None:
             dates = prices.index if hasattr(prices, 'index') else range(len(prices))
 
-        cash = self.config.initial_capital
-        position = 0
-        entry_price = 0
-        entry_date = None
-
-        portfolio_values = []
-        daily_returns = []
-        trades = []
-        equity_curve = []
-
-        for i, (date, price) in enumerate(zip(dates, prices)):
-            signal = signals.iloc[i] if i < len(signals) else 'HOLD'
-
-            # 检查止损止盈
-            if position > 0 and entry_price > 0:
-                current_return = (price - entry_price) / entry_price
-
-                if self.config.stop_loss and current_return <= -self.config.stop_loss:
-                    signal = 'STOP_LOSS'
-                elif self.config.take_profit and current_return >= self.config.take_profit:
-                    signal = 'TAKE_PROFIT'
-
-            # 处理交易
-            if signal in ['BUY', 'STRONG_BUY'] and position == 0:
-                # 买入
-                buy_price = price * (1 + self.config.slippage)
-                max_shares = int((cash * self.config.max_position) / buy_price)
-
-                if max_shares > 0:
-                    cost = max_shares * buy_price
-                    commission = cost * self.config.commission
-
-                    cash -= (cost + commission)
-                    position = max_shares
-                    entry_price = buy_price
-                    entry_date = date
-
-            elif signal in ['SELL', 'STRONG_SELL', 'STOP_LOSS', 'TAKE_PROFIT'] and position > 0:
-                # 卖出
-                sell_price = price * (1 - self.config.slippage)
-                revenue = position * sell_price
-                commission = revenue * self.config.commission
-
-                cash += (revenue - commission)
-
-                # 记录交易
-                trade_return = (sell_price - entry_price) / entry_price
-                pnl = (sell_price - entry_price) * position - commission * 2
-
-                trades.append({
-                    'entry_date': entry_date,
-                    'exit_date': date,
-                    'entry_price': entry_price,
-                    'exit_price': sell_price,
-                    'shares': position,
-                    'return': trade_return,
-                    'pnl': pnl,
-                    'signal': signal
-                })
-
-                position = 0
-                entry_price = 0
-                entry_date = None
-
-            # 计算组合价值
-            position_value = position * price if position > 0 else 0
-            total_value = cash + position_value
-            portfolio_values.append(total_value)
-            equity_curve.append(total_value)
-
-            # 计算日收益率
-            if i > 0:
-                daily_return = (total_value - portfolio_values[i-1]) / portfolio_values[i-1]
-                daily_returns.append(daily_return)
-            else:
-                daily_returns.append(0)
+        price_array = np.asarray(prices, dtype=float)[:len(dates)]
+        dates = list(dates)[:len(price_array)]
+
+        # 预先转换为数组, 撮合循环不经过pandas索引
+        values, raw_trades = backtest_arrays(
+            price_array,
+            encode_signals(signals, len(price_array)),
+            initial_capital=self.config.initial_capital,
+            commission=self.config.commission,
+            slippage=self.config.slippage,
+            stop_loss=self.config.stop_loss,
+            take_profit=self.config.take_profit,
+            max_position=self.config.max_position
+        )
+
+        trades = [trade_to_dict(raw, dates) for raw in raw_trades]
+        portfolio_values = values.tolist()
+        daily_returns = daily_returns_from_values(values).tolist()
+        equity_curve = list(portfolio_values)
 
         # 保存结果
         self.portfolio_values = portfolio_values
@@ -257,66 +258,173 @@ class BacktestEngineEnhanced:
         self,
         n_simulations: int = 1000,
         n_days: int = 252,
-        use_historical_returns: bool = True
+        use_historical_returns: bool = True,
+        vectorized: bool = True,
+        chunk_size: int = 10000,
+        return_paths: bool = False,
+        seed: Optional[int] = None
     ) -> Dict:
         """
         蒙特卡洛模拟
 
+        向量化模式按块生成 (chunk_size × n_days) 收益率矩阵, 用累乘计算权益路径,
+        逐块累计期末资金、最大回撤和分位数带, 内存占用与模拟次数无关
+        (10万条路径可在数秒内完成)。
+
+        分位数带由每日对数收益直方图合并得到, 结果与分块大小无关;
+        精度为分箱宽度 (约0.005倍当日收益标准差), 并限定在当日最小/最大值之间。
+
         Args:
             n_simulations: 模拟次数
             n_days: 模拟天数
             use_historical_returns: 是否使用历史收益率分布
+            vectorized: 是否使用NumPy批量模式(False为逐条路径循环)
+            chunk_size: 向量化模式每块的路径数
+            return_paths: 是否返回全部模拟路径(内存占用随模拟次数线性增长, 默认只返回统计与分位数带)
+            seed: 随机种子(仅向量化模式)
 
         Returns:
             蒙特卡洛模拟结果
         """
+        if n_simulations < 1 or n_days < 1:
+            raise ValueError(f"模拟次数和模拟天数需为正整数: n_simulations={n_simulations}, n_days={n_days}")
         if not self.daily_returns:
             return {'error': '需要先运行回测以获取历史收益率'}
 
-        # 计算收益率统计
         returns_array = np.array(self.daily_returns)
+
+        if vectorized:
+            chunks = self._simulate_equity_chunks(
+                returns_array, n_simulations, n_days, use_historical_returns,
+                max(1, chunk_size), np.random.default_rng(seed)
+            )
+        else:
+            chunks = [self._simulate_equity_loop(returns_array, n_simulations, n_days, use_historical_returns)]
+
+        final_values = []
+        max_drawdowns = []
+        kept_paths = []
+        band_histogram = _BandHistogram(returns_array, n_days, self.MC_BAND_BINS, self.MC_BAND_SIGMAS)
+        initial = self.config.initial_capital
+
+        for equity in chunks:
+            final_values.append(equity[:, -1])
+            peaks = np.maximum.accumulate(equity, axis=1)
+            max_drawdowns.append(np.max((peaks - equity) / peaks, axis=1))
+            band_histogram.add(np.log(np.maximum(equity / initial, 1e-300)))
+
+            if return_paths:
+                kept_paths.append(equity)
+
+        final_values = np.concatenate(final_values)
+        max_drawdowns = np.concatenate(max_drawdowns)
+        bands = np.exp(band_histogram.percentiles(self.MC_BAND_PERCENTILES)) * initial
+
+        result = {
+            'n_simulations': n_simulations,
+            'n_days': n_days,
+            'statistics': self._summarize_monte_carlo(final_values),
+            'percentile_bands': {
+                f'p{pct}': bands[i].tolist() for i, pct in enumerate(self.MC_BAND_PERCENTILES)
+            },
+            'drawdown_distribution': {
+                'mean': float(np.mean(max_drawdowns)),
+                'median': float(np.median(max_drawdowns)),
+                'percentile_95': float(np.percentile(max_drawdowns, 95)),
+                'percentile_99': float(np.percentile(max_drawdowns, 99)),
+                'probability_dd_20pct': float(np.mean(max_drawdowns > 0.20)),
+                'probability_dd_30pct': float(np.mean(max_drawdowns > 0.30)),
+            },
+        }
+
+        if return_paths:
+            result['simulation_paths'] = np.vstack(kept_paths).tolist()
+
+        return result
+
+    def _simulate_equity_chunks(
+        self,
+        returns_array: np.ndarray,
+        n_simulations: int,
+        n_days: int,
+        use_historical_returns: bool,
+        chunk_size: int,
+        rng: np.random.Generator
+    ):
+        """按块生成模拟权益路径矩阵 (路径数 × (n_days + 1)), 首列为初始资金"""
         mean_return = np.mean(returns_array)
         std_return = np.std(returns_array)
+        initial = self.config.initial_capital
 
-        simulation_paths = []
-        final_values = []
+        done = 0
+        while done < n_simulations:
+            size = min(chunk_size, n_simulations - done)
+            if use_historical_returns:
+                # 从历史收益率中随机抽样
+                simulated = rng.choice(returns_array, size=(size, n_days), replace=True)
+            else:
+                # 使用正态分布生成
+                simulated = rng.normal(mean_return, std_return, (size, n_days))
+
+            equity = np.empty((size, n_days + 1))
+            equity[:, 0] = initial
+            np.cumprod(1 + simulated, axis=1, out=equity[:, 1:])
+            equity[:, 1:] *= initial
+
+            done += size
+            yield equity
+
+    def _simulate_equity_loop(
+        self,
+        returns_array: np.ndarray,
+        n_simulations: int,
+        n_days: int,
+        use_historical_returns: bool
+    ) -> np.ndarray:
+        """逐条路径模拟(原始实现, 作为向量化模式的对照)"""
+        mean_return = np.mean(returns_array)
+        std_return = np.std(returns_array)
 
+        simulation_paths = []
         for _ in range(n_simulations):
             if use_historical_returns:
-                # 从历史收益率中随机抽样
                 simulated_returns = np.random.choice(returns_array, size=n_days, replace=True)
             else:
-                # 使用正态分布生成
                 simulated_returns = np.random.normal(mean_return, std_return, n_days)
 
-            # 计算模拟路径
             equity_path = [self.config.initial_capital]
             for ret in simulated_returns:
                 equity_path.append(equity_path[-1] * (1 + ret))
-
             simulation_paths.append(equity_path)
-            final_values.append(equity_path[-1])
 
-        # 统计分析
-        final_values = np.array(final_values)
+        return np.array(simulation_paths)
+
+    def _summarize_monte_carlo(self, final_values: np.ndarray) -> Dict:
+        """汇总期末资金分布"""
+        initial = self.config.initial_capital
+        n_simulations = len(final_values)
+        final_returns = final_values / initial - 1
+
+        var_95 = np.percentile(final_returns, 5)
+        var_99 = np.percentile(final_returns, 1)
 
         return {
-            'n_simulations': n_simulations,
-            'n_days': n_days,
-            'simulation_paths': simulation_paths,
-            'statistics': {
-                'mean_final_value': np.mean(final_values),
-                'median_final_value': np.median(final_values),
-                'std_final_value': np.std(final_values),
-                'percentile_5': np.percentile(final_values, 5),
-                'percentile_25': np.percentile(final_values, 25),
-                'percentile_75': np.percentile(final_values, 75),
-                'percentile_95': np.percentile(final_values, 95),
-                'probability_profit': np.sum(final_values > self.config.initial_capital) / n_simulations,
-                'probability_loss_50pct': np.sum(final_values < self.config.initial_capital * 0.5) / n_simulations,
-                'expected_return': (np.mean(final_values) - self.config.initial_capital) / self.config.initial_capital,
-                'expected_shortfall_5pct': self._calculate_expected_shortfall(final_values, 0.05)
-            }
+            'mean_final_value': np.mean(final_values),
+            'median_final_value': np.median(final_values),
+            'std_final_value': np.std(final_values),
+            'percentile_5': np.percentile(final_values, 5),
+            'percentile_25': np.percentile(final_values, 25),
+            'percentile_75': np.percentile(final_values, 75),
+            'percentile_95': np.percentile(final_values, 95),
+            'probability_profit': np.sum(final_values > initial) / n_simulations,
+            'probability_loss_50pct': np.sum(final_values < initial * 0.5) / n_simulations,
+            'expected_return': (np.mean(final_values) - initial) / initial,
+            'expected_shortfall_5pct': self._calculate_expected_shortfall(final_values, 0.05),
+            # 区间收益率口径的VaR/ES (负数表示亏损)
+            'var_95': var_95,
+            'var_99': var_99,
+            'es_95': np.mean(final_returns[final_returns <= var_95]),
+            'es_99': np.mean(final_returns[final_returns <= var_99]),
         }
 
     def run_sensitivity_analysis(
@@ -325,7 +433,9 @@ class BacktestEngineEnhanced:
         parameter_ranges: Dict[str, List]
     ) -> Dict:
         """
-        敏感性分析
+        敏感性分析 (逐个参数串行扫描)
+
+        多参数联合扫描、并行执行及断点恢复请使用 run_parameter_sweep。
 
         Args:
             backtest_func: 回测函数
@@ -357,14 +467,132 @@ class BacktestEngineEnhanced:
                 except Exception as e:
                     logger.error(f"参数 {param_name}={value} 回测失败: {e}")
 
-                # 恢复原值
-                if original_value is not None:
-                    setattr(self.config, param_name, original_value)
+                # 恢复原值(原值为None时同样恢复, 避免污染后续回测)
+                setattr(self.config, param_name, original_value)
 
             sensitivity_results[param_name] = param_results
 
         return sensitivity_results
 
+    def run_parameter_sweep(
+        self,
+        backtest_func: Callable[[BacktestConfig], Dict],
+        param_space: Dict[str, Any],
+        method: str = 'grid',
+        n_samples: int = 50,
+        n_workers: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        参数扫描 (网格搜索 / 随机搜索)
+
+        每组参数基于 self.config 复制出独立的 BacktestConfig, 在进程池中并行回测,
+        结果逐条写入检查点文件, 中断后以相同参数再次调用即可跳过已完成的组合。
+
+        Args:
+            backtest_func: 回测函数, 接收 BacktestConfig 返回回测结果字典
+                (进程池模式下需可pickle, 如模块级函数或 SimpleBacktestTask)
+            param_space: 参数空间 {'stop_loss': [0.05, 0.08], 'take_profit': (0.1, 0.3)}
+                列表为离散取值, 二元元组为随机搜索时的均匀分布区间
+            method: 'grid' 全组合 / 'random' 随机抽样
+            n_samples: 随机搜索的样本数
+            n_workers: 进程数, 1为当前进程串行执行, None为CPU核数
+            checkpoint_path: 检查点CSV路径, 存在时从中恢复
+            seed: 随机搜索的随机种子(恢复时需保持一致)
+
+        Returns:
+            每组参数一行的DataFrame (参数列 + 指标列)
+        """
+        param_sets = self._build_param_sets(param_space, method, n_samples, seed)
+
+        done = pd.DataFrame()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            done = pd.read_csv(checkpoint_path)
+            logger.info(f"从检查点恢复: 已完成 {len(done)} 组参数")
+        done_ids = set(done['run_id']) if 'run_id' in done.columns else set()
+
+        pending = [p for p in param_sets if self._sweep_run_id(p) not in done_ids]
+        logger.info(f"参数扫描: 共 {len(param_sets)} 组, 待运行 {len(pending)} 组")
+
+        rows = []
+
+        def record(params: Dict, metrics: Dict):
+            row = {'run_id': self._sweep_run_id(params), **params, **metrics}
+            rows.append(row)
+            # 失败的组合不写入检查点, 恢复时重新运行
+            if checkpoint_path and 'error' not in metrics:
+                write_header = not os.path.exists(checkpoint_path)
+                pd.DataFrame([row]).to_csv(checkpoint_path, mode='a', header=write_header, index=False)
+
+        if n_workers == 1:
+            for params in pending:
+                record(params, _run_sweep_config(backtest_func, replace(self.config, **params)))
+        elif pending:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = {
+                    executor.submit(_run_sweep_config, backtest_func, replace(self.config, **params)): params
+                    for params in pending
+                }
+                for future in as_completed(futures):
+                    params = futures[future]
+                    try:
+                        metrics = future.result()
+                    except Exception as e:
+                        # 进程崩溃/结果无法pickle等, 记为失败行后继续收集其余组合
+                        logger.error(f"参数组合 {params} 执行失败: {e}")
+                        metrics = {'error': str(e)}
+                    record(params, metrics)
+
+        results = pd.concat([done, pd.DataFrame(rows)], ignore_index=True)
+        if results.empty:
+            return results
+
+        # 按参数组合的生成顺序输出
+        order = {self._sweep_run_id(p): i for i, p in enumerate(param_sets)}
+        results = results[results['run_id'].isin(order)]
+        results = results.iloc[results['run_id'].map(order).argsort()].reset_index(drop=True)
+        return results
+
+    @staticmethod
+    def _build_param_sets(
+        param_space: Dict[str, Any],
+        method: str,
+        n_samples: int,
+        seed: Optional[int]
+    ) -> List[Dict]:
+        """生成参数组合列表"""
+        for name in param_space:
+            if name not in BacktestConfig.__dataclass_fields__:
+                raise ValueError(f"BacktestConfig 没有参数: {name}")
+
+        names = list(param_space)
+        if method == 'grid':
+            for name, values in param_space.items():
+                if not isinstance(values, list):
+                    raise ValueError(f"网格搜索的参数 {name} 需为取值列表")
+            return [dict(zip(names, combo)) for combo in itertools.product(*param_space.values())]
+
+        if method == 'random':
+            rng = np.random.default_rng(seed)
+            param_sets = []
+            for _ in range(n_samples):
+                params = {}
+                for name, values in param_space.items():
+                    if isinstance(values, tuple):
+                        params[name] = float(rng.uniform(values[0], values[1]))
+                    else:
+                        params[name] = values[int(rng.integers(len(values)))]
+                param_sets.append(params)
+            return param_sets
+
+        raise ValueError(f"不支持的扫描方式: {method}")
+
+    @staticmethod
+    def _sweep_run_id(params: Dict) -> str:
+        """参数组合的唯一标识(用于断点恢复)"""
+        return json.dumps(params, sort_keys=True, default=str)
+
     def run_multi_scenario_backtest(
         self,
         prices: pd.Series,
@@ -464,7 +692,7 @@ class BacktestEngineEnhanced:
             if include_monte_carlo and self.daily_returns:
                 lines.append("## 4. 蒙特卡洛模拟")
                 lines.append("")
-                mc_results = self.run_monte_carlo_simulation(n_simulations=1000)
+                mc_results = self.run_monte_carlo_simulation(n_simulations=1000, return_paths=False)
                 lines.append(self._format_monte_carlo_results(mc_results))
                 lines.append("")
 
@@ -779,10 +1007,67 @@ class BacktestEngineEnhanced:
         lines.append(f"- **亏损50%以上概率**: {stats.get('probability_loss_50pct', 0)*100:.2f}%")
         lines.append(f"- **期望收益率**: {stats.get('expected_return', 0)*100:.2f}%")
         lines.append(f"- **期望损失(CVaR 5%)**: {stats.get('expected_shortfall_5pct', 0):,.0f} 元")
+        lines.append(f"- **VaR 95% / ES 95%**: {stats.get('var_95', 0)*100:.2f}% / {stats.get('es_95', 0)*100:.2f}%")
+
+        dd = mc_results.get('drawdown_distribution')
+        if dd:
+            lines.append("")
+            lines.append("### 最大回撤分布")
+            lines.append("")
+            lines.append(f"- **平均最大回撤**: {dd['mean']*100:.2f}%")
+            lines.append(f"- **95%分位最大回撤**: {dd['percentile_95']*100:.2f}%")
+            lines.append(f"- **回撤超20%概率**: {dd['probability_dd_20pct']*100:.2f}%")
 
         return "\n".join(lines)
 
 
+class SimpleBacktestTask:
+    """
+    可pickle的单资产回测任务, 供 run_parameter_sweep 在进程池中使用
+
+    用法:
+        task = SimpleBacktestTask(prices, signals)
+        engine.run_parameter_sweep(task, {'stop_loss': [0.05, 0.08]})
+    """
+
+    def __init__(self, prices: pd.Series, signals: pd.Series):
+        self.prices = prices
+        self.signals = signals
+
+    def __call__(self, config: BacktestConfig) -> Dict:
+        return BacktestEngineEnhanced(config).run_simple_backtest(self.prices, self.signals)
+
+
+def _run_sweep_config(backtest_func: Callable, config: BacktestConfig) -> Dict:
+    """运行单组参数并提取汇总指标(模块级函数, 供进程池调用)"""
+    try:
+        result = backtest_func(config) or {}
+    except Exception as e:
+        logger.error(f"参数组合回测失败: {e}")
+        return {'error': str(e)}
+
+    values = np.asarray(result.get('portfolio_values') or [], dtype=float)
+    returns = np.asarray(result.get('daily_returns') or [], dtype=float)
+
+    sharpe = result.get('sharpe_ratio')
+    if sharpe is None:
+        std = np.std(returns) if len(returns) else 0
+        sharpe = (np.mean(returns) * 252 - config.risk_free_rate) / (std * np.sqrt(252)) if std > 0 else 0
+
+    max_dd = result.get('max_drawdown')
+    if max_dd is None:
+        max_dd = float(np.max(1 - values / np.maximum.accumulate(values))) if len(values) else 0
+
+    return {
+        'total_return': result.get('total_return', 0),
+        'final_value': result.get('final_value', 0),
+        'sharpe_ratio': float(sharpe),
+        'max_drawdown': float(max_dd),
+        'win_rate': result.get('win_rate', 0),
+        'total_trades': result.get('total_trades', 0),
+    }
+
+
 def demo_backtest():
     """示例: 演示增强版回测引擎的功能"""
     print("=" * 70)
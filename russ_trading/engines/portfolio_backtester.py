@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+组合级多资产回测引擎
+
+输入价格面板和目标权重面板(日期 × 标的), 按目标权重调仓,
+手续费/滑点/最大仓位取自 BacktestConfig, 权益曲线用矩阵运算一次算出。
+用于在整张持仓表上一次性验证底仓/波段配置规则, 而不必逐个标的单独回测。
+"""
+
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .backtest_engine_enhanced import BacktestConfig
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioBacktester:
+    """组合回测引擎"""
+
+    def __init__(self, config: Optional[BacktestConfig] = None):
+        """
+        初始化组合回测引擎
+
+        Args:
+            config: 回测配置对象
+        """
+        self.config = config or BacktestConfig()
+
+    def run(
+        self,
+        prices: pd.DataFrame,
+        target_weights: pd.DataFrame,
+        rebalance_threshold: float = 0.0
+    ) -> Dict:
+        """
+        运行组合回测
+
+        target_weights 中有值的行即调仓日(按当日收盘价成交), 全为NaN或缺失的日期
+        维持持股数量不变、权重随价格漂移。调仓成本 = 换手金额 × (手续费率 + 滑点)。
+
+        Args:
+            prices: 价格面板 (日期 × 标的)
+            target_weights: 目标权重面板, 行为调仓日, 缺失标的视为0
+            rebalance_threshold: 单边换手率低于该值时跳过调仓(漂移容忍带)
+
+        Returns:
+            回测结果字典
+        """
+        if prices.empty:
+            return {'error': '价格数据为空'}
+
+        symbols = list(prices.columns)
+        index = prices.index
+        price_matrix = prices.ffill().to_numpy(dtype=float)
+        tradable = np.isfinite(price_matrix) & (price_matrix > 0)
+        valuation = np.where(tradable, price_matrix, 0.0)
+
+        weights = target_weights.reindex(columns=symbols).reindex(index)
+        rebalance_rows = np.flatnonzero(weights.notna().any(axis=1).to_numpy())
+        weight_matrix = self._cap_weights(weights.fillna(0.0).to_numpy(dtype=float))
+
+        n_days, n_assets = price_matrix.shape
+        initial = float(self.config.initial_capital)
+        rebalance_holdings = np.zeros((n_days, n_assets))
+        rebalance_cash = np.zeros(n_days)
+        last_rebalance = np.full(n_days, -1)
+        turnover = pd.Series(0.0, index=index)
+        costs = pd.Series(0.0, index=index)
+
+        cost_rate = self.config.commission + self.config.slippage
+        shares = np.zeros(n_assets)
+        cash_now = initial
+        executed = []
+
+        for i in rebalance_rows:
+            value = cash_now + valuation[i] @ shares
+            if value <= 0:
+                logger.warning(f"{index[i]}: 组合净值非正, 停止调仓")
+                break
+
+            # 无有效价格的标的无法建仓, 目标权重置0
+            target = np.where(tradable[i], weight_matrix[i], 0.0)
+            current = valuation[i] * shares / value
+            one_way = np.abs(target - current).sum() / 2
+
+            if executed and one_way < rebalance_threshold:
+                continue
+
+            cost = 2 * one_way * value * cost_rate
+            value_after = value - cost
+            shares = np.divide(target * value_after, price_matrix[i],
+                               out=np.zeros(n_assets), where=tradable[i])
+            cash_now = value_after - valuation[i] @ shares
+
+            rebalance_holdings[i] = shares
+            rebalance_cash[i] = cash_now
+            last_rebalance[i] = i
+            turnover.iloc[i] = one_way
+            costs.iloc[i] = cost
+            executed.append(i)
+
+            logger.debug(f"{index[i]}: 调仓 换手{one_way*100:.1f}% 成本{cost:.2f}")
+
+        # 两次调仓之间持股不变: 每日取最近一次调仓后的持股与现金
+        last_rebalance = np.maximum.accumulate(last_rebalance)
+        held = last_rebalance >= 0
+        source = np.maximum(last_rebalance, 0)
+        holdings = np.where(held[:, None], rebalance_holdings[source], 0.0)
+        cash = np.where(held, rebalance_cash[source], initial)
+
+        # 持仓市值 = 持股矩阵 ⊙ 价格矩阵 按行求和
+        position_values = holdings * valuation
+        equity = pd.Series(cash + position_values.sum(axis=1), index=index)
+        daily_returns = equity.pct_change().fillna(0.0)
+        actual_weights = pd.DataFrame(position_values / equity.to_numpy()[:, None], index=index, columns=symbols)
+
+        return {
+            'equity_curve': equity,
+            'daily_returns': daily_returns,
+            'weights': actual_weights,
+            'turnover': turnover,
+            'costs': costs,
+            'rebalance_dates': list(index[executed]),
+            'rebalance_count': len(executed),
+            **self._calculate_metrics(equity, daily_returns, costs),
+        }
+
+    def _cap_weights(self, weights: np.ndarray) -> np.ndarray:
+        """按最大仓位(或杠杆上限)等比例压缩目标权重, 负权重视为0"""
+        weights = np.clip(weights, 0.0, None)
+        limit = self.config.max_leverage if self.config.enable_leverage else self.config.max_position
+        totals = weights.sum(axis=1, keepdims=True)
+        scale = np.where(totals > limit, limit / np.where(totals > 0, totals, 1.0), 1.0)
+        return weights * scale
+
+    def _calculate_metrics(self, equity: pd.Series, daily_returns: pd.Series, costs: pd.Series) -> Dict:
+        """计算组合绩效指标"""
+        initial = self.config.initial_capital
+        final_value = float(equity.iloc[-1])
+        total_return = (final_value - initial) / initial
+        years = len(equity) / 252
+        annual_return = (final_value / initial) ** (1 / years) - 1 if years > 0 and final_value > 0 else 0.0
+
+        std = daily_returns.std()
+        sharpe = (daily_returns.mean() * 252 - self.config.risk_free_rate) / (std * np.sqrt(252)) if std > 0 else 0.0
+        max_drawdown = float((1 - equity / equity.cummax()).max())
+
+        return {
+            'initial_capital': initial,
+            'final_value': final_value,
+            'total_return': total_return,
+            'annual_return': annual_return,
+            'sharpe_ratio': float(sharpe),
+            'max_drawdown': max_drawdown,
+            'total_costs': float(costs.sum()),
+        }
+
+    @staticmethod
+    def build_base_swing_weights(
+        swing_signals: pd.DataFrame,
+        base_weights: Dict[str, float],
+        swing_weights: Dict[str, float]
+    ) -> pd.DataFrame:
+        """
+        由底仓/波段配置生成目标权重面板
+
+        目标权重 = 底仓权重 + 波段权重 × 波段信号(1持有/0空仓),
+        仅在信号发生变化的日期生成调仓行。
+
+        Args:
+            swing_signals: 波段持有信号面板 (日期 × 标的, 取值0/1)
+            base_weights: 各标的底仓权重 {'标的': 0.2}
+            swing_weights: 各标的波段仓权重 {'标的': 0.1}
+
+        Returns:
+            目标权重面板 (非调仓日为NaN)
+        """
+        symbols = list(swing_signals.columns)
+        base = pd.Series(base_weights).reindex(symbols).fillna(0.0)
+        swing = pd.Series(swing_weights).reindex(symbols).fillna(0.0)
+
+        signals = swing_signals.fillna(0).astype(float)
+        weights = signals.mul(swing, axis=1).add(base, axis=1)
+
+        changed = signals.diff().abs().sum(axis=1) > 0
+        changed.iloc[0] = True
+        return weights.where(changed, np.nan)
@@ -22,6 +22,10 @@ Daily Position Report Generator (Enhanced Edition)
     # 自动更新持仓数据
     python scripts/russ_trading_strategy/daily_position_report_generator.py --auto-update
 
+    # 录制上游数据 / 离线回放
+    python scripts/russ_trading_strategy/daily_position_report_generator.py --record data/fixtures/upstream/20251021
+    python scripts/russ_trading_strategy/daily_position_report_generator.py --replay data/fixtures/upstream/20251021
+
 作者: Claude Code
 日期: 2025-10-21
 """
@@ -43,6 +47,7 @@ from russ_trading.trackers.position_health_checker import PositionHealthChecker
 from russ_trading.trackers.performance_tracker import PerformanceTracker
 from russ_trading.analyzers.potential_analyzer import PotentialAnalyzer
 from russ_trading.analyzers.market_depth_analyzer import MarketDepthAnalyzer
+from src.utils.upstream_replay import activate_from_args, add_replay_arguments
 
 # 导入机构级核心指标分析器 (Phase 3.3)
 try:
@@ -60,11 +65,17 @@ try:
     from russ_trading.managers.dynamic_position_manager import DynamicPositionManager
     from russ_trading.managers.data_manager import DataManager
     from russ_trading.analyzers.technical_analyzer import TechnicalAnalyzer
+    from strategies.trading.signal_generators.indicator_panel import panel_key
     HAS_ENHANCED_MODULES = True
 except ImportError:
     HAS_ENHANCED_MODULES = False
     logging.warning("增强模块未找到，将使用基础功能")
 
+
+def technical_panel_key(idx_key: str) -> str:
+    """技术信号指数的共享指标面板键 (市场概览与技术形态两处使用同一份K线, 指标只算一次)"""
+    return panel_key('HK' if idx_key == 'HSTECH' else 'CN', idx_key)
+
 # 导入配置加载器
 try:
     from russ_trading.config.investment_config import get_investment_config
@@ -1793,7 +1804,9 @@ class DailyPositionReportGenerator:
                 for idx_key, idx_name in [('HS300', '沪深300'), ('CYBZ', '创业板'), ('KC50', '科创50'), ('HSTECH', '恒科')]:
                     if idx_key in technical_data:
                         df = technical_data[idx_key]
-                        analysis = self.technical_analyzer.analyze_index(idx_name, df)
+                        analysis = self.technical_analyzer.analyze_index(
+                            idx_name, df, panel_key=technical_panel_key(idx_key)
+                        )
 
                         if analysis.get('has_data'):
                             # 提取MACD和RSI
@@ -2098,7 +2111,9 @@ class DailyPositionReportGenerator:
                 for idx_name, idx_key in [('沪深300', 'HS300'), ('创业板指', 'CYBZ'), ('科创50', 'KC50'), ('恒生科技', 'HSTECH')]:
                     if idx_key in technical_data:
                         df = technical_data[idx_key]
-                        analysis = self.technical_analyzer.analyze_index(idx_name, df)
+                        analysis = self.technical_analyzer.analyze_index(
+                            idx_name, df, panel_key=technical_panel_key(idx_key)
+                        )
 
                         if analysis.get('has_data'):
                             lines.append(f"**{idx_name}**:")
@@ -3046,6 +3061,7 @@ def main():
         action='store_true',
         help='显示详细日志'
     )
+    add_replay_arguments(parser)
 
     args = parser.parse_args()
 
@@ -3053,6 +3069,9 @@ def main():
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    # 录制/回放须在创建分析器之前启用
+    recorder = activate_from_args(args)
+
     try:
         print("=" * 80)
         print("📊 每日持仓调整建议报告生成器(增强版)")
@@ -3095,6 +3114,8 @@ def main():
         print("=" * 80)
         print(f"✅ 报告生成成功!")
         print(f"📄 保存位置: {filepath}")
+        if recorder:
+            print(f"🎞️ 上游调用统计: {recorder.get_stats()}")
         print("=" * 80)
 
     except Exception as e:
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+盘前缓存预热
+Pre-market Cache Warm-up
+
+在生成报告前把统一资产(UNIFIED_ASSETS)和持仓标的需要的上游数据并发拉取到共享缓存:
+- 日线: 指数/商品/加密货币(综合分析器), 板块ETF/个股(板块分析器), 持仓中未覆盖的标的
+- 估值: 沪深300/创业板指 PE/PB历史, 股债收益比所需的国债收益率与股息率表
+- 融资融券/市场宽度: 沪深两市融资融券余额, A股新高新低统计
+- 宏观: 美债收益率曲线, 美元指数
+
+每项先检查缓存, 仍在有效期内的跳过; 需要刷新的项按上游主机限流(令牌桶+并发上限)。
+--force 时先删除各项的缓存键再获取, 确保真正向上游重新请求
+(本地日线仓库中的历史K线不删除, 仍只增量拉取缺失的交易日)。
+数据写入各自的磁盘缓存命名空间, 之后运行 run_unified_analysis 时直接命中缓存,
+报告生成只剩本地计算。
+
+运行方式:
+  python russ_trading/runners/cache_warmup.py
+  python russ_trading/runners/cache_warmup.py --assets CYBZ HS300 --no-positions
+  python russ_trading/runners/cache_warmup.py --positions data/positions_20251118.json --force
+  python russ_trading/runners/run_unified_analysis.py --warmup
+"""
+
+import sys
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from russ_trading.config.unified_config import UNIFIED_ASSETS
+from src.data_sources.batch_downloader import get_rate_limiter
+from src.utils.cache_service import get_namespace
+
+logger = logging.getLogger(__name__)
+
+# 各上游主机同时进行的请求上限 (速率由 batch_downloader 的令牌桶控制)
+HOST_CONCURRENCY = {
+    'akshare': 2,
+    'ashare': 4,
+    'yfinance': 4,
+}
+DEFAULT_HOST_CONCURRENCY = 2
+
+# 数据源每次请求前已自行获取令牌的主机, 预热只限制并发, 不再重复取令牌
+SELF_LIMITED_HOSTS = {'yfinance'}
+
+# 估值分析覆盖的指数 (与 asset_reporter._analyze_valuation / 机构级核心指标一致)
+VALUATION_INDEX_CODES = ['000300', '399006']
+
+# 宏观分析使用的回溯天数和美债期限 (与 asset_reporter._analyze_macro_environment 一致)
+MACRO_LOOKBACK_DAYS = 252
+TREASURY_PERIODS = ['5Y', '10Y', '30Y']
+
+GROUP_NAMES = {
+    'bars': '日线',
+    'valuation': '估值',
+    'margin': '融资融券',
+    'breadth': '市场宽度',
+    'macro': '宏观',
+}
+
+
+@dataclass
+class WarmupTask:
+    """一项预热任务"""
+    name: str                           # 显示名称
+    group: str                          # 数据类别 (见 GROUP_NAMES)
+    fetch: Callable[[], Any]            # 通过带缓存的正常代码路径获取数据
+    is_cached: Callable[[], bool]       # 缓存中是否已有未过期的数据
+    host: Optional[str] = None          # 上游主机, 用于限流; None表示数据源内部已限流
+    invalidate: Optional[Callable[[], None]] = None  # 删除该项的缓存键 (--force 时在获取前调用)
+
+
+@dataclass
+class WarmupResult:
+    """单项预热结果"""
+    name: str
+    group: str
+    status: str                         # fresh(缓存有效) / refreshed(已刷新) / failed
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class WarmupReport:
+    """预热汇总"""
+    results: List[WarmupResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def by_status(self, status: str) -> List[WarmupResult]:
+        return [r for r in self.results if r.status == status]
+
+    @property
+    def stale(self) -> List[WarmupResult]:
+        """预热前已过期或缺失的项 (含刷新失败的)"""
+        return [r for r in self.results if r.status != 'fresh']
+
+    @property
+    def failed(self) -> List[WarmupResult]:
+        return self.by_status('failed')
+
+    def format_summary(self) -> str:
+        """文本汇总"""
+        refreshed = self.by_status('refreshed')
+        lines = [
+            f"缓存预热完成: 共 {len(self.results)} 项, 已是最新 {len(self.by_status('fresh'))} 项, "
+            f"刷新 {len(refreshed)} 项, 失败 {len(self.failed)} 项, 耗时 {self.elapsed:.1f}s"
+        ]
+        if refreshed:
+            lines.append("已过期并刷新:")
+            for r in sorted(refreshed, key=lambda r: -r.seconds):
+                lines.append(f"  [{GROUP_NAMES.get(r.group, r.group)}] {r.name} ({r.seconds:.1f}s)")
+        if self.failed:
+            lines.append("刷新失败 (报告运行时将重新请求):")
+            for r in self.failed:
+                lines.append(f"  [{GROUP_NAMES.get(r.group, r.group)}] {r.name}: {r.error}")
+        return '\n'.join(lines)
+
+
+def _is_empty(result: Any) -> bool:
+    """获取结果是否视为无数据"""
+    if result is None:
+        return True
+    if isinstance(result, pd.DataFrame):
+        return result.empty
+    if isinstance(result, dict):
+        return 'error' in result
+    return False
+
+
+def _namespace_probe(namespace: str, *keys: str) -> Callable[[], bool]:
+    """检查命名空间中的键是否都已缓存"""
+    def probe() -> bool:
+        ns = get_namespace(namespace)
+        return all(ns.get(key) is not None for key in keys)
+    return probe
+
+
+def _namespace_invalidate(namespace: str, *keys: str) -> Callable[[], None]:
+    """删除命名空间中的键 (与 _namespace_probe 对应)"""
+    def invalidate() -> None:
+        ns = get_namespace(namespace)
+        for key in keys:
+            ns.delete(key)
+    return invalidate
+
+
+def _infer_position_market(code: str) -> str:
+    """按代码格式推断持仓标的市场"""
+    if code.upper().endswith('.HK'):
+        return 'HK'
+    if code.isdigit() and len(code) == 6:
+        return 'CN'
+    return 'US'
+
+
+class CacheWarmer:
+    """按资产列表和持仓构建预热任务, 并发执行并汇总缓存状态"""
+
+    def __init__(self, max_workers: int = 8, force: bool = False):
+        """
+        初始化
+
+        Args:
+            max_workers: 最大并发线程数
+            force: 忽略缓存状态, 全部重新拉取
+        """
+        self.max_workers = max_workers
+        self.force = force
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._semaphores_lock = threading.Lock()
+        self._comprehensive_reporter = None
+        self._sector_reporter = None
+
+    # ------------------------------------------------------------------
+    # 分析器 (按需创建, 与报告运行时使用同一缓存路径)
+    # ------------------------------------------------------------------
+
+    @property
+    def comprehensive_reporter(self):
+        if self._comprehensive_reporter is None:
+            from scripts.analysis.comprehensive_asset_analysis.asset_reporter import ComprehensiveAssetReporter
+            self._comprehensive_reporter = ComprehensiveAssetReporter()
+        return self._comprehensive_reporter
+
+    @property
+    def sector_reporter(self):
+        if self._sector_reporter is None:
+            from scripts.analysis.sector_analysis.sector_reporter import SectorReporter
+            self._sector_reporter = SectorReporter()
+        return self._sector_reporter
+
+    # ------------------------------------------------------------------
+    # 任务构建
+    # ------------------------------------------------------------------
+
+    def build_tasks(
+        self,
+        asset_keys: Optional[List[str]] = None,
+        positions: Optional[List[Dict]] = None
+    ) -> List[WarmupTask]:
+        """
+        构建预热任务
+
+        Args:
+            asset_keys: 资产代码列表, None表示全部 UNIFIED_ASSETS
+            positions: 持仓列表 (含 asset_key / asset_code)
+
+        Returns:
+            任务列表
+        """
+        if asset_keys is None:
+            asset_keys = list(UNIFIED_ASSETS.keys())
+        asset_keys = [key for key in asset_keys if key in UNIFIED_ASSETS]
+
+        extra_codes = []
+        for position in positions or []:
+            asset_key = position.get('asset_key')
+            if asset_key in UNIFIED_ASSETS:
+                if asset_key not in asset_keys:
+                    asset_keys.append(asset_key)
+            elif position.get('asset_code'):
+                extra_codes.append(str(position['asset_code']))
+
+        tasks = []
+        sector_symbols = set()
+        for asset_key in asset_keys:
+            config = UNIFIED_ASSETS[asset_key]
+            if config['analyzer_type'] == 'comprehensive':
+                tasks.append(self._comprehensive_bars_task(config))
+            else:
+                sector_tasks, symbol = self._sector_bars_task(asset_key)
+                tasks.extend(sector_tasks)
+                sector_symbols.add(symbol)
+
+        for code in dict.fromkeys(extra_codes):
+            if code not in sector_symbols:
+                tasks.append(self._position_bars_task(code))
+
+        tasks.extend(self._valuation_tasks())
+        tasks.extend(self._market_stats_tasks())
+        tasks.extend(self._macro_tasks())
+        return tasks
+
+    def _comprehensive_bars_task(self, config: Dict) -> WarmupTask:
+        market, code, asset_type = config['market'], config['code'], config['type']
+        reporter = self.comprehensive_reporter
+        return WarmupTask(
+            name=f"{config['name']} ({code})",
+            group='bars',
+            fetch=lambda: reporter.fetch_asset_data(market, code, asset_type, period='5y'),
+            is_cached=lambda: reporter.is_asset_data_cached(market, code, period='5y'),
+            invalidate=lambda: reporter.invalidate_asset_data(market, code, period='5y'),
+            # A股指数走Ashare, 港美股/商品/加密货币走USStockDataSource(内部已限流)
+            host='ashare' if market == 'CN' and asset_type == 'index' else None
+        )
+
+    def _sector_bars_task(self, sector_key: str) -> Tuple[List[WarmupTask], str]:
+        from scripts.analysis.sector_analysis.sector_config import get_sector_config
+
+        config = get_sector_config(sector_key)
+        reporter = self.sector_reporter
+        symbol, prefer_source = reporter.resolve_data_source(config)
+        market = config['market']
+        manager = reporter.data_source_manager
+
+        # 历史点位/技术面使用5年数据, 成交量/支撑压力位使用1年数据
+        tasks = [
+            WarmupTask(
+                name=f"{config['name']} ({symbol}, {period})",
+                group='bars',
+                fetch=lambda period=period: reporter.get_etf_data(symbol, period, market, prefer_source),
+                is_cached=lambda period=period: manager.is_cached(symbol, period, market),
+                invalidate=lambda period=period: manager.invalidate(symbol, period, market),
+                host=prefer_source or 'yfinance'
+            )
+            for period in ('5y', '1y')
+        ]
+        return tasks, symbol
+
+    def _position_bars_task(self, code: str) -> WarmupTask:
+        market = _infer_position_market(code)
+        prefer_source = 'ashare' if market == 'CN' else None
+        reporter = self.sector_reporter
+        return WarmupTask(
+            name=f"持仓 {code}",
+            group='bars',
+            fetch=lambda: reporter.get_etf_data(code, '5y', market, prefer_source),
+            is_cached=lambda: reporter.data_source_manager.is_cached(code, '5y', market),
+            invalidate=lambda: reporter.data_source_manager.invalidate(code, '5y', market),
+            host=prefer_source or 'yfinance'
+        )
+
+    def _valuation_tasks(self) -> List[WarmupTask]:
+        from strategies.position.analyzers.valuation.index_valuation_analyzer import IndexValuationAnalyzer
+
+        analyzer = IndexValuationAnalyzer(lookback_days=2520)
+        tasks = [
+            WarmupTask(
+                name=f"{analyzer.INDEX_MAP.get(code, code)} PE/PB",
+                group='valuation',
+                fetch=lambda code=code: analyzer.get_index_pe_pb_data(code),
+                is_cached=_namespace_probe('valuation', f'pe_pb_{code}'),
+                invalidate=_namespace_invalidate('valuation', f'pe_pb_{code}'),
+                host='akshare'
+            )
+            for code in VALUATION_INDEX_CODES
+        ]
+        tasks.append(WarmupTask(
+            name='股债收益比 (国债收益率/指数股息率)',
+            group='valuation',
+            fetch=lambda: analyzer.calculate_equity_risk_premium('000300'),
+            is_cached=_namespace_probe('valuation', 'bond_zh_us_rate', 'index_stock_info'),
+            host='akshare',
+            invalidate=_namespace_invalidate('valuation', 'bond_zh_us_rate', 'index_stock_info')
+        ))
+        return tasks
+
+    def _market_stats_tasks(self) -> List[WarmupTask]:
+        from strategies.position.analyzers.market_specific.margin_trading_analyzer import MarginTradingAnalyzer
+        from strategies.position.analyzers.market_structure.market_breadth_analyzer import MarketBreadthAnalyzer
+
+        margin = MarginTradingAnalyzer()
+        breadth = MarketBreadthAnalyzer()
+        return [
+            WarmupTask(name, group, fetch, _namespace_probe('market_stats', key), host='akshare',
+                       invalidate=_namespace_invalidate('market_stats', key))
+            for name, group, fetch, key in (
+                ('上交所融资融券', 'margin', margin.get_margin_data_sse, 'margin_sh'),
+                ('深交所融资融券', 'margin', margin.get_margin_data_szse, 'margin_sz'),
+                ('A股新高新低', 'breadth', breadth.get_high_low_data, 'high_low'),
+            )
+        ]
+
+    def _macro_tasks(self) -> List[WarmupTask]:
+        from strategies.position.analyzers.macro.treasury_yield_analyzer import TreasuryYieldAnalyzer
+        from strategies.position.analyzers.macro.dxy_analyzer import DXYAnalyzer
+
+        treasury = TreasuryYieldAnalyzer(lookback_days=MACRO_LOOKBACK_DAYS)
+        dxy = DXYAnalyzer(lookback_days=MACRO_LOOKBACK_DAYS)
+        tasks = [
+            WarmupTask(
+                name=f"{period}美债收益率",
+                group='macro',
+                fetch=lambda period=period: treasury.get_treasury_yield(period),
+                is_cached=_namespace_probe('us_macro', f'treasury_{period}_{MACRO_LOOKBACK_DAYS}'),
+                host='yfinance',
+                invalidate=_namespace_invalidate('us_macro', f'treasury_{period}_{MACRO_LOOKBACK_DAYS}')
+            )
+            for period in TREASURY_PERIODS
+        ]
+        tasks.append(WarmupTask(
+            name='美元指数',
+            group='macro',
+            fetch=dxy.get_dxy_data,
+            is_cached=_namespace_probe('us_macro', f'dxy_{MACRO_LOOKBACK_DAYS}'),
+            host='yfinance',
+            invalidate=_namespace_invalidate('us_macro', f'dxy_{MACRO_LOOKBACK_DAYS}')
+        ))
+        return tasks
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+
+    def _host_semaphore(self, host: str) -> threading.Semaphore:
+        with self._semaphores_lock:
+            if host not in self._semaphores:
+                limit = HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY)
+                self._semaphores[host] = threading.Semaphore(limit)
+            return self._semaphores[host]
+
+    def _run_task(self, task: WarmupTask) -> WarmupResult:
+        try:
+            if not self.force and task.is_cached():
+                return WarmupResult(task.name, task.group, 'fresh')
+        except Exception as e:
+            logger.debug(f"检查缓存失败 {task.name}: {e}")
+
+        start = time.perf_counter()
+        try:
+            if self.force and task.invalidate:
+                task.invalidate()
+            if task.host:
+                with self._host_semaphore(task.host):
+                    if task.host not in SELF_LIMITED_HOSTS:
+                        get_rate_limiter(task.host).acquire()
+                    result = task.fetch()
+            else:
+                result = task.fetch()
+        except Exception as e:
+            return WarmupResult(task.name, task.group, 'failed', time.perf_counter() - start, str(e))
+
+        seconds = time.perf_counter() - start
+        if _is_empty(result):
+            error = result.get('error') if isinstance(result, dict) else '无数据'
+            return WarmupResult(task.name, task.group, 'failed', seconds, error)
+        logger.info(f"✓ {task.name} 已刷新 ({seconds:.1f}s)")
+        return WarmupResult(task.name, task.group, 'refreshed', seconds)
+
+    def run(self, tasks: List[WarmupTask]) -> WarmupReport:
+        """
+        并发执行预热任务
+
+        Args:
+            tasks: 任务列表
+
+        Returns:
+            WarmupReport
+        """
+        start = time.perf_counter()
+        report = WarmupReport()
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+                report.results = list(executor.map(self._run_task, tasks))
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def warmup(
+        self,
+        asset_keys: Optional[List[str]] = None,
+        positions: Optional[List[Dict]] = None
+    ) -> WarmupReport:
+        """构建并执行预热任务"""
+        tasks = self.build_tasks(asset_keys, positions)
+        logger.info(f"开始缓存预热: {len(tasks)} 项")
+        return self.run(tasks)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='盘前缓存预热 (统一资产 + 持仓标的)')
+    parser.add_argument('--assets', nargs='+', help='指定资产代码, 不指定则预热所有资产')
+    parser.add_argument('--positions', type=str, help='持仓文件路径, 默认使用环境变量或 data/ 下最新持仓文件')
+    parser.add_argument('--no-positions', action='store_true', help='不预热持仓标的')
+    parser.add_argument('--workers', type=int, default=8, help='最大并发线程数')
+    parser.add_argument('--force', action='store_true', help='忽略缓存状态, 全部重新拉取')
+    parser.add_argument('--verbose', action='store_true', help='显示详细日志')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    positions = None
+    if not args.no_positions:
+        from russ_trading.runners.run_unified_analysis import load_positions
+        positions = load_positions(args.positions)
+
+    report = CacheWarmer(max_workers=args.workers, force=args.force).warmup(args.assets, positions)
+    print(report.format_summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -13,19 +13,24 @@ Unified Asset Analysis Runner
   python scripts/unified_analysis/run_unified_analysis.py --save reports/unified_report.md
   python scripts/unified_analysis/run_unified_analysis.py --format markdown
   python scripts/unified_analysis/run_unified_analysis.py --list
+  python scripts/unified_analysis/run_unified_analysis.py --warmup
+  python scripts/unified_analysis/run_unified_analysis.py --record data/fixtures/upstream/20251114
+  python scripts/unified_analysis/run_unified_analysis.py --replay data/fixtures/upstream/20251114
 
 作者: Claude Code
 日期: 2025-10-16
 """
 
 import sys
+import os
+import glob
 import argparse
 import logging
 import json
 from pathlib import Path
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent.parent
@@ -42,6 +47,7 @@ from scripts.analysis.sector_analysis.sector_reporter import SectorReporter
 from russ_trading.notifiers.unified_email_notifier import UnifiedEmailNotifier
 from russ_trading.core.investment_advisor import InvestmentAdvisor
 from russ_trading.generators.daily_position_report_generator import DailyPositionReportGenerator
+from src.utils.upstream_replay import activate_from_args, add_replay_arguments
 
 # 导入机构级核心指标分析器 (Phase 3.3)
 try:
@@ -1516,6 +1522,64 @@ class UnifiedAnalysisRunner:
         return '\n'.join(lines)
 
 
+def _convert_positions(positions_raw: list) -> List[Dict]:
+    """转换字段名: position_ratio -> position_pct"""
+    return [
+        {
+            'asset_name': p.get('asset_name'),
+            'asset_code': p.get('asset_code'),
+            'asset_key': p.get('asset_key'),
+            'position_pct': p.get('position_ratio', 0),
+            'current_value': p.get('current_value', 0)
+        }
+        for p in positions_raw
+    ]
+
+
+def load_positions(positions_file: Optional[str] = None) -> Optional[List[Dict]]:
+    """
+    读取持仓数据 (优先级: 指定文件 > 环境变量 POSITIONS_DATA > data/ 下最新的 positions_*.json)
+
+    Args:
+        positions_file: 持仓文件路径, None时按环境变量/最新文件查找
+
+    Returns:
+        持仓列表, 未找到或解析失败时返回None
+    """
+    # 优先读取环境变量 POSITIONS_DATA (用于GitHub workflow)
+    env_positions = None if positions_file else os.getenv('POSITIONS_DATA')
+    if env_positions:
+        try:
+            positions = _convert_positions(json.loads(env_positions))
+            logger.info(f"✅ 成功读取 {len(positions)} 个持仓 (来源: 环境变量 POSITIONS_DATA)")
+            return positions
+        except Exception as e:
+            logger.warning(f"解析环境变量 POSITIONS_DATA 失败: {e}, 降级到本地文件")
+
+    if positions_file:
+        latest_position_file = positions_file
+    else:
+        # 按修改时间排序而非字典序, 使用最新的持仓文件
+        positions_dir = project_root / 'data'
+        position_files = sorted(
+            glob.glob(str(positions_dir / 'positions_*.json')),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        if not position_files:
+            return None
+        latest_position_file = position_files[0]
+
+    try:
+        with open(latest_position_file, 'r', encoding='utf-8') as f:
+            positions = _convert_positions(json.load(f))
+        logger.info(f"成功读取 {len(positions)} 个持仓 (来源: {Path(latest_position_file).name})")
+        return positions
+    except Exception as e:
+        logger.warning(f"读取持仓数据失败: {e}")
+        return None
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(
@@ -1553,6 +1617,12 @@ def main():
         action='store_true',
         help='发送邮件到配置的收件人列表'
     )
+    parser.add_argument(
+        '--warmup',
+        action='store_true',
+        help='分析前先并发预热缓存(统一资产+持仓标的), 并输出过期数据汇总'
+    )
+    add_replay_arguments(parser)
 
     args = parser.parse_args()
 
@@ -1560,6 +1630,9 @@ def main():
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    # 录制/回放须在创建分析器之前启用
+    recorder = activate_from_args(args)
+
     # 列出所有资产
     if args.list:
         print("=" * 80)
@@ -1592,72 +1665,20 @@ def main():
 
         print("=" * 80)
 
+        # 读取持仓数据
+        positions = load_positions()
+
+        # 缓存预热: 先按主机限流并发拉取全部上游数据, 分析阶段只剩本地计算
+        if args.warmup:
+            from russ_trading.runners.cache_warmup import CacheWarmer
+            warmup_report = CacheWarmer().warmup(asset_keys, positions)
+            print(warmup_report.format_summary())
+            print("=" * 80)
+
         # 执行分析
         runner = UnifiedAnalysisRunner()
         results = runner.analyze_assets(asset_keys)
 
-        # 读取持仓数据 (优先级: 环境变量 > 本地最新文件 > 示例文件)
-        positions = None
-        positions_dir = Path(__file__).parent.parent.parent / 'data'
-
-        # 优先读取环境变量 POSITIONS_DATA (用于GitHub workflow)
-        import os
-        import glob
-
-        env_positions = os.getenv('POSITIONS_DATA')
-        if env_positions:
-            try:
-                positions_raw = json.loads(env_positions)
-                logger.info("✅ 从环境变量 POSITIONS_DATA 读取持仓数据")
-
-                # 转换字段名: position_ratio -> position_pct
-                positions = []
-                for p in positions_raw:
-                    position_data = {
-                        'asset_name': p.get('asset_name'),
-                        'asset_code': p.get('asset_code'),
-                        'asset_key': p.get('asset_key'),
-                        'position_pct': p.get('position_ratio', 0),  # 转换字段名
-                        'current_value': p.get('current_value', 0)
-                    }
-                    positions.append(position_data)
-
-                logger.info(f"成功读取 {len(positions)} 个持仓 (来源: 环境变量)")
-            except Exception as e:
-                logger.warning(f"解析环境变量 POSITIONS_DATA 失败: {e}, 降级到本地文件")
-
-        # 如果环境变量未配置,读取本地文件
-        if positions is None:
-            # 🔧 修复: 按修改时间排序而非字典序
-            position_files = sorted(
-                glob.glob(str(positions_dir / 'positions_*.json')),
-                key=os.path.getmtime,  # 按修改时间排序
-                reverse=True  # 最新的在前
-            )
-
-            if position_files:
-                # 使用最新的持仓文件
-                latest_position_file = position_files[0]
-                try:
-                    with open(latest_position_file, 'r', encoding='utf-8') as f:
-                        positions_raw = json.load(f)
-
-                    # 转换字段名: position_ratio -> position_pct
-                    positions = []
-                    for p in positions_raw:
-                        position_data = {
-                            'asset_name': p.get('asset_name'),
-                            'asset_code': p.get('asset_code'),
-                            'asset_key': p.get('asset_key'),
-                            'position_pct': p.get('position_ratio', 0),  # 转换字段名
-                            'current_value': p.get('current_value', 0)
-                        }
-                        positions.append(position_data)
-
-                    logger.info(f"成功读取 {len(positions)} 个持仓 (来源: {Path(latest_position_file).name})")
-                except Exception as e:
-                    logger.warning(f"读取持仓数据失败: {e}")
-
         # 格式化报告 (传入持仓数据)
         if positions:
             logger.info(f"✅ 将使用持仓数据生成报告, 共 {len(positions)} 个持仓")
@@ -1707,6 +1728,8 @@ def main():
                 sys.exit(1)
 
         logger.info("✅ 分析任务完成")
+        if recorder:
+            logger.info(f"上游调用统计: {recorder.get_stats()}")
 
     except Exception as e:
         logger.error(f"执行失败: {str(e)}", exc_info=True)
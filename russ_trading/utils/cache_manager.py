@@ -6,40 +6,38 @@ Cache Manager
 
 提供数据缓存功能,减少重复计算和数据获取
 支持内存缓存和可选的Redis缓存
+存储由共享缓存服务(src.utils.cache_service)的 'simple' 命名空间提供
 """
 
-import json
-import pickle
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Optional, Callable
 from functools import wraps
-import hashlib
+
+from src.utils.cache_service import NO_EXPIRY, CacheService, get_cache_service
+from src.utils.memory_cache import DEFAULT_MAX_BYTES
+
+# 命名空间名称
+CACHE_NAMESPACE = 'simple'
 
 
 class SimpleCache:
     """简单内存缓存 (不依赖Redis)"""
 
-    def __init__(self, cache_dir: Path = None):
+    def __init__(self, cache_dir: Path = None, memory_max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
         """
         初始化缓存
 
         Args:
-            cache_dir: 缓存目录,如果为None则使用项目cache目录
+            cache_dir: 缓存目录,如果为None则使用进程共享的缓存服务
+            memory_max_bytes: 内存缓存字节预算,None表示不限(仅指定cache_dir时生效)
         """
         if cache_dir is None:
-            cache_dir = Path(__file__).parent.parent.parent.parent / 'cache'
-        self.cache_dir = cache_dir
-        self.cache_dir.mkdir(exist_ok=True, parents=True)
-
-        # 内存缓存
-        self._memory_cache = {}
-
-    def _get_cache_path(self, key: str) -> Path:
-        """获取缓存文件路径"""
-        # 使用MD5避免文件名过长
-        key_hash = hashlib.md5(key.encode()).hexdigest()
-        return self.cache_dir / f"{key_hash}.cache"
+            service = get_cache_service()
+        else:
+            service = CacheService(cache_dir=cache_dir, memory_max_bytes=memory_max_bytes)
+        self._ns = service.namespace(CACHE_NAMESPACE)
+        self.cache_dir = self._ns.directory
 
     def get(self, key: str, use_memory: bool = True) -> Optional[Any]:
         """
@@ -52,43 +50,13 @@ class SimpleCache:
         Returns:
             缓存值,如果不存在或已过期则返回None
         """
-        # 先查内存缓存
-        if use_memory and key in self._memory_cache:
-            data, expire_time = self._memory_cache[key]
-            if expire_time is None or datetime.now() < expire_time:
-                return data
-            else:
-                # 过期则删除
-                del self._memory_cache[key]
-
-        # 查文件缓存
-        cache_path = self._get_cache_path(key)
-        if cache_path.exists():
-            try:
-                with open(cache_path, 'rb') as f:
-                    cached_data = pickle.load(f)
-
-                expire_time = cached_data.get('expire_time')
-                if expire_time is None or datetime.now() < expire_time:
-                    data = cached_data['data']
-                    # 回填内存缓存
-                    if use_memory:
-                        self._memory_cache[key] = (data, expire_time)
-                    return data
-                else:
-                    # 过期删除
-                    cache_path.unlink()
-            except Exception:
-                # 缓存损坏,删除
-                cache_path.unlink()
-
-        return None
+        return self._ns.get(key, memory=use_memory)
 
     def set(
         self,
         key: str,
         value: Any,
-        ttl: int = 86400,
+        ttl: Optional[int] = 86400,
         use_memory: bool = True
     ) -> None:
         """
@@ -100,46 +68,16 @@ class SimpleCache:
             ttl: 过期时间(秒),None表示永不过期
             use_memory: 是否同时缓存到内存
         """
-        expire_time = None if ttl is None else datetime.now() + timedelta(seconds=ttl)
-
-        # 内存缓存
-        if use_memory:
-            self._memory_cache[key] = (value, expire_time)
-
-        # 文件缓存
-        cache_path = self._get_cache_path(key)
-        cached_data = {
-            'data': value,
-            'expire_time': expire_time,
-            'created_at': datetime.now()
-        }
-
-        try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(cached_data, f)
-        except Exception as e:
-            # 缓存失败不影响主流程
-            print(f"Warning: Failed to cache data: {e}")
+        # 缓存失败不影响主流程(文件写入失败由缓存服务记录日志)
+        self._ns.set(key, value, ttl=NO_EXPIRY if ttl is None else ttl, memory=use_memory)
 
     def delete(self, key: str) -> None:
         """删除缓存"""
-        # 删除内存缓存
-        if key in self._memory_cache:
-            del self._memory_cache[key]
-
-        # 删除文件缓存
-        cache_path = self._get_cache_path(key)
-        if cache_path.exists():
-            cache_path.unlink()
+        self._ns.delete(key)
 
     def clear(self) -> None:
         """清空所有缓存"""
-        # 清空内存
-        self._memory_cache.clear()
-
-        # 清空文件
-        for cache_file in self.cache_dir.glob('*.cache'):
-            cache_file.unlink()
+        self._ns.clear()
 
     def cleanup_expired(self) -> int:
         """
@@ -148,34 +86,11 @@ class SimpleCache:
         Returns:
             清理的缓存数量
         """
-        cleaned = 0
-
-        # 清理内存缓存
-        expired_keys = []
-        for key, (data, expire_time) in self._memory_cache.items():
-            if expire_time and datetime.now() >= expire_time:
-                expired_keys.append(key)
-
-        for key in expired_keys:
-            del self._memory_cache[key]
-            cleaned += 1
-
-        # 清理文件缓存
-        for cache_file in self.cache_dir.glob('*.cache'):
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-
-                expire_time = cached_data.get('expire_time')
-                if expire_time and datetime.now() >= expire_time:
-                    cache_file.unlink()
-                    cleaned += 1
-            except Exception:
-                # 损坏的缓存文件也删除
-                cache_file.unlink()
-                cleaned += 1
-
-        return cleaned
+        return self._ns.purge_expired()
+
+    def get_stats(self) -> dict:
+        """获取缓存统计 (内存条目数/字节数/命中等)"""
+        return self._ns.get_stats()
 
 
 # 全局缓存实例
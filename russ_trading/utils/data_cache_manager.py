@@ -5,57 +5,76 @@
 Data Cache Manager
 
 实现三级缓存机制:
-1. 内存缓存 - 单次运行内复用
-2. 文件缓存 - 跨运行复用(当日有效)
+1. 内存缓存 - 进程内复用(与其他模块共享字节预算LRU)
+2. 文件缓存 - 跨运行复用(按TTL失效)
 3. 智能缓存失效 - 自动清理过期数据
 
+存储由共享缓存服务(src.utils.cache_service)的 'data' 命名空间提供,
+本类保留按 cache_type 选择TTL的接口和原有统计字段。
+
 作者: Claude Code
 日期: 2025-11-14
 """
 
-import os
-import pickle
-import hashlib
 import logging
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Optional, Callable, Dict
 import pandas as pd
 
+from src.utils.cache_service import CACHE_FILE_SUFFIX, CacheService, get_cache_service
+from src.utils.memory_cache import DEFAULT_MAX_BYTES
+from src.utils.trading_calendar import get_trading_calendar
+
 logger = logging.getLogger(__name__)
 
+# 命名空间名称
+CACHE_NAMESPACE = 'data'
+
 
 class DataCacheManager:
     """
     数据缓存管理器
 
     特性:
-    - 内存缓存: 进程内数据复用
+    - 内存缓存: 进程内数据复用,按字节预算LRU淘汰
     - 文件缓存: 持久化缓存,跨运行复用
     - 自动过期: 根据数据类型设置不同TTL
     - 线程安全: 支持并发访问
+    - 请求合并: 同一key的并发未命中只执行一次fetcher,其余线程等待结果
     """
 
-    def __init__(self, cache_dir: Optional[Path] = None, enable_file_cache: bool = True):
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        enable_file_cache: bool = True,
+        memory_max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        memory_max_entries: Optional[int] = None,
+        service: Optional[CacheService] = None
+    ):
         """
         初始化缓存管理器
 
         Args:
             cache_dir: 文件缓存目录,默认为项目根目录/data/cache
             enable_file_cache: 是否启用文件缓存
+            memory_max_bytes: 内存缓存字节预算,None表示不限
+            memory_max_entries: 内存缓存条目上限,None表示不限
+            service: 使用已有的缓存服务(如全局共享服务),此时忽略以上存储参数
         """
-        # 内存缓存
-        self._memory_cache: Dict[str, tuple] = {}  # {key: (data, timestamp)}
-
-        # 文件缓存配置
-        self.enable_file_cache = enable_file_cache
-        if cache_dir is None:
-            project_root = Path(__file__).parent.parent.parent
-            cache_dir = project_root / "data" / "cache"
-
-        self.cache_dir = Path(cache_dir)
+        if service is None:
+            service = CacheService(
+                cache_dir=cache_dir,
+                enable_file_cache=enable_file_cache,
+                memory_max_bytes=memory_max_bytes,
+                memory_max_entries=memory_max_entries
+            )
+        self.service = service
+        self._ns = service.namespace(CACHE_NAMESPACE)
+
+        self.enable_file_cache = self._ns.persist
+        self.cache_dir = self._ns.directory
         if self.enable_file_cache:
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
             logger.info(f"文件缓存目录: {self.cache_dir}")
 
         # 默认TTL配置(秒)
@@ -72,7 +91,8 @@ class DataCacheManager:
         fetcher: Callable,
         ttl: Optional[int] = None,
         cache_type: str = 'daily',
-        force_refresh: bool = False
+        force_refresh: bool = False,
+        market: Optional[str] = None
     ) -> Any:
         """
         获取缓存数据或调用fetcher获取新数据
@@ -83,108 +103,46 @@ class DataCacheManager:
             ttl: 缓存有效期(秒),None表示使用默认值
             cache_type: 缓存类型 (intraday/daily/historical/static)
             force_refresh: 强制刷新,忽略缓存
+            market: 数据所属市场(cn/hk/us/crypto),指定且未给出ttl时按交易日历
+                    在下一个收盘后过期,盘中按cache_type的TTL失效
 
         Returns:
             数据对象
         """
-        if force_refresh:
-            data = fetcher()
-            self._set_cache(key, data, ttl or self.default_ttls.get(cache_type, 86400))
-            return data
-
-        # 1. 尝试内存缓存
-        cached_data = self._get_memory_cache(key, ttl or self.default_ttls.get(cache_type, 86400))
-        if cached_data is not None:
-            logger.debug(f"内存缓存命中: {key}")
-            return cached_data
-
-        # 2. 尝试文件缓存
-        if self.enable_file_cache:
-            cached_data = self._get_file_cache(key, ttl or self.default_ttls.get(cache_type, 86400))
-            if cached_data is not None:
-                logger.debug(f"文件缓存命中: {key}")
-                # 回写到内存缓存
-                self._memory_cache[key] = (cached_data, datetime.now())
-                return cached_data
-
-        # 3. 缓存未命中,获取新数据
-        logger.debug(f"缓存未命中,获取数据: {key}")
-        try:
-            data = fetcher()
-            # 保存到缓存
-            self._set_cache(key, data, ttl or self.default_ttls.get(cache_type, 86400))
-            return data
-        except Exception as e:
-            logger.error(f"获取数据失败 {key}: {e}")
-            raise
-
-    def _get_memory_cache(self, key: str, ttl: int) -> Optional[Any]:
-        """从内存缓存获取数据"""
-        if key not in self._memory_cache:
-            return None
-
-        data, timestamp = self._memory_cache[key]
-
-        # 检查是否过期
-        if (datetime.now() - timestamp).total_seconds() > ttl:
-            del self._memory_cache[key]
-            return None
-
-        return data
-
-    def _get_file_cache(self, key: str, ttl: int) -> Optional[Any]:
-        """从文件缓存获取数据"""
-        cache_file = self._get_cache_file_path(key)
-
-        if not cache_file.exists():
-            return None
-
-        # 检查文件修改时间
-        mtime = datetime.fromtimestamp(cache_file.stat().st_mtime)
-        if (datetime.now() - mtime).total_seconds() > ttl:
-            # 过期,删除
-            cache_file.unlink()
-            return None
-
-        # 读取缓存
-        try:
-            with open(cache_file, 'rb') as f:
-                data = pickle.load(f)
-            return data
-        except Exception as e:
-            logger.warning(f"读取文件缓存失败 {key}: {e}")
-            cache_file.unlink()
-            return None
-
-    def _set_cache(self, key: str, data: Any, ttl: int):
-        """保存数据到缓存"""
-        # 1. 保存到内存
-        self._memory_cache[key] = (data, datetime.now())
-
-        # 2. 保存到文件
-        if self.enable_file_cache:
-            try:
-                cache_file = self._get_cache_file_path(key)
-                with open(cache_file, 'wb') as f:
-                    pickle.dump(data, f)
-                logger.debug(f"数据已缓存: {key}")
-            except Exception as e:
-                logger.warning(f"保存文件缓存失败 {key}: {e}")
+        if market is not None and ttl is None:
+            intraday_ttl = self.default_ttls.get(cache_type, 86400)
+            ttl = get_trading_calendar().ttl(market, intraday_ttl=intraday_ttl)
+            # 过期时间已写入条目, 读取时不再按固定时长判断
+            return self._ns.get_or_fetch(key, fetcher, ttl=ttl, force_refresh=force_refresh)
+
+        ttl = ttl or self.default_ttls.get(cache_type, 86400)
+        # 同一键可能以不同cache_type读取, 按读取时的TTL判断是否过期
+        return self._ns.get_or_fetch(key, fetcher, ttl=ttl, max_age=ttl, force_refresh=force_refresh)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        只读缓存, 不调用fetcher
+
+        Args:
+            key: 缓存键
+            default: 未命中或已过期时返回值
+
+        Returns:
+            缓存数据或default
+        """
+        return self._ns.get(key, default=default)
+
+    def delete(self, key: str):
+        """删除缓存条目(内存和文件), 下次读取时重新获取"""
+        self._ns.delete(key)
 
     def _get_cache_file_path(self, key: str) -> Path:
         """生成缓存文件路径"""
-        # 使用日期作为子目录,便于清理
-        today = datetime.now().strftime('%Y%m%d')
-        cache_subdir = self.cache_dir / today
-        cache_subdir.mkdir(parents=True, exist_ok=True)
-
-        # 使用MD5哈希作为文件名(避免特殊字符)
-        hash_key = hashlib.md5(key.encode()).hexdigest()
-        return cache_subdir / f"{hash_key}.pkl"
+        return self._ns.file_path(key)
 
     def clear_memory_cache(self):
         """清空内存缓存"""
-        self._memory_cache.clear()
+        self._ns.clear(files=False)
         logger.info("内存缓存已清空")
 
     def clear_file_cache(self, days_to_keep: int = 1):
@@ -197,38 +155,52 @@ class DataCacheManager:
         if not self.enable_file_cache:
             return
 
-        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+        deleted_count = self._ns.remove_files_older_than(days_to_keep * 86400)
 
-        deleted_count = 0
-        for date_dir in self.cache_dir.iterdir():
-            if not date_dir.is_dir():
+        # 旧版缓存布局(根目录下按哈希前两位或日期分目录)已不再读取, 直接删除
+        root = self.service.cache_dir
+        for legacy_dir in root.iterdir():
+            if not legacy_dir.is_dir():
                 continue
-
-            try:
-                dir_date = datetime.strptime(date_dir.name, '%Y%m%d')
-                if dir_date < cutoff_date:
-                    # 删除整个目录
-                    for cache_file in date_dir.glob('*.pkl'):
-                        cache_file.unlink()
-                        deleted_count += 1
-                    date_dir.rmdir()
-            except ValueError:
-                # 忽略非日期格式的目录
-                pass
+            if len(legacy_dir.name) == 2:
+                pattern = f'*{CACHE_FILE_SUFFIX}'
+            elif len(legacy_dir.name) == 8 and legacy_dir.name.isdigit():
+                pattern = '*.pkl'
+            else:
+                continue
+            for cache_file in legacy_dir.glob(pattern):
+                cache_file.unlink()
+                deleted_count += 1
+            if not any(legacy_dir.iterdir()):
+                legacy_dir.rmdir()
 
         logger.info(f"清理过期文件缓存: 删除 {deleted_count} 个文件")
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
+        ns_stats = self._ns.get_stats()
+        memory_stats = self.service.memory.get_stats()
         stats = {
-            'memory_cache_size': len(self._memory_cache),
-            'memory_cache_keys': list(self._memory_cache.keys())
+            'memory_cache_size': ns_stats['memory_entries'],
+            'memory_cache_keys': self._ns.memory_keys(),
+            'memory_cache_bytes': ns_stats['memory_bytes'],
+            'memory_cache_max_bytes': memory_stats['max_bytes'],
+            'memory_misses': memory_stats['misses'],
+            'memory_evictions': memory_stats['evictions'],
+            'memory_expirations': memory_stats['expirations'],
+            'memory_rejections': memory_stats['rejections'],
+            'memory_hit_rate': memory_stats['hit_rate'],
+            'memory_hits': ns_stats['memory_hits'],
+            'file_hits': ns_stats['file_hits'],
+            'fetch_calls': ns_stats['fetch_calls'],
+            'coalesced_calls': ns_stats['coalesced_calls'],
+            'inflight_calls': ns_stats['inflight_calls'],
         }
 
         if self.enable_file_cache and self.cache_dir.exists():
             total_files = 0
             total_size = 0
-            for cache_file in self.cache_dir.rglob('*.pkl'):
+            for cache_file in self.cache_dir.glob(f'*/*{CACHE_FILE_SUFFIX}'):
                 total_files += 1
                 total_size += cache_file.stat().st_size
 
@@ -244,7 +216,8 @@ _global_cache_manager: Optional[DataCacheManager] = None
 
 def get_cache_manager(
     cache_dir: Optional[Path] = None,
-    enable_file_cache: bool = True
+    enable_file_cache: bool = True,
+    memory_max_bytes: Optional[int] = DEFAULT_MAX_BYTES
 ) -> DataCacheManager:
     """
     获取全局缓存管理器单例
@@ -252,6 +225,7 @@ def get_cache_manager(
     Args:
         cache_dir: 缓存目录
         enable_file_cache: 是否启用文件缓存
+        memory_max_bytes: 内存缓存字节预算(仅首次创建时生效)
 
     Returns:
         DataCacheManager实例
@@ -259,10 +233,15 @@ def get_cache_manager(
     global _global_cache_manager
 
     if _global_cache_manager is None:
-        _global_cache_manager = DataCacheManager(
-            cache_dir=cache_dir,
-            enable_file_cache=enable_file_cache
-        )
+        if cache_dir is None and enable_file_cache and memory_max_bytes == DEFAULT_MAX_BYTES:
+            # 默认配置直接挂在进程共享的缓存服务上
+            _global_cache_manager = DataCacheManager(service=get_cache_service())
+        else:
+            _global_cache_manager = DataCacheManager(
+                cache_dir=cache_dir,
+                enable_file_cache=enable_file_cache,
+                memory_max_bytes=memory_max_bytes
+            )
 
     return _global_cache_manager
 
@@ -44,6 +44,7 @@ from strategies.position.analyzers.technical_analysis.divergence_analyzer import
 from strategies.position.analyzers.market_specific.cn_stock_indicators import CNStockIndicators
 from strategies.position.analyzers.market_specific.hk_connect_analyzer import HKConnectAnalyzer
 from src.data_sources.us_stock_source import USStockDataSource
+from strategies.trading.signal_generators.indicator_panel import get_indicator_panel, panel_key
 
 # 新增的分析器(维度8-11)
 from strategies.position.analyzers.technical_analysis.volume_analyzer import VolumeAnalyzer
@@ -180,7 +181,7 @@ class ComprehensiveAssetReporter:
 
         logger.info("综合资产分析系统初始化完成")
 
-    def _fetch_asset_data(self, market: str, code: str, asset_type: str, period: str = '5y') -> pd.DataFrame:
+    def fetch_asset_data(self, market: str, code: str, asset_type: str, period: str = '5y') -> pd.DataFrame:
         """
         统一数据获取方法(带缓存)
 
@@ -193,7 +194,7 @@ class ComprehensiveAssetReporter:
         Returns:
             DataFrame
         """
-        cache_key = f"asset_data_{market}_{code}_{period}"
+        cache_key = self._asset_cache_key(market, code, period)
 
         def fetcher():
             """实际数据获取逻辑"""
@@ -208,13 +209,35 @@ class ComprehensiveAssetReporter:
             else:
                 raise ValueError(f"不支持的市场: {market}")
 
-        # 使用缓存获取数据
+        # 使用缓存获取数据(按所属市场交易日历在下一个收盘后过期)
         return self.cache_manager.get_or_fetch(
             key=cache_key,
             fetcher=fetcher,
-            cache_type='daily'  # 日线数据缓存24小时
+            cache_type='daily',
+            market=self._calendar_market(market, asset_type)
         )
 
+    @staticmethod
+    def _asset_cache_key(market: str, code: str, period: str) -> str:
+        return f"asset_data_{market}_{code}_{period}"
+
+    @staticmethod
+    def _calendar_market(market: str, asset_type: str) -> str:
+        """资产所属的交易日历市场 (黄金按美股, 比特币7x24)"""
+        if asset_type == 'crypto':
+            return 'crypto'
+        if asset_type == 'commodity':
+            return 'us'
+        return market.lower()
+
+    def is_asset_data_cached(self, market: str, code: str, period: str = '5y') -> bool:
+        """资产日线是否已在缓存中且未过期 (不触发获取)"""
+        return self.cache_manager.get(self._asset_cache_key(market, code, period)) is not None
+
+    def invalidate_asset_data(self, market: str, code: str, period: str = '5y'):
+        """删除资产日线缓存, 下次获取时重新请求上游"""
+        self.cache_manager.delete(self._asset_cache_key(market, code, period))
+
     def analyze_single_asset(self, asset_key: str) -> Dict:
         """
         综合分析单个资产(优化版:一次性获取数据,所有分析共享)
@@ -242,7 +265,7 @@ class ComprehensiveAssetReporter:
             logger.debug(f"获取 {config['name']} 的数据...")
 
             # 获取5年数据(用于历史点位和技术分析)
-            df_5y = self._fetch_asset_data(
+            df_5y = self.fetch_asset_data(
                 config['market'], config['code'], config['type'], period='5y'
             )
 
@@ -362,7 +385,7 @@ class ComprehensiveAssetReporter:
                 if asset_type in ['commodity', 'crypto']:
                     df = self.us_source.get_us_index_daily(code, period='5y')
                 else:
-                    df = self._fetch_asset_data(market, code, asset_type, period='5y')
+                    df = self.fetch_asset_data(market, code, asset_type, period='5y')
 
             # 使用传入的或获取的DataFrame进行分析
             if asset_type in ['commodity', 'crypto']:
@@ -486,7 +509,7 @@ class ComprehensiveAssetReporter:
                 if asset_type in ['commodity', 'crypto']:
                     df = self.us_source.get_us_index_daily(code, period='5y')
                 else:
-                    df = self._fetch_asset_data(market, code, asset_type, period='5y')
+                    df = self.fetch_asset_data(market, code, asset_type, period='5y')
 
             # 获取symbol
             if asset_type in ['commodity', 'crypto']:
@@ -507,45 +530,32 @@ class ComprehensiveAssetReporter:
             # 提取关键技术指标
             latest = df.iloc[-1]
 
-            # 计算MACD
-            exp1 = df['close'].ewm(span=12, adjust=False).mean()
-            exp2 = df['close'].ewm(span=26, adjust=False).mean()
-            macd = exp1 - exp2
-            signal = macd.ewm(span=9, adjust=False).mean()
-
-            # 计算RSI
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-
-            # 计算均线
-            ma5 = df['close'].rolling(window=5).mean()
-            ma20 = df['close'].rolling(window=20).mean()
-            ma60 = df['close'].rolling(window=60).mean()
-
-            # 计算KDJ
-            low_9 = df['low'].rolling(window=9).min()
-            high_9 = df['high'].rolling(window=9).max()
-            rsv = (df['close'] - low_9) / (high_9 - low_9) * 100
-            kdj_k = rsv.ewm(span=3, adjust=False).mean()
-            kdj_d = kdj_k.ewm(span=3, adjust=False).mean()
-            kdj_j = 3 * kdj_k - 2 * kdj_d
-
-            # 计算布林带
-            boll_mid = df['close'].rolling(window=20).mean()
-            boll_std = df['close'].rolling(window=20).std()
-            boll_upper = boll_mid + (boll_std * 2)
-            boll_lower = boll_mid - (boll_std * 2)
+            # 常规指标取自该标的的共享指标面板(同一K线只计算一次)
+            panel = get_indicator_panel(panel_key(market, code), df)
+
+            # MACD
+            macd_frame = panel.series('macd')
+            macd, signal = macd_frame['macd'], macd_frame['macd_signal']
+
+            # RSI
+            rsi = panel.series('rsi', period=14)['rsi']
+
+            # 均线
+            ma5 = panel.series('ma', period=5)['ma5']
+            ma20 = panel.series('ma', period=20)['ma20']
+            ma60 = panel.series('ma', period=60)['ma60']
+
+            # KDJ
+            kdj = panel.series('kdj', n=9, m1=3, m2=3)
+            kdj_k, kdj_d, kdj_j = kdj['kdj_k'], kdj['kdj_d'], kdj['kdj_j']
+
+            # 布林带
+            boll = panel.series('boll', period=20, num_std=2)
+            boll_mid, boll_upper, boll_lower = boll['boll_mid'], boll['boll_upper'], boll['boll_lower']
             boll_position = (df['close'] - boll_lower) / (boll_upper - boll_lower)
 
-            # 计算ATR
-            high_low = df['high'] - df['low']
-            high_close = abs(df['high'] - df['close'].shift(1))
-            low_close = abs(df['low'] - df['close'].shift(1))
-            true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-            atr = true_range.rolling(window=14).mean()
+            # ATR
+            atr = panel.series('atr', period=14)['atr']
 
             # 计算DMI/ADX
             high_diff = df['high'].diff()
@@ -555,7 +565,7 @@ class ComprehensiveAssetReporter:
 
             plus_dm_smooth = plus_dm.rolling(window=14).mean()
             minus_dm_smooth = minus_dm.rolling(window=14).mean()
-            atr_smooth = true_range.rolling(window=14).mean()
+            atr_smooth = atr
 
             plus_di = 100 * plus_dm_smooth / atr_smooth
             minus_di = 100 * minus_dm_smooth / atr_smooth
@@ -617,7 +627,7 @@ class ComprehensiveAssetReporter:
         try:
             # 如果没有传入DataFrame,则获取数据(向后兼容)
             if df is None:
-                df = self._fetch_asset_data(market, code, asset_type, period='1y')
+                df = self.fetch_asset_data(market, code, asset_type, period='1y')
 
             if df.empty:
                 return {'error': '数据获取失败'}
@@ -665,7 +675,7 @@ class ComprehensiveAssetReporter:
         try:
             # 如果没有传入DataFrame,则获取数据(向后兼容)
             if df is None:
-                df = self._fetch_asset_data(market, code, asset_type, period='1y')
+                df = self.fetch_asset_data(market, code, asset_type, period='1y')
 
             # 获取symbol用于分析
             if asset_type in ['commodity', 'crypto']:
@@ -709,133 +719,157 @@ class ComprehensiveAssetReporter:
     def _analyze_market_breadth(self) -> Dict:
         """市场宽度分析(维度10,仅A股)"""
         try:
-            # 调用时需要传入metrics参数
-            breadth_result = self.market_breadth_analyzer.analyze_market_strength(metrics=['new_high_low'])
-
-            if 'error' in breadth_result:
-                return breadth_result
-
-            # 提取关键数据
-            return {
-                'new_high_low': breadth_result.get('new_high_low', {}),
-                'strength_score': breadth_result.get('strength_score', 0),
-                'interpretation': breadth_result.get('interpretation', ''),
-                'signal': breadth_result.get('signal', {})
-            }
+            # 全市场数据,并发线程共享同一次获取
+            return self.cache_manager.get_or_fetch(
+                key='market_breadth_new_high_low',
+                fetcher=self._fetch_market_breadth,
+                cache_type='intraday'
+            )
 
         except Exception as e:
             logger.error(f"市场宽度分析失败: {str(e)}")
             return {'error': str(e)}
 
+    def _fetch_market_breadth(self) -> Dict:
+        # 调用时需要传入metrics参数
+        breadth_result = self.market_breadth_analyzer.analyze_market_strength(metrics=['new_high_low'])
+
+        if 'error' in breadth_result:
+            raise RuntimeError(breadth_result['error'])
+
+        # 提取关键数据
+        return {
+            'new_high_low': breadth_result.get('new_high_low', {}),
+            'strength_score': breadth_result.get('strength_score', 0),
+            'interpretation': breadth_result.get('interpretation', ''),
+            'signal': breadth_result.get('signal', {})
+        }
+
     def _analyze_panic_index(self, index_type: str, config: Dict) -> Dict:
         """恐慌指数分析(维度11)"""
+        # VIX为全局数据;VHSI失败时回退到按资产计算的HKVI,CNVI按资产计算
+        cache_key = 'panic_index_VIX' if index_type == 'VIX' else f"panic_index_{index_type}_{config['code']}"
         try:
-            if index_type == 'VIX':
-                # 美股VIX
-                vix_result = self.vix_analyzer.analyze_vix(period='1y')
-                if 'error' in vix_result:
-                    return vix_result
+            return self.cache_manager.get_or_fetch(
+                key=cache_key,
+                fetcher=lambda: self._fetch_panic_index(index_type, config),
+                cache_type='intraday'
+            )
+        except Exception as e:
+            logger.error(f"恐慌指数分析失败: {str(e)}")
+            return {'error': str(e)}
 
-                return {
-                    'type': 'VIX',
-                    'current_state': vix_result.get('current_state', {}),
-                    'percentile': vix_result.get('percentile', {}),
-                    'signal': vix_result.get('signal', {}),
-                    'correlation': vix_result.get('correlation', {})
-                }
+    def _fetch_panic_index(self, index_type: str, config: Dict) -> Dict:
+        if index_type == 'VIX':
+            # 美股VIX
+            vix_result = self.vix_analyzer.analyze_vix(period='1y')
+            if 'error' in vix_result:
+                raise RuntimeError(vix_result['error'])
 
-            elif index_type == 'VHSI':
-                # 港股VHSI,失败时自动切换到HKVI
-                vhsi_result = self.vhsi_analyzer.analyze_vhsi(period='1y')
+            return {
+                'type': 'VIX',
+                'current_state': vix_result.get('current_state', {}),
+                'percentile': vix_result.get('percentile', {}),
+                'signal': vix_result.get('signal', {}),
+                'correlation': vix_result.get('correlation', {})
+            }
 
-                if 'error' in vhsi_result:
-                    logger.warning(f"VHSI数据获取失败,使用港股自定义波动率指数HKVI: {vhsi_result['error']}")
-                    # 切换到HKVI
-                    df = self.hk_analyzer.get_index_data(config['code'], period="1y")
-                    if df.empty:
-                        return {'error': 'VHSI和HKVI数据都无法获取'}
+        elif index_type == 'VHSI':
+            # 港股VHSI,失败时自动切换到HKVI
+            vhsi_result = self.vhsi_analyzer.analyze_vhsi(period='1y')
 
-                    hkvi_result = self.hk_volatility_analyzer.calculate_hkvi(df)
-                    if 'error' in hkvi_result:
-                        return hkvi_result
+            if 'error' in vhsi_result:
+                logger.warning(f"VHSI数据获取失败,使用港股自定义波动率指数HKVI: {vhsi_result['error']}")
+                # 切换到HKVI
+                df = self.hk_analyzer.get_index_data(config['code'], period="1y")
+                if df.empty:
+                    raise RuntimeError('VHSI和HKVI数据都无法获取')
 
-                    return {
-                        'type': 'HKVI',
-                        'index_value': hkvi_result['hkvi_value'],
-                        'status': hkvi_result['status'],
-                        'level': hkvi_result['level'],
-                        'emoji': hkvi_result['emoji'],
-                        'signal': hkvi_result['signal'],
-                        'percentile': hkvi_result.get('percentile', {}),
-                        'note': '港股自定义波动率指数(VHSI数据不可用)'
-                    }
+                hkvi_result = self.hk_volatility_analyzer.calculate_hkvi(df)
+                if 'error' in hkvi_result:
+                    raise RuntimeError(hkvi_result['error'])
 
                 return {
-                    'type': 'VHSI',
-                    'current_vhsi': vhsi_result.get('current_vhsi', 0),
-                    'panic_level': vhsi_result.get('panic_level', ''),
-                    'percentile': vhsi_result.get('vhsi_percentile', 0),
-                    'trend': vhsi_result.get('trend', ''),
-                    'signal': vhsi_result.get('signal', ''),
-                    'trading_advice': vhsi_result.get('trading_advice', ''),
-                    'risk_alert': vhsi_result.get('risk_alert', None)
+                    'type': 'HKVI',
+                    'index_value': hkvi_result['hkvi_value'],
+                    'status': hkvi_result['status'],
+                    'level': hkvi_result['level'],
+                    'emoji': hkvi_result['emoji'],
+                    'signal': hkvi_result['signal'],
+                    'percentile': hkvi_result.get('percentile', {}),
+                    'note': '港股自定义波动率指数(VHSI数据不可用)'
                 }
 
-            elif index_type == 'CNVI':
-                # A股自定义波动率指数
-                df = self.cn_analyzer.get_index_data(config['code'], period="1y")
-                if df.empty:
-                    return {'error': 'A股数据获取失败'}
+            return {
+                'type': 'VHSI',
+                'current_vhsi': vhsi_result.get('current_vhsi', 0),
+                'panic_level': vhsi_result.get('panic_level', ''),
+                'percentile': vhsi_result.get('vhsi_percentile', 0),
+                'trend': vhsi_result.get('trend', ''),
+                'signal': vhsi_result.get('signal', ''),
+                'trading_advice': vhsi_result.get('trading_advice', ''),
+                'risk_alert': vhsi_result.get('risk_alert', None)
+            }
 
-                cnvi_result = self.cn_volatility_analyzer.calculate_cnvi(df)
-                if 'error' in cnvi_result:
-                    return cnvi_result
+        elif index_type == 'CNVI':
+            # A股自定义波动率指数
+            df = self.cn_analyzer.get_index_data(config['code'], period="1y")
+            if df.empty:
+                raise RuntimeError('A股数据获取失败')
 
-                return {
-                    'type': 'CNVI',
-                    'index_value': cnvi_result['cnvi_value'],
-                    'status': cnvi_result['status'],
-                    'level': cnvi_result['level'],
-                    'emoji': cnvi_result['emoji'],
-                    'signal': cnvi_result['signal'],
-                    'percentile': cnvi_result.get('percentile', {}),
-                    'note': 'A股自定义波动率指数'
-                }
+            cnvi_result = self.cn_volatility_analyzer.calculate_cnvi(df)
+            if 'error' in cnvi_result:
+                raise RuntimeError(cnvi_result['error'])
 
-            else:
-                return {'error': f'未知恐慌指数类型: {index_type}'}
+            return {
+                'type': 'CNVI',
+                'index_value': cnvi_result['cnvi_value'],
+                'status': cnvi_result['status'],
+                'level': cnvi_result['level'],
+                'emoji': cnvi_result['emoji'],
+                'signal': cnvi_result['signal'],
+                'percentile': cnvi_result.get('percentile', {}),
+                'note': 'A股自定义波动率指数'
+            }
 
-        except Exception as e:
-            logger.error(f"恐慌指数分析失败: {str(e)}")
-            return {'error': str(e)}
+        else:
+            raise ValueError(f'未知恐慌指数类型: {index_type}')
 
     def _analyze_market_sentiment(self) -> Dict:
         """综合市场情绪指数分析(维度11,所有资产)"""
         try:
-            # 调用MarketSentimentIndex计算综合情绪
-            sentiment_result = self.sentiment_analyzer.calculate_comprehensive_sentiment()
-
-            if 'error' in sentiment_result:
-                return sentiment_result
-
-            # 提取关键数据
-            return {
-                'sentiment_score': sentiment_result.get('sentiment_score', 50),
-                'rating': sentiment_result.get('rating', '中性'),
-                'emoji': sentiment_result.get('emoji', '😐'),
-                'suggestion': sentiment_result.get('suggestion', ''),
-                'components': {
-                    'vix_score': sentiment_result.get('components', {}).get('vix_sentiment', {}).get('score', 50),
-                    'vix_level': sentiment_result.get('components', {}).get('vix_sentiment', {}).get('level', ''),
-                    'momentum_score': sentiment_result.get('components', {}).get('nasdaq_momentum', {}).get('score', 50),
-                    'volume_score': sentiment_result.get('components', {}).get('nasdaq_volume', {}).get('score', 50)
-                }
-            }
+            # 全局数据,并发线程共享同一次获取
+            return self.cache_manager.get_or_fetch(
+                key='market_sentiment',
+                fetcher=self._fetch_market_sentiment,
+                cache_type='intraday'
+            )
 
         except Exception as e:
             logger.error(f"综合市场情绪分析失败: {str(e)}")
             return {'error': str(e)}
 
+    def _fetch_market_sentiment(self) -> Dict:
+        # 调用MarketSentimentIndex计算综合情绪
+        sentiment_result = self.sentiment_analyzer.calculate_comprehensive_sentiment()
+
+        if 'error' in sentiment_result:
+            raise RuntimeError(sentiment_result['error'])
+
+        # 提取关键数据
+        return {
+            'sentiment_score': sentiment_result.get('sentiment_score', 50),
+            'rating': sentiment_result.get('rating', '中性'),
+            'emoji': sentiment_result.get('emoji', '😐'),
+            'suggestion': sentiment_result.get('suggestion', ''),
+            'components': {
+                'vix_score': sentiment_result.get('components', {}).get('vix_sentiment', {}).get('score', 50),
+                'vix_level': sentiment_result.get('components', {}).get('vix_sentiment', {}).get('level', ''),
+                'momentum_score': sentiment_result.get('components', {}).get('nasdaq_momentum', {}).get('score', 50),
+                'volume_score': sentiment_result.get('components', {}).get('nasdaq_volume', {}).get('score', 50)
+            }
+        }
+
     def _analyze_capital_flow(self, market: str, code: str) -> Dict:
         """资金面分析(维度3)"""
         try:
@@ -2681,7 +2715,7 @@ class ComprehensiveAssetReporter:
         try:
             # 如果没有传入DataFrame,则获取数据(向后兼容)
             if df is None:
-                df = self._fetch_asset_data(market, code, asset_type, period='1y')
+                df = self.fetch_asset_data(market, code, asset_type, period='1y')
 
             # 获取基准数据
             if market == 'CN':
@@ -2729,7 +2763,7 @@ class ComprehensiveAssetReporter:
         try:
             # 如果没有传入DataFrame,则获取数据(向后兼容)
             if df is None:
-                df = self._fetch_asset_data(market, code, asset_type, period='120d')
+                df = self.fetch_asset_data(market, code, asset_type, period='120d')
 
             if df.empty:
                 return {'error': '数据获取失败'}
@@ -2756,7 +2790,7 @@ class ComprehensiveAssetReporter:
         try:
             # 如果没有传入DataFrame,则获取数据(向后兼容)
             if df is None:
-                df = self._fetch_asset_data(market, code, asset_type, period='120d')
+                df = self.fetch_asset_data(market, code, asset_type, period='120d')
 
             if df.empty:
                 return {'error': '数据获取失败'}
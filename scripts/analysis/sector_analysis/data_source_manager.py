@@ -16,24 +16,138 @@ Data Source Manager with Auto Fallback
 """
 
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, Optional, List
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
+from src.data_sources.batch_downloader import get_rate_limiter
+from src.utils.cache_service import CacheNamespace, CacheService
+
 logger = logging.getLogger(__name__)
 
 
+class SourceHealth:
+    """
+    单个数据源的健康统计 + 熔断器
+
+    - 记录最近N次请求的耗时与成败
+    - 连续失败达到阈值后熔断(open), 冷却期内不再尝试;
+      冷却期结束后恢复放行(half-open), 成功则关闭熔断, 再失败一次即重新熔断
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        default_latency: float = 3.0
+    ):
+        """
+        Args:
+            window: 统计窗口(最近请求数)
+            failure_threshold: 触发熔断的连续失败次数
+            cooldown: 熔断冷却时间(秒)
+            default_latency: 无样本时假定的延迟(秒)
+        """
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.default_latency = default_latency
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.total_requests = 0
+        self.total_failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, success: bool):
+        """记录一次请求结果"""
+        with self._lock:
+            self.total_requests += 1
+            self.outcomes.append(success)
+            if success:
+                self.latencies.append(latency)
+                self.consecutive_failures = 0
+                self.open_until = 0.0
+            else:
+                self.total_failures += 1
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= self.failure_threshold:
+                    self.open_until = time.monotonic() + self.cooldown
+
+    @property
+    def is_open(self) -> bool:
+        """是否处于熔断冷却期"""
+        return self.open_until > 0.0 and time.monotonic() < self.open_until
+
+    @property
+    def error_rate(self) -> float:
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def latency_percentile(self, q: float, min_samples: int = 5) -> float:
+        """成功请求耗时的分位数(样本不足时返回默认延迟)"""
+        if len(self.latencies) < min_samples:
+            return self.default_latency
+        return float(np.percentile(list(self.latencies), q))
+
+    def score(self) -> float:
+        """健康评分(越小越好): 中位延迟按错误率加罚"""
+        return self.latency_percentile(50) * (1 + 4 * self.error_rate)
+
+    def to_dict(self) -> Dict:
+        return {
+            'state': 'open' if self.is_open else ('half_open' if self.open_until else 'closed'),
+            'requests': self.total_requests,
+            'failures': self.total_failures,
+            'error_rate': round(self.error_rate, 3),
+            'p50_latency': round(self.latency_percentile(50), 3),
+            'p90_latency': round(self.latency_percentile(90), 3),
+            'consecutive_failures': self.consecutive_failures,
+        }
+
+
 class DataSourceManager:
-    """多数据源管理器 - 自动故障切换"""
+    """
+    多数据源管理器 - 自动故障切换
+
+    内部持有请求线程池, 用完后调用 close() (或使用 with 语句) 释放线程;
+    实例被回收时也会关闭线程池。
+    """
+
+    # 对冲请求延迟下限(秒), 避免样本很快时频繁发出多余请求
+    MIN_HEDGE_DELAY = 0.2
+
+    def __init__(self, hedge: bool = False, max_workers: int = 4, cache: Optional[CacheNamespace] = None):
+        """
+        初始化数据源管理器
 
-    def __init__(self):
-        """初始化数据源管理器"""
-        self.cache = {}  # 数据缓存
+        Args:
+            hedge: 是否启用对冲请求(当前数据源超过其p90延迟仍未返回时并发请求下一个数据源)
+            max_workers: 数据源请求线程数
+            cache: 数据缓存命名空间(如共享的 'sector_bars'), None时使用实例私有的内存缓存
+        """
+        if cache is None:
+            cache = CacheService(enable_file_cache=False).namespace('sector_bars')
+        self.cache = cache  # 数据缓存, 按所属市场交易日历在下一个收盘后过期
         self.source_status = {}  # 数据源状态跟踪
+        self.hedge = hedge
+        self.source_health: Dict[str, SourceHealth] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='datasource')
 
         # 尝试加载各个数据源
         self._init_data_sources()
 
+        self._fetchers = {
+            'ashare': self._fetch_ashare,
+            'yfinance': self._fetch_yfinance,
+            'akshare': self._fetch_akshare,
+        }
+
     def _init_data_sources(self):
         """初始化各数据源"""
         # 1. Ashare数据源
@@ -93,60 +207,146 @@ class DataSourceManager:
         symbol: str,
         period: str = "5y",
         market: str = "CN",
-        prefer_source: str = None
+        prefer_source: str = None,
+        hedge: Optional[bool] = None
     ) -> pd.DataFrame:
         """
         获取股票数据 - 支持多数据源自动切换
 
+        数据源按市场默认优先级和近期健康度(延迟/错误率)排序, 熔断中的数据源跳过。
+        启用对冲时, 若当前数据源超过其p90延迟仍未返回, 则并发请求下一个数据源,
+        取最先返回且通过 _validate_data 的结果。
+
         Args:
             symbol: 股票代码
             period: 时间周期 (5y/3y/1y/6mo/3mo/1mo)
             market: 市场 (CN/HK/US)
             prefer_source: 优先使用的数据源 (ashare/yfinance/akshare)
+            hedge: 是否启用对冲请求, 默认使用初始化参数
 
         Returns:
             DataFrame with columns: open, high, low, close, volume, return
         """
-        cache_key = f"{symbol}_{period}_{market}"
+        cache_key = self._cache_key(symbol, period, market)
 
         # 检查缓存
-        if cache_key in self.cache:
+        cached = self.cache.get(cache_key)
+        if cached is not None:
             logger.debug(f"使用缓存: {cache_key}")
-            return self.cache[cache_key]
+            return cached
 
         # 确定数据源优先级
         source_priority = self._get_source_priority(market, prefer_source)
+        use_hedge = self.hedge if hedge is None else hedge
 
-        # 依次尝试各数据源
-        for source in source_priority:
-            try:
-                logger.info(f"尝试数据源: {source} (symbol={symbol}, period={period}, market={market})")
-
-                if source == 'ashare':
-                    df = self._fetch_ashare(symbol, period, market)
-                elif source == 'yfinance':
-                    df = self._fetch_yfinance(symbol, period, market)
-                elif source == 'akshare':
-                    df = self._fetch_akshare(symbol, period, market)
-                else:
-                    continue
-
-                # 验证数据
-                if self._validate_data(df):
-                    logger.info(f"✓ 数据获取成功: {source} (共{len(df)}条记录)")
-                    self.cache[cache_key] = df
-                    return df
-                else:
-                    logger.warning(f"✗ 数据验证失败: {source}")
-
-            except Exception as e:
-                logger.warning(f"✗ {source}数据源失败: {str(e)}")
-                continue
+        df = self._fetch_with_fallback(source_priority, symbol, period, market, use_hedge)
+        if df is not None:
+            self.cache.set(cache_key, df, market=market.lower())
+            return df
 
         # 所有数据源都失败
         logger.error(f"所有数据源均失败: {symbol}")
         return pd.DataFrame()
 
+    @staticmethod
+    def _cache_key(symbol: str, period: str, market: str) -> str:
+        return f"{symbol}_{period}_{market}"
+
+    def is_cached(self, symbol: str, period: str = "5y", market: str = "CN") -> bool:
+        """数据是否已在缓存中且未过期"""
+        return self.cache.get(self._cache_key(symbol, period, market)) is not None
+
+    def invalidate(self, symbol: str, period: str = "5y", market: str = "CN"):
+        """删除缓存中的数据, 下次获取时重新请求数据源"""
+        self.cache.delete(self._cache_key(symbol, period, market))
+
+    def _fetch_with_fallback(
+        self,
+        sources: List[str],
+        symbol: str,
+        period: str,
+        market: str,
+        hedge: bool
+    ) -> Optional[pd.DataFrame]:
+        """
+        依次(或对冲)请求各数据源, 返回第一个有效结果
+
+        未启用对冲时, 前一个数据源失败后才请求下一个;
+        启用对冲时, 前一个数据源超过p90延迟未返回即提前请求下一个。
+        落后返回的请求结果仍计入健康统计。
+        """
+        candidates = [s for s in sources if not self._get_health(s).is_open]
+        if not candidates:
+            # 全部熔断时仍按健康度尝试, 避免直接返回空数据
+            logger.warning("所有数据源均处于熔断状态, 仍尝试请求")
+            candidates = list(sources)
+
+        pending = {}
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            source = candidates[next_index]
+            next_index += 1
+            logger.info(f"尝试数据源: {source} (symbol={symbol}, period={period}, market={market})")
+            future = self._executor.submit(self._timed_fetch, source, symbol, period, market)
+            pending[future] = source
+            return source
+
+        current = launch()
+        while pending:
+            has_next = next_index < len(candidates)
+            timeout = None
+            if hedge and has_next:
+                timeout = max(self._get_health(current).latency_percentile(90), self.MIN_HEDGE_DELAY)
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # 当前数据源超过p90延迟仍未返回, 对冲请求下一个数据源
+                logger.info(f"{current} 超过{timeout:.2f}秒未返回, 对冲请求下一个数据源")
+                current = launch()
+                continue
+
+            for future in done:
+                source = pending.pop(future)
+                df = future.result()
+                if df is not None:
+                    logger.info(f"✓ 数据获取成功: {source} (共{len(df)}条记录)")
+                    return df
+
+            # 已返回的全部失败, 且没有进行中的请求时切换到下一个数据源
+            if not pending and next_index < len(candidates):
+                current = launch()
+
+        return None
+
+    def _timed_fetch(self, source: str, symbol: str, period: str, market: str) -> Optional[pd.DataFrame]:
+        """请求单个数据源并记录耗时/成败, 失败或验证不通过返回None"""
+        health = self._get_health(source)
+        start = time.perf_counter()
+        try:
+            df = self._fetchers[source](symbol, period, market)
+        except Exception as e:
+            health.record(time.perf_counter() - start, success=False)
+            logger.warning(f"✗ {source}数据源失败: {str(e)}")
+            return None
+
+        # 验证数据
+        valid = self._validate_data(df)
+        health.record(time.perf_counter() - start, success=valid)
+        if not valid:
+            logger.warning(f"✗ 数据验证失败: {source}")
+            return None
+        return df
+
+    def _get_health(self, source: str) -> SourceHealth:
+        """获取数据源健康统计(懒加载)"""
+        health = self.source_health.get(source)
+        if health is None:
+            health = self.source_health.setdefault(source, SourceHealth())
+        return health
+
     def _get_source_priority(self, market: str, prefer_source: str = None) -> List[str]:
         """
         确定数据源优先级
@@ -155,8 +355,11 @@ class DataSourceManager:
           - A股(CN): ashare > akshare > yfinance
           - 港股(HK): yfinance > akshare > ashare
           - 美股(US): yfinance > finnhub > akshare
+
+        指定的优先数据源始终置顶; 其余数据源在默认顺序基础上按健康评分重排,
+        熔断中的数据源排在最后。
         """
-        if prefer_source and self.source_status.get(prefer_source):
+        if prefer_source and self.source_status.get(prefer_source) and prefer_source in self._fetchers:
             # 如果指定了优先数据源，将其置顶
             priority = [prefer_source]
         else:
@@ -172,12 +375,16 @@ class DataSourceManager:
         else:
             default_priority = ['yfinance', 'akshare', 'ashare']
 
-        # 合并优先级，去重
-        for source in default_priority:
-            if source not in priority and self.source_status.get(source):
-                priority.append(source)
+        # 合并优先级，去重(仅保留已实现获取方法的数据源)
+        rest = [
+            source for source in default_priority
+            if source not in priority and self.source_status.get(source) and source in self._fetchers
+        ]
+
+        # 稳定排序: 评分相同时保持默认顺序
+        rest.sort(key=lambda source: (self._get_health(source).is_open, self._get_health(source).score()))
 
-        return priority
+        return priority + rest
 
     def _fetch_ashare(self, symbol: str, period: str, market: str) -> pd.DataFrame:
         """使用Ashare获取数据"""
@@ -217,7 +424,8 @@ class DataSourceManager:
         # 转换股票代码格式
         yf_symbol = self._convert_symbol_to_yfinance(symbol, market)
 
-        # 获取数据
+        # 获取数据 (与 USStockDataSource 共用yfinance令牌桶)
+        get_rate_limiter('yfinance').acquire()
         ticker = self.yfinance.Ticker(yf_symbol)
         df = ticker.history(period=period)
 
@@ -359,11 +567,35 @@ class DataSourceManager:
         """获取所有数据源状态"""
         return self.source_status.copy()
 
+    def get_source_health(self) -> Dict[str, Dict]:
+        """获取各数据源健康统计(延迟分位数/错误率/熔断状态)"""
+        return {source: health.to_dict() for source, health in self.source_health.items()}
+
     def clear_cache(self):
         """清空缓存"""
         self.cache.clear()
         logger.info("数据缓存已清空")
 
+    def close(self, wait: bool = False):
+        """
+        关闭请求线程池
+
+        Args:
+            wait: 是否等待进行中的请求(含落后返回的对冲请求)结束
+        """
+        executor = getattr(self, '_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
 
 if __name__ == '__main__':
     """测试代码"""
@@ -25,7 +25,7 @@ Sector Comprehensive Reporter
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 import pandas as pd
 import numpy as np
@@ -36,6 +36,7 @@ sys.path.insert(0, str(project_root))
 
 from scripts.analysis.sector_analysis.sector_config import get_sector_config, list_all_sectors
 from scripts.analysis.sector_analysis.data_source_manager import DataSourceManager
+from src.utils.cache_service import get_namespace
 from strategies.position.market_analyzers.cn_market_analyzer import CNMarketAnalyzer
 from strategies.position.analyzers.technical_analysis.divergence_analyzer import DivergenceAnalyzer
 from strategies.position.analyzers.market_specific.cn_stock_indicators import CNStockIndicators
@@ -59,8 +60,8 @@ class SectorReporter:
         """初始化分析器"""
         logger.info("初始化板块分析系统...")
 
-        # 多数据源管理器 (替代原有的单一Ashare数据源)
-        self.data_source_manager = DataSourceManager()
+        # 多数据源管理器 (替代原有的单一Ashare数据源), 日线缓存在共享命名空间中跨运行复用
+        self.data_source_manager = DataSourceManager(hedge=True, cache=get_namespace('sector_bars'))
         logger.info(f"数据源管理器初始化完成: {self.data_source_manager.get_source_status()}")
 
         # 市场分析器
@@ -110,13 +111,7 @@ class SectorReporter:
 
         try:
             # 获取板块数据(目前仅支持单个ETF，后续可扩展为多个股票组合)
-            primary_symbol = config['symbols'][0]
-            prefer_source = config.get('data_source', None)  # None表示自动选择，或指定'yfinance'等
-
-            # 智能数据源选择：A股标的强制用ashare（yfinance不支持A股ETF和个股）
-            if prefer_source is None and config['market'] == 'CN':
-                prefer_source = 'ashare'
-                logger.info(f"{primary_symbol} 是A股标的，强制使用ashare数据源")
+            primary_symbol, prefer_source = self.resolve_data_source(config)
 
             # 1. 历史点位分析
             result['historical_analysis'] = self._analyze_historical_position(
@@ -177,6 +172,26 @@ class SectorReporter:
 
         return result
 
+    @staticmethod
+    def resolve_data_source(config: Dict) -> Tuple[str, Optional[str]]:
+        """
+        板块主标的及优先数据源
+
+        Args:
+            config: 板块配置
+
+        Returns:
+            (主标的代码, 优先数据源), 数据源为None表示自动选择
+        """
+        primary_symbol = config['symbols'][0]
+        prefer_source = config.get('data_source', None)  # None表示自动选择，或指定'yfinance'等
+
+        # 智能数据源选择：A股标的强制用ashare（yfinance不支持A股ETF和个股）
+        if prefer_source is None and config['market'] == 'CN':
+            prefer_source = 'ashare'
+            logger.debug(f"{primary_symbol} 是A股标的，强制使用ashare数据源")
+        return primary_symbol, prefer_source
+
     def get_etf_data(self, symbol: str, period: str = "5y", market: str = "CN", prefer_source: str = None) -> pd.DataFrame:
         """获取ETF/个股历史数据 (使用多数据源管理器)
 
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DataCacheManager 文件缓存编解码基准
+对比 pickle 与按类型编码(Arrow内存映射 / 紧凑二进制)的读取耗时和磁盘占用
+
+用法:
+    python scripts/benchmarks/bench_cache_codecs.py --years 5 --symbols 20 --repeat 20
+"""
+
+import sys
+import time
+import pickle
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.cache_codecs import read_file, write_file
+
+
+def make_synthetic_bars(years: int, seed: int = 7) -> pd.DataFrame:
+    """生成随机游走日线(无需联网)"""
+    rng = np.random.default_rng(seed)
+    n = years * 252
+    # 行情接口返回的日期索引不带频率
+    dates = pd.DatetimeIndex(pd.bdate_range(end='2025-11-14', periods=n).values, name='date')
+    close = 3000 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, n)))
+    spread = np.abs(rng.normal(0, 0.006, n)) * close
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.003, n)),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.integers(1_000_000, 5_000_000, n).astype(float),
+    }, index=dates)
+
+
+def make_close_panel(years: int, symbols: int, seed: int = 11) -> pd.DataFrame:
+    """生成收盘价面板 (日期 × 标的)"""
+    rng = np.random.default_rng(seed)
+    n = years * 252
+    dates = pd.DatetimeIndex(pd.bdate_range(end='2025-11-14', periods=n).values, name='date')
+    returns = rng.normal(0.0003, 0.015, (n, symbols))
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=dates,
+                        columns=[f'{600000 + i}' for i in range(symbols)])
+
+
+def make_snapshot(symbols: int) -> dict:
+    """生成标量字典(类似行情快照/指标结果)"""
+    rng = np.random.default_rng(3)
+    return {
+        f'{600000 + i}': {
+            'name': f'股票{i}',
+            'price': float(rng.uniform(5, 500)),
+            'change_pct': float(rng.normal(0, 2)),
+            'volume': int(rng.integers(1e5, 1e8)),
+            'is_st': bool(i % 50 == 0),
+        }
+        for i in range(symbols)
+    }
+
+
+def time_load(load, repeat: int) -> float:
+    # 预热一次, 排除首次导入(pyarrow.pandas_compat等)的开销
+    load()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        load()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_case(name: str, value, workdir: Path, repeat: int) -> bool:
+    pickle_path = workdir / f'{name}.pkl'
+    codec_path = workdir / f'{name}.rtc'
+
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(value, f)
+    codec = write_file(codec_path, value)
+
+    def load_pickle():
+        with open(pickle_path, 'rb') as f:
+            return pickle.load(f)
+
+    time_pickle = time_load(load_pickle, repeat)
+    time_codec = time_load(lambda: read_file(codec_path), repeat)
+
+    loaded = read_file(codec_path)
+    if isinstance(value, pd.DataFrame):
+        identical = value.equals(loaded) and value.index.equals(loaded.index)
+    else:
+        identical = loaded == value
+
+    size_pickle = pickle_path.stat().st_size / 1024
+    size_codec = codec_path.stat().st_size / 1024
+    print(f"\n{name} ({codec})")
+    print(f"  pickle: {time_pickle * 1000:8.3f}ms  {size_pickle:10.1f}KB")
+    print(f"  {codec:<6}: {time_codec * 1000:8.3f}ms  {size_codec:10.1f}KB  (含校验和)")
+    print(f"  读取加速比: {time_pickle / time_codec:.2f}x   结果一致: {'✅' if identical else '❌'}")
+    return identical
+
+
+def run(years: int, symbols: int, repeat: int) -> bool:
+    print("=" * 80)
+    print(f"文件缓存编解码基准 (重复{repeat}次取平均)")
+    print("=" * 80)
+
+    cases = {
+        f'bars_{years}y': make_synthetic_bars(years),
+        f'bars_{years * 4}y': make_synthetic_bars(years * 4),
+        f'panel_{years * 4}y_x500': make_close_panel(years * 4, 500),
+        f'snapshot_{symbols}': make_snapshot(symbols),
+        f'snapshot_{symbols * 50}': make_snapshot(symbols * 50),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [bench_case(name, value, Path(tmp), repeat) for name, value in cases.items()]
+
+    print("=" * 80)
+    return all(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='文件缓存编解码基准')
+    parser.add_argument('--years', type=int, default=5, help='模拟日线年数')
+    parser.add_argument('--symbols', type=int, default=20, help='模拟快照标的数')
+    parser.add_argument('--repeat', type=int, default=20, help='重复读取次数')
+    args = parser.parse_args()
+
+    ok = run(args.years, args.symbols, args.repeat)
+    sys.exit(0 if ok else 1)
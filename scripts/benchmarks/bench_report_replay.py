@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报告生成离线基准
+从录制的上游夹具回放, 测量 UnifiedAnalysisRunner 与 DailyPositionReportGenerator
+的纯计算耗时 (不受网络影响), 并检查多次回放的报告是否一致
+
+用法:
+    # 先联网录制一次
+    python russ_trading/runners/run_unified_analysis.py --record data/fixtures/upstream/20251114
+    python russ_trading/generators/daily_position_report_generator.py --record data/fixtures/upstream/20251114
+
+    # 之后离线测量
+    python scripts/benchmarks/bench_report_replay.py data/fixtures/upstream/20251114 --repeat 3
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.upstream_replay import MODE_REPLAY, activate, deactivate
+
+
+def bench_unified(assets):
+    from russ_trading.config.unified_config import UNIFIED_ASSETS
+    from russ_trading.runners.run_unified_analysis import UnifiedAnalysisRunner
+
+    runner = UnifiedAnalysisRunner()
+    results = runner.analyze_assets(assets or list(UNIFIED_ASSETS.keys()))
+    return runner.format_report(results, 'markdown')
+
+
+def bench_daily(date: str):
+    from russ_trading.generators.daily_position_report_generator import DailyPositionReportGenerator
+
+    generator = DailyPositionReportGenerator()
+    market_data = generator.fetch_market_data(date)
+    positions = generator.load_positions()
+    return generator.generate_report(date=date, positions=positions, market_data=market_data)
+
+
+def run(fixtures_dir: Path, repeat: int, assets, date: str):
+    print("=" * 80)
+    print(f"报告生成离线基准 (夹具: {fixtures_dir}, 重复{repeat}次)")
+    print("=" * 80)
+
+    ok = True
+    for name, build in (('统一资产分析', lambda: bench_unified(assets)),
+                        ('每日持仓报告', lambda: bench_daily(date))):
+        timings, reports, missed = [], [], 0
+        for _ in range(repeat):
+            # 每轮重新启用: 缓存从空开始, 测到的是完整计算路径
+            recorder = activate(MODE_REPLAY, fixtures_dir)
+            start = time.perf_counter()
+            try:
+                reports.append(build())
+            finally:
+                timings.append(time.perf_counter() - start)
+                missed += recorder.get_stats()['misses']
+                deactivate()
+
+        # 报告中含生成时间, 只比较长度
+        stable = len({len(r) for r in reports}) == 1
+        ok = ok and stable and missed == 0
+        print(f"\n{name}:")
+        print(f"  耗时: 最快 {min(timings):.3f}秒, 平均 {sum(timings) / len(timings):.3f}秒")
+        print(f"  未命中夹具: {missed}")
+        print(f"  报告一致: {'✅' if stable else '❌'}")
+
+    print("=" * 80)
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='报告生成离线基准')
+    parser.add_argument('fixtures', type=Path, help='录制的夹具目录')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    parser.add_argument('--assets', nargs='+', help='统一资产分析的资产代码, 默认全部')
+    parser.add_argument('--date', type=str, default=time.strftime('%Y-%m-%d'), help='持仓报告日期')
+    args = parser.parse_args()
+
+    ok = run(args.fixtures, args.repeat, args.assets, args.date)
+    sys.exit(0 if ok else 1)
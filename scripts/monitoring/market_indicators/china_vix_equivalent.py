@@ -26,6 +26,13 @@ import akshare as ak
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 import warnings
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.data_sources.a_share_snapshot import get_a_share_snapshot
 
 warnings.filterwarnings('ignore')
 
@@ -341,7 +348,7 @@ def get_limit_up_down_ratio() -> Dict:
     """
     try:
         print("\n正在获取涨跌停数据...")
-        df = ak.stock_zh_a_spot_em()
+        df = get_a_share_snapshot().get_frame()
 
         # 涨停: 涨幅 >= 9.9%
         # 跌停: 跌幅 <= -9.9%
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A股全市场实时行情快照服务
+
+ak.stock_zh_a_spot_em() 每次下载约5000只A股的完整行情表。各分析器原本按标的
+各自调用再线性过滤, 分析N只标的就要下载N次全表。
+
+本服务按可配置的间隔最多拉取一次全表, 保存为列式数组 + 代码→行号哈希索引:
+- 单标的查询: 字典定位行号后直接取数组元素 (微秒级)
+- 多标的查询: 一次 get_indexer + take 完成向量化查询
+- 并发调用只触发一次下载; 刷新失败时在允许的陈旧期内继续使用旧快照
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 默认刷新间隔(秒)
+DEFAULT_SNAPSHOT_TTL = 60
+# 刷新失败时允许继续使用旧快照的最长时间(秒)
+DEFAULT_MAX_STALE = 1800
+
+CODE_COLUMN = '代码'
+
+
+class _SnapshotTable(NamedTuple):
+    """一次拉取建立的快照及其索引, 整体替换, 查询方始终看到同一次拉取的数据"""
+    frame: pd.DataFrame
+    codes: pd.Index                 # 按行排列的代码, 供 get_indexer 向量化查询
+    code_index: Dict[str, int]      # 代码 → 行号
+    columns: Dict[str, np.ndarray]  # 列名 → 列数组
+    fetched_at: float
+
+
+def normalize_a_share_code(symbol: str) -> Optional[str]:
+    """
+    标准化A股代码为6位数字
+
+    支持 '600519' / '600519.SS' / '000001.SZ' / 'sh600519' / 'sz000001' 等格式
+
+    Returns:
+        6位代码, 非A股代码返回None
+    """
+    if symbol is None:
+        return None
+    code = str(symbol).strip()
+    for suffix in ('.SS', '.SH', '.SZ', '.ss', '.sh', '.sz'):
+        if code.endswith(suffix):
+            code = code[:-len(suffix)]
+    if code[:2].lower() in ('sh', 'sz', 'bj') and len(code) == 8:
+        code = code[2:]
+    return code if len(code) == 6 and code.isdigit() else None
+
+
+def _default_fetcher() -> pd.DataFrame:
+    import akshare as ak
+    return ak.stock_zh_a_spot_em()
+
+
+class AShareSnapshot:
+    """A股全市场行情快照"""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_SNAPSHOT_TTL,
+        max_stale: float = DEFAULT_MAX_STALE,
+        fetcher: Optional[Callable[[], pd.DataFrame]] = None
+    ):
+        """
+        初始化快照服务
+
+        Args:
+            ttl: 刷新间隔(秒), 间隔内的查询直接使用内存快照
+            max_stale: 刷新失败时允许使用旧快照的最长时间(秒)
+            fetcher: 全表拉取函数, 默认 ak.stock_zh_a_spot_em
+        """
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.fetcher = fetcher or _default_fetcher
+
+        self._table: Optional[_SnapshotTable] = None
+        self._lock = threading.Lock()
+        self.stats = {'fetches': 0, 'hits': 0, 'failures': 0, 'stale_served': 0}
+
+    # ------------------------------------------------------------------
+    # 刷新
+    # ------------------------------------------------------------------
+
+    @property
+    def _frame(self) -> Optional[pd.DataFrame]:
+        table = self._table
+        return table.frame if table is not None else None
+
+    @property
+    def age(self) -> float:
+        """快照距上次拉取的秒数(从未拉取时为inf)"""
+        table = self._table
+        return time.monotonic() - table.fetched_at if table is not None else float('inf')
+
+    def _load(self, df: pd.DataFrame):
+        """建立列式数组与代码索引, 全部建好后一次性替换, 并发查询不会读到新旧混合的状态"""
+        df = df.reset_index(drop=True)
+        codes = df[CODE_COLUMN].astype(str)
+        # 重复代码保留第一行, 与原先 df[df['代码'] == code].iloc[0] 一致
+        code_index: Dict[str, int] = {}
+        for position, code in enumerate(codes):
+            code_index.setdefault(code, position)
+        columns = {column: df[column].to_numpy() for column in df.columns}
+        self._table = _SnapshotTable(df, pd.Index(codes), code_index, columns, time.monotonic())
+
+    def refresh(self, force: bool = False) -> pd.DataFrame:
+        """
+        必要时拉取全表
+
+        Args:
+            force: 忽略刷新间隔强制拉取
+
+        Returns:
+            当前快照DataFrame
+        """
+        if not force and self.age < self.ttl:
+            self.stats['hits'] += 1
+            return self._frame
+
+        with self._lock:
+            # 等锁期间其他线程可能已经完成刷新
+            if not force and self.age < self.ttl:
+                self.stats['hits'] += 1
+                return self._frame
+
+            try:
+                df = self.fetcher()
+                if df is None or df.empty or CODE_COLUMN not in df.columns:
+                    raise ValueError("A股实时行情为空")
+            except Exception as e:
+                self.stats['failures'] += 1
+                if self._frame is not None and self.age < self.max_stale:
+                    self.stats['stale_served'] += 1
+                    logger.warning(f"A股实时行情刷新失败, 使用{self.age:.0f}秒前的快照: {e}")
+                    return self._frame
+                raise
+
+            self.stats['fetches'] += 1
+            self._load(df)
+            logger.info(f"A股实时行情快照已更新: {len(df)}只")
+            return self._frame
+
+    def get_frame(self, force_refresh: bool = False) -> pd.DataFrame:
+        """获取完整快照表(原 ak.stock_zh_a_spot_em() 的返回值)"""
+        return self.refresh(force=force_refresh)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """
+        查询单只股票的完整行情
+
+        Returns:
+            {列名: 值}, 未找到返回None
+        """
+        self.refresh()
+        table = self._table
+        position = table.code_index.get(normalize_a_share_code(symbol))
+        if position is None:
+            return None
+        return {column: values[position] for column, values in table.columns.items()}
+
+    def get_value(self, symbol: str, field: str):
+        """
+        查询单只股票的单个字段
+
+        Returns:
+            字段值, 未找到股票或字段返回None
+        """
+        self.refresh()
+        table = self._table
+        position = table.code_index.get(normalize_a_share_code(symbol))
+        values = table.columns.get(field)
+        if position is None or values is None:
+            return None
+        return values[position]
+
+    def lookup(self, symbols: Iterable[str], fields: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        向量化查询多只股票
+
+        Args:
+            symbols: 股票代码列表
+            fields: 需要的列, 默认全部
+
+        Returns:
+            以输入代码为索引的DataFrame, 未找到的代码整行为NaN
+        """
+        self.refresh()
+        table = self._table
+        symbols = list(symbols)
+        codes = [normalize_a_share_code(symbol) for symbol in symbols]
+        positions = table.codes.get_indexer(codes)
+        found = positions >= 0
+
+        fields = fields or list(table.columns)
+        data = {}
+        for field in fields:
+            values = table.columns[field]
+            taken = values.take(np.where(found, positions, 0))
+            if not found.all():
+                taken = pd.Series(taken, dtype=object if values.dtype == object else float)
+                taken[~found] = np.nan
+                taken = taken.to_numpy()
+            data[field] = taken
+        return pd.DataFrame(data, index=pd.Index(symbols, name='symbol'))
+
+    def turnover_rate(self, symbol: str) -> Optional[float]:
+        """
+        查询换手率
+
+        Returns:
+            换手率(小数形式,如0.025表示2.5%), 未找到或无效返回None
+        """
+        value = self.get_value(symbol, '换手率')
+        if value is None or pd.isna(value):
+            return None
+        return float(value) / 100
+
+    def get_stats(self) -> Dict:
+        """获取快照统计信息"""
+        stats = dict(self.stats)
+        table = self._table
+        stats['rows'] = len(table.frame) if table is not None else 0
+        stats['age_seconds'] = round(self.age, 1) if table is not None else None
+        return stats
+
+
+# 全局单例实例
+_global_snapshot: Optional[AShareSnapshot] = None
+_global_snapshot_lock = threading.Lock()
+
+
+def get_a_share_snapshot(ttl: Optional[float] = None) -> AShareSnapshot:
+    """
+    获取全局A股行情快照单例
+
+    Args:
+        ttl: 刷新间隔(秒), 指定时更新单例的刷新间隔
+
+    Returns:
+        AShareSnapshot实例
+    """
+    global _global_snapshot
+
+    with _global_snapshot_lock:
+        if _global_snapshot is None:
+            _global_snapshot = AShareSnapshot(ttl=ttl if ttl is not None else DEFAULT_SNAPSHOT_TTL)
+        elif ttl is not None:
+            _global_snapshot.ttl = ttl
+
+    return _global_snapshot
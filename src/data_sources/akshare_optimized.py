@@ -12,14 +12,17 @@ import logging
 import time
 from typing import Dict, Optional
 
+from src.utils.cache_service import get_namespace
+
 logger = logging.getLogger(__name__)
 
 class OptimizedAkshareSource:
     """优化的 akshare 数据源"""
 
     def __init__(self):
-        self.cache = {}
-        self.cache_timeout = 300  # 5分钟缓存
+        # 全市场实时快照, 固定5分钟缓存
+        self.cache = get_namespace('akshare_market')
+        self.snapshot_ttl = 300
 
     def get_market_data(self) -> Optional[Dict]:
         """获取市场数据 - 使用稳定的 akshare 接口"""
@@ -54,11 +57,10 @@ class OptimizedAkshareSource:
         cache_key = "market_summary"
 
         # 检查缓存
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if (datetime.now() - cached_time).seconds < self.cache_timeout:
-                logger.info("使用缓存的市场数据")
-                return cached_data
+        cached_data = self.cache.get(cache_key, max_age=self.snapshot_ttl)
+        if cached_data is not None:
+            logger.info("使用缓存的市场数据")
+            return cached_data
 
         try:
             # 使用新浪数据源 (已测试可用)
@@ -67,7 +69,7 @@ class OptimizedAkshareSource:
 
             if df is not None and not df.empty:
                 # 缓存数据
-                self.cache[cache_key] = (datetime.now(), df)
+                self.cache.set(cache_key, df, ttl=self.snapshot_ttl)
                 logger.info(f"新浪数据获取成功: {len(df)} 只股票")
                 return df
             else:
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地列式K线仓库 - 所有日线获取接口的共享存储层
+
+布局:
+    data/bars/<market>/<source>/<symbol>.parquet   日线OHLCV (DatetimeIndex)
+    data/bars/<market>/<source>/<symbol>.json      元数据 (覆盖起点/最近检查时间)
+
+同一代码在不同数据源(yfinance/akshare/ashare)下口径不同, 按source分目录存放
+
+刷新策略:
+1. 已覆盖到最近一个已收盘交易日 -> 直接读本地, 不访问网络
+2. 否则只从本地最后一根K线开始增量拉取, 追加缺失的交易日
+3. 重叠K线价格不一致(复权因子变化) -> 全量重建
+4. 盘中未收盘的K线只随结果返回, 不写入仓库
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+# 重叠K线允许的相对误差, 超过视为复权口径变化
+REBUILD_TOLERANCE = 1e-6
+
+# 请求起点早于本地覆盖起点超过该天数时全量重建
+COVERAGE_SLACK_DAYS = 10
+
+
+def infer_market(symbol: str) -> str:
+    """根据yfinance风格的代码推断所属市场"""
+    upper = symbol.upper()
+    if upper.endswith('.SS') or upper.endswith('.SZ'):
+        return 'cn'
+    if upper.endswith('.HK') or upper in ('^HSI', '^HSCE'):
+        return 'hk'
+    if upper.endswith('-USD'):
+        return 'crypto'
+    return 'us'
+
+
+def last_completed_session(market: str, now: Optional[datetime] = None) -> pd.Timestamp:
+    """
+    返回指定市场最近一个已收盘交易日 (按本地交易日历跳过周末和节假日)
+
+    Args:
+        market: cn/hk/us/crypto
+        now: 当前时间 (带时区或本地时间), 默认当前时间
+
+    Returns:
+        交易日日期 (无时区, 00:00)
+    """
+    return pd.Timestamp(get_trading_calendar().last_completed_session(market, now))
+
+
+def is_in_session(market: str, now: Optional[datetime] = None) -> bool:
+    """判断市场当前是否处于交易时段"""
+    return get_trading_calendar().is_in_session(market, now)
+
+
+class BarStore:
+    """
+    按 市场/代码 分区的本地日线仓库
+
+    fetcher 约定: fetcher(since) -> DataFrame
+        - since 为 None: 全量下载
+        - since 为 Timestamp: 只需返回 >= since 的K线 (数据源不支持时返回全量亦可)
+        - 返回值索引为日期, 列至少包含 open/high/low/close/volume
+    """
+
+    def __init__(self, root: Optional[Path] = None, enabled: bool = True):
+        """
+        初始化K线仓库
+
+        Args:
+            root: 仓库根目录,默认为项目根目录/data/bars
+            enabled: 是否启用 (缺少parquet引擎时自动禁用)
+        """
+        if root is None:
+            project_root = Path(__file__).parent.parent.parent
+            root = project_root / "data" / "bars"
+        self.root = Path(root)
+        self.enabled = enabled and PARQUET_AVAILABLE
+        if enabled and not PARQUET_AVAILABLE:
+            logger.warning("未安装pyarrow, K线仓库已禁用, 将直接访问数据源")
+
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {'local_hits': 0, 'delta_fetches': 0, 'full_fetches': 0, 'rebuilds': 0}
+
+    # ------------------------------------------------------------------
+    # 存取
+    # ------------------------------------------------------------------
+
+    def _path(self, market: str, source: str, symbol: str, suffix: str) -> Path:
+        # 代码本身可能带点号 (000001.SS), 不能使用 with_suffix
+        safe_symbol = symbol.replace('/', '_').replace('^', '_').replace('=', '_')
+        return self.root / market / source / f"{safe_symbol}{suffix}"
+
+    def _lock_for(self, market: str, source: str, symbol: str) -> threading.Lock:
+        key = f"{market}/{source}/{symbol}"
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def read(self, market: str, source: str, symbol: str) -> pd.DataFrame:
+        """读取本地K线, 不存在时返回空DataFrame"""
+        path = self._path(market, source, symbol, '.parquet')
+        if not self.enabled or not path.exists():
+            return pd.DataFrame()
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"读取本地K线失败 {market}/{symbol}: {e}")
+            return pd.DataFrame()
+
+    def read_meta(self, market: str, source: str, symbol: str) -> Dict:
+        path = self._path(market, source, symbol, '.json')
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except Exception:
+            return {}
+
+    def write(self, market: str, source: str, symbol: str, df: pd.DataFrame, meta: Optional[Dict] = None):
+        """原子写入K线与元数据"""
+        if not self.enabled or df is None or df.empty:
+            return
+        data_path = self._path(market, source, symbol, '.parquet')
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = self._path(market, source, symbol, '.parquet.tmp')
+        df.to_parquet(tmp_path)
+        tmp_path.replace(data_path)
+
+        if meta is not None:
+            meta_path = self._path(market, source, symbol, '.json')
+            tmp_meta = self._path(market, source, symbol, '.json.tmp')
+            tmp_meta.write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+            tmp_meta.replace(meta_path)
+
+    def partitions(self) -> List[Tuple[str, str, str]]:
+        """仓库中所有分区 (market, source, symbol), symbol为文件名中的安全代码"""
+        if not self.enabled or not self.root.exists():
+            return []
+        return [(path.parent.parent.name, path.parent.name, path.stem)
+                for path in sorted(self.root.glob('*/*/*.parquet'))]
+
+    def fingerprint(self) -> Tuple[Tuple[str, int, int], ...]:
+        """
+        仓库内容指纹: 各分区文件的 (相对路径, 修改时间ns, 大小)
+
+        新增分区或任一分区写入后指纹改变, 供基于全仓库构建的索引判断是否需要重建
+        """
+        if not self.enabled or not self.root.exists():
+            return ()
+        entries = []
+        for path in sorted(self.root.glob('*/*/*.parquet')):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((str(path.relative_to(self.root)), stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def last_date(self, market: str, source: str, symbol: str) -> Optional[pd.Timestamp]:
+        df = self.read(market, source, symbol)
+        return df.index[-1] if not df.empty else None
+
+    # ------------------------------------------------------------------
+    # 增量刷新
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        df.index = pd.to_datetime(df.index)
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        df.index = df.index.normalize()
+        df.index.name = 'date'
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        return df
+
+    def get_bars(
+        self,
+        market: str,
+        source: str,
+        symbol: str,
+        fetcher: Callable[[Optional[pd.Timestamp]], pd.DataFrame],
+        start: Optional[pd.Timestamp] = None,
+        now: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        读取K线, 必要时增量刷新
+
+        Args:
+            market: 市场 (cn/hk/us/crypto)
+            source: 数据源名称 (yfinance/akshare/ashare)
+            symbol: 代码
+            fetcher: 数据源拉取函数, 见类说明
+            start: 调用方需要的最早日期, 用于判断本地覆盖范围是否足够
+            now: 当前时间 (测试用)
+
+        Returns:
+            完整日线DataFrame (可能包含盘中未收盘K线)
+        """
+        if not self.enabled:
+            df = fetcher(None)
+            return self._normalize(df) if df is not None and not df.empty else pd.DataFrame()
+
+        with self._lock_for(market, source, symbol):
+            return self._get_bars_locked(market, source, symbol, fetcher, start, now)
+
+    def _plan(self, market, stored, meta, start, now) -> Tuple[str, Optional[pd.Timestamp]]:
+        """判断刷新方式: ('full', None) / ('local', None) / ('delta', 本地最后一根K线日期)"""
+        expected = last_completed_session(market, now)
+        checked_at = pd.Timestamp(meta['checked_session']) if meta.get('checked_session') else None
+
+        covered = True
+        if start is not None and not stored.empty:
+            covers_from = pd.Timestamp(meta.get('covers_from', stored.index[0]))
+            covered = pd.Timestamp(start) >= covers_from - pd.Timedelta(days=COVERAGE_SLACK_DAYS)
+
+        if stored.empty or not covered:
+            return 'full', None
+
+        up_to_date = stored.index[-1] >= expected or (checked_at is not None and checked_at >= expected)
+        if up_to_date and not is_in_session(market, now):
+            return 'local', None
+
+        return 'delta', stored.index[-1]
+
+    def plan_fetch(
+        self,
+        market: str,
+        source: str,
+        symbol: str,
+        start: Optional[pd.Timestamp] = None,
+        now: Optional[datetime] = None
+    ) -> Tuple[str, Optional[pd.Timestamp]]:
+        """
+        预判 get_bars 需要的刷新方式(不访问网络), 供批量下载提前合并请求
+
+        Returns:
+            ('full', None) / ('local', None) / ('delta', since)
+        """
+        if not self.enabled:
+            return 'full', None
+        return self._plan(
+            market, self.read(market, source, symbol), self.read_meta(market, source, symbol), start, now
+        )
+
+    def _get_bars_locked(self, market, source, symbol, fetcher, start, now) -> pd.DataFrame:
+        stored = self.read(market, source, symbol)
+        meta = self.read_meta(market, source, symbol)
+        expected = last_completed_session(market, now)
+
+        action, last = self._plan(market, stored, meta, start, now)
+        if action == 'full':
+            return self._full_fetch(market, source, symbol, fetcher, start, expected)
+
+        if action == 'local':
+            self.stats['local_hits'] += 1
+            logger.debug(f"K线仓库命中: {market}/{source}/{symbol}")
+            return stored
+
+        # 增量拉取: 从本地最后一根K线开始, 保留一根重叠用于校验复权口径
+        self.stats['delta_fetches'] += 1
+        delta = fetcher(last)
+        if delta is None or delta.empty:
+            return stored
+        delta = self._normalize(delta)
+
+        if last in delta.index:
+            old_close = float(stored['close'].iloc[-1])
+            new_close = float(delta.loc[last, 'close'])
+            if old_close and abs(new_close - old_close) / abs(old_close) > REBUILD_TOLERANCE:
+                logger.info(f"{market}/{symbol} 复权口径变化, 全量重建")
+                self.stats['rebuilds'] += 1
+                return self._full_fetch(market, source, symbol, fetcher, start, expected)
+
+        new_rows = delta[delta.index > last]
+        completed = new_rows[new_rows.index <= expected]
+        pending = new_rows[new_rows.index > expected]
+
+        merged = pd.concat([stored, completed]) if not completed.empty else stored
+        meta.update({'checked_session': str(expected.date()), 'updated_at': datetime.now().isoformat()})
+        self.write(market, source, symbol, merged, meta)
+        if not completed.empty:
+            logger.info(f"{market}/{symbol} 增量追加 {len(completed)} 根K线")
+
+        return pd.concat([merged, pending]) if not pending.empty else merged
+
+    def _full_fetch(self, market, source, symbol, fetcher, start, expected) -> pd.DataFrame:
+        self.stats['full_fetches'] += 1
+        df = fetcher(None)
+        if df is None or df.empty:
+            return pd.DataFrame()
+        df = self._normalize(df)
+
+        completed = df[df.index <= expected]
+        covers_from = df.index[0]
+        if start is not None:
+            covers_from = min(covers_from, pd.Timestamp(start))
+        meta = {
+            'covers_from': str(covers_from.date()),
+            'checked_session': str(expected.date()),
+            'updated_at': datetime.now().isoformat(),
+        }
+        self.write(market, source, symbol, completed, meta)
+        logger.info(f"{market}/{symbol} 全量写入 {len(completed)} 根K线")
+        return df
+
+    def get_stats(self) -> Dict:
+        """获取仓库统计信息"""
+        stats = dict(self.stats)
+        stats['enabled'] = self.enabled
+        if self.enabled and self.root.exists():
+            files = list(self.root.rglob('*.parquet'))
+            stats['partitions'] = len(files)
+            stats['size_mb'] = round(sum(f.stat().st_size for f in files) / 1024 / 1024, 2)
+        return stats
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[pd.Timestamp]:
+    """把yfinance风格的period (1mo/1y/5y/max) 转为起始日期, 按天计的period返回None"""
+    now = pd.Timestamp(now or datetime.now()).normalize()
+    if not period or period == 'max':
+        return None
+    if period == 'ytd':
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    unit_days = {'wk': 7, 'mo': 31, 'y': 366}
+    for unit, days in unit_days.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return now - pd.Timedelta(days=int(period[:-len(unit)]) * days)
+    return None
+
+
+def slice_period(df: pd.DataFrame, period: str, now: Optional[datetime] = None) -> pd.DataFrame:
+    """按period截取K线, 'Nd' 表示最近N个交易日"""
+    if df.empty or not period:
+        return df
+    if period.endswith('d') and period[:-1].isdigit():
+        return df.tail(int(period[:-1]))
+    start = period_start(period, now)
+    return df[df.index >= start] if start is not None else df
+
+
+# 全局单例实例
+_global_bar_store: Optional[BarStore] = None
+
+
+def get_bar_store(root: Optional[Path] = None) -> BarStore:
+    """
+    获取全局K线仓库单例
+
+    Args:
+        root: 仓库根目录
+
+    Returns:
+        BarStore实例
+    """
+    global _global_bar_store
+
+    if _global_bar_store is None:
+        _global_bar_store = BarStore(root=root)
+
+    return _global_bar_store
+
+
+def set_bar_store(store: Optional[BarStore]) -> None:
+    """替换全局K线仓库 (如录制/回放时隔离仓库目录), None表示下次重新创建"""
+    global _global_bar_store
+    _global_bar_store = store
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量行情下载 - 多代码一次请求 / 有界并发 + 令牌桶限流
+
+- download_batch: yfinance 多代码一次下载 (yf.download), 返回 {代码: DataFrame}
+- fetch_concurrently: 不支持多代码接口的数据源, 用有界线程池并发拉取
+- TokenBucket: 按上游主机限流, 所有单代码请求和批量请求共用同一个桶
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 各上游主机限流配置: (每秒令牌数, 桶容量)
+HOST_RATE_LIMITS = {
+    'yfinance': (5.0, 10),
+    'akshare': (2.0, 4),
+    'ashare': (5.0, 10),
+}
+DEFAULT_RATE_LIMIT = (2.0, 4)
+
+
+class TokenBucket:
+    """线程安全的令牌桶限流器"""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量(允许的突发请求数)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        获取令牌, 不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待秒数, None表示一直等待
+
+        Returns:
+            是否获取成功
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host: str) -> TokenBucket:
+    """
+    获取上游主机的全局限流器
+
+    Args:
+        host: 上游主机/数据源名称 (yfinance/akshare/ashare)
+
+    Returns:
+        TokenBucket实例
+    """
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            rate, capacity = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+            _rate_limiters[host] = TokenBucket(rate, capacity)
+        return _rate_limiters[host]
+
+
+def fetch_concurrently(
+    keys: Iterable,
+    fetch_fn: Callable,
+    host: Optional[str] = None,
+    max_workers: int = 8
+) -> Dict:
+    """
+    有界线程池并发拉取
+
+    Args:
+        keys: 代码列表
+        fetch_fn: 单代码拉取函数 fetch_fn(key) -> 结果
+        host: 上游主机名, 指定时每次调用前先获取令牌; 若fetch_fn内部已限流则传None
+        max_workers: 最大并发数
+
+    Returns:
+        {key: 结果}, 抛出异常或返回None/空DataFrame的代码不包含在内
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    limiter = get_rate_limiter(host) if host else None
+
+    def run(key):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fetch_fn(key)
+        except Exception as e:
+            logger.error(f"获取{key}数据失败: {str(e)}")
+            return None
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+        for key, result in zip(keys, executor.map(run, keys)):
+            if result is None or (isinstance(result, pd.DataFrame) and result.empty):
+                continue
+            results[key] = result
+    return results
+
+
+def download_batch(
+    symbols: List[str],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    period: Optional[str] = "1y",
+    max_workers: int = 8,
+    ignore_tz: bool = True
+) -> Dict[str, pd.DataFrame]:
+    """
+    yfinance 多代码一次下载
+
+    Args:
+        symbols: yfinance代码列表
+        start: 开始日期 (指定时忽略period)
+        end: 结束日期
+        period: 时间周期
+        max_workers: yfinance内部下载线程数
+        ignore_tz: 是否去掉时区 (与 Ticker.history 保持一致时传False)
+
+    Returns:
+        {代码: DataFrame(Open/High/Low/Close/Volume)}, 无数据的代码不包含在内
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    import yfinance as yf
+
+    get_rate_limiter('yfinance').acquire()
+    logger.info(f"批量下载 {len(symbols)} 个代码: {', '.join(symbols[:10])}{'...' if len(symbols) > 10 else ''}")
+
+    kwargs = {'start': start, 'end': end} if start else {'period': period}
+    try:
+        raw = yf.download(
+            tickers=symbols,
+            group_by='ticker',
+            auto_adjust=True,
+            threads=min(max_workers, len(symbols)),
+            ignore_tz=ignore_tz,
+            progress=False,
+            **kwargs
+        )
+    except Exception as e:
+        logger.error(f"批量下载失败: {str(e)}")
+        return {}
+
+    return split_download(raw, symbols)
+
+
+def split_download(raw: Optional[pd.DataFrame], symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """把 yf.download(group_by='ticker') 的结果拆分为 {代码: DataFrame}"""
+    if raw is None or raw.empty:
+        return {}
+
+    results = {}
+    for symbol in symbols:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if symbol not in raw.columns.get_level_values(0):
+                continue
+            df = raw[symbol]
+        elif len(symbols) == 1:
+            df = raw
+        else:
+            continue
+
+        # 多代码下载按日期对齐, 不同交易日历会产生整行NaN
+        df = df.dropna(how='all')
+        if 'Close' in df.columns:
+            df = df[df['Close'].notna()]
+        if not df.empty:
+            df.columns.name = None
+            results[symbol] = df
+    return results
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A股业绩报表本地仓库 - 按报告期持久化 + 代码索引
+
+ak.stock_yjbb_em(date=report_date) 每次返回一个报告期全市场数千只股票的业绩报表,
+财务分析器原本按标的各自下载整表再过滤, 分析N只股票就要下载N次同一张表。
+
+布局:
+    data/earnings/<report_date>.parquet   业绩报表全表
+    data/earnings/<report_date>.json      元数据 (拉取时间/是否已定稿)
+
+刷新策略:
+1. 报告期披露截止日之后整表不再变化(已定稿), 本地有文件即直接使用, 永不重新下载
+2. 披露期内的报告期仍有公司陆续披露, 本地文件超过 open_ttl 后重新下载
+3. 每个报告期在进程内只加载一次, 建立 代码→行号 索引, 单标的查询为字典定位
+"""
+
+import json
+import logging
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .a_share_snapshot import normalize_a_share_code
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+CODE_COLUMN = '股票代码'
+
+# 披露期内报告期的本地文件有效期(秒)
+DEFAULT_OPEN_TTL = 12 * 3600
+
+# 各报告期法定披露截止日: 报告期月日 -> (相对年份偏移, 截止月, 截止日)
+# 一季报4月30日, 半年报8月31日, 三季报10月31日, 年报次年4月30日
+DISCLOSURE_DEADLINES = {
+    '0331': (0, 4, 30),
+    '0630': (0, 8, 31),
+    '0930': (0, 10, 31),
+    '1231': (1, 4, 30),
+}
+
+# 截止日后的宽限天数 (延期披露/更正公告)
+DISCLOSURE_GRACE_DAYS = 7
+
+
+def disclosure_deadline(report_date: str) -> Optional[date]:
+    """
+    报告期的披露截止日
+
+    Args:
+        report_date: 报告期 (如 '20240930')
+
+    Returns:
+        截止日期, 非标准报告期返回None
+    """
+    rule = DISCLOSURE_DEADLINES.get(report_date[4:])
+    if rule is None or not report_date[:4].isdigit():
+        return None
+    year_offset, month, day = rule
+    return date(int(report_date[:4]) + year_offset, month, day)
+
+
+def is_report_final(report_date: str, today: Optional[date] = None) -> bool:
+    """判断报告期是否已过披露截止日(整表不再变化)"""
+    deadline = disclosure_deadline(report_date)
+    if deadline is None:
+        return False
+    today = today or date.today()
+    return (today - deadline).days > DISCLOSURE_GRACE_DAYS
+
+
+def _default_fetcher(report_date: str) -> pd.DataFrame:
+    import akshare as ak
+    return ak.stock_yjbb_em(date=report_date)
+
+
+class _PeriodTable:
+    """单个报告期的内存表: 列式数组 + 代码索引"""
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.reset_index(drop=True)
+        self.frame = df
+        # 重复代码保留第一行, 与原先 df[df['股票代码'] == symbol].iloc[0] 一致
+        self.code_index: Dict[str, int] = {}
+        for position, code in enumerate(df[CODE_COLUMN].astype(str)):
+            self.code_index.setdefault(code, position)
+        self.columns: Dict[str, np.ndarray] = {column: df[column].to_numpy() for column in df.columns}
+
+    def get(self, code: str) -> Optional[Dict]:
+        position = self.code_index.get(code)
+        if position is None:
+            return None
+        return {column: values[position] for column, values in self.columns.items()}
+
+
+class EarningsTable:
+    """
+    按报告期分区的业绩报表仓库
+
+    fetcher 约定: fetcher(report_date) -> DataFrame (ak.stock_yjbb_em 的返回格式)
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        fetcher: Optional[Callable[[str], pd.DataFrame]] = None,
+        open_ttl: float = DEFAULT_OPEN_TTL
+    ):
+        """
+        初始化业绩报表仓库
+
+        Args:
+            root: 仓库根目录, 默认为项目根目录/data/earnings
+            fetcher: 整表拉取函数, 默认 ak.stock_yjbb_em
+            open_ttl: 披露期内报告期的本地文件有效期(秒)
+        """
+        if root is None:
+            project_root = Path(__file__).parent.parent.parent
+            root = project_root / "data" / "earnings"
+        self.root = Path(root)
+        self.fetcher = fetcher or _default_fetcher
+        self.open_ttl = open_ttl
+
+        self._tables: Dict[str, _PeriodTable] = {}
+        self._loaded_at: Dict[str, datetime] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {'memory_hits': 0, 'local_hits': 0, 'fetches': 0, 'failures': 0}
+
+    # ------------------------------------------------------------------
+    # 存取
+    # ------------------------------------------------------------------
+
+    def _path(self, report_date: str, suffix: str) -> Path:
+        return self.root / f"{report_date}{suffix}"
+
+    def _lock_for(self, report_date: str) -> threading.Lock:
+        with self._locks_guard:
+            if report_date not in self._locks:
+                self._locks[report_date] = threading.Lock()
+            return self._locks[report_date]
+
+    def _read_local(self, report_date: str):
+        """读取本地报表, 返回 (DataFrame, 元数据), 不存在时返回 (None, {})"""
+        path = self._path(report_date, '.parquet')
+        if not PARQUET_AVAILABLE or not path.exists():
+            return None, {}
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"读取本地业绩报表失败 {report_date}: {e}")
+            return None, {}
+
+        meta = {}
+        meta_path = self._path(report_date, '.json')
+        if meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            except Exception:
+                meta = {}
+        return df, meta
+
+    def _write_local(self, report_date: str, df: pd.DataFrame, meta: Dict):
+        """原子写入报表与元数据"""
+        if not PARQUET_AVAILABLE:
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(report_date, '.parquet.tmp')
+            df.to_parquet(tmp_path, index=False)
+            tmp_path.replace(self._path(report_date, '.parquet'))
+
+            tmp_meta = self._path(report_date, '.json.tmp')
+            tmp_meta.write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+            tmp_meta.replace(self._path(report_date, '.json'))
+        except Exception as e:
+            logger.warning(f"写入本地业绩报表失败 {report_date}: {e}")
+
+    def _is_fresh(self, meta: Dict, now: datetime) -> bool:
+        if meta.get('final'):
+            return True
+        fetched_at = meta.get('fetched_at')
+        if not fetched_at:
+            return False
+        return (now - datetime.fromisoformat(fetched_at)).total_seconds() < self.open_ttl
+
+    # ------------------------------------------------------------------
+    # 加载
+    # ------------------------------------------------------------------
+
+    def _load(self, report_date: str, now: Optional[datetime] = None) -> Optional[_PeriodTable]:
+        """加载报告期内存表: 内存 -> 本地文件 -> 上游下载"""
+        now = now or datetime.now()
+        table = self._tables.get(report_date)
+        if table is not None and self._memory_fresh(report_date, now):
+            self.stats['memory_hits'] += 1
+            return table
+
+        with self._lock_for(report_date):
+            # 等锁期间其他线程可能已经完成加载
+            table = self._tables.get(report_date)
+            if table is not None and self._memory_fresh(report_date, now):
+                self.stats['memory_hits'] += 1
+                return table
+
+            stored, meta = self._read_local(report_date)
+            if stored is not None and self._is_fresh(meta, now):
+                self.stats['local_hits'] += 1
+                return self._remember(report_date, stored, now)
+
+            try:
+                df = self.fetcher(report_date)
+                if df is None or df.empty or CODE_COLUMN not in df.columns:
+                    raise ValueError(f"{report_date}业绩报表为空")
+            except Exception as e:
+                self.stats['failures'] += 1
+                if stored is not None:
+                    logger.warning(f"业绩报表{report_date}下载失败, 使用本地旧表: {e}")
+                    return self._remember(report_date, stored, now)
+                logger.error(f"业绩报表{report_date}下载失败: {e}")
+                return None
+
+            self.stats['fetches'] += 1
+            df = df.copy()
+            df[CODE_COLUMN] = df[CODE_COLUMN].astype(str)
+            final = is_report_final(report_date, now.date())
+            self._write_local(report_date, df, {
+                'rows': len(df),
+                'fetched_at': now.isoformat(),
+                'final': final,
+            })
+            logger.info(f"业绩报表{report_date}已更新: {len(df)}只{' (已定稿)' if final else ''}")
+            return self._remember(report_date, df, now)
+
+    def _memory_fresh(self, report_date: str, now: datetime) -> bool:
+        loaded_at = self._loaded_at.get(report_date)
+        if loaded_at is None:
+            return False
+        if is_report_final(report_date, now.date()):
+            return True
+        return (now - loaded_at).total_seconds() < self.open_ttl
+
+    def _remember(self, report_date: str, df: pd.DataFrame, now: datetime) -> _PeriodTable:
+        table = _PeriodTable(df)
+        self._tables[report_date] = table
+        # 已定稿的表常驻内存; 披露期内的表按加载时间计算有效期
+        self._loaded_at[report_date] = now
+        return table
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def get_frame(self, report_date: str) -> pd.DataFrame:
+        """获取报告期全表(原 ak.stock_yjbb_em 的返回值), 失败时返回空DataFrame"""
+        table = self._load(report_date)
+        return table.frame if table is not None else pd.DataFrame()
+
+    def get(self, symbol: str, report_date: str) -> Optional[Dict]:
+        """
+        查询单只股票的业绩报表行
+
+        Args:
+            symbol: 股票代码 (如 '600519' 或 '600519.SS')
+            report_date: 报告期 (如 '20240930')
+
+        Returns:
+            {列名: 值}, 未找到返回None
+        """
+        table = self._load(report_date)
+        if table is None:
+            return None
+        return table.get(normalize_a_share_code(symbol) or str(symbol))
+
+    def lookup(self, symbols: Iterable[str], report_date: str) -> Dict[str, Optional[Dict]]:
+        """
+        批量查询多只股票 (整表只加载一次)
+
+        Returns:
+            {输入代码: 行字典或None}
+        """
+        table = self._load(report_date)
+        return {
+            symbol: table.get(normalize_a_share_code(symbol) or str(symbol)) if table is not None else None
+            for symbol in symbols
+        }
+
+    def get_stats(self) -> Dict:
+        """获取仓库统计信息"""
+        stats = dict(self.stats)
+        stats['loaded_periods'] = sorted(self._tables)
+        if self.root.exists():
+            files = list(self.root.glob('*.parquet'))
+            stats['stored_periods'] = len(files)
+            stats['size_mb'] = round(sum(f.stat().st_size for f in files) / 1024 / 1024, 2)
+        return stats
+
+
+# 全局单例实例
+_global_earnings_table: Optional[EarningsTable] = None
+_global_earnings_table_lock = threading.Lock()
+
+
+def get_earnings_table(root: Optional[Path] = None) -> EarningsTable:
+    """
+    获取全局业绩报表仓库单例
+
+    Args:
+        root: 仓库根目录
+
+    Returns:
+        EarningsTable实例
+    """
+    global _global_earnings_table
+
+    with _global_earnings_table_lock:
+        if _global_earnings_table is None:
+            _global_earnings_table = EarningsTable(root=root)
+
+    return _global_earnings_table
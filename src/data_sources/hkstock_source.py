@@ -12,6 +12,8 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, Optional, List
 
+from src.utils.cache_service import get_namespace
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,8 +21,10 @@ class HKStockDataSource:
     """港股数据源 - 使用 AKShare"""
 
     def __init__(self):
-        self.cache = {}
-        self.cache_timeout = 300  # 5分钟缓存
+        # 日线按港股交易日历在下一个收盘后过期(盘中/开盘后5分钟);
+        # 实时行情/资金流等快照不是日线, 固定5分钟
+        self.cache = get_namespace('hk_stock')
+        self.snapshot_ttl = 300
         logger.info("港股数据源初始化完成")
 
     def get_hk_index_daily(
@@ -46,11 +50,10 @@ class HKStockDataSource:
         cache_key = f"hk_index_{symbol}_{period}"
 
         # 检查缓存
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if (datetime.now() - cached_time).seconds < self.cache_timeout:
-                logger.info(f"使用缓存的{symbol}指数数据")
-                return cached_data
+        cached_data = self.cache.get(cache_key)
+        if cached_data is not None:
+            logger.info(f"使用缓存的{symbol}指数数据")
+            return cached_data
 
         try:
             logger.info(f"获取港股指数数据: {symbol} ({period})")
@@ -74,7 +77,7 @@ class HKStockDataSource:
                     df['amount'] = 0
 
                 # 缓存数据
-                self.cache[cache_key] = (datetime.now(), df)
+                self.cache.set(cache_key, df)
                 logger.info(f"{symbol}数据获取成功: {len(df)} 条记录")
                 return df
             else:
@@ -95,18 +98,17 @@ class HKStockDataSource:
         cache_key = "hk_stock_spot"
 
         # 检查缓存
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if (datetime.now() - cached_time).seconds < self.cache_timeout:
-                logger.info("使用缓存的港股实时行情")
-                return cached_data
+        cached_data = self.cache.get(cache_key, max_age=self.snapshot_ttl)
+        if cached_data is not None:
+            logger.info("使用缓存的港股实时行情")
+            return cached_data
 
         try:
             logger.info("获取港股实时行情...")
             df = ak.stock_hk_spot_em()
 
             if df is not None and not df.empty:
-                self.cache[cache_key] = (datetime.now(), df)
+                self.cache.set(cache_key, df, ttl=self.snapshot_ttl)
                 logger.info(f"港股实时行情获取成功: {len(df)} 只股票")
                 return df
             else:
@@ -174,11 +176,10 @@ class HKStockDataSource:
         cache_key = f"south_capital_flow_{days}"
 
         # 检查缓存
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if (datetime.now() - cached_time).seconds < self.cache_timeout:
-                logger.info("使用缓存的南向资金数据")
-                return cached_data
+        cached_data = self.cache.get(cache_key, max_age=self.snapshot_ttl)
+        if cached_data is not None:
+            logger.info("使用缓存的南向资金数据")
+            return cached_data
 
         try:
             logger.info(f"获取南向资金流向数据 (最近{days}天)...")
@@ -192,7 +193,7 @@ class HKStockDataSource:
                 df_south['交易日'] = pd.to_datetime(df_south['交易日'])
                 df_south = df_south.sort_values('交易日', ascending=False).head(days)
 
-                self.cache[cache_key] = (datetime.now(), df_south)
+                self.cache.set(cache_key, df_south, ttl=self.snapshot_ttl)
                 logger.info(f"南向资金数据获取成功: {len(df_south)} 条记录")
                 return df_south
             else:
@@ -213,18 +214,17 @@ class HKStockDataSource:
         cache_key = "ah_price_comparison"
 
         # 检查缓存
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if (datetime.now() - cached_time).seconds < self.cache_timeout:
-                logger.info("使用缓存的AH股比价数据")
-                return cached_data
+        cached_data = self.cache.get(cache_key, max_age=self.snapshot_ttl)
+        if cached_data is not None:
+            logger.info("使用缓存的AH股比价数据")
+            return cached_data
 
         try:
             logger.info("获取AH股比价数据...")
             df = ak.stock_zh_ah_spot()
 
             if df is not None and not df.empty:
-                self.cache[cache_key] = (datetime.now(), df)
+                self.cache.set(cache_key, df, ttl=self.snapshot_ttl)
                 logger.info(f"AH股比价数据获取成功: {len(df)} 只股票")
                 return df
             else:
@@ -245,11 +245,10 @@ class HKStockDataSource:
         cache_key = "ah_premium_index"
 
         # 检查缓存
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if (datetime.now() - cached_time).seconds < self.cache_timeout:
-                logger.info("使用缓存的AH溢价指数数据")
-                return cached_data
+        cached_data = self.cache.get(cache_key, max_age=self.snapshot_ttl)
+        if cached_data is not None:
+            logger.info("使用缓存的AH溢价指数数据")
+            return cached_data
 
         try:
             logger.info("获取AH股溢价指数历史数据...")
@@ -259,7 +258,7 @@ class HKStockDataSource:
                 df['日期'] = pd.to_datetime(df['日期'])
                 df = df.set_index('日期').sort_index()
 
-                self.cache[cache_key] = (datetime.now(), df)
+                self.cache.set(cache_key, df, ttl=self.snapshot_ttl)
                 logger.info(f"AH溢价指数数据获取成功: {len(df)} 条记录")
                 return df
             else:
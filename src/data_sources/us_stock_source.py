@@ -11,7 +11,10 @@ import numpy as np
 from datetime import datetime, timedelta
 import logging
 from typing import Dict, Optional, List
-import time
+
+from src.data_sources.bar_store import get_bar_store, infer_market, slice_period, period_start
+from src.data_sources.batch_downloader import download_batch, fetch_concurrently, get_rate_limiter
+from src.utils.cache_service import get_namespace
 
 logger = logging.getLogger(__name__)
 
@@ -67,16 +70,27 @@ class USStockDataSource:
     }
 
     def __init__(self):
-        self.cache = {}
-        self.cache_timeout = 300  # 5分钟缓存
+        # 按标的所属市场的交易日历过期, 盘中5分钟
+        self.cache = get_namespace('us_stock')
         logger.info("美股数据源初始化完成")
 
+    def _resolve_symbol(self, symbol: str) -> str:
+        """标准化symbol - 支持指数、商品、加密货币、A股、港股"""
+        for mapping in (self.US_INDICES, self.A_INDICES, self.HK_INDICES, self.COMMODITIES, self.CRYPTO):
+            if symbol in mapping:
+                return mapping[symbol]
+        return symbol
+
+    def _get_cached(self, cache_key: str) -> Optional[pd.DataFrame]:
+        return self.cache.get(cache_key)
+
     def get_us_index_daily(
         self,
         symbol: str,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        period: str = "5y"
+        period: str = "5y",
+        prefetched: Optional[pd.DataFrame] = None
     ) -> pd.DataFrame:
         """
         获取美股指数历史日线数据
@@ -90,58 +104,55 @@ class USStockDataSource:
             start_date: 开始日期 (YYYY-MM-DD), 可选
             end_date: 结束日期 (YYYY-MM-DD), 可选
             period: 时间周期 (1d/5d/1mo/3mo/6mo/1y/2y/5y/10y/ytd/max)
+            prefetched: 批量下载预取的原始数据(见 get_multiple_indices), 覆盖所需区间时不再单独请求
 
         Returns:
             DataFrame with columns: [Open, High, Low, Close, Volume]
             索引为日期 (DatetimeIndex)
         """
-        # 标准化symbol - 支持指数、商品、加密货币、A股、港股
-        if symbol in self.US_INDICES:
-            symbol = self.US_INDICES[symbol]
-        elif symbol in self.A_INDICES:
-            symbol = self.A_INDICES[symbol]
-        elif symbol in self.HK_INDICES:
-            symbol = self.HK_INDICES[symbol]
-        elif symbol in self.COMMODITIES:
-            symbol = self.COMMODITIES[symbol]
-        elif symbol in self.CRYPTO:
-            symbol = self.CRYPTO[symbol]
-
+        symbol = self._resolve_symbol(symbol)
         cache_key = f"us_index_{symbol}_{start_date}_{end_date}_{period}"
 
         # 检查缓存
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if (datetime.now() - cached_time).seconds < self.cache_timeout:
-                logger.info(f"使用缓存的{symbol}指数数据")
-                return cached_data
+        cached_data = self._get_cached(cache_key)
+        if cached_data is not None:
+            logger.info(f"使用缓存的{symbol}指数数据")
+            return cached_data
 
         try:
-            logger.info(f"获取美股指数数据: {symbol}")
-            ticker = yf.Ticker(symbol)
+            def fetch(since: Optional[pd.Timestamp]) -> pd.DataFrame:
+                if prefetched is not None and not prefetched.empty:
+                    if since is None:
+                        return self._normalize_history(prefetched)
+                    if prefetched.index[0] <= since:
+                        return self._normalize_history(prefetched[prefetched.index >= since])
+
+                get_rate_limiter('yfinance').acquire()
+                ticker = yf.Ticker(symbol)
+                # 本地仓库已有历史时只拉取缺失的交易日
+                if since is not None:
+                    logger.info(f"增量获取美股指数数据: {symbol} (自 {since.date()})")
+                    return self._normalize_history(ticker.history(start=since.strftime('%Y-%m-%d')))
+                logger.info(f"获取美股指数数据: {symbol}")
+                if start_date:
+                    return self._normalize_history(ticker.history(start=start_date))
+                return self._normalize_history(ticker.history(period=period))
+
+            required_start = pd.Timestamp(start_date) if start_date else period_start(period)
+            df = get_bar_store().get_bars(
+                infer_market(symbol), 'yfinance', symbol, fetch, start=required_start
+            )
 
-            # 根据参数选择获取方式
             if start_date and end_date:
-                df = ticker.history(start=start_date, end=end_date)
+                df = df[(df.index >= pd.Timestamp(start_date)) & (df.index < pd.Timestamp(end_date))]
+            elif start_date:
+                df = df[df.index >= pd.Timestamp(start_date)]
             else:
-                df = ticker.history(period=period)
+                df = slice_period(df, period)
 
             if df is not None and not df.empty:
-                # 标准化列名 (yfinance已经是标准格式)
-                # 列名: Open, High, Low, Close, Volume, Dividends, Stock Splits
-
-                # 只保留OHLCV
-                df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-
-                # 重命名为小写(与港股保持一致)
-                df.columns = ['open', 'high', 'low', 'close', 'volume']
-
-                # 确保索引是日期类型
-                df.index = pd.to_datetime(df.index)
-                df = df.sort_index()
-
                 # 缓存数据
-                self.cache[cache_key] = (datetime.now(), df)
+                self.cache.set(cache_key, df, market=infer_market(symbol))
                 logger.info(f"{symbol}数据获取成功: {len(df)} 条记录")
                 return df
             else:
@@ -152,6 +163,20 @@ class USStockDataSource:
             logger.error(f"获取{symbol}指数数据失败: {str(e)}")
             return pd.DataFrame()
 
+    @staticmethod
+    def _normalize_history(df: pd.DataFrame) -> pd.DataFrame:
+        """yfinance原始数据 -> 小写OHLCV"""
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        # 只保留OHLCV, 重命名为小写(与港股保持一致)
+        df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+        df.columns = ['open', 'high', 'low', 'close', 'volume']
+
+        # 确保索引是日期类型
+        df.index = pd.to_datetime(df.index)
+        return df.sort_index()
+
     def get_us_stock_hist(
         self,
         symbol: str,
@@ -173,6 +198,7 @@ class USStockDataSource:
         """
         try:
             logger.info(f"获取美股个股/ETF历史数据: {symbol}")
+            get_rate_limiter('yfinance').acquire()
             ticker = yf.Ticker(symbol)
 
             if start_date and end_date:
@@ -201,37 +227,125 @@ class USStockDataSource:
         symbols: List[str],
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        period: str = "5y"
+        period: str = "5y",
+        batch: bool = True,
+        max_workers: int = 8
     ) -> Dict[str, pd.DataFrame]:
         """
         批量获取多个指数数据
 
+        批量模式下先按K线仓库的刷新计划合并请求: 需全量下载的代码一次 yf.download,
+        需增量补齐的代码从最早缺口起一次 yf.download; 随后并发写入仓库并切片。
+        预取未覆盖的代码自动回退为单代码请求(受令牌桶限流)。
+
         Args:
             symbols: 指数代码列表
             start_date: 开始日期
             end_date: 结束日期
             period: 时间周期
+            batch: 是否使用批量下载, False时逐个串行获取
+            max_workers: 最大并发数
 
         Returns:
             字典 {symbol: DataFrame}
         """
-        results = {}
+        if not batch:
+            results = {}
+            for symbol in symbols:
+                df = self.get_us_index_daily(symbol, start_date, end_date, period)
+                if not df.empty:
+                    results[symbol] = df
+            return results
+
+        resolved = {symbol: self._resolve_symbol(symbol) for symbol in symbols}
+        pending = [
+            symbol for symbol in symbols
+            if self._get_cached(f"us_index_{resolved[symbol]}_{start_date}_{end_date}_{period}") is None
+        ]
+        prefetched = self._prefetch_indices([resolved[symbol] for symbol in pending], start_date, period)
+
+        fetched = fetch_concurrently(
+            symbols,
+            lambda symbol: self.get_us_index_daily(
+                symbol, start_date, end_date, period, prefetched=prefetched.get(resolved[symbol])
+            ),
+            max_workers=max_workers
+        )
+        # 保持输入顺序
+        return {symbol: fetched[symbol] for symbol in symbols if symbol in fetched}
+
+    def _prefetch_indices(
+        self,
+        yf_symbols: List[str],
+        start_date: Optional[str],
+        period: str
+    ) -> Dict[str, pd.DataFrame]:
+        """按K线仓库刷新计划合并为至多两次 yf.download (全量/增量)"""
+        if not yf_symbols:
+            return {}
+
+        store = get_bar_store()
+        required_start = pd.Timestamp(start_date) if start_date else period_start(period)
+
+        full, delta = [], {}
+        for symbol in dict.fromkeys(yf_symbols):
+            action, since = store.plan_fetch(infer_market(symbol), 'yfinance', symbol, start=required_start)
+            if action == 'full':
+                full.append(symbol)
+            elif action == 'delta':
+                delta[symbol] = since
+
+        prefetched = {}
+        if full:
+            prefetched.update(download_batch(full, start=start_date, period=period))
+        if delta:
+            since = min(delta.values())
+            prefetched.update(download_batch(list(delta), start=since.strftime('%Y-%m-%d')))
+        return prefetched
+
+    def get_multiple_stocks_hist(
+        self,
+        symbols: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        period: str = "5y"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取美股个股/ETF历史数据 (一次 yf.download)
 
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+            period: 时间周期
+
+        Returns:
+            字典 {symbol: DataFrame[open, high, low, close, volume]}, 与 get_us_stock_hist 口径一致
+        """
+        if start_date and end_date:
+            raw = download_batch(symbols, start=start_date, end=end_date, ignore_tz=False)
+        else:
+            raw = download_batch(symbols, period=period, ignore_tz=False)
+
+        results = {}
         for symbol in symbols:
-            df = self.get_us_index_daily(symbol, start_date, end_date, period)
+            df = self._normalize_history(raw[symbol]) if symbol in raw else pd.DataFrame()
+            if df.empty:
+                # 批量结果缺失时回退为单代码请求
+                df = self.get_us_stock_hist(symbol, start_date, end_date, period)
             if not df.empty:
                 results[symbol] = df
-            # 添加短暂延迟,避免频繁请求
-            time.sleep(0.2)
 
+        logger.info(f"批量获取个股/ETF数据: {len(results)}/{len(symbols)}")
         return results
 
-    def calculate_technical_indicators(self, df: pd.DataFrame) -> Dict:
+    def calculate_technical_indicators(self, df: pd.DataFrame, symbol: Optional[str] = None) -> Dict:
         """
         计算技术指标
 
         Args:
             df: OHLCV数据
+            symbol: 共享指标面板键(panel_key(市场, 代码)), 提供时跨分析器复用该标的的指标序列
 
         Returns:
             技术指标字典
@@ -239,9 +353,13 @@ class USStockDataSource:
         if df.empty or len(df) < 2:
             return {}
 
+        # 指标面板属于策略层, 延迟导入避免数据源模块在导入期依赖 strategies
+        from strategies.trading.signal_generators.indicator_panel import IndicatorPanel, get_indicator_panel
+
         try:
             latest = df.iloc[-1]
             prev = df.iloc[-2] if len(df) > 1 else latest
+            panel = get_indicator_panel(symbol, df) if symbol else IndicatorPanel(df)
 
             indicators = {}
 
@@ -255,61 +373,43 @@ class USStockDataSource:
             # 均线 (MA)
             for period in [5, 10, 20, 60, 120, 250]:
                 if len(df) >= period:
-                    ma = df['close'].rolling(period).mean().iloc[-1]
+                    ma = panel.latest('ma', period=period)[f'ma{period}']
                     indicators[f'ma{period}'] = float(ma)
                     # 价格与均线的偏离度
                     indicators[f'ma{period}_deviation'] = float((latest['close'] - ma) / ma * 100)
 
             # RSI
             if len(df) >= 15:
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                indicators['rsi'] = float(rsi.iloc[-1])
+                indicators['rsi'] = panel.latest('rsi', period=14)['rsi']
 
             # MACD
             if len(df) >= 26:
-                ema12 = df['close'].ewm(span=12, adjust=False).mean()
-                ema26 = df['close'].ewm(span=26, adjust=False).mean()
-                dif = ema12 - ema26
-                dea = dif.ewm(span=9, adjust=False).mean()
-                macd_hist = (dif - dea) * 2
-
-                indicators['macd_dif'] = float(dif.iloc[-1])
-                indicators['macd_dea'] = float(dea.iloc[-1])
-                indicators['macd_hist'] = float(macd_hist.iloc[-1])
+                macd = panel.latest('macd')
+                indicators['macd_dif'] = macd['macd']
+                indicators['macd_dea'] = macd['macd_signal']
+                indicators['macd_hist'] = macd['macd_histogram'] * 2
 
             # 布林带
             if len(df) >= 20:
-                bb_period = 20
-                bb_std = 2
-                bb_middle = df['close'].rolling(bb_period).mean()
-                bb_std_dev = df['close'].rolling(bb_period).std()
-                bb_upper = bb_middle + (bb_std * bb_std_dev)
-                bb_lower = bb_middle - (bb_std * bb_std_dev)
+                boll = panel.latest('boll', period=20, num_std=2)
+                bb_upper, bb_middle, bb_lower = boll['boll_upper'], boll['boll_mid'], boll['boll_lower']
 
-                indicators['bb_upper'] = float(bb_upper.iloc[-1])
-                indicators['bb_middle'] = float(bb_middle.iloc[-1])
-                indicators['bb_lower'] = float(bb_lower.iloc[-1])
+                indicators['bb_upper'] = bb_upper
+                indicators['bb_middle'] = bb_middle
+                indicators['bb_lower'] = bb_lower
 
                 # 布林带宽度
-                indicators['bb_width'] = float((bb_upper.iloc[-1] - bb_lower.iloc[-1]) / bb_middle.iloc[-1] * 100)
+                indicators['bb_width'] = float((bb_upper - bb_lower) / bb_middle * 100)
 
                 # 价格在布林带中的位置
-                bb_position = (latest['close'] - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1]) * 100
+                bb_position = (latest['close'] - bb_lower) / (bb_upper - bb_lower) * 100
                 indicators['bb_position'] = float(bb_position)
 
             # ATR (Average True Range)
             if len(df) >= 15:
-                high_low = df['high'] - df['low']
-                high_close = abs(df['high'] - df['close'].shift())
-                low_close = abs(df['low'] - df['close'].shift())
-                true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-                atr = true_range.rolling(14).mean()
-                indicators['atr'] = float(atr.iloc[-1])
-                indicators['atr_pct'] = float(atr.iloc[-1] / latest['close'] * 100)
+                atr = panel.latest('atr', period=14)['atr']
+                indicators['atr'] = atr
+                indicators['atr_pct'] = float(atr / latest['close'] * 100)
 
             # 波动率
             if len(df) >= 20:
@@ -338,22 +438,11 @@ class USStockDataSource:
 
             # KDJ指标
             if len(df) >= 9:
-                from strategies.trading.signal_generators.technical_indicators import TechnicalIndicators
-                calc = TechnicalIndicators()
-                df_with_kdj = calc.calculate_kdj(df.copy())
-                indicators['kdj_k'] = float(df_with_kdj['kdj_k'].iloc[-1])
-                indicators['kdj_d'] = float(df_with_kdj['kdj_d'].iloc[-1])
-                indicators['kdj_j'] = float(df_with_kdj['kdj_j'].iloc[-1])
+                indicators.update(panel.latest('kdj'))
 
             # DMI/ADX指标
             if len(df) >= 28:  # 需要至少14*2天数据
-                from strategies.trading.signal_generators.technical_indicators import TechnicalIndicators
-                calc = TechnicalIndicators()
-                df_with_dmi = calc.calculate_dmi_adx(df.copy())
-                if not df_with_dmi.empty and 'adx' in df_with_dmi.columns:
-                    indicators['adx'] = float(df_with_dmi['adx'].iloc[-1])
-                    indicators['+di'] = float(df_with_dmi['+di'].iloc[-1])
-                    indicators['-di'] = float(df_with_dmi['-di'].iloc[-1])
+                indicators.update(panel.latest('dmi_adx', period=14))
 
             return indicators
 
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数组化回测内核
+将价格和信号预先转换为NumPy数组/编码, 逐K线撮合时不再经过pandas索引,
+交易、手续费、止损止盈规则与 BacktestEngine.run_backtest 完全一致。
+
+- backtest_arrays: 单资产内核
+- backtest_basket: 多资产内核, 一次调用回测一篮子标的(各标的独立资金)
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 信号编码 (未列出的信号视为HOLD)
+HOLD = 0
+SIGNAL_CODES = {
+    'BUY': 1,
+    'STRONG_BUY': 2,
+    'SELL': 3,
+    'STRONG_SELL': 4,
+    'STOP_LOSS': 5,
+    'TAKE_PROFIT': 6,
+}
+CODE_NAMES = {code: name for name, code in SIGNAL_CODES.items()}
+STOP_LOSS = SIGNAL_CODES['STOP_LOSS']
+TAKE_PROFIT = SIGNAL_CODES['TAKE_PROFIT']
+
+
+def _is_buy(code) -> bool:
+    return (code == 1) | (code == 2)
+
+
+def _is_sell(code) -> bool:
+    return code >= 3
+
+
+def encode_signals(signals, length: int) -> np.ndarray:
+    """
+    将信号序列编码为int8数组(按位置对齐, 不足部分补HOLD)
+
+    Args:
+        signals: 交易信号序列 ('BUY', 'SELL', 'HOLD', etc.)
+        length: K线数量
+
+    Returns:
+        长度为length的信号编码数组
+    """
+    values = pd.Series(np.asarray(signals, dtype=object)[:length])
+    codes = np.full(length, HOLD, dtype=np.int8)
+    codes[:len(values)] = values.map(SIGNAL_CODES).fillna(HOLD).astype(np.int8).values
+    return codes
+
+
+def backtest_arrays(
+    prices: np.ndarray,
+    codes: np.ndarray,
+    initial_capital: float,
+    commission: float,
+    slippage: float,
+    stop_loss: Optional[float] = None,
+    take_profit: Optional[float] = None,
+    max_position: float = 1.0
+) -> Tuple[np.ndarray, List[Tuple]]:
+    """
+    单资产回测内核
+
+    Args:
+        prices: 价格数组
+        codes: 信号编码数组(见 encode_signals)
+        initial_capital: 初始资金
+        commission: 手续费率
+        slippage: 滑点
+        stop_loss: 止损比例
+        take_profit: 止盈比例
+        max_position: 买入时使用的资金比例
+
+    Returns:
+        (组合价值数组, 交易列表)
+        交易为 (入场位置, 出场位置, 入场价, 出场价, 股数, 手续费, 出场信号编码)
+    """
+    price_list = np.asarray(prices, dtype=float).tolist()
+    code_list = np.asarray(codes).tolist()
+    values = np.empty(len(price_list))
+    trades = []
+
+    cash = initial_capital
+    position = 0
+    entry_price = 0
+    entry_index = -1
+
+    for i, price in enumerate(price_list):
+        code = code_list[i]
+
+        # 检查止损止盈
+        if position > 0 and entry_price > 0:
+            current_return = (price - entry_price) / entry_price
+            if stop_loss and current_return <= -stop_loss:
+                code = STOP_LOSS
+            elif take_profit and current_return >= take_profit:
+                code = TAKE_PROFIT
+
+        if (code == 1 or code == 2) and position == 0:
+            buy_price = price * (1 + slippage)
+            shares = int((cash * max_position) / buy_price)
+
+            if shares > 0:
+                cost = shares * buy_price
+                cash -= (cost + cost * commission)
+                position = shares
+                entry_price = buy_price
+                entry_index = i
+
+        elif code >= 3 and position > 0:
+            sell_price = price * (1 - slippage)
+            revenue = position * sell_price
+            commission_fee = revenue * commission
+            cash += (revenue - commission_fee)
+
+            trades.append((entry_index, i, entry_price, sell_price, position, commission_fee, code))
+            position = 0
+            entry_price = 0
+            entry_index = -1
+
+        values[i] = cash + (position * price if position > 0 else 0)
+
+    return values, trades
+
+
+def daily_returns_from_values(values: np.ndarray) -> np.ndarray:
+    """组合价值 -> 日收益率(首日为0)"""
+    values = np.asarray(values, dtype=float)
+    returns = np.zeros(len(values))
+    if len(values) > 1:
+        returns[1:] = (values[1:] - values[:-1]) / values[:-1]
+    return returns
+
+
+def trade_to_dict(trade: Tuple, dates) -> Dict:
+    """将内核交易元组转换为引擎交易记录字典"""
+    entry_index, exit_index, entry_price, exit_price, shares, commission_fee, code = trade
+    return {
+        'entry_date': dates[entry_index],
+        'exit_date': dates[exit_index],
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'shares': shares,
+        'return': (exit_price - entry_price) / entry_price,
+        'pnl': (exit_price - entry_price) * shares - commission_fee * 2,
+        'signal': CODE_NAMES[code],
+    }
+
+
+def backtest_basket(
+    price_panel: pd.DataFrame,
+    signal_panel: pd.DataFrame,
+    initial_capital: float,
+    commission: float,
+    slippage: float,
+    stop_loss: Optional[float] = None,
+    take_profit: Optional[float] = None,
+    max_position: float = 1.0
+) -> Dict:
+    """
+    多资产回测内核: 所有标的在同一时间循环中按向量同步撮合
+
+    每个标的使用独立的初始资金, 结果等价于对各列分别调用 backtest_arrays。
+    价格为NaN(未上市/停牌)的K线不交易, 持仓按最近有效价格估值。
+
+    Args:
+        price_panel: 价格面板 (日期 × 标的)
+        signal_panel: 信号面板 (日期 × 标的), 与价格面板对齐
+        其余参数同 backtest_arrays
+
+    Returns:
+        {
+            'portfolio_values': 各标的组合价值面板,
+            'trades': {标的: 交易记录列表},
+            'summary': 每个标的一行的汇总DataFrame
+        }
+    """
+    symbols = list(price_panel.columns)
+    dates = list(price_panel.index)
+    signal_panel = signal_panel.reindex(index=price_panel.index, columns=symbols)
+
+    raw_prices = price_panel.to_numpy(dtype=float)
+    tradable = np.isfinite(raw_prices)
+    prices = price_panel.ffill().to_numpy(dtype=float)
+    codes = np.column_stack([
+        encode_signals(signal_panel[symbol].values, len(dates)) for symbol in symbols
+    ]) if symbols else np.empty((len(dates), 0), dtype=np.int8)
+
+    n_days, n_assets = raw_prices.shape
+    cash = np.full(n_assets, float(initial_capital))
+    position = np.zeros(n_assets)
+    entry_price = np.zeros(n_assets)
+    entry_index = np.full(n_assets, -1)
+    values = np.empty((n_days, n_assets))
+    trades = {symbol: [] for symbol in symbols}
+
+    for i in range(n_days):
+        price = raw_prices[i]
+        code = codes[i].copy()
+        can_trade = tradable[i]
+        holding = position > 0
+
+        # 检查止损止盈
+        with np.errstate(divide='ignore', invalid='ignore'):
+            current_return = (price - entry_price) / entry_price
+        check = holding & (entry_price > 0) & can_trade
+        if stop_loss:
+            hit_stop = check & (current_return <= -stop_loss)
+            code[hit_stop] = STOP_LOSS
+        else:
+            hit_stop = np.zeros(n_assets, dtype=bool)
+        if take_profit:
+            code[check & ~hit_stop & (current_return >= take_profit)] = TAKE_PROFIT
+
+        # 买入
+        buy = _is_buy(code) & ~holding & can_trade
+        if buy.any():
+            buy_price = price[buy] * (1 + slippage)
+            shares = np.floor((cash[buy] * max_position) / buy_price)
+            filled = shares > 0
+            idx = np.flatnonzero(buy)[filled]
+            cost = shares[filled] * buy_price[filled]
+            cash[idx] -= (cost + cost * commission)
+            position[idx] = shares[filled]
+            entry_price[idx] = buy_price[filled]
+            entry_index[idx] = i
+
+        # 卖出
+        sell = _is_sell(code) & holding & can_trade
+        if sell.any():
+            idx = np.flatnonzero(sell)
+            sell_price = price[idx] * (1 - slippage)
+            revenue = position[idx] * sell_price
+            commission_fee = revenue * commission
+            cash[idx] += (revenue - commission_fee)
+
+            for j, k in enumerate(idx):
+                trades[symbols[k]].append(trade_to_dict((
+                    int(entry_index[k]), i, float(entry_price[k]), float(sell_price[j]),
+                    int(position[k]), float(commission_fee[j]), int(code[k])
+                ), dates))
+
+            position[idx] = 0
+            entry_price[idx] = 0
+            entry_index[idx] = -1
+
+        values[i] = cash + np.where(position > 0, position * prices[i], 0)
+
+    portfolio_values = pd.DataFrame(values, index=price_panel.index, columns=symbols)
+    summary = pd.DataFrame([{
+        'symbol': symbol,
+        'final_capital': portfolio_values[symbol].iloc[-1] if n_days else initial_capital,
+        'total_return': (portfolio_values[symbol].iloc[-1] - initial_capital) / initial_capital if n_days else 0,
+        'total_trades': len(trades[symbol]),
+        'win_rate': (
+            sum(1 for t in trades[symbol] if t['return'] > 0) / len(trades[symbol])
+            if trades[symbol] else 0
+        ),
+    } for symbol in symbols])
+
+    return {
+        'portfolio_values': portfolio_values,
+        'trades': trades,
+        'summary': summary,
+    }
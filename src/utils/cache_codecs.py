@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存文件编解码器
+Cache File Codecs
+
+按数据类型选择序列化格式, 替代统一的pickle:
+1. DataFrame  -> Arrow IPC (Feather v2), 在内存映射上解析, 跨pandas版本稳定
+2. 标量字典/列表 -> 紧凑二进制 (marshal, 格式版本记录在文件头)
+3. 其他对象   -> pickle (兜底)
+
+文件布局 (32字节头 + 负载):
+    magic(4) | codec(1) | 格式版本(1) | 保留(2) | crc32(4) | 负载长度(8) | 过期时间(8) | 保留(4) | 负载
+过期时间为写入时确定的Unix时间戳, 0表示不过期 (旧文件该字段为0, 兼容读取)。
+负载按8字节对齐, Arrow可直接在映射内存上读取; 读取时校验crc32,
+校验失败或格式不符视为缓存未命中。写入使用临时文件 + rename 保证原子性。
+读取结果是可写的独立拷贝 (DataFrame转换为pandas块时拷贝一次), 不引用映射内存,
+映射在读取完成后即关闭。
+"""
+
+import marshal
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+MAGIC = b'RTC1'
+HEADER = struct.Struct('<4sBB2xIQd4x')
+HEADER_SIZE = HEADER.size  # 32
+
+CODEC_PICKLE = 0
+CODEC_ARROW = 1
+CODEC_BINARY = 2
+
+CODEC_NAMES = {CODEC_PICKLE: 'pickle', CODEC_ARROW: 'arrow', CODEC_BINARY: 'binary'}
+
+FREQ_METADATA_KEY = b'rtc_index_freq'
+
+
+class CacheCodecError(ValueError):
+    """缓存文件损坏或格式不符"""
+
+
+# ----------------------------------------------------------------------
+# 紧凑二进制 (标量字典/列表)
+# ----------------------------------------------------------------------
+
+def encode_binary(value: Any) -> bytes:
+    """
+    紧凑二进制编码 (marshal格式, C实现, 比pickle更小更快)
+
+    只支持 None/bool/int/float/str/bytes 及其 list/tuple/dict/set 嵌套,
+    包含其他类型(datetime/numpy整数/DataFrame等)时抛出ValueError
+    """
+    return marshal.dumps(value)
+
+
+def decode_binary(payload) -> Any:
+    """紧凑二进制解码"""
+    return marshal.loads(payload)
+
+
+# ----------------------------------------------------------------------
+# Arrow (DataFrame)
+# ----------------------------------------------------------------------
+
+def encode_arrow(df: pd.DataFrame):
+    """DataFrame编码为Arrow IPC文件格式 (保留索引), 无法无损转换时抛出异常"""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    freq = getattr(df.index, 'freqstr', None)
+    if freq:
+        # pandas元数据不记录索引频率, 单独保存以保证无损往返
+        table = table.replace_schema_metadata({**table.schema.metadata, FREQ_METADATA_KEY: freq.encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode_arrow(payload) -> pd.DataFrame:
+    """从(可能是内存映射的)缓冲区读取DataFrame"""
+    table = pa.ipc.open_file(pa.BufferReader(payload)).read_all()
+    # 直接在映射内存上解析, 转换为pandas块时拷贝一次
+    # (不做零拷贝: 只读数组会让调用方的原地赋值报错, 且返回值不应依赖映射是否仍打开)
+    df = table.to_pandas()
+    freq = (table.schema.metadata or {}).get(FREQ_METADATA_KEY)
+    if freq:
+        df.index.freq = freq.decode()
+    return df
+
+
+def _arrow_roundtrip_safe(df: pd.DataFrame) -> bool:
+    """Arrow能表达的DataFrame: 列名唯一的字符串, 非object列或纯字符串object列"""
+    if not isinstance(df, pd.DataFrame) or isinstance(df.columns, pd.MultiIndex):
+        return False
+    if not df.columns.is_unique or not all(isinstance(column, str) for column in df.columns):
+        return False
+    for column in df.columns:
+        series = df[column]
+        if series.dtype == object and not series.map(lambda v: v is None or isinstance(v, str)).all():
+            return False
+    return True
+
+
+# ----------------------------------------------------------------------
+# 文件读写
+# ----------------------------------------------------------------------
+
+def encode(value: Any) -> Tuple[int, Any]:
+    """
+    选择编解码器并编码
+
+    Returns:
+        (codec_id, 负载缓冲区)
+    """
+    if ARROW_AVAILABLE and isinstance(value, pd.DataFrame) and _arrow_roundtrip_safe(value):
+        try:
+            return CODEC_ARROW, encode_arrow(value)
+        except (pa.ArrowException, TypeError, ValueError):
+            pass
+    if isinstance(value, (dict, list, tuple)):
+        try:
+            return CODEC_BINARY, encode_binary(value)
+        except ValueError:
+            pass
+    return CODEC_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode(codec: int, payload) -> Any:
+    """按codec_id解码负载"""
+    if codec == CODEC_ARROW:
+        if not ARROW_AVAILABLE:
+            raise CacheCodecError('未安装pyarrow, 无法读取Arrow缓存')
+        return decode_arrow(payload)
+    if codec == CODEC_BINARY:
+        return decode_binary(payload)
+    if codec == CODEC_PICKLE:
+        return pickle.loads(payload)
+    raise CacheCodecError(f'未知的编解码器: {codec}')
+
+
+def write_file(path: Path, value: Any, expire_at: Optional[float] = None) -> str:
+    """
+    编码并原子写入缓存文件
+
+    Args:
+        path: 目标文件路径
+        value: 缓存值
+        expire_at: 过期时间(Unix时间戳), None表示不过期
+
+    Returns:
+        使用的编解码器名称
+    """
+    codec, payload = encode(value)
+    view = memoryview(payload)
+    version = marshal.version if codec == CODEC_BINARY else 0
+    header = HEADER.pack(MAGIC, codec, version, zlib.crc32(view), len(view), expire_at or 0.0)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(view)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return CODEC_NAMES[codec]
+
+
+def read_file(path: Path) -> Any:
+    """
+    读取并校验缓存文件
+
+    Arrow负载在内存映射上直接解码, 其他负载读入内存后解码; 返回值均为独立拷贝
+
+    Raises:
+        CacheCodecError: 文件头/长度/校验和不符
+    """
+    return read_entry(path)[0]
+
+
+def read_entry(path: Path) -> Tuple[Any, Optional[float]]:
+    """
+    读取并校验缓存文件, 同时返回写入时记录的过期时间
+
+    Returns:
+        (缓存值, 过期时间戳或None)
+
+    Raises:
+        CacheCodecError: 文件头/长度/校验和不符
+    """
+    path = Path(path)
+    if ARROW_AVAILABLE:
+        with pa.memory_map(str(path), 'r') as source:
+            return _parse_entry(source.read_buffer())
+    return _parse_entry(path.read_bytes())
+
+
+def _parse_entry(buffer) -> Tuple[Any, Optional[float]]:
+    """校验文件头与校验和并解码负载"""
+    view = memoryview(buffer)
+    if len(view) < HEADER_SIZE:
+        raise CacheCodecError('缓存文件过短')
+    magic, codec, version, checksum, length, expire_at = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise CacheCodecError('缓存文件头不符')
+    if codec == CODEC_BINARY and version != marshal.version:
+        raise CacheCodecError('二进制格式版本不符')
+    if len(view) - HEADER_SIZE != length:
+        raise CacheCodecError('缓存文件长度不符')
+
+    payload = buffer[HEADER_SIZE:] if ARROW_AVAILABLE else view[HEADER_SIZE:]
+    if zlib.crc32(memoryview(payload)) != checksum:
+        raise CacheCodecError('缓存文件校验和不符')
+    return decode(codec, payload), (expire_at or None)
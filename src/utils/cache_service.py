@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分层命名空间缓存服务
+Tiered, Namespaced Cache Service
+
+进程内所有数据缓存共用一个服务, 取代各模块各自实现的字典/JSON/pickle缓存:
+1. 内存层 - 全进程共享一个字节预算LRU (见 memory_cache), 同一份数据只保存一次
+2. 磁盘层 - 按命名空间分目录, 按数据类型编码 (见 cache_codecs), 跨运行复用
+3. 命名空间 - 每类数据一个命名空间, 统一的TTL/落盘策略和命中统计
+
+过期规则: 写入时按TTL记录过期时间(内存条目与文件头各自保存), 读取时可再用
+max_age 按写入时间收紧 (如失败回退时允许使用更旧的数据)。
+行情类命名空间指定所属市场, 条目在该市场下一个收盘(加发布延迟)时过期
+(见 trading_calendar), 盘中(及盘前写入的条目自开盘起)仍按命名空间TTL短期失效。
+同一键的并发未命中只执行一次fetcher, 其余线程等待结果。
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .cache_codecs import CacheCodecError, read_entry, write_file
+from .memory_cache import DEFAULT_MAX_BYTES, MemoryCache
+from .trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+# 文件缓存扩展名 (带文件头和校验和的编码格式)
+CACHE_FILE_SUFFIX = '.rtc'
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / 'data' / 'cache'
+
+# 显式不过期: set/get_or_fetch 的 ttl=None 表示按命名空间策略计算, 需要永不过期时传入该值
+NO_EXPIRY = float('inf')
+
+
+@dataclass(frozen=True)
+class NamespacePolicy:
+    """命名空间缓存策略"""
+    ttl: Optional[float] = 86400    # 默认过期时间(秒), None表示不过期; 指定market时为盘中TTL
+    persist: bool = False           # 是否写入磁盘层
+    market: Optional[str] = None    # 所属市场(cn/hk/us/crypto), 指定时按交易日历在下一个收盘后过期
+
+
+# 各类数据的默认策略
+DEFAULT_POLICIES: Dict[str, NamespacePolicy] = {
+    'data': NamespacePolicy(ttl=86400, persist=True),            # DataCacheManager
+    'simple': NamespacePolicy(ttl=86400, persist=True),          # SimpleCache / @cached
+    'index_history': NamespacePolicy(ttl=300, persist=True, market='cn'),  # 指数/ETF/个股历史日线
+    'us_stock': NamespacePolicy(ttl=300, market='us'),           # yfinance 行情
+    'hk_stock': NamespacePolicy(ttl=300, market='hk'),           # 港股行情/南向资金/AH溢价
+    'akshare_market': NamespacePolicy(ttl=300, market='cn'),     # A股全市场概况
+    'sector_bars': NamespacePolicy(ttl=300, persist=True, market='cn'),  # 板块ETF/个股日线(多数据源)
+    'valuation': NamespacePolicy(ttl=3600, persist=True, market='cn'),   # 指数PE/PB、股息率、国债收益率
+    'market_stats': NamespacePolicy(ttl=3600, persist=True, market='cn'),  # 融资融券、新高新低统计
+    'us_macro': NamespacePolicy(ttl=1800, persist=True, market='us'),    # 美债收益率、美元指数
+    'market_depth': NamespacePolicy(ttl=72 * 3600, persist=True),  # 板块轮动等失败回退数据
+    'macro': NamespacePolicy(ttl=3600, persist=True),            # 存款/货币供应等宏观数据
+}
+
+_DEFAULT_POLICY = NamespacePolicy()
+
+
+class _InFlightCall:
+    """正在执行的fetch调用, 同key的并发请求等待其结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class CacheNamespace:
+    """
+    缓存命名空间
+
+    通过 CacheService.namespace() 获取, 键在服务内部加命名空间前缀,
+    不同命名空间的同名键互不影响
+    """
+
+    def __init__(self, service: 'CacheService', name: str, policy: NamespacePolicy):
+        self.service = service
+        self.name = name
+        self.policy = policy
+        self._prefix = f'{name}:'
+
+        self._inflight: Dict[str, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'file_hits': 0,
+            'misses': 0,
+            'fetch_calls': 0,
+            'coalesced_calls': 0,
+            'writes': 0,
+        }
+
+    @property
+    def persist(self) -> bool:
+        return self.policy.persist and self.service.enable_file_cache
+
+    @property
+    def directory(self) -> Path:
+        """磁盘层目录"""
+        return self.service.cache_dir / self.name
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def get(
+        self,
+        key: str,
+        max_age: Optional[float] = None,
+        default: Any = None,
+        memory: bool = True
+    ) -> Any:
+        """
+        依次查询内存层和磁盘层
+
+        Args:
+            key: 缓存键
+            max_age: 写入后最大存活秒数 (在写入时TTL之外额外收紧)
+            default: 未命中时返回值
+            memory: 是否使用内存层 (False时只读磁盘层且不回填)
+
+        Returns:
+            缓存值或default
+        """
+        if memory:
+            value = self.service.memory.get(self._prefix + key, max_age=max_age)
+            if value is not None:
+                self._stats['memory_hits'] += 1
+                return value
+
+        if self.persist:
+            value = self._read_file(key, max_age, backfill=memory)
+            if value is not None:
+                self._stats['file_hits'] += 1
+                return value
+
+        self._stats['misses'] += 1
+        return default
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        memory: bool = True,
+        market: Optional[str] = None
+    ) -> None:
+        """
+        写入内存层(及按策略写入磁盘层)
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间(秒), None按命名空间策略计算, NO_EXPIRY表示永不过期
+            memory: 是否写入内存层
+            market: 覆盖命名空间的所属市场 (同一命名空间包含多个市场的数据时)
+        """
+        ttl = self.resolve_ttl(ttl, market)
+        if memory:
+            self.service.memory.set(self._prefix + key, value, ttl=ttl)
+        self._stats['writes'] += 1
+
+        if self.persist:
+            expire_at = None if ttl is None else time.time() + ttl
+            try:
+                codec = write_file(self.file_path(key), value, expire_at=expire_at)
+                logger.debug(f"数据已缓存: {self.name}:{key} ({codec})")
+            except Exception as e:
+                logger.warning(f"保存文件缓存失败 {self.name}:{key}: {e}")
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetcher: Callable[[], Any],
+        ttl: Optional[float] = None,
+        max_age: Optional[float] = None,
+        force_refresh: bool = False,
+        market: Optional[str] = None
+    ) -> Any:
+        """
+        获取缓存数据或调用fetcher获取新数据
+
+        同一键的并发未命中只有首个线程调用fetcher, 其余线程等待并共享其结果或异常;
+        fetcher返回None时不缓存
+
+        Args:
+            key: 缓存键
+            fetcher: 数据获取函数
+            ttl: 写入时的过期时间(秒), None按命名空间策略计算
+            max_age: 读取时的最大存活秒数
+            force_refresh: 忽略缓存强制获取
+            market: 覆盖命名空间的所属市场
+
+        Returns:
+            数据对象
+        """
+        if not force_refresh:
+            value = self.get(key, max_age=max_age)
+            if value is not None:
+                return value
+
+        with self._lock:
+            call = self._inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._inflight[key] = call
+            else:
+                self._stats['coalesced_calls'] += 1
+
+        if not is_leader:
+            logger.debug(f"合并并发请求,等待进行中的获取: {self.name}:{key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            # 等锁期间其他线程可能刚完成同key的获取
+            value = None if force_refresh else self.service.memory.get(self._prefix + key, max_age=max_age)
+            if value is None:
+                logger.debug(f"缓存未命中,获取数据: {self.name}:{key}")
+                self._stats['fetch_calls'] += 1
+                value = fetcher()
+                if value is not None:
+                    self.set(key, value, ttl=ttl, market=market)
+            call.result = value
+            return value
+        except Exception as e:
+            logger.error(f"获取数据失败 {self.name}:{key}: {e}")
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def resolve_ttl(self, ttl: Optional[float] = None, market: Optional[str] = None) -> Optional[float]:
+        """
+        计算写入时的TTL
+
+        显式ttl优先 (NO_EXPIRY返回None, 即不过期); 否则有所属市场时取距下一个收盘
+        (加发布延迟)的秒数, 盘中不超过命名空间TTL; 都没有时使用命名空间TTL
+        """
+        if ttl is not None:
+            return None if ttl == NO_EXPIRY else ttl
+        market = market or self.policy.market
+        if market is None:
+            return self.policy.ttl
+        return get_trading_calendar().ttl(market, intraday_ttl=self.policy.ttl)
+
+    def delete(self, key: str) -> None:
+        """删除内存层和磁盘层的条目"""
+        self.service.memory.pop(self._prefix + key)
+        self.file_path(key).unlink(missing_ok=True)
+
+    def clear(self, files: bool = True) -> None:
+        """
+        清空命名空间
+
+        Args:
+            files: 是否同时删除磁盘层文件
+        """
+        self.service.memory.clear(self._prefix)
+        if files and self.directory.exists():
+            for cache_file in self.directory.glob(f'*/*{CACHE_FILE_SUFFIX}'):
+                cache_file.unlink(missing_ok=True)
+
+    def purge_expired(self) -> int:
+        """
+        清理内存层和磁盘层的过期条目
+
+        Returns:
+            清理数量
+        """
+        cleaned = self.service.memory.purge_expired(self._prefix)
+        if not self.directory.exists():
+            return cleaned
+
+        now = time.time()
+        for cache_file in self.directory.glob(f'*/*{CACHE_FILE_SUFFIX}'):
+            try:
+                _, expire_at = read_entry(cache_file)
+                expired = expire_at is not None and now >= expire_at
+            except Exception:
+                # 损坏的缓存文件也删除
+                expired = True
+            if expired:
+                cache_file.unlink(missing_ok=True)
+                cleaned += 1
+        return cleaned
+
+    def remove_files_older_than(self, seconds: float) -> int:
+        """
+        删除写入时间早于 seconds 秒前的磁盘层文件
+
+        Returns:
+            删除数量
+        """
+        if not self.directory.exists():
+            return 0
+        cutoff = time.time() - seconds
+        deleted = 0
+        for cache_file in self.directory.glob(f'*/*{CACHE_FILE_SUFFIX}'):
+            try:
+                if cache_file.stat().st_mtime < cutoff:
+                    cache_file.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    def file_path(self, key: str) -> Path:
+        """生成缓存文件路径 (MD5作文件名避免特殊字符, 前两位作为子目录分散文件)"""
+        hash_key = hashlib.md5(key.encode()).hexdigest()
+        return self.directory / hash_key[:2] / f'{hash_key}{CACHE_FILE_SUFFIX}'
+
+    def memory_keys(self) -> list:
+        """内存层中本命名空间的键 (不含前缀)"""
+        return [key[len(self._prefix):] for key in self.service.memory.keys(self._prefix)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命名空间统计"""
+        memory_keys = self.service.memory.keys(self._prefix)
+        lookups = self._stats['memory_hits'] + self._stats['file_hits'] + self._stats['misses']
+        hits = lookups - self._stats['misses']
+        return {
+            'ttl': self.policy.ttl,
+            'market': self.policy.market,
+            'persist': self.persist,
+            'memory_entries': len(memory_keys),
+            'memory_bytes': self.service.memory.size_of(self._prefix),
+            **self._stats,
+            'inflight_calls': len(self._inflight),
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+
+    def _read_file(self, key: str, max_age: Optional[float], backfill: bool = True) -> Optional[Any]:
+        """读取磁盘层, 过期或校验失败视为未命中并删除文件; 命中时回填内存层"""
+        cache_file = self.file_path(key)
+        try:
+            mtime = cache_file.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+        now = time.time()
+        if max_age is not None and now - mtime > max_age:
+            cache_file.unlink(missing_ok=True)
+            return None
+
+        try:
+            value, expire_at = read_entry(cache_file)
+        except (CacheCodecError, OSError) as e:
+            logger.warning(f"读取文件缓存失败 {self.name}:{key}: {e}")
+            value, expire_at = None, now
+        except Exception as e:
+            logger.warning(f"解码文件缓存失败 {self.name}:{key}: {e}")
+            value, expire_at = None, now
+
+        if expire_at is not None and now >= expire_at:
+            cache_file.unlink(missing_ok=True)
+            return None
+
+        if backfill and value is not None:
+            remaining = None if expire_at is None else expire_at - now
+            self.service.memory.set(self._prefix + key, value, ttl=remaining, created_at=mtime)
+        return value
+
+
+class CacheService:
+    """
+    分层缓存服务
+
+    特性:
+    - 共享内存层: 全部命名空间共用一个字节预算
+    - 磁盘层: 按命名空间策略落盘, 文件带校验和与过期时间
+    - 命名空间: 每类数据独立的TTL/落盘策略和统计
+    - 线程安全: 同键并发未命中合并为一次获取
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        enable_file_cache: bool = True,
+        memory_max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        memory_max_entries: Optional[int] = None,
+        policies: Optional[Dict[str, NamespacePolicy]] = None
+    ):
+        """
+        初始化缓存服务
+
+        Args:
+            cache_dir: 磁盘层根目录, 默认为项目根目录/data/cache
+            enable_file_cache: 是否启用磁盘层
+            memory_max_bytes: 内存层字节预算, None表示不限
+            memory_max_entries: 内存层条目上限, None表示不限
+            policies: 覆盖默认的命名空间策略
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.enable_file_cache = enable_file_cache
+        if self.enable_file_cache:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.memory = MemoryCache(max_bytes=memory_max_bytes, max_entries=memory_max_entries)
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+
+        self._namespaces: Dict[str, CacheNamespace] = {}
+        self._lock = threading.Lock()
+
+    def namespace(self, name: str, policy: Optional[NamespacePolicy] = None) -> CacheNamespace:
+        """
+        获取命名空间 (同名返回同一实例)
+
+        Args:
+            name: 命名空间名称
+            policy: 首次创建时使用的策略, None时取注册的默认策略
+
+        Returns:
+            CacheNamespace
+        """
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is None:
+                policy = policy or self.policies.get(name, _DEFAULT_POLICY)
+                ns = CacheNamespace(self, name, policy)
+                self._namespaces[name] = ns
+            return ns
+
+    def clear_memory(self) -> None:
+        """清空共享内存层"""
+        self.memory.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取内存层和各命名空间统计"""
+        return {
+            'memory': self.memory.get_stats(),
+            'namespaces': {name: ns.get_stats() for name, ns in list(self._namespaces.items())},
+        }
+
+
+# 全局单例实例
+_global_cache_service: Optional[CacheService] = None
+_global_lock = threading.Lock()
+
+
+def get_cache_service() -> CacheService:
+    """获取进程内共享的缓存服务单例"""
+    global _global_cache_service
+    if _global_cache_service is None:
+        with _global_lock:
+            if _global_cache_service is None:
+                _global_cache_service = CacheService()
+    return _global_cache_service
+
+
+def set_cache_service(service: Optional[CacheService]) -> None:
+    """替换进程内共享的缓存服务 (如录制/回放时隔离缓存目录), None表示下次重新创建"""
+    global _global_cache_service
+    with _global_lock:
+        _global_cache_service = service
+
+
+def get_namespace(name: str) -> CacheNamespace:
+    """便捷函数: 获取共享缓存服务的命名空间"""
+    return get_cache_service().namespace(name)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+局部极值(峰/谷)识别
+Local Extrema Kernel
+
+背离分析、量价关系、支撑压力位共用的峰谷识别:
+- 邻域极值: 对 ±order 范围内的 2*order 个平移视图逐个取 max/min,
+  得到每个位置的邻域最大/最小值, 与中心值比较一次得到全部候选
+- 严格(strict): 中心值严格大于(小于)所有邻居
+- 非严格: 中心值等于含自身窗口的最大(最小)值, 平台上的每个点都算
+- 最小间隔: 按时间顺序贪心保留, 与上一个保留点的距离不足 min_distance 的候选丢弃
+
+只有首尾各 order 根以外的位置参与识别, 与原逐点循环的范围一致。
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def _neighbor_extreme(values: np.ndarray, order: int, kind: str, skip_nan: bool) -> np.ndarray:
+    """
+    位置 order..n-order-1 的邻域(不含自身)最大/最小值
+
+    skip_nan=True 时 NaN 邻居不参与(全为NaN时结果为NaN), 否则NaN会传播
+    """
+    n = len(values)
+    if kind == 'max':
+        reduce = np.fmax if skip_nan else np.maximum
+    else:
+        reduce = np.fmin if skip_nan else np.minimum
+
+    result = None
+    for j in range(1, order + 1):
+        pair = reduce(values[order - j:n - order - j], values[order + j:n - order + j])
+        result = pair if result is None else reduce(result, pair)
+    return result
+
+
+def _suppress_close(positions: np.ndarray, min_distance: int) -> np.ndarray:
+    """按时间顺序贪心保留, 相邻保留点距离 >= min_distance"""
+    if min_distance <= 1 or len(positions) < 2 or (np.diff(positions) >= min_distance).all():
+        return positions
+
+    kept = [positions[0]]
+    for pos in positions[1:]:
+        if pos - kept[-1] >= min_distance:
+            kept.append(pos)
+    return np.asarray(kept, dtype=positions.dtype)
+
+
+def _local_extrema(
+    values,
+    order: int,
+    kind: str,
+    strict: bool,
+    min_distance: int,
+    skip_nan: bool
+) -> np.ndarray:
+    data = np.asarray(values, dtype=float)
+    n = len(data)
+    if order < 0:
+        raise ValueError(f"order 必须为非负整数: {order}")
+    if n < 2 * order + 1:
+        return np.empty(0, dtype=np.intp)
+
+    center = data[order:n - order]
+    if order == 0:
+        # 无邻居: 每个点都满足条件
+        mask = np.ones(len(center), dtype=bool)
+    else:
+        neighbor = _neighbor_extreme(data, order, kind, skip_nan)
+        if strict and skip_nan:
+            # 与逐个邻居判断 "not (x <= 邻居)" 一致: 与NaN的比较不会否定候选
+            mask = ~(center <= neighbor) if kind == 'max' else ~(center >= neighbor)
+        elif strict:
+            mask = center > neighbor if kind == 'max' else center < neighbor
+        else:
+            mask = center >= neighbor if kind == 'max' else center <= neighbor
+
+    positions = np.flatnonzero(mask) + order
+    return _suppress_close(positions, min_distance)
+
+
+def local_maxima(
+    values,
+    order: int,
+    strict: bool = True,
+    min_distance: int = 0,
+    skip_nan: bool = False
+) -> np.ndarray:
+    """
+    局部最大值(峰)位置
+
+    Args:
+        values: 一维序列 (ndarray / Series / list)
+        order: 邻域半径, 与两侧各 order 个点比较
+        strict: True 要求严格大于所有邻居; False 允许与邻居相等(平台)
+        min_distance: 相邻峰的最小间隔, <=1 表示不限制
+        skip_nan: 忽略NaN邻居 (对应 `x <= 邻居` 逐个否定的写法);
+                  False 时任何NaN邻居都会使该位置不成立 (对应 `all(x > 邻居)` 的写法)
+
+    Returns:
+        升序的位置数组
+    """
+    return _local_extrema(values, order, 'max', strict, min_distance, skip_nan)
+
+
+def local_minima(
+    values,
+    order: int,
+    strict: bool = True,
+    min_distance: int = 0,
+    skip_nan: bool = False
+) -> np.ndarray:
+    """局部最小值(谷)位置, 参数同 local_maxima"""
+    return _local_extrema(values, order, 'min', strict, min_distance, skip_nan)
+
+
+def find_extrema(
+    values,
+    order: int,
+    strict: bool = True,
+    min_distance: int = 0,
+    skip_nan: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    同时识别峰和谷 (峰、谷各自独立做最小间隔过滤)
+
+    Returns:
+        (峰位置, 谷位置)
+    """
+    data = np.asarray(values, dtype=float)
+    return (
+        local_maxima(data, order, strict, min_distance, skip_nan),
+        local_minima(data, order, strict, min_distance, skip_nan),
+    )
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存缓存层
+In-Process Memory Cache
+
+按字节预算约束的LRU内存缓存, 供 CacheService 作为共享内存层使用:
+1. 容量 - 按对象实际占用字节计数 (DataFrame用 memory_usage(deep=True)), 超出预算淘汰最久未用条目
+2. 过期 - 写入时可指定TTL, 读取时也可按最大存活时间判断
+3. 统计 - 命中/未命中/淘汰/过期计数, 当前字节数
+
+长驻进程(FastAPI、定时任务)中避免多年日线DataFrame无限累积。
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+# 默认内存预算 256MB
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 容器估算的最大递归深度, 更深的嵌套只计浅层大小
+_MAX_SIZE_DEPTH = 4
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """
+    估算对象占用的内存字节数
+
+    - DataFrame/Series/Index: memory_usage(deep=True) (含object列字符串)
+    - numpy数组: nbytes
+    - dict/list/tuple/set: 容器本身 + 元素递归估算
+    - 其他: sys.getsizeof
+    """
+    memory_usage = getattr(obj, 'memory_usage', None)
+    if callable(memory_usage):
+        try:
+            usage = memory_usage(deep=True)
+            total = getattr(usage, 'sum', None)
+            return int(total() if callable(total) else usage)
+        except Exception:
+            pass
+
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    size = sys.getsizeof(obj, 0)
+    if _depth >= _MAX_SIZE_DEPTH:
+        return size
+
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, _depth + 1)
+    return size
+
+
+class _Entry:
+    """缓存条目"""
+
+    __slots__ = ('value', 'size', 'created_at', 'expire_at')
+
+    def __init__(self, value: Any, size: int, created_at: float, expire_at: Optional[float]):
+        self.value = value
+        self.size = size
+        self.created_at = created_at
+        self.expire_at = expire_at
+
+
+class MemoryCache:
+    """
+    字节预算LRU内存缓存 (线程安全)
+
+    特性:
+    - 字节预算: 总占用超过max_bytes时按LRU顺序淘汰
+    - 条目上限: 可选max_entries限制条目数
+    - TTL: set时指定ttl, get时可再用max_age按写入时间判断
+    - 统计: hits/misses/evictions/expirations/rejections
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        max_entries: Optional[int] = None,
+        default_ttl: Optional[float] = None
+    ):
+        """
+        初始化内存缓存
+
+        Args:
+            max_bytes: 字节预算, None表示不限
+            max_entries: 条目数上限, None表示不限
+            default_ttl: set未指定ttl时的默认过期时间(秒), None表示不过期
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._current_bytes = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'rejections': 0,
+        }
+
+    def get(self, key: str, default: Any = None, max_age: Optional[float] = None) -> Any:
+        """
+        获取缓存值, 命中时标记为最近使用
+
+        Args:
+            key: 缓存键
+            default: 未命中时返回值
+            max_age: 写入后最大存活秒数, 与条目自身TTL同时生效
+
+        Returns:
+            缓存值或default
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+
+            if self._is_expired(entry, now, max_age):
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry.value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        size: Optional[int] = None,
+        created_at: Optional[float] = None
+    ) -> bool:
+        """
+        写入缓存, 必要时淘汰最久未用条目
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间(秒), None使用default_ttl
+            size: 已知的占用字节数, None时自动估算
+            created_at: 数据产生时间(Unix时间戳), 从下层回填时传入原写入时间, 供max_age判断
+
+        Returns:
+            是否写入 (单个对象超过整个预算时拒绝写入)
+        """
+        if size is None:
+            size = estimate_size(value)
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expire_at = None if ttl is None else now + ttl
+        created_at = now if created_at is None else created_at
+
+        with self._lock:
+            self._remove(key)
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._stats['rejections'] += 1
+                return False
+
+            self._entries[key] = _Entry(value, size, created_at, expire_at)
+            self._current_bytes += size
+            self._evict(now)
+            return True
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """删除并返回缓存值"""
+        with self._lock:
+            entry = self._remove(key)
+            return default if entry is None else entry.value
+
+    def clear(self, prefix: Optional[str] = None) -> int:
+        """
+        清空缓存 (统计计数保留)
+
+        Args:
+            prefix: 只清除以此开头的键, None表示全部
+
+        Returns:
+            清除数量
+        """
+        with self._lock:
+            if prefix is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self._current_bytes = 0
+                return count
+            keys = self.keys(prefix)
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def purge_expired(self, prefix: Optional[str] = None) -> int:
+        """
+        清理已过期条目
+
+        Args:
+            prefix: 只清理以此开头的键, None表示全部
+
+        Returns:
+            清理数量
+        """
+        now = time.time()
+        with self._lock:
+            expired = [k for k in self.keys(prefix) if self._is_expired(self._entries[k], now)]
+            for key in expired:
+                self._remove(key)
+            self._stats['expirations'] += len(expired)
+            return len(expired)
+
+    def keys(self, prefix: Optional[str] = None) -> List[str]:
+        """缓存键列表 (从最久未用到最近使用), 可按前缀过滤"""
+        with self._lock:
+            if prefix is None:
+                return list(self._entries.keys())
+            return [key for key in self._entries if key.startswith(prefix)]
+
+    def size_of(self, prefix: str) -> int:
+        """以prefix开头的条目占用字节数"""
+        with self._lock:
+            return sum(e.size for k, e in self._entries.items() if k.startswith(prefix))
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry, time.time())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    @property
+    def current_bytes(self) -> int:
+        """当前占用字节数"""
+        return self._current_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+            }
+
+    def _is_expired(self, entry: _Entry, now: float, max_age: Optional[float] = None) -> bool:
+        if entry.expire_at is not None and now >= entry.expire_at:
+            return True
+        return max_age is not None and now - entry.created_at > max_age
+
+    def _remove(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._current_bytes -= entry.size
+        return entry
+
+    def _evict(self, now: float) -> None:
+        """超出预算时先清理过期条目, 再按LRU顺序淘汰"""
+        if not self._over_budget():
+            return
+
+        expired = [k for k, e in self._entries.items() if self._is_expired(e, now)]
+        for key in expired:
+            self._remove(key)
+        self._stats['expirations'] += len(expired)
+
+        while self._over_budget() and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._current_bytes -= entry.size
+            self._stats['evictions'] += 1
+
+    def _over_budget(self) -> bool:
+        if self.max_bytes is not None and self._current_bytes > self.max_bytes:
+            return True
+        return self.max_entries is not None and len(self._entries) > self.max_entries
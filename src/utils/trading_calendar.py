@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交易日历
+Trading Calendar
+
+本地维护的各市场交易日历 (休市日 + 提前收盘表), 用于:
+1. 判断最近一个已收盘交易日 / 是否处于交易时段 (K线仓库增量刷新)
+2. 计算缓存条目的过期时间: 日线类数据在下一个收盘(加数据发布延迟)时过期,
+   周末和节假日不会重复拉取, 收盘后也不会继续使用收盘前的数据
+
+休市表覆盖 HOLIDAY_YEARS 内的年份; 超出范围的日期只按周末判断。
+加密货币 7x24 交易, 以UTC零点作为日线切分。
+"""
+
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, FrozenSet, Iterable, Optional
+from zoneinfo import ZoneInfo
+
+# 各市场交易时段 (交易所本地时区)
+# publish_delay: 收盘后数据源发布当日日线所需的时间, 在此之前拿到的仍可能是收盘前数据
+MARKET_SESSIONS = {
+    'cn': {'tz': 'Asia/Shanghai', 'open': dtime(9, 30), 'close': dtime(15, 0), 'publish_delay': 15},
+    'hk': {'tz': 'Asia/Hong_Kong', 'open': dtime(9, 30), 'close': dtime(16, 10), 'publish_delay': 15},
+    'us': {'tz': 'America/New_York', 'open': dtime(9, 30), 'close': dtime(16, 0), 'publish_delay': 15},
+    'crypto': {'tz': 'UTC', 'open': dtime(0, 0), 'close': dtime(0, 0), 'publish_delay': 5},
+}
+
+HOLIDAY_YEARS = (2025, 2026)
+
+
+def _dates(*values: str) -> FrozenSet[date]:
+    return frozenset(date.fromisoformat(v) for v in values)
+
+
+# 工作日休市日 (周末不列出)
+MARKET_HOLIDAYS: Dict[str, FrozenSet[date]] = {
+    # 上交所/深交所
+    'cn': _dates(
+        '2025-01-01',
+        '2025-01-28', '2025-01-29', '2025-01-30', '2025-01-31', '2025-02-03', '2025-02-04',
+        '2025-04-04',
+        '2025-05-01', '2025-05-02', '2025-05-05',
+        '2025-06-02',
+        '2025-10-01', '2025-10-02', '2025-10-03', '2025-10-06', '2025-10-07', '2025-10-08',
+        '2026-01-01', '2026-01-02',
+        '2026-02-16', '2026-02-17', '2026-02-18', '2026-02-19', '2026-02-20', '2026-02-23',
+        '2026-04-06',
+        '2026-05-01', '2026-05-04', '2026-05-05',
+        '2026-06-19',
+        '2026-09-25',
+        '2026-10-01', '2026-10-02', '2026-10-05', '2026-10-06', '2026-10-07',
+    ),
+    # 港交所
+    'hk': _dates(
+        '2025-01-01',
+        '2025-01-29', '2025-01-30', '2025-01-31',
+        '2025-04-04', '2025-04-18', '2025-04-21',
+        '2025-05-01', '2025-05-05',
+        '2025-07-01',
+        '2025-10-01', '2025-10-07', '2025-10-29',
+        '2025-12-25', '2025-12-26',
+        '2026-01-01',
+        '2026-02-17', '2026-02-18', '2026-02-19',
+        '2026-04-03', '2026-04-06', '2026-04-07',
+        '2026-05-01', '2026-05-25',
+        '2026-06-19',
+        '2026-07-01',
+        '2026-10-01', '2026-10-19',
+        '2026-12-25',
+    ),
+    # 纽交所/纳斯达克
+    'us': _dates(
+        '2025-01-01', '2025-01-09', '2025-01-20', '2025-02-17', '2025-04-18', '2025-05-26',
+        '2025-06-19', '2025-07-04', '2025-09-01', '2025-11-27', '2025-12-25',
+        '2026-01-01', '2026-01-19', '2026-02-16', '2026-04-03', '2026-05-25',
+        '2026-06-19', '2026-07-03', '2026-09-07', '2026-11-26', '2026-12-25',
+    ),
+}
+
+# 提前收盘 (半日市)
+EARLY_CLOSES: Dict[str, Dict[date, dtime]] = {
+    'hk': {
+        date(2025, 1, 28): dtime(12, 10), date(2025, 12, 24): dtime(12, 10), date(2025, 12, 31): dtime(12, 10),
+        date(2026, 2, 16): dtime(12, 10), date(2026, 12, 24): dtime(12, 10), date(2026, 12, 31): dtime(12, 10),
+    },
+    'us': {
+        date(2025, 7, 3): dtime(13, 0), date(2025, 11, 28): dtime(13, 0), date(2025, 12, 24): dtime(13, 0),
+        date(2026, 11, 27): dtime(13, 0), date(2026, 12, 24): dtime(13, 0),
+    },
+}
+
+# 向前/向后查找交易日的最大天数 (最长假期远小于此值)
+_MAX_SCAN_DAYS = 30
+
+
+class TradingCalendar:
+    """按市场查询交易日、收盘时间和缓存过期时间"""
+
+    def __init__(
+        self,
+        holidays: Optional[Dict[str, Iterable[date]]] = None,
+        early_closes: Optional[Dict[str, Dict[date, dtime]]] = None
+    ):
+        """
+        初始化交易日历
+
+        Args:
+            holidays: 覆盖默认休市表 {market: [date, ...]}
+            early_closes: 覆盖默认提前收盘表 {market: {date: 收盘时间}}
+        """
+        self.holidays = {m: frozenset(d) for m, d in (holidays or MARKET_HOLIDAYS).items()}
+        self.early_closes = early_closes if early_closes is not None else EARLY_CLOSES
+
+    @staticmethod
+    def session(market: str) -> Dict:
+        """市场交易时段配置, 未知市场按A股处理"""
+        return MARKET_SESSIONS.get(market, MARKET_SESSIONS['cn'])
+
+    def _now(self, market: str, now: Optional[datetime]) -> datetime:
+        tz = ZoneInfo(self.session(market)['tz'])
+        return (now or datetime.now().astimezone()).astimezone(tz)
+
+    def is_trading_day(self, market: str, day: date) -> bool:
+        """是否为交易日"""
+        if market == 'crypto':
+            return True
+        return day.weekday() < 5 and day not in self.holidays.get(market, ())
+
+    def close_time(self, market: str, day: date) -> dtime:
+        """指定交易日的收盘时间 (含半日市)"""
+        return self.early_closes.get(market, {}).get(day, self.session(market)['close'])
+
+    def session_close(self, market: str, day: date) -> datetime:
+        """指定交易日收盘的带时区时间 (加密货币为次日UTC零点)"""
+        tz = ZoneInfo(self.session(market)['tz'])
+        if market == 'crypto':
+            return datetime.combine(day + timedelta(days=1), dtime(0, 0), tz)
+        return datetime.combine(day, self.close_time(market, day), tz)
+
+    def last_completed_session(self, market: str, now: Optional[datetime] = None) -> date:
+        """
+        最近一个已收盘交易日
+
+        Args:
+            market: cn/hk/us/crypto
+            now: 当前时间 (带时区或本地时间), 默认当前时间
+        """
+        now = self._now(market, now)
+        if market == 'crypto':
+            return now.date() - timedelta(days=1)
+
+        day = now.date()
+        if not self.is_trading_day(market, day) or now.time() < self.close_time(market, day):
+            day -= timedelta(days=1)
+        for _ in range(_MAX_SCAN_DAYS):
+            if self.is_trading_day(market, day):
+                return day
+            day -= timedelta(days=1)
+        return day
+
+    def is_in_session(self, market: str, now: Optional[datetime] = None) -> bool:
+        """当前是否处于交易时段"""
+        if market == 'crypto':
+            return True
+        now = self._now(market, now)
+        day = now.date()
+        return (self.is_trading_day(market, day)
+                and self.session(market)['open'] <= now.time() < self.close_time(market, day))
+
+    def next_close(self, market: str, now: Optional[datetime] = None, delay_minutes: float = 0) -> datetime:
+        """
+        now之后的下一个收盘时间
+
+        Args:
+            market: cn/hk/us/crypto
+            now: 当前时间
+            delay_minutes: 收盘后的顺延分钟数, 在 [收盘, 收盘+顺延) 内返回当天的时间点
+
+        Returns:
+            带时区的收盘(+顺延)时间
+        """
+        now = self._now(market, now)
+        delay = timedelta(minutes=delay_minutes)
+        day = now.date() - timedelta(days=1)
+        for _ in range(_MAX_SCAN_DAYS):
+            if self.is_trading_day(market, day):
+                boundary = self.session_close(market, day) + delay
+                if boundary > now:
+                    return boundary
+            day += timedelta(days=1)
+        return now + timedelta(days=1)
+
+    def next_open(self, market: str, now: Optional[datetime] = None) -> datetime:
+        """now之后的下一个开盘时间 (带时区; 加密货币不休市, 返回now)"""
+        now = self._now(market, now)
+        if market == 'crypto':
+            return now
+        tz = ZoneInfo(self.session(market)['tz'])
+        day = now.date()
+        for _ in range(_MAX_SCAN_DAYS):
+            if self.is_trading_day(market, day):
+                opening = datetime.combine(day, self.session(market)['open'], tz)
+                if opening > now:
+                    return opening
+            day += timedelta(days=1)
+        return now + timedelta(days=1)
+
+    def expire_at(
+        self,
+        market: str,
+        now: Optional[datetime] = None,
+        intraday_ttl: Optional[float] = None
+    ) -> float:
+        """
+        行情类缓存条目的过期时间
+
+        - 基准: 下一个收盘时间 + 数据发布延迟
+        - 盘中: 不超过 now + intraday_ttl (盘中数据仍在变化)
+        - 盘前/周末/节假日: 不超过 下一个开盘 + intraday_ttl, 开盘前写入的条目不会被整个交易时段沿用
+        - 收盘后到发布延迟结束之间: 基准时间之前不再开盘, 按基准过期
+
+        Returns:
+            Unix时间戳
+        """
+        now = self._now(market, now)
+        boundary = self.next_close(market, now, self.session(market)['publish_delay']).timestamp()
+        if intraday_ttl is None:
+            return boundary
+        if self.is_in_session(market, now):
+            return min(boundary, now.timestamp() + intraday_ttl)
+        opening = self.next_open(market, now).timestamp()
+        if opening < boundary:
+            return min(boundary, opening + intraday_ttl)
+        return boundary
+
+    def ttl(self, market: str, now: Optional[datetime] = None, intraday_ttl: Optional[float] = None) -> float:
+        """距 expire_at 的秒数"""
+        now = self._now(market, now)
+        return max(self.expire_at(market, now, intraday_ttl) - now.timestamp(), 0.0)
+
+
+# 全局单例实例
+_global_calendar: Optional[TradingCalendar] = None
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """获取共享的交易日历"""
+    global _global_calendar
+    if _global_calendar is None:
+        _global_calendar = TradingCalendar()
+    return _global_calendar
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上游数据调用录制/回放
+Upstream Record / Replay
+
+在模块边界拦截所有上游数据调用 (akshare / efinance / yfinance / requests),
+录制模式下把每次调用的响应按 (数据源, 函数名, 参数) 写入本地夹具目录,
+回放模式下直接从夹具返回, 不访问网络:
+- 性能测量不受网络抖动影响
+- 报告生成 (UnifiedAnalysisRunner / DailyPositionReportGenerator) 可离线回归测试
+
+参数中的日期 (datetime/Timestamp 及 2025-11-14 / 20251114 形式的字符串) 和
+Unix时间戳在生成键时被归一化为相对运行日期的天数偏移 (如 <date-1826d>),
+因此按当前时间计算起止日期的调用在之后回放时仍能命中, 而回溯窗口不同的调用互不混淆。
+上游抛出的异常也会被录制, 回放时以 RecordedUpstreamError 重新抛出。
+嵌套调用 (如akshare内部的requests请求) 只录制最外层。
+
+夹具按类型编码 (见 cache_codecs), 路径: <fixtures>/<数据源>/<函数名>/<键>.rtc,
+manifest.jsonl 记录每个键对应的调用签名便于排查。
+
+用法:
+    from src.utils.upstream_replay import activate
+    activate('record', 'data/fixtures/upstream/20251114')   # 真实运行并录制
+    activate('replay', 'data/fixtures/upstream/20251114')   # 离线回放
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import re
+import tempfile
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .cache_codecs import CacheCodecError, read_file, write_file
+
+logger = logging.getLogger(__name__)
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+FIXTURE_SUFFIX = '.rtc'
+DEFAULT_FIXTURES_DIR = Path(__file__).parent.parent.parent / 'data' / 'fixtures' / 'upstream'
+
+# 参与生成键的requests参数 (headers/timeout/proxies等不影响响应内容)
+_HTTP_KEY_KWARGS = ('params', 'data', 'json')
+
+# Session.request 的前几个位置参数
+_HTTP_POSITIONAL = ('method', 'url', 'params', 'data')
+
+_DATE_PATTERN = re.compile(r'(?<!\d)(?:19|20)\d{2}(-?)(?:0[1-9]|1[0-2])\1(?:0[1-9]|[12]\d|3[01])(?!\d)')
+_EPOCH_PATTERN = re.compile(r'(?<!\d)1\d{9}(?:\d{3})?(?!\d)')
+
+_ERROR_MARKER = '__upstream_error__'
+_MISSING = object()
+
+
+class ReplayMissError(RuntimeError):
+    """回放模式下找不到录制的响应"""
+
+
+class RecordedUpstreamError(RuntimeError):
+    """录制时上游抛出的异常, 回放时原样重新抛出"""
+
+
+def _relative_day(day: date, run_date: date, token: str) -> str:
+    """日期 -> 相对运行日期的天数偏移标记, 如 <date-1826d>"""
+    return f'<{token}{(day - run_date).days:+d}d>'
+
+
+def _normalize_date_text(match: 're.Match', run_date: date) -> str:
+    try:
+        day = datetime.strptime(match.group(0).replace('-', ''), '%Y%m%d').date()
+    except ValueError:  # 形如日期但不合法 (如 20250231)
+        return '<date>'
+    return _relative_day(day, run_date, 'date')
+
+
+def _normalize_epoch_text(match: 're.Match', run_date: date) -> str:
+    seconds = int(match.group(0))
+    if seconds >= 10 ** 12:  # 毫秒时间戳
+        seconds //= 1000
+    return _relative_day(datetime.fromtimestamp(seconds).date(), run_date, 'ts')
+
+
+def normalize_arg(value: Any, run_date: Optional[date] = None) -> Any:
+    """
+    把调用参数转换为与运行日期无关、可JSON序列化的形式
+
+    Args:
+        value: 调用参数
+        run_date: 运行日期, 参数中的日期/时间戳表示为相对它的天数偏移; 默认今天
+    """
+    run_date = run_date or date.today()
+    if isinstance(value, datetime):
+        return _relative_day(value.date(), run_date, 'date')
+    if isinstance(value, date):
+        return _relative_day(value, run_date, 'date')
+    if isinstance(value, str):
+        value = _DATE_PATTERN.sub(lambda m: _normalize_date_text(m, run_date), value)
+        return _EPOCH_PATTERN.sub(lambda m: _normalize_epoch_text(m, run_date), value)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [normalize_arg(v, run_date) for v in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, dict):
+        return {str(k): normalize_arg(v, run_date)
+                for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    # 其他对象(Session/DataFrame等)只保留类型名
+    return f'<{type(value).__name__}>'
+
+
+def http_key_args(args: Sequence, kwargs: Dict) -> Tuple[Tuple, Dict]:
+    """
+    requests.Session.request 的键参数: (方法, URL) + params/data/json
+
+    requests.get(url) 以关键字形式传入 method/url, 直接调用时也可能是位置参数;
+    URL中的日期和时间戳由 normalize_arg 归一化
+    """
+    named = dict(zip(_HTTP_POSITIONAL, args))
+    named.update(kwargs)
+    method = named.get('method')
+    return (
+        (str(method).upper() if method is not None else None, named.get('url')),
+        {k: named[k] for k in _HTTP_KEY_KWARGS if k in named}
+    )
+
+
+def call_key(
+    provider: str,
+    name: str,
+    args: Sequence,
+    kwargs: Dict,
+    run_date: Optional[date] = None
+) -> Tuple[str, str]:
+    """
+    生成调用键
+
+    Args:
+        run_date: 运行日期, 参数中的日期按相对它的偏移参与生成键; 默认今天
+
+    Returns:
+        (键, 调用签名)
+    """
+    signature = json.dumps(
+        [provider, name, normalize_arg(list(args), run_date), normalize_arg(kwargs, run_date)],
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha1(signature.encode('utf-8')).hexdigest()[:20], signature
+
+
+class FixtureStore:
+    """夹具目录: 每次上游调用一个文件"""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else DEFAULT_FIXTURES_DIR
+        self._lock = threading.Lock()
+
+    def path(self, provider: str, name: str, key: str) -> Path:
+        return self.root / provider / name.replace('/', '_') / f'{key}{FIXTURE_SUFFIX}'
+
+    def save(self, provider: str, name: str, key: str, value: Any, signature: str = '') -> None:
+        """写入夹具并在manifest中记录调用签名"""
+        codec = write_file(self.path(provider, name, key), value)
+        line = json.dumps({'provider': provider, 'name': name, 'key': key,
+                           'codec': codec, 'call': signature}, ensure_ascii=False)
+        with self._lock:
+            with open(self.root / 'manifest.jsonl', 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def load(self, provider: str, name: str, key: str) -> Any:
+        """读取夹具, 不存在时抛出 ReplayMissError"""
+        path = self.path(provider, name, key)
+        try:
+            return read_file(path)
+        except FileNotFoundError:
+            raise ReplayMissError(f"未录制的上游调用: {provider}.{name} ({key})") from None
+        except CacheCodecError as e:
+            raise ReplayMissError(f"夹具损坏: {path}: {e}") from None
+
+    def __contains__(self, item: Tuple[str, str, str]) -> bool:
+        return self.path(*item).exists()
+
+
+class UpstreamRecorder:
+    """
+    上游调用录制/回放器
+
+    install() 替换各数据源模块上的函数/方法, uninstall() 恢复原实现
+    """
+
+    def __init__(self, mode: str, store: FixtureStore, run_date: Optional[date] = None):
+        """
+        Args:
+            mode: record / replay
+            store: 夹具目录
+            run_date: 固定运行日期 (生成键时日期参数相对它归一化), 默认每次调用取当天
+        """
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"不支持的模式: {mode}")
+        self.mode = mode
+        self.store = store
+        self.run_date = run_date
+        self.missed: List[str] = []
+
+        self._patches: List[Tuple[Any, str, Any]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'recorded': 0, 'replayed': 0, 'misses': 0, 'errors': 0}
+
+    # ------------------------------------------------------------------
+    # 拦截
+    # ------------------------------------------------------------------
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def call(
+        self,
+        provider: str,
+        name: str,
+        func: Callable,
+        args: Sequence,
+        kwargs: Dict,
+        key_args: Optional[Sequence] = None,
+        key_kwargs: Optional[Dict] = None,
+        encode: Optional[Callable[[Any], Any]] = None,
+        decode: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        执行(录制)或回放一次上游调用
+
+        Args:
+            provider: 数据源名称
+            name: 函数名
+            func: 原始函数
+            args / kwargs: 调用参数
+            key_args / key_kwargs: 生成键使用的参数, 默认同调用参数
+            encode / decode: 响应与夹具值之间的转换 (如 requests.Response)
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            # 嵌套调用: 由最外层统一录制
+            return func(*args, **kwargs)
+
+        key, signature = call_key(
+            provider, name,
+            args if key_args is None else key_args,
+            kwargs if key_kwargs is None else key_kwargs,
+            self.run_date
+        )
+
+        if self.mode == MODE_REPLAY:
+            try:
+                value = self.store.load(provider, name, key)
+            except ReplayMissError:
+                self._count('misses')
+                with self._lock:
+                    self.missed.append(signature)
+                logger.warning(f"回放未命中: {signature}")
+                raise
+            self._count('replayed')
+            if isinstance(value, dict) and _ERROR_MARKER in value:
+                raise RecordedUpstreamError(f"{value[_ERROR_MARKER]}: {value['message']}")
+            return decode(value) if decode else value
+
+        self._local.depth = depth + 1
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._save(provider, name, key, {_ERROR_MARKER: type(e).__name__, 'message': str(e)}, signature)
+            self._count('errors')
+            raise
+        finally:
+            self._local.depth = depth
+
+        self._save(provider, name, key, encode(result) if encode else result, signature)
+        self._count('recorded')
+        return result
+
+    def _save(self, provider: str, name: str, key: str, value: Any, signature: str) -> None:
+        try:
+            self.store.save(provider, name, key, value, signature)
+        except Exception as e:
+            logger.warning(f"录制上游响应失败 {provider}.{name}: {e}")
+
+    # ------------------------------------------------------------------
+    # 安装
+    # ------------------------------------------------------------------
+
+    def _patch(self, owner: Any, attr: str, replacement: Any) -> None:
+        # 类属性可能继承自基类, 恢复时删除而不是写回
+        original = owner.__dict__.get(attr, _MISSING) if inspect.isclass(owner) else getattr(owner, attr)
+        setattr(owner, attr, replacement)
+        self._patches.append((owner, attr, original))
+
+    def wrap_function(self, owner: Any, attr: str, provider: str, name: Optional[str] = None) -> None:
+        """拦截模块级函数 owner.attr"""
+        original = getattr(owner, attr)
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            return self.call(provider, name or attr, original, args, kwargs)
+
+        self._patch(owner, attr, wrapper)
+
+    def wrap_module(self, module: Any, provider: str) -> int:
+        """拦截模块上所有公开函数, 返回拦截数量"""
+        names = [attr for attr in dir(module)
+                 if not attr.startswith('_') and inspect.isfunction(getattr(module, attr))]
+        for attr in names:
+            self.wrap_function(module, attr, provider)
+        return len(names)
+
+    def wrap_method(
+        self,
+        cls: type,
+        attr: str,
+        provider: str,
+        identity: Callable[[Any], Any],
+        key_kwargs: Optional[Sequence[str]] = None,
+        encode: Optional[Callable[[Any], Any]] = None,
+        decode: Optional[Callable[[Any], Any]] = None,
+        key_builder: Optional[Callable[[Sequence, Dict], Tuple[Sequence, Dict]]] = None
+    ) -> None:
+        """
+        拦截实例方法 cls.attr
+
+        Args:
+            identity: 从实例取参与生成键的标识 (如 Ticker.ticker)
+            key_kwargs: 只用这些关键字参数生成键, None表示全部
+            key_builder: 由 (args, kwargs) 生成 (键位置参数, 键关键字参数), 优先于 key_kwargs
+        """
+        original = getattr(cls, attr)
+        name = f'{cls.__name__}.{attr}'
+
+        @functools.wraps(original)
+        def wrapper(obj, *args, **kwargs):
+            if key_builder is not None:
+                key_args, selected = key_builder(args, kwargs)
+            else:
+                key_args = args
+                selected = kwargs if key_kwargs is None else {k: kwargs[k] for k in key_kwargs if k in kwargs}
+            return self.call(provider, name, original, (obj,) + args, kwargs,
+                             key_args=(identity(obj),) + tuple(key_args), key_kwargs=selected,
+                             encode=encode, decode=decode)
+
+        self._patch(cls, attr, wrapper)
+
+    def wrap_property(self, cls: type, attr: str, provider: str, identity: Callable[[Any], Any]) -> None:
+        """拦截只读属性 cls.attr"""
+        original = getattr(cls, attr)
+        name = f'{cls.__name__}.{attr}'
+
+        def getter(obj):
+            return self.call(provider, name, original.fget, (obj,), {}, key_args=(identity(obj),))
+
+        self._patch(cls, attr, property(getter))
+
+    def wrap_http(
+        self,
+        session_cls: type,
+        encode: Optional[Callable[[Any], Any]] = None,
+        decode: Optional[Callable[[Any], Any]] = None
+    ) -> None:
+        """拦截 session_cls.request, 键包含请求方法和URL"""
+        self.wrap_method(
+            session_cls, 'request', 'http',
+            identity=lambda session: None,
+            encode=encode or _encode_response,
+            decode=decode or _decode_response,
+            key_builder=http_key_args
+        )
+
+    def install(self) -> 'UpstreamRecorder':
+        """拦截已安装的各数据源"""
+        try:
+            import akshare as ak
+            count = self.wrap_module(ak, 'akshare')
+            logger.debug(f"已拦截 akshare {count} 个接口")
+        except ImportError:
+            pass
+
+        try:
+            import efinance as ef
+            for sub in ('stock', 'fund', 'bond', 'futures'):
+                if hasattr(ef, sub):
+                    self.wrap_module(getattr(ef, sub), f'efinance.{sub}')
+        except ImportError:
+            pass
+
+        try:
+            import yfinance as yf
+            self.wrap_function(yf, 'download', 'yfinance')
+            self.wrap_method(yf.Ticker, 'history', 'yfinance', identity=lambda t: t.ticker)
+            self.wrap_property(yf.Ticker, 'info', 'yfinance', identity=lambda t: t.ticker)
+        except ImportError:
+            pass
+
+        try:
+            import requests
+            self.wrap_http(requests.Session)
+        except ImportError:
+            pass
+
+        logger.info(f"上游调用{'录制' if self.mode == MODE_RECORD else '回放'}已启用: {self.store.root}")
+        return self
+
+    def uninstall(self) -> None:
+        """恢复所有被拦截的函数"""
+        for owner, attr, original in reversed(self._patches):
+            if original is _MISSING:
+                delattr(owner, attr)
+            else:
+                setattr(owner, attr, original)
+        self._patches.clear()
+
+    def __enter__(self) -> 'UpstreamRecorder':
+        return self.install()
+
+    def __exit__(self, *exc) -> None:
+        self.uninstall()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """录制/回放统计"""
+        with self._lock:
+            return {'mode': self.mode, 'fixtures_dir': str(self.store.root), **self._stats}
+
+
+def _encode_response(response) -> Dict[str, Any]:
+    return {
+        'status_code': response.status_code,
+        'url': response.url,
+        'encoding': response.encoding,
+        'headers': dict(response.headers),
+        'content': response.content,
+    }
+
+
+def _decode_response(value: Dict[str, Any]):
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+
+    response = Response()
+    response.status_code = value['status_code']
+    response.url = value['url']
+    response.encoding = value['encoding']
+    response.headers = CaseInsensitiveDict(value['headers'])
+    response._content = value['content']
+    return response
+
+
+# ----------------------------------------------------------------------
+# 全局开关
+# ----------------------------------------------------------------------
+
+_active_recorder: Optional[UpstreamRecorder] = None
+
+
+def activate(mode: str, fixtures_dir: Optional[Path] = None, isolate_cache: bool = True) -> UpstreamRecorder:
+    """
+    启用录制/回放 (须在创建分析器之前调用)
+
+    Args:
+        mode: record / replay
+        fixtures_dir: 夹具目录, 默认 data/fixtures/upstream
+        isolate_cache: 是否让缓存服务和K线仓库使用本次运行独立的临时目录;
+                       录制和回放都从空缓存开始, 两次运行发起的上游调用才一致
+
+    Returns:
+        UpstreamRecorder
+    """
+    global _active_recorder
+    deactivate()
+
+    if isolate_cache:
+        from .cache_service import CacheService, set_cache_service
+        from src.data_sources.bar_store import BarStore, set_bar_store
+
+        scratch = Path(tempfile.mkdtemp(prefix='upstream_replay_'))
+        set_cache_service(CacheService(cache_dir=scratch / 'cache'))
+        set_bar_store(BarStore(root=scratch / 'bars'))
+        logger.info(f"缓存已隔离到临时目录: {scratch}")
+
+    _active_recorder = UpstreamRecorder(mode, FixtureStore(fixtures_dir)).install()
+    return _active_recorder
+
+
+def deactivate() -> None:
+    """停用录制/回放"""
+    global _active_recorder
+    if _active_recorder is not None:
+        _active_recorder.uninstall()
+        _active_recorder = None
+
+
+def get_recorder() -> Optional[UpstreamRecorder]:
+    """当前启用的录制/回放器, 未启用时为None"""
+    return _active_recorder
+
+
+def add_replay_arguments(parser: argparse.ArgumentParser) -> None:
+    """为命令行入口添加 --record / --replay 参数"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--record', metavar='DIR', help='录制所有上游数据调用到夹具目录')
+    group.add_argument('--replay', metavar='DIR', help='从夹具目录回放上游数据调用(不联网)')
+
+
+def activate_from_args(args: argparse.Namespace) -> Optional[UpstreamRecorder]:
+    """按 --record / --replay 参数启用录制/回放"""
+    if getattr(args, 'record', None):
+        return activate(MODE_RECORD, Path(args.record))
+    if getattr(args, 'replay', None):
+        return activate(MODE_REPLAY, Path(args.replay))
+    return None
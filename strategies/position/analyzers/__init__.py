@@ -60,6 +60,7 @@ from .risk_detection import (
 # 量化因子
 from .quantitative import (
     Alpha101Engine,
+    Alpha101PanelEngine,
 )
 
 __all__ = [
@@ -98,4 +99,5 @@ __all__ = [
     'HKMarketTopDetector',
     # 量化因子
     'Alpha101Engine',
+    'Alpha101PanelEngine',
 ]
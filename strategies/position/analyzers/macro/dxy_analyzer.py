@@ -21,6 +21,9 @@ from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 import logging
 
+from src.data_sources.batch_downloader import get_rate_limiter
+from src.utils.cache_service import get_namespace
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,9 +57,8 @@ class DXYAnalyzer:
             lookback_days: 回溯天数,默认252天(1年)
         """
         self.lookback_days = lookback_days
-        self.cache = {}
-        self.cache_time = {}
-        self.cache_duration = 1800  # 30分钟缓存
+        # 共享缓存命名空间: 按美股交易日历在下一个收盘后过期, 盘中30分钟
+        self.cache = get_namespace('us_macro')
         logger.info("美元指数分析器初始化完成")
 
     def get_dxy_data(self, days: int = None) -> pd.DataFrame:
@@ -69,23 +71,26 @@ class DXYAnalyzer:
         Returns:
             DataFrame with columns: [date, close, high, low, volume]
         """
-        cache_key = "dxy_data"
+        if days is None:
+            days = self.lookback_days
+
+        # 按回溯窗口缓存整段历史, 不同days的调用共用一次下载
+        window = max(days, self.lookback_days)
+        cache_key = f"dxy_{window}"
 
         # 检查缓存
-        if cache_key in self.cache:
-            if (datetime.now() - self.cache_time[cache_key]).seconds < self.cache_duration:
-                logger.info("使用缓存的美元指数数据")
-                return self.cache[cache_key]
+        result = self.cache.get(cache_key)
+        if result is not None:
+            logger.info("使用缓存的美元指数数据")
+            return result.tail(days)
 
         try:
             logger.info(f"获取美元指数数据 ({self.DXY_TICKER})...")
 
-            if days is None:
-                days = self.lookback_days
-
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=days+30)
+            start_date = end_date - timedelta(days=window+30)
 
+            get_rate_limiter('yfinance').acquire()
             dxy = yf.Ticker(self.DXY_TICKER)
             df = dxy.history(start=start_date, end=end_date)
 
@@ -103,14 +108,13 @@ class DXYAnalyzer:
             })
 
             result = result.sort_values('date', ascending=True).reset_index(drop=True)
-            result = result.tail(days)
+            result = result.tail(window)
 
             # 缓存
-            self.cache[cache_key] = result
-            self.cache_time[cache_key] = datetime.now()
+            self.cache.set(cache_key, result)
 
             logger.info(f"美元指数数据获取成功: {len(result)} 条记录")
-            return result
+            return result.tail(days)
 
         except Exception as e:
             logger.error(f"获取美元指数数据失败: {str(e)}")
@@ -14,7 +14,6 @@ CN Stock Indicators Analyzer
 日期: 2025-10-12
 """
 
-import akshare as ak
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -335,20 +334,13 @@ class CNStockIndicators:
         try:
             logger.info(f"获取{symbol}实时数据...")
 
-            # 使用akshare获取实时行情
-            df = ak.stock_zh_a_spot_em()
+            # 从共享的全市场行情快照中按代码索引查询
+            from src.data_sources.a_share_snapshot import get_a_share_snapshot
+            row = get_a_share_snapshot().get(symbol)
 
-            if df is None or df.empty:
-                return {'error': '获取数据失败'}
-
-            # 查找指定股票
-            stock_data = df[df['代码'] == symbol]
-
-            if stock_data.empty:
+            if row is None:
                 return {'error': f'未找到股票{symbol}'}
 
-            row = stock_data.iloc[0]
-
             result = {
                 'symbol': symbol,
                 'name': row['名称'],
@@ -22,6 +22,8 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, Optional, List
 
+from src.utils.cache_service import get_namespace
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +46,8 @@ class MarginTradingAnalyzer:
             lookback_days: 回溯天数,默认252天(1年)
         """
         self.lookback_days = lookback_days
+        # 共享缓存命名空间: 按A股交易日历在下一个收盘后过期
+        self.cache = get_namespace('market_stats')
         logger.info("融资融券分析器初始化完成")
 
     def get_margin_data_sse(self, days: int = None) -> pd.DataFrame:
@@ -57,6 +61,11 @@ class MarginTradingAnalyzer:
             DataFrame with columns: [信用交易日期, 融资余额, 融资买入额, 融券余量, ...]
         """
         try:
+            df = self.cache.get('margin_sh')
+            if df is not None:
+                logger.info("使用缓存的上交所融资融券数据")
+                return df.tail(days or self.lookback_days)
+
             logger.info("获取上交所融资融券数据(宏观接口)...")
             # 使用宏观数据接口获取最新数据
             df = ak.macro_china_market_margin_sh()
@@ -79,6 +88,7 @@ class MarginTradingAnalyzer:
             # 转换日期格式
             df['信用交易日期'] = pd.to_datetime(df['信用交易日期'])
             df = df.sort_values('信用交易日期', ascending=True)
+            self.cache.set('margin_sh', df)
 
             # 筛选最近N天
             if days is None:
@@ -104,6 +114,11 @@ class MarginTradingAnalyzer:
             DataFrame with columns: [信用交易日期, 融资余额, 融资买入额, 融券余量, ...]
         """
         try:
+            df = self.cache.get('margin_sz')
+            if df is not None:
+                logger.info("使用缓存的深交所融资融券数据")
+                return df.tail(days or self.lookback_days)
+
             logger.info("获取深交所融资融券数据(宏观接口)...")
             # 使用宏观数据接口获取最新数据
             df = ak.macro_china_market_margin_sz()
@@ -126,6 +141,7 @@ class MarginTradingAnalyzer:
             # 转换日期格式
             df['信用交易日期'] = pd.to_datetime(df['信用交易日期'])
             df = df.sort_values('信用交易日期', ascending=True)
+            self.cache.set('margin_sz', df)
 
             # 筛选最近N天
             if days is None:
@@ -22,6 +22,8 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, Optional, List
 
+from src.utils.cache_service import get_namespace
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +46,8 @@ class MarketBreadthAnalyzer:
             lookback_days: 回溯天数,默认60天
         """
         self.lookback_days = lookback_days
+        # 共享缓存命名空间: 按A股交易日历在下一个收盘后过期
+        self.cache = get_namespace('market_stats')
         logger.info("市场宽度分析器初始化完成")
 
     def get_high_low_data(self) -> pd.DataFrame:
@@ -54,6 +58,11 @@ class MarketBreadthAnalyzer:
             DataFrame with columns: [date, close, high20, low20, high60, low60, high120, low120]
         """
         try:
+            df = self.cache.get('high_low')
+            if df is not None:
+                logger.info("使用缓存的新高新低数据")
+                return df.tail(self.lookback_days)
+
             logger.info("获取新高新低数据...")
             df = ak.stock_a_high_low_statistics()
 
@@ -64,6 +73,7 @@ class MarketBreadthAnalyzer:
             # 确保日期列格式正确
             df['date'] = pd.to_datetime(df['date'])
             df = df.sort_values('date', ascending=True)
+            self.cache.set('high_low', df)
 
             # 筛选最近N天
             df = df.tail(self.lookback_days)
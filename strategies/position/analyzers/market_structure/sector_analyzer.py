@@ -103,19 +103,20 @@ class SectorRotationAnalyzer:
         Returns:
             {ETF代码: DataFrame} 字典
         """
-        sector_data = {}
-
-        for etf_code in self.SECTOR_ETFS.keys():
-            try:
-                df = self.data_source.get_us_stock_hist(etf_code, period=period)
-                if not df.empty:
-                    sector_data[etf_code] = df
-                    logger.debug(f"{etf_code} ({self.SECTOR_ETFS[etf_code]}) 数据获取成功")
-                else:
-                    logger.warning(f"{etf_code} 数据为空")
-            except Exception as e:
-                logger.error(f"获取{etf_code}数据失败: {str(e)}")
-                continue
+        etf_codes = list(self.SECTOR_ETFS.keys())
+
+        try:
+            # 一次批量下载所有行业ETF, 缺失的代码由数据源回退为单代码请求
+            sector_data = self.data_source.get_multiple_stocks_hist(etf_codes, period=period)
+        except Exception as e:
+            logger.error(f"批量获取行业ETF数据失败: {str(e)}")
+            sector_data = {}
+
+        for etf_code in etf_codes:
+            if etf_code in sector_data:
+                logger.debug(f"{etf_code} ({self.SECTOR_ETFS[etf_code]}) 数据获取成功")
+            else:
+                logger.warning(f"{etf_code} 数据为空")
 
         logger.info(f"成功获取 {len(sector_data)}/{len(self.SECTOR_ETFS)} 个行业ETF数据")
         return sector_data
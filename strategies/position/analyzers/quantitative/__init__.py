@@ -3,8 +3,10 @@
 WorldQuant Alpha101等量化因子库
 """
 
-from .alpha101_factors import Alpha101Engine
+from .alpha101_factors import Alpha101Engine, Alpha101PanelEngine, score_universe
 
 __all__ = [
     'Alpha101Engine',
+    'Alpha101PanelEngine',
+    'score_universe',
 ]
@@ -8,17 +8,105 @@ Alpha101 因子库
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence, Union
 import yfinance as yf
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
 
+# ==================== 滚动窗口内核 ====================
+# 输入为 (日期 × 标的) 二维数组, 沿时间轴计算; 窗口内含NaN时结果为NaN
+# (与 rolling(window).apply 默认 min_periods=window 一致)。
+# 每个内核只在窗口偏移上做 window 次整表运算, 不再逐窗口调用Python函数。
+
+
+def _full_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """每个位置结尾的窗口是否完整且不含NaN"""
+    nan_count = np.cumsum(np.isnan(values), axis=0)
+    nan_count[window:] = nan_count[window:] - nan_count[:-window]
+    valid = nan_count == 0
+    valid[:window - 1] = False
+    return valid
+
+
+def rolling_rank(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    窗口最后一个值在窗口内的排名 / window (并列取平均排名)
+
+    与 rolling(window).apply(lambda x: pd.Series(x).rank().iloc[-1] / len(x)) 一致
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    n = len(values)
+    if window < 1 or n < window:
+        return out
+
+    last = values[window - 1:]
+    less = np.zeros(last.shape)
+    equal = np.zeros(last.shape)
+    for k in range(window - 1):
+        prev = values[k:n - window + 1 + k]
+        less += prev < last
+        equal += prev == last
+
+    # 平均排名 = 小于的个数 + (含自身的并列个数 + 1) / 2
+    out[window - 1:] = (less + (equal + 2) / 2) / window
+    out[~_full_windows(values, window)] = np.nan
+    return out
+
+
+def rolling_argext(values: np.ndarray, window: int, kind: str = 'max') -> np.ndarray:
+    """
+    窗口内最大(最小)值的位置 (0为窗口最早一天, 并列取最早)
+
+    与 rolling(window).apply(lambda x: x.argmax(), raw=True) 一致
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    n = len(values)
+    if window < 1 or n < window:
+        return out
+
+    best = values[:n - window + 1].copy()
+    position = np.zeros(best.shape)
+    for k in range(1, window):
+        current = values[k:n - window + 1 + k]
+        better = current > best if kind == 'max' else current < best
+        best = np.where(better, current, best)
+        position[better] = k
+
+    out[window - 1:] = position
+    out[~_full_windows(values, window)] = np.nan
+    return out
+
+
+def _apply_kernel(kernel, obj: Union[pd.Series, pd.DataFrame], window: int, **kwargs):
+    """对Series/DataFrame按列应用滚动内核, 保留索引"""
+    values = obj.to_numpy(dtype=float)
+    if isinstance(obj, pd.Series):
+        return pd.Series(kernel(values.reshape(-1, 1), window, **kwargs)[:, 0], index=obj.index, name=obj.name)
+    return pd.DataFrame(kernel(values, window, **kwargs), index=obj.index, columns=obj.columns)
+
+
+def classify_signals(positive_count: int, negative_count: int):
+    """按看多/看空因子个数给出信号强度和操作建议"""
+    if positive_count >= 7:
+        return 'strong_bullish', '✅ 强烈看多 - 多个因子共振'
+    elif positive_count >= 5:
+        return 'bullish', '⬆️ 看多 - 因子偏多'
+    elif negative_count >= 7:
+        return 'strong_bearish', '❌ 强烈看空 - 多个因子共振'
+    elif negative_count >= 5:
+        return 'bearish', '⬇️ 看空 - 因子偏空'
+    return 'neutral', '➡️ 中性 - 因子分歧'
+
+
 class Alpha101Engine:
     """Alpha101 因子计算引擎"""
 
-    def __init__(self, symbol: str, start_date: str = None, end_date: str = None):
+    def __init__(self, symbol: str, start_date: str = None, end_date: str = None,
+                 data: Optional[pd.DataFrame] = None):
         """
         初始化因子引擎
 
@@ -26,13 +114,17 @@ class Alpha101Engine:
             symbol: 股票代码
             start_date: 开始日期 (默认1年前)
             end_date: 结束日期 (默认今天)
+            data: 已有的日线 (Open/High/Low/Close/Volume 列), 传入时不再下载
         """
         self.symbol = symbol
         self.end_date = end_date or datetime.now().strftime('%Y-%m-%d')
         self.start_date = start_date or (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
 
         # 下载数据
-        self.data = yf.download(symbol, start=self.start_date, end=self.end_date, progress=False)
+        if data is not None:
+            self.data = data.copy()
+        else:
+            self.data = yf.download(symbol, start=self.start_date, end=self.end_date, progress=False)
 
         # 处理多层索引
         if isinstance(self.data.columns, pd.MultiIndex):
@@ -68,17 +160,15 @@ class Alpha101Engine:
 
     def ts_rank(self, series: pd.Series, window: int) -> pd.Series:
         """时间序列排名 (0-1标准化)"""
-        return series.rolling(window=window).apply(
-            lambda x: pd.Series(x).rank().iloc[-1] / len(x), raw=False
-        )
+        return _apply_kernel(rolling_rank, series, window)
 
     def ts_argmax(self, series: pd.Series, window: int) -> pd.Series:
         """时间序列最大值位置"""
-        return series.rolling(window=window).apply(lambda x: x.argmax(), raw=True)
+        return _apply_kernel(rolling_argext, series, window, kind='max')
 
     def ts_argmin(self, series: pd.Series, window: int) -> pd.Series:
         """时间序列最小值位置"""
-        return series.rolling(window=window).apply(lambda x: x.argmin(), raw=True)
+        return _apply_kernel(rolling_argext, series, window, kind='min')
 
     def delta(self, series: pd.Series, period: int = 1) -> pd.Series:
         """差分"""
@@ -112,6 +202,12 @@ class Alpha101Engine:
         """时间序列最小值"""
         return series.rolling(window=window).min()
 
+    def _like_close(self, values) -> pd.Series:
+        """把 np.where 结果包装成与收盘价相同的形状和索引"""
+        if isinstance(self.close, pd.DataFrame):
+            return pd.DataFrame(values, index=self.close.index, columns=self.close.columns)
+        return pd.Series(values, index=self.close.index)
+
     # ==================== Top 10 Alpha因子 ====================
 
     def alpha001(self) -> pd.Series:
@@ -126,7 +222,7 @@ class Alpha101Engine:
         stddev_20 = self.ts_std(self.returns, 20)
         inner = np.where(condition, stddev_20, self.close)
         power = np.power(inner, 2)
-        return self.rank(self.ts_argmax(pd.Series(power, index=self.close.index), 5))
+        return self.rank(self.ts_argmax(self._like_close(power), 5))
 
     def alpha002(self) -> pd.Series:
         """
@@ -193,7 +289,7 @@ class Alpha101Engine:
             -1 * self.ts_rank(abs(delta_close), 60) * np.sign(delta_close),
             -1
         )
-        return pd.Series(result, index=self.close.index)
+        return self._like_close(result)
 
     def alpha009(self) -> pd.Series:
         """
@@ -213,7 +309,7 @@ class Alpha101Engine:
             delta_close,
             np.where(ts_max_5 < 0, delta_close, -1 * delta_close)
         )
-        return pd.Series(result, index=self.close.index)
+        return self._like_close(result)
 
     def alpha012(self) -> pd.Series:
         """
@@ -269,7 +365,7 @@ class Alpha101Engine:
                 )
             )
         )
-        return pd.Series(result, index=self.close.index)
+        return self._like_close(result)
 
     # ==================== 因子评估 ====================
 
@@ -328,21 +424,7 @@ class Alpha101Engine:
             avg_signal = np.mean(list(signals.values()))
 
             # 信号强度
-            if positive_count >= 7:
-                signal_strength = 'strong_bullish'
-                recommendation = '✅ 强烈看多 - 多个因子共振'
-            elif positive_count >= 5:
-                signal_strength = 'bullish'
-                recommendation = '⬆️ 看多 - 因子偏多'
-            elif negative_count >= 7:
-                signal_strength = 'strong_bearish'
-                recommendation = '❌ 强烈看空 - 多个因子共振'
-            elif negative_count >= 5:
-                signal_strength = 'bearish'
-                recommendation = '⬇️ 看空 - 因子偏空'
-            else:
-                signal_strength = 'neutral'
-                recommendation = '➡️ 中性 - 因子分歧'
+            signal_strength, recommendation = classify_signals(positive_count, negative_count)
 
             return {
                 'symbol': self.symbol,
@@ -372,6 +454,196 @@ class Alpha101Engine:
         return stats.percentileofscore(series, value)
 
 
+# 面板必需字段 (K线仓库小写列名)
+PANEL_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class Alpha101PanelEngine(Alpha101Engine):
+    """
+    Alpha101 横截面面板引擎
+
+    输入 (日期 × 标的) 的OHLCV面板, 全部因子以二维表一次算出:
+    - ts_* / delta / correlation 等沿时间轴逐列计算
+    - rank / scale 在每个交易日的横截面上计算(论文原义),
+      单标的模式下只能退化为时间序列排名
+
+    横截面排名只在同一市场内有意义, 多市场请分别建面板(见 score_universe)。
+    停牌等缺失日期保留为NaN, 覆盖缺失日的窗口结果为NaN。
+    """
+
+    def __init__(self, panel: Dict[str, pd.DataFrame], name: str = 'panel'):
+        """
+        Args:
+            panel: {字段: DataFrame(日期 × 标的)}, 字段见 PANEL_FIELDS
+            name: 面板名称(如市场代码), 作为结果中的标识
+        """
+        missing = [field for field in PANEL_FIELDS if field not in panel]
+        if missing:
+            raise ValueError(f"面板缺少字段: {missing}")
+
+        close = panel['close'].sort_index()
+        if close.empty:
+            raise ValueError("面板为空")
+
+        self.symbol = name
+        self.symbols: List[str] = list(close.columns)
+        self.start_date = close.index[0].strftime('%Y-%m-%d')
+        self.end_date = close.index[-1].strftime('%Y-%m-%d')
+
+        # 基础数据 (按收盘价面板对齐)
+        self.close = close
+        self.open = panel['open'].reindex_like(close)
+        self.high = panel['high'].reindex_like(close)
+        self.low = panel['low'].reindex_like(close)
+        self.volume = panel['volume'].reindex_like(close)
+
+        # 预计算常用指标 (缺失日不向前填充)
+        self.returns = self.close / self.close.shift(1) - 1
+        self.vwap = (self.high + self.low + self.close) / 3
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], name: str = 'panel',
+                    start: Optional[str] = None) -> 'Alpha101PanelEngine':
+        """
+        由 {标的: 日线} 构建面板
+
+        Args:
+            frames: 日线需包含小写 open/high/low/close/volume 列, 缺列的标的跳过
+            name: 面板名称
+            start: 起始日期
+        """
+        usable = {
+            symbol: df for symbol, df in frames.items()
+            if df is not None and not df.empty and all(field in df.columns for field in PANEL_FIELDS)
+        }
+        if not usable:
+            raise ValueError("没有包含完整OHLCV的标的")
+
+        panel = {}
+        for field in PANEL_FIELDS:
+            table = pd.DataFrame({symbol: df[field] for symbol, df in usable.items()}).sort_index()
+            if start is not None:
+                table = table[table.index >= pd.Timestamp(start)]
+            panel[field] = table.astype(float)
+        return cls(panel, name=name)
+
+    @classmethod
+    def from_bar_store(cls, market: Optional[str] = None, source: Optional[str] = None,
+                       symbols: Optional[Sequence[str]] = None, start: Optional[str] = None,
+                       store=None) -> 'Alpha101PanelEngine':
+        """
+        从本地K线仓库读取面板(不访问网络)
+
+        Args:
+            market: 只取该市场 (cn/hk/us/crypto), None为全部
+            source: 只取该数据源 (yfinance/akshare/ashare), None为全部
+            symbols: 只取这些代码, None为全部
+            start: 起始日期
+            store: K线仓库, 默认全局实例
+
+        标的键为 source/symbol (同一代码不同数据源口径不同, 分别计算)
+        """
+        from src.data_sources.bar_store import get_bar_store
+
+        store = store or get_bar_store()
+        frames = {}
+        for part_market, part_source, symbol in store.partitions():
+            if market is not None and part_market != market:
+                continue
+            if source is not None and part_source != source:
+                continue
+            if symbols is not None and symbol not in symbols:
+                continue
+            frames[f'{part_source}/{symbol}'] = store.read(part_market, part_source, symbol)
+        return cls.from_frames(frames, name=market or 'all', start=start)
+
+    # ==================== 横截面算子 ====================
+
+    def rank(self, df: pd.DataFrame) -> pd.DataFrame:
+        """横截面排名: 每个交易日在全部标的中的百分位"""
+        return df.rank(axis=1, pct=True)
+
+    def scale(self, df: pd.DataFrame, k: float = 1) -> pd.DataFrame:
+        """横截面标准化: 每个交易日绝对值之和为k"""
+        return df.div(df.abs().sum(axis=1), axis=0) * k
+
+    # ==================== 全市场打分 ====================
+
+    def get_latest_signals(self) -> pd.DataFrame:
+        """
+        各标的最新因子值 (标的 × 因子)
+
+        只取面板最后一个交易日的值: 当日无K线(停牌/退市/数据滞后)的标的不参与打分,
+        当日因子为NaN(窗口不足等)按中性0处理, 不向前沿用旧值
+        """
+        alphas = self.calculate_all_alphas()
+        active = self.close.iloc[-1].notna()
+        return pd.DataFrame({
+            name: table.iloc[-1][active] for name, table in alphas.items()
+        }).fillna(0.0)
+
+    def score_universe(self) -> pd.DataFrame:
+        """
+        全部标的一次打分
+
+        Returns:
+            DataFrame(标的 × [各因子最新值, positive_count, negative_count, neutral_count,
+            avg_signal, signal_strength]), 按看多因子个数、平均信号降序
+        """
+        signals = self.get_latest_signals()
+        positive = (signals > 0).sum(axis=1)
+        negative = (signals < 0).sum(axis=1)
+
+        scores = signals.copy()
+        scores['positive_count'] = positive
+        scores['negative_count'] = negative
+        scores['neutral_count'] = signals.shape[1] - positive - negative
+        scores['avg_signal'] = signals.mean(axis=1)
+        scores['signal_strength'] = [
+            classify_signals(pos, neg)[0] for pos, neg in zip(positive, negative)
+        ]
+        return scores.sort_values(['positive_count', 'avg_signal'], ascending=False)
+
+    def comprehensive_analysis(self) -> Dict[str, Any]:
+        """面板综合分析"""
+        try:
+            scores = self.score_universe()
+            return {
+                'symbol': self.symbol,
+                'analysis_date': self.end_date,
+                'universe_size': len(scores),
+                'scores': scores,
+                'strength_counts': scores['signal_strength'].value_counts().to_dict()
+            }
+
+        except Exception as e:
+            return {
+                'symbol': self.symbol,
+                'error': str(e),
+                'analysis_date': self.end_date
+            }
+
+
+def score_universe(markets: Sequence[str] = ('cn', 'hk', 'us'), start: Optional[str] = None,
+                   store=None) -> pd.DataFrame:
+    """
+    K线仓库中全部标的的Alpha101打分, 每个市场单独建面板后合并
+
+    Returns:
+        Alpha101PanelEngine.score_universe 结果加 market 列; 仓库为空时为空DataFrame
+    """
+    results = []
+    for market in markets:
+        try:
+            engine = Alpha101PanelEngine.from_bar_store(market=market, start=start, store=store)
+        except ValueError:
+            continue
+        scores = engine.score_universe()
+        scores.insert(0, 'market', market)
+        results.append(scores)
+    return pd.concat(results) if results else pd.DataFrame()
+
+
 if __name__ == '__main__':
     # 测试代码
     print("=" * 80)
@@ -11,6 +11,8 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import logging
 
+from src.utils.cache_service import get_namespace
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,8 +21,7 @@ class BullMarketTopDetector:
 
     def __init__(self):
         """初始化牛市见顶检测器"""
-        self.cache = {}
-        self.cache_time = {}
+        self.cache = get_namespace('macro')
         self.cache_duration = 3600  # 1小时缓存(宏观数据更新频率低)
 
         # 历史阈值(基于文章研究)
@@ -73,16 +74,13 @@ class BullMarketTopDetector:
 
     def _get_cached_data(self, key: str, fetch_func, *args, **kwargs):
         """通用缓存获取方法"""
-        if key in self.cache:
-            if (datetime.now() - self.cache_time[key]).seconds < self.cache_duration:
-                logger.info(f"使用缓存的{key}数据")
-                return self.cache[key]
-
         try:
-            data = fetch_func(*args, **kwargs)
-            self.cache[key] = data
-            self.cache_time[key] = datetime.now()
-            return data
+            return self.cache.get_or_fetch(
+                key,
+                lambda: fetch_func(*args, **kwargs),
+                ttl=self.cache_duration,
+                max_age=self.cache_duration
+            )
         except Exception as e:
             logger.error(f"获取{key}数据失败: {str(e)}")
             return None
@@ -20,6 +20,8 @@ from dataclasses import dataclass
 from datetime import datetime
 import logging
 
+from src.utils.extrema import find_extrema
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,31 +85,12 @@ class DivergenceAnalyzer:
         if window is None:
             window = self.peak_valley_window
 
-        peaks = []
-        valleys = []
-
-        for i in range(window, len(series) - window):
-            # 检查是否为峰值
-            is_peak = True
-            is_valley = True
-
-            for j in range(1, window + 1):
-                if series.iloc[i] <= series.iloc[i - j] or series.iloc[i] <= series.iloc[i + j]:
-                    is_peak = False
-                if series.iloc[i] >= series.iloc[i - j] or series.iloc[i] >= series.iloc[i + j]:
-                    is_valley = False
-
-            if is_peak:
-                # 确保与上一个峰值有足够距离
-                if not peaks or (i - peaks[-1]) >= self.min_peak_distance:
-                    peaks.append(i)
-
-            if is_valley:
-                # 确保与上一个谷值有足够距离
-                if not valleys or (i - valleys[-1]) >= self.min_peak_distance:
-                    valleys.append(i)
-
-        return peaks, valleys
+        # 严格大于/小于两侧各window个点, 与上一个峰(谷)间隔不足min_peak_distance的丢弃
+        peaks, valleys = find_extrema(
+            series.to_numpy(), window, strict=True,
+            min_distance=self.min_peak_distance, skip_nan=True
+        )
+        return peaks.tolist(), valleys.tolist()
 
     def _calculate_divergence_strength(
         self,
@@ -7,9 +7,10 @@
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import logging
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+from ...core.price_index import SortedPriceIndex, frame_key, select_price_band
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,11 @@ class HistoricalMatcher:
     负责查找历史相似点位并计算未来收益率
     """
 
+    # 技术指标回看窗口, 与逐日切片 df[df.index <= date].tail(250) 保持一致
+    TECH_WINDOW = 250
+    # 回看数据少于该值的日期不参与技术指标匹配
+    MIN_TECH_BARS = 60
+
     def __init__(self, data_source):
         """
         初始化历史匹配器
@@ -28,6 +34,10 @@ class HistoricalMatcher:
             data_source: 数据源实例 (USStockDataSource)
         """
         self.data_source = data_source
+        # 全量技术指标序列缓存 {(长度, 首日, 末日, 末收盘): DataFrame}
+        self._indicator_frames: Dict[Tuple, pd.DataFrame] = {}
+        # 收盘价排序索引缓存 {(长度, 首日, 末日, 末收盘): SortedPriceIndex}
+        self._price_indexes: Dict[Tuple, SortedPriceIndex] = {}
 
     def find_similar_periods(
         self,
@@ -53,22 +63,12 @@ class HistoricalMatcher:
             logger.warning("数据为空,无法查找相似时期")
             return pd.DataFrame()
 
-        if current_price is None:
-            current_price = df['close'].iloc[-1]
-
-        # 定义相似区间
-        lower_bound = current_price * (1 - tolerance)
-        upper_bound = current_price * (1 + tolerance)
-
-        # 筛选相似点位
-        similar = df[
-            (df['close'] >= lower_bound) &
-            (df['close'] <= upper_bound)
-        ].copy()
-
-        # 过滤: 排除最近的数据点(避免用当前预测当前)
-        cutoff_date = df.index[-1] - timedelta(days=min_gap_days)
-        similar = similar[similar.index <= cutoff_date]
+        if len(self._price_indexes) >= 16:
+            self._price_indexes.clear()
+        # 按排序价格索引二分查找区间, 再排除最近的数据点(避免用当前预测当前)
+        similar, lower_bound, upper_bound = select_price_band(
+            self._price_indexes, frame_key(df), df, current_price, tolerance, min_gap_days
+        )
 
         logger.info(
             f"在 {lower_bound:.2f}-{upper_bound:.2f} 区间 "
@@ -85,7 +85,8 @@ class HistoricalMatcher:
         min_gap_days: int = 5,
         use_technical_filter: bool = True,
         rsi_tolerance: float = 15.0,
-        percentile_tolerance: float = 15.0
+        percentile_tolerance: float = 15.0,
+        vectorized: bool = True
     ) -> pd.DataFrame:
         """
         Phase 2: 技术指标增强匹配
@@ -99,6 +100,7 @@ class HistoricalMatcher:
             use_technical_filter: 是否启用技术指标过滤
             rsi_tolerance: RSI容差(默认±15)
             percentile_tolerance: 52周分位数容差(默认±15%)
+            vectorized: 是否使用预计算指标序列+布尔掩码过滤(结果与逐日计算一致)
 
         Returns:
             技术指标增强过滤后的相似时期DataFrame
@@ -132,13 +134,48 @@ class HistoricalMatcher:
         )
 
         # 3. 过滤技术指标相似的时期
+        filter_args = (current_rsi, current_dist_to_high, current_ma_state, rsi_tolerance, percentile_tolerance)
+        if vectorized:
+            filtered_dates = self._filter_technical_vectorized(df, similar, *filter_args)
+        else:
+            filtered_dates = self._filter_technical_loop(df, similar, *filter_args)
+
+        # 4. 返回过滤后的结果
+        if len(filtered_dates) == 0:
+            logger.warning(
+                f"技术指标过滤后无匹配时期 "
+                f"(原{len(similar)}个 → 0个)"
+            )
+            return pd.DataFrame()
+
+        filtered_similar = df.loc[filtered_dates]
+
+        logger.info(
+            f"技术指标增强匹配: "
+            f"{len(similar)}个 → {len(filtered_similar)}个相似点位 "
+            f"(过滤率{(1-len(filtered_similar)/len(similar))*100:.1f}%)"
+        )
+
+        return filtered_similar
+
+    def _filter_technical_loop(
+        self,
+        df: pd.DataFrame,
+        similar: pd.DataFrame,
+        current_rsi: float,
+        current_dist_to_high: float,
+        current_ma_state: str,
+        rsi_tolerance: float,
+        percentile_tolerance: float
+    ) -> List:
+        """逐日重算技术指标并过滤(基准实现, O(匹配数 × 250))"""
         filtered_dates = []
 
         for date in similar.index:
             # 获取该日期之前的数据(模拟当时的市场状态)
-            hist_df = df[df.index <= date].tail(250)  # 最近250个交易日
+            hist_df = df[df.index <= date].tail(self.TECH_WINDOW)  # 最近250个交易日
 
-            if len(hist_df) < 60:  # 数据不足,跳过
+            if len(hist_df) < self.MIN_TECH_BARS:  # 数据不足,跳过
                 continue
 
             hist_indicators = self.data_source.calculate_technical_indicators(hist_df)
@@ -163,23 +200,85 @@ class HistoricalMatcher:
 
             filtered_dates.append(date)
 
-        # 4. 返回过滤后的结果
-        if len(filtered_dates) == 0:
-            logger.warning(
-                f"技术指标过滤后无匹配时期 "
-                f"(原{len(similar)}个 → 0个)"
-            )
-            return pd.DataFrame()
-
-        filtered_similar = df.loc[filtered_dates]
+        return filtered_dates
 
-        logger.info(
-            f"技术指标增强匹配: "
-            f"{len(similar)}个 → {len(filtered_similar)}个相似点位 "
-            f"(过滤率{(1-len(filtered_similar)/len(similar))*100:.1f}%)"
+    def _filter_technical_vectorized(
+        self,
+        df: pd.DataFrame,
+        similar: pd.DataFrame,
+        current_rsi: float,
+        current_dist_to_high: float,
+        current_ma_state: str,
+        rsi_tolerance: float,
+        percentile_tolerance: float
+    ) -> List:
+        """基于全量指标序列的布尔掩码过滤, 与 _filter_technical_loop 结果一致"""
+        frame = self.get_indicator_frame(df).loc[similar.index]
+
+        # NaN比较结果为False, 与逐日版本 abs(a - NaN) > tol 不过滤的行为一致
+        mask = (
+            frame['valid'].values
+            & ~(np.abs(current_rsi - frame['rsi'].values) > rsi_tolerance)
+            & ~(np.abs(current_dist_to_high - frame['dist_to_high_pct'].values) > percentile_tolerance)
+            & (frame['ma_state'].values == current_ma_state)
         )
+        return list(similar.index[mask])
 
-        return filtered_similar
+    def get_indicator_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        一次性计算每个交易日在"截至当日最近250根K线"窗口下的匹配指标
+
+        各列与对该窗口调用 calculate_technical_indicators 的结果逐日对应:
+        - rsi: 14日RSI
+        - dist_to_high_pct: 距窗口内最高价的百分比
+        - ma_state: 均线排列状态(窗口不足250根时MA250取当日价格)
+        - valid: 窗口长度 >= 60
+
+        Args:
+            df: 指数历史数据(需包含close/high)
+
+        Returns:
+            与df同索引的指标DataFrame
+        """
+        key = (len(df), df.index[0], df.index[-1], float(df['close'].iloc[-1]))
+        if key in self._indicator_frames:
+            return self._indicator_frames[key]
+
+        close = df['close']
+        window_len = np.minimum(np.arange(1, len(df) + 1), self.TECH_WINDOW)
+
+        # RSI (与calculate_technical_indicators相同的简单均值口径)
+        delta = close.diff()
+        gain = (delta.where(delta > 0, 0)).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        rsi = 100 - (100 / (1 + gain / loss))
+
+        # 均线: 窗口长度不足周期时不存在该均线, _get_ma_state 以价格代替
+        price = close.values
+        ma = {}
+        for period in (20, 60, 250):
+            values = close.rolling(period).mean().values
+            ma[period] = np.where(window_len >= period, values, price)
+
+        # 窗口内最高价(lookback = min(252, 窗口长度) = 窗口长度)
+        high_window = df['high'].rolling(self.TECH_WINDOW, min_periods=1).max()
+        dist_to_high = (close - high_window) / high_window * 100
+
+        bull = (price > ma[20]) & (ma[20] > ma[60]) & (ma[60] > ma[250])
+        bear = (price < ma[20]) & (ma[20] < ma[60]) & (ma[60] < ma[250])
+        ma_state = np.select([bull, bear], ['多头排列', '空头排列'], default='震荡')
+
+        frame = pd.DataFrame({
+            'rsi': rsi.values,
+            'dist_to_high_pct': dist_to_high.values,
+            'ma_state': ma_state,
+            'valid': window_len >= self.MIN_TECH_BARS,
+        }, index=df.index)
+
+        if len(self._indicator_frames) >= 16:
+            self._indicator_frames.clear()
+        self._indicator_frames[key] = frame
+        return frame
 
     def _get_ma_state(self, indicators: Dict) -> str:
         """
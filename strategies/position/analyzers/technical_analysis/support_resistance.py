@@ -12,6 +12,8 @@ import yfinance as yf
 from datetime import datetime, timedelta
 import logging
 
+from src.utils.extrema import local_maxima, local_minima
+
 logger = logging.getLogger(__name__)
 
 
@@ -142,18 +144,10 @@ class SupportResistanceAnalyzer:
         highs = self.data['High'].values
         lows = self.data['Low'].values
 
-        # 找出局部高点和低点
-        local_highs = []
-        local_lows = []
-
+        # 找出局部高点和低点 (等于前后各window天内的最高/最低价, 平台上的点都计入)
         window = 5
-        for i in range(window, len(self.data) - window):
-            # 局部高点
-            if highs[i] == max(highs[i-window:i+window+1]):
-                local_highs.append(highs[i])
-            # 局部低点
-            if lows[i] == min(lows[i-window:i+window+1]):
-                local_lows.append(lows[i])
+        local_highs = list(highs[local_maxima(highs, window, strict=False)])
+        local_lows = list(lows[local_minima(lows, window, strict=False)])
 
         # 聚类相近的价位
         def cluster_prices(prices, tolerance):
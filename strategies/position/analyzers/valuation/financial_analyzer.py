@@ -23,6 +23,9 @@ from datetime import datetime
 import logging
 from typing import Dict, Optional, List
 
+from src.data_sources.batch_downloader import fetch_concurrently
+from src.data_sources.earnings_table import EarningsTable, get_earnings_table
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,8 +41,14 @@ class FinancialAnalyzer:
     5. 综合评分
     """
 
-    def __init__(self):
-        """初始化"""
+    def __init__(self, earnings_table: Optional[EarningsTable] = None):
+        """
+        初始化
+
+        Args:
+            earnings_table: 业绩报表仓库, 默认使用全局单例(按报告期持久化, 跨标的/跨运行复用)
+        """
+        self.earnings_table = earnings_table or get_earnings_table()
         logger.info("财务数据分析器初始化完成")
 
     def get_financial_indicators(self, symbol: str, report_date: str = '20240930') -> Dict:
@@ -56,22 +65,13 @@ class FinancialAnalyzer:
         try:
             logger.info(f"获取{symbol}财务指标...")
 
-            # 使用stock_yjbb_em获取业绩报表(包含ROE/毛利率等)
-            df = ak.stock_yjbb_em(date=report_date)
-
-            if df is None or df.empty:
-                logger.warning(f"业绩报表数据为空")
-                return {}
-
-            # 筛选目标股票
-            stock_data = df[df['股票代码'] == symbol]
+            # 业绩报表(stock_yjbb_em, 包含ROE/毛利率等)按报告期整表缓存, 按代码索引查询
+            latest = self.earnings_table.get(symbol, report_date)
 
-            if stock_data.empty:
+            if latest is None:
                 logger.warning(f"{symbol}财务数据为空")
                 return {}
 
-            latest = stock_data.iloc[0]
-
             indicators = {
                 'date': report_date,
                 'stock_name': latest.get('股票简称', ''),
@@ -96,13 +96,14 @@ class FinancialAnalyzer:
             logger.error(f"获取{symbol}财务指标失败: {str(e)}")
             return {}
 
-    def calculate_growth_rate(self, symbol: str, indicators: Dict = None) -> Dict:
+    def calculate_growth_rate(self, symbol: str, indicators: Dict = None, report_date: str = '20240930') -> Dict:
         """
         从业绩报表中提取增长率数据
 
         Args:
             symbol: 股票代码
             indicators: 如果已有财务指标数据,直接使用
+            report_date: 未提供指标数据时查询的报告日期
 
         Returns:
             {
@@ -126,8 +127,8 @@ class FinancialAnalyzer:
                 logger.info(f"{symbol}增长率提取完成")
                 return growth
 
-            # 否则重新获取数据
-            indicators = self.get_financial_indicators(symbol)
+            # 否则从业绩报表仓库查询(整表已缓存时不会重复下载)
+            indicators = self.get_financial_indicators(symbol, report_date)
             if not indicators:
                 return {}
 
@@ -427,12 +428,13 @@ class FinancialAnalyzer:
             'reasons': reasons
         }
 
-    def comprehensive_analysis(self, symbol: str) -> Dict:
+    def comprehensive_analysis(self, symbol: str, report_date: str = '20240930') -> Dict:
         """
         综合财务分析
 
         Args:
             symbol: 股票代码
+            report_date: 报告日期
 
         Returns:
             完整的财务分析结果
@@ -446,12 +448,12 @@ class FinancialAnalyzer:
             }
 
             # 1. 获取财务指标 (包含增长率)
-            indicators = self.get_financial_indicators(symbol)
+            indicators = self.get_financial_indicators(symbol, report_date)
             if indicators:
                 result['financial_indicators'] = indicators
 
             # 2. 提取增长率
-            growth = self.calculate_growth_rate(symbol, indicators)
+            growth = self.calculate_growth_rate(symbol, indicators, report_date)
             if growth:
                 result['growth_metrics'] = growth
 
@@ -508,6 +510,39 @@ class FinancialAnalyzer:
                 'timestamp': datetime.now()
             }
 
+    def batch_comprehensive_analysis(
+        self,
+        symbols: List[str],
+        report_date: str = '20240930',
+        max_workers: int = 4
+    ) -> Dict[str, Dict]:
+        """
+        批量综合财务分析
+
+        业绩报表整表只加载一次, 各标的的估值数据(个股接口)有界并发拉取
+
+        Args:
+            symbols: 股票代码列表
+            report_date: 报告日期
+            max_workers: 最大并发数
+
+        Returns:
+            {股票代码: 综合财务分析结果}, 顺序与输入一致
+        """
+        symbols = list(dict.fromkeys(symbols))
+        logger.info(f"开始批量财务分析: {len(symbols)}只, 报告期{report_date}")
+
+        # 预先加载报告期整表, 后续各标的查询都命中内存索引
+        self.earnings_table.get_frame(report_date)
+
+        results = fetch_concurrently(
+            symbols,
+            lambda symbol: self.comprehensive_analysis(symbol, report_date),
+            host='akshare',
+            max_workers=max_workers
+        )
+        return {symbol: results.get(symbol, {'error': '分析失败', 'timestamp': datetime.now()}) for symbol in symbols}
+
 
 if __name__ == '__main__':
     """测试代码"""
@@ -19,7 +19,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
+
+from src.utils.cache_service import get_namespace
 
 logger = logging.getLogger(__name__)
 
@@ -64,11 +66,17 @@ class IndexValuationAnalyzer:
             lookback_days: 回溯天数,默认1260天(约5年)
         """
         self.lookback_days = lookback_days
-        self.cache = {}
-        self.cache_time = {}
-        self.cache_duration = 3600  # 1小时缓存
+        # 共享缓存命名空间: 按A股交易日历在下一个收盘后过期, 跨实例/跨运行复用
+        self.cache = get_namespace('valuation')
         logger.info("指数估值分析器初始化完成")
 
+    def _fetch_table(self, cache_key: str, fetcher: Callable[[], pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """获取akshare原始表(带缓存), 空表不缓存并返回None"""
+        def fetch():
+            df = fetcher()
+            return None if df is None or df.empty else df
+        return self.cache.get_or_fetch(cache_key, fetch)
+
     def get_index_pe_pb_data(self, index_code: str) -> pd.DataFrame:
         """
         获取指数PE/PB历史数据
@@ -81,11 +89,11 @@ class IndexValuationAnalyzer:
         """
         cache_key = f"pe_pb_{index_code}"
 
-        # 检查缓存
-        if cache_key in self.cache:
-            if (datetime.now() - self.cache_time[cache_key]).seconds < self.cache_duration:
-                logger.info(f"使用缓存的{index_code}估值数据")
-                return self.cache[cache_key]
+        # 检查缓存 (缓存完整历史, 按lookback_days截取)
+        df = self.cache.get(cache_key)
+        if df is not None:
+            logger.info(f"使用缓存的{index_code}估值数据")
+            return df.tail(self.lookback_days)
 
         try:
             # 转换为akshare接受的名称
@@ -112,9 +120,6 @@ class IndexValuationAnalyzer:
             df['date'] = pd.to_datetime(df['date'])
             df = df.sort_values('date', ascending=True)
 
-            # 筛选最近N天
-            df = df.tail(self.lookback_days)
-
             # 尝试获取PB数据
             try:
                 df_pb = ak.stock_index_pb_lg(symbol=akshare_name)
@@ -129,17 +134,16 @@ class IndexValuationAnalyzer:
                 df['pb'] = np.nan
 
             # 缓存
-            self.cache[cache_key] = df
-            self.cache_time[cache_key] = datetime.now()
+            self.cache.set(cache_key, df)
 
             logger.info(f"{akshare_name}估值数据获取成功: {len(df)} 条记录")
-            return df
+            # 筛选最近N天
+            return df.tail(self.lookback_days)
 
         except Exception as e:
             logger.error(f"获取{index_code}估值数据失败: {str(e)}")
             return pd.DataFrame()
 
-
     def calculate_valuation_percentile(
         self,
         index_code: str,
@@ -239,9 +243,9 @@ class IndexValuationAnalyzer:
             logger.info(f"计算{index_code}的股债收益比...")
 
             # 1. 获取10年期国债收益率
-            bond_yield_df = ak.bond_zh_us_rate()
+            bond_yield_df = self._fetch_table('bond_zh_us_rate', ak.bond_zh_us_rate)
 
-            if bond_yield_df.empty:
+            if bond_yield_df is None:
                 return {'error': '无法获取国债收益率数据'}
 
             # 最新10年期国债收益率
@@ -249,7 +253,9 @@ class IndexValuationAnalyzer:
             bond_yield_10y = float(latest_bond['中国国债收益率10年']) / 100  # 转换为小数
 
             # 2. 获取指数股息率
-            index_info = ak.index_stock_info()
+            index_info = self._fetch_table('index_stock_info', ak.index_stock_info)
+            if index_info is None:
+                return {'error': '无法获取指数信息数据'}
 
             index_row = index_info[index_info['index_code'] == index_code]
 
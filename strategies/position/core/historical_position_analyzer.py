@@ -17,6 +17,10 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import warnings
 
+from src.data_sources.bar_store import get_bar_store
+from src.utils.cache_service import get_namespace
+from .price_index import DateBitmap, get_price_index, select_price_band
+
 warnings.filterwarnings('ignore')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -53,44 +57,61 @@ DEFAULT_INDICES = ['sh000001', 'sh000300', 'sz399006', 'sh000688']
 
 
 class DataCache:
-    """数据缓存管理 - 优化版(LRU淘汰策略)"""
+    """数据缓存管理 - 共享缓存服务的 index_history 命名空间(LRU淘汰策略)"""
 
     def __init__(self, max_size: int = 20):
         """
         初始化缓存
 
         Args:
-            max_size: 最大缓存数量(默认20个指数,约2MB内存)
+            max_size: 本实例跟踪的最大缓存数量(默认20个指数,约2MB内存)
+
+        条目存放在进程共享的命名空间中, 其他分析器实例可直接复用;
+        超过 max_size 时只把最久未用的键移出本实例的LRU记录, 不删除共享条目
+        (其他实例可能仍在使用), 内存占用由共享内存层的字节预算控制
         """
         from collections import OrderedDict
-        self._cache = OrderedDict()
+        self._ns = get_namespace('index_history')
+        self._keys = OrderedDict()  # 本实例使用的键, 按最近使用排序
         self.max_size = max_size
         self.hits = 0
         self.misses = 0
 
+    def _touch(self, key: str):
+        """LRU: 标记为最近使用, 超出上限时淘汰本实例最久未用的键"""
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_size:
+            oldest_key, _ = self._keys.popitem(last=False)
+            logger.debug(f"缓存已满,淘汰最久未用: {oldest_key}")
+
     def get(self, key: str) -> Optional[pd.DataFrame]:
-        if key in self._cache:
+        data = self._ns.get(key)
+        if data is not None:
             self.hits += 1
-            # LRU: 移到最后(标记为最近使用)
-            self._cache.move_to_end(key)
+            self._touch(key)
             logger.debug(f"从缓存获取数据: {key} (命中率: {self.get_hit_rate():.1%})")
-            return self._cache[key].copy()
+            return data.copy()
+        self._keys.pop(key, None)
         self.misses += 1
         return None
 
-    def set(self, key: str, data: pd.DataFrame):
-        # 如果超过大小限制,删除最久未使用的
-        if len(self._cache) >= self.max_size:
-            oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
-            logger.debug(f"缓存已满,淘汰最久未用: {oldest_key}")
+    def set(self, key: str, data: pd.DataFrame, market: Optional[str] = None):
+        """
+        写入缓存, 在所属市场(默认A股)下一个收盘后过期
 
-        self._cache[key] = data.copy()
-        self._cache.move_to_end(key)
-        logger.debug(f"缓存数据: {key}, 大小: {len(data)}, 当前缓存数: {len(self._cache)}/{self.max_size}")
+        Args:
+            key: 指数/ETF/个股代码
+            data: 历史数据
+            market: 所属市场 (cn/hk)
+        """
+        self._ns.set(key, data.copy(), market=market)
+        self._touch(key)
+        logger.debug(f"缓存数据: {key}, 大小: {len(data)}, 当前缓存数: {len(self._keys)}/{self.max_size}")
 
     def clear(self):
-        self._cache.clear()
+        """清空本实例的LRU记录和统计 (共享条目保留, 按过期时间失效)"""
+        self._keys.clear()
         self.hits = 0
         self.misses = 0
         logger.info("缓存已清空")
@@ -103,7 +124,7 @@ class DataCache:
     def get_stats(self) -> Dict:
         """获取缓存统计信息"""
         return {
-            'size': len(self._cache),
+            'size': len(self._keys),
             'max_size': self.max_size,
             'hits': self.hits,
             'misses': self.misses,
@@ -117,6 +138,8 @@ class HistoricalPositionAnalyzer:
     def __init__(self, cache_enabled: bool = True):
         self.cache = DataCache() if cache_enabled else None
         self.data = {}  # 存储各指数的历史数据
+        self.price_indexes = {}  # 收盘价排序索引(按指数代码)
+        self._date_bitmaps = {}  # 多指数日期位图
         logger.info("历史点位分析器初始化完成")
 
     def get_index_data(self, index_code: str) -> pd.DataFrame:
@@ -127,7 +150,7 @@ class HistoricalPositionAnalyzer:
             if cached is not None:
                 return cached
 
-        # 从 akshare 获取数据
+        # 从本地K线仓库读取, 缺失的交易日由 akshare 增量补齐
         try:
             logger.info(f"正在获取 {index_code} 历史数据...")
 
@@ -135,35 +158,20 @@ class HistoricalPositionAnalyzer:
             if not config:
                 raise ValueError(f"不支持的代码: {index_code}")
 
-            # 根据类型选择不同的接口
-            if config.type == 'etf':
-                # ETF数据
-                df = ak.fund_etf_hist_em(symbol=index_code, period='daily', adjust='')
-                df.rename(columns={'日期': 'date', '收盘': 'close', '成交量': 'volume',
-                                   '开盘': 'open', '最高': 'high', '最低': 'low'}, inplace=True)
-            elif config.type == 'stock':
-                # 个股数据
-                df = ak.stock_zh_a_hist(symbol=index_code, period='daily', adjust='hfq')  # 后复权
-                df.rename(columns={'日期': 'date', '收盘': 'close', '成交量': 'volume',
-                                   '开盘': 'open', '最高': 'high', '最低': 'low'}, inplace=True)
-            elif index_code.startswith('hk_'):
-                # 港股指数
-                symbol = config.symbol
-                df = ak.stock_hk_index_daily_em(symbol=symbol)
-            else:
-                # A股指数
-                df = ak.stock_zh_index_daily(symbol=index_code)
-
-            # 数据处理
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.set_index('date').sort_index()
+            market = 'hk' if index_code.startswith('hk_') else 'cn'
+            df = get_bar_store().get_bars(
+                market, 'akshare', index_code,
+                lambda since: self._download_index_data(index_code, config, since)
+            )
+            if df.empty:
+                raise ValueError(f"{index_code} 数据为空")
 
             # 计算收益率
             df['return'] = df['close'].pct_change()
 
             # 缓存
             if self.cache:
-                self.cache.set(index_code, df)
+                self.cache.set(index_code, df, market=market)
 
             logger.info(f"{index_code} 数据获取成功，共 {len(df)} 条")
             return df
@@ -172,6 +180,38 @@ class HistoricalPositionAnalyzer:
             logger.error(f"获取 {index_code} 数据失败: {str(e)}")
             raise
 
+    @staticmethod
+    def _download_index_data(
+        index_code: str,
+        config: IndexConfig,
+        since: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        """从 akshare 下载日线, since 不为空时只下载该日之后的数据(接口支持时)"""
+        start_date = since.strftime('%Y%m%d') if since is not None else '19700101'
+
+        # 根据类型选择不同的接口
+        if config.type == 'etf':
+            # ETF数据
+            df = ak.fund_etf_hist_em(symbol=index_code, period='daily', start_date=start_date, adjust='')
+            df.rename(columns={'日期': 'date', '收盘': 'close', '成交量': 'volume',
+                               '开盘': 'open', '最高': 'high', '最低': 'low'}, inplace=True)
+        elif config.type == 'stock':
+            # 个股数据
+            df = ak.stock_zh_a_hist(symbol=index_code, period='daily', start_date=start_date, adjust='hfq')  # 后复权
+            df.rename(columns={'日期': 'date', '收盘': 'close', '成交量': 'volume',
+                               '开盘': 'open', '最高': 'high', '最低': 'low'}, inplace=True)
+        elif index_code.startswith('hk_'):
+            # 港股指数
+            symbol = config.symbol
+            df = ak.stock_hk_index_daily_em(symbol=symbol)
+        else:
+            # A股指数
+            df = ak.stock_zh_index_daily(symbol=index_code)
+
+        # 数据处理
+        df['date'] = pd.to_datetime(df['date'])
+        return df.set_index('date').sort_index()
+
     def get_current_positions(self) -> Dict[str, float]:
         """获取当前各指数点位"""
         positions = {}
@@ -213,22 +253,10 @@ class HistoricalPositionAnalyzer:
         """
         df = self.get_index_data(index_code)
 
-        if current_price is None:
-            current_price = df['close'].iloc[-1]
-
-        # 定义相似区间
-        lower_bound = current_price * (1 - tolerance)
-        upper_bound = current_price * (1 + tolerance)
-
-        # 筛选相似点位
-        similar = df[
-            (df['close'] >= lower_bound) &
-            (df['close'] <= upper_bound)
-        ].copy()
-
-        # 过滤：排除最近的数据点（避免用当前预测当前）
-        cutoff_date = df.index[-1] - timedelta(days=min_gap_days)
-        similar = similar[similar.index <= cutoff_date]
+        # 按排序价格索引二分查找区间, 再排除最近的数据点(避免用当前预测当前)
+        similar, lower_bound, upper_bound = select_price_band(
+            self.price_indexes, index_code, df, current_price, tolerance, min_gap_days
+        )
 
         logger.info(
             f"{SUPPORTED_INDICES[index_code].name} "
@@ -392,38 +420,27 @@ class HistoricalPositionAnalyzer:
         """
         logger.info(f"开始多指数联合匹配（需匹配至少 {min_match_count} 个指数）...")
 
-        # 存储每个指数的相似时期
-        similar_periods_by_index = {}
-
+        # 各指数在价格区间内的K线位置(排序索引二分查找)
+        frames = {}
+        matches = {}
         for index_code, pos_info in positions.items():
-            similar = self.find_similar_periods(
-                index_code,
-                pos_info['price'],
-                tolerance
+            df = self.get_index_data(index_code)
+            lower_bound = pos_info['price'] * (1 - tolerance)
+            upper_bound = pos_info['price'] * (1 + tolerance)
+            # 排除最近5天, 与find_similar_periods默认min_gap_days一致
+            cutoff_date = df.index[-1] - timedelta(days=5)
+            frames[index_code] = df
+            matches[index_code] = get_price_index(self.price_indexes, index_code, df).band_positions(
+                lower_bound, upper_bound, cutoff_date
+            )
+            logger.info(
+                f"{SUPPORTED_INDICES[index_code].name} "
+                f"在 {lower_bound:.2f}-{upper_bound:.2f} 区间"
+                f"共找到 {len(matches[index_code])} 个相似点位"
             )
-            similar_periods_by_index[index_code] = set(similar.index)
-
-        # 找出所有日期的交集
-        all_dates = set()
-        for dates in similar_periods_by_index.values():
-            all_dates.update(dates)
-
-        # 统计每个日期匹配了几个指数
-        match_results = []
-        for date in sorted(all_dates):
-            matched_indices = [
-                code for code, dates in similar_periods_by_index.items()
-                if date in dates
-            ]
-
-            if len(matched_indices) >= min_match_count:
-                match_results.append({
-                    'date': date,
-                    'match_count': len(matched_indices),
-                    'matched_indices': ','.join(matched_indices)
-                })
 
-        result_df = pd.DataFrame(match_results)
+        # 日期对齐位图: 每个指数一行, 按列求和得到每个交易日匹配的指数数量
+        result_df = self._date_bitmap(frames).match(matches, min_match_count)
 
         if len(result_df) > 0:
             logger.info(f"找到 {len(result_df)} 个多指数匹配时期")
@@ -432,6 +449,17 @@ class HistoricalPositionAnalyzer:
 
         return result_df
 
+    def _date_bitmap(self, frames: Dict[str, pd.DataFrame]) -> DateBitmap:
+        """取出(或构建)这组指数的日期对齐位图, 任一指数数据变化时重建"""
+        key = tuple((code, self.price_indexes[code].key) for code in frames)
+        bitmap = self._date_bitmaps.get(key)
+        if bitmap is None:
+            if len(self._date_bitmaps) >= 16:
+                self._date_bitmaps.clear()
+            bitmap = DateBitmap({code: df.index for code, df in frames.items()})
+            self._date_bitmaps[key] = bitmap
+        return bitmap
+
     def find_similar_periods_multidim(
         self,
         index_code: str,
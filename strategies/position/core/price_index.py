@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格排序索引与日期位图
+Sorted Price Index & Date Bitmap
+
+历史相似点位查找的两类查询:
+1. 单指数: 收盘价落在 当前价±容差 区间的交易日
+   - 按收盘价排序一次, 每次查询两次二分查找取出区间, 不再对全历史做布尔掩码
+2. 多指数联合: 同一交易日有几个指数同时落在各自区间
+   - 各指数日期对齐到统一日历, 每个指数一行布尔位图, 按列求和即为匹配数量
+
+索引只在数据变化时重建, 容差扫描(如Web端拖动容差)只需重复二分查找。
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def frame_key(df: pd.DataFrame) -> Tuple:
+    """日线的轻量指纹: (长度, 首日, 末日, 末收盘), 用于判断缓存是否仍对应同一份数据"""
+    return (len(df), df.index[0], df.index[-1], float(df['close'].iloc[-1]))
+
+
+class SortedPriceIndex:
+    """单个标的的收盘价排序索引"""
+
+    def __init__(self, df: pd.DataFrame, column: str = 'close'):
+        """
+        Args:
+            df: 按日期升序的日线
+            column: 建索引的价格列
+        """
+        self.key = frame_key(df)
+        self.dates = df.index
+        values = df[column].to_numpy(dtype=float)
+        # 稳定排序, NaN排在末尾, 不会落入任何区间
+        self.order = np.argsort(values, kind='stable')
+        self.sorted_values = values[self.order]
+
+    def band_positions(self, lower: float, upper: float, cutoff_date=None) -> np.ndarray:
+        """
+        收盘价在 [lower, upper] 内的K线位置(按日期升序)
+
+        Args:
+            lower / upper: 价格区间(闭区间)
+            cutoff_date: 只保留该日期及之前的K线
+        """
+        lo = np.searchsorted(self.sorted_values, lower, side='left')
+        hi = np.searchsorted(self.sorted_values, upper, side='right')
+        positions = np.sort(self.order[lo:hi])
+        if cutoff_date is not None:
+            end = self.dates.searchsorted(cutoff_date, side='right')
+            positions = positions[:np.searchsorted(positions, end)]
+        return positions
+
+    def count_in_band(self, lower: float, upper: float) -> int:
+        """区间内K线数量(不排序, 供容差扫描使用)"""
+        return int(np.searchsorted(self.sorted_values, upper, side='right')
+                   - np.searchsorted(self.sorted_values, lower, side='left'))
+
+
+def get_price_index(cache: Dict[str, SortedPriceIndex], key: str, df: pd.DataFrame) -> SortedPriceIndex:
+    """
+    从分析器的索引缓存取出(或构建)价格索引, 数据变化时重建
+
+    Args:
+        cache: 分析器持有的 {key: 索引} 字典
+        key: 缓存键(通常为指数代码)
+        df: 日线
+    """
+    index = cache.get(key)
+    if index is None or index.key != frame_key(df):
+        index = SortedPriceIndex(df)
+        cache[key] = index
+    return index
+
+
+def select_price_band(
+    cache: Dict[str, SortedPriceIndex],
+    key: str,
+    df: pd.DataFrame,
+    current_price: Optional[float] = None,
+    tolerance: float = 0.05,
+    min_gap_days: int = 5
+) -> Tuple[pd.DataFrame, float, float]:
+    """
+    按价格容差筛选历史相似点位 (与布尔掩码筛选结果一致)
+
+    Args:
+        cache / key: 价格索引缓存及键
+        df: 日线
+        current_price: 当前价格, None表示最新收盘
+        tolerance: 相似度容差
+        min_gap_days: 排除最近N天(避免用当前预测当前)
+
+    Returns:
+        (相似时期DataFrame, 区间下限, 区间上限)
+    """
+    if current_price is None:
+        current_price = df['close'].iloc[-1]
+
+    lower_bound = current_price * (1 - tolerance)
+    upper_bound = current_price * (1 + tolerance)
+
+    cutoff_date = df.index[-1] - pd.Timedelta(days=min_gap_days)
+    positions = get_price_index(cache, key, df).band_positions(lower_bound, upper_bound, cutoff_date)
+    return df.iloc[positions].copy(), lower_bound, upper_bound
+
+
+class DateBitmap:
+    """
+    多指数日期对齐位图
+
+    统一日历为各指数交易日的并集, 每个指数的K线位置预先映射到日历列;
+    一次联合查询 = 各指数区间位置置位 + 按列求和。
+    """
+
+    def __init__(self, indexes: Dict[str, pd.DatetimeIndex]):
+        """
+        Args:
+            indexes: {代码: 该指数日线的日期索引}, 顺序即结果中 matched_indices 的顺序
+        """
+        self.codes: List[str] = list(indexes)
+        calendar = pd.DatetimeIndex([])
+        for dates in indexes.values():
+            calendar = calendar.union(dates)
+        self.calendar = calendar
+        self._slots = {code: calendar.get_indexer(dates) for code, dates in indexes.items()}
+
+    def bits(self, matches: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        构建位图
+
+        Args:
+            matches: {代码: 命中的K线位置}
+
+        Returns:
+            bool矩阵 (指数数 × 日历长度)
+        """
+        bitmap = np.zeros((len(self.codes), len(self.calendar)), dtype=bool)
+        for row, code in enumerate(self.codes):
+            positions = matches.get(code)
+            if positions is not None and len(positions):
+                bitmap[row, self._slots[code][positions]] = True
+        return bitmap
+
+    def match(self, matches: Dict[str, np.ndarray], min_match_count: int) -> pd.DataFrame:
+        """
+        联合匹配
+
+        Returns:
+            DataFrame(date, match_count, matched_indices), 按日期升序;
+            无结果时为空DataFrame
+        """
+        bitmap = self.bits(matches)
+        counts = bitmap.sum(axis=0)
+        # 只统计至少一个指数命中的日期(与逐日集合判断一致)
+        columns = np.flatnonzero((counts >= min_match_count) & (counts > 0))
+        if len(columns) == 0:
+            return pd.DataFrame()
+
+        codes = np.array(self.codes, dtype=object)
+        return pd.DataFrame({
+            'date': self.calendar[columns],
+            'match_count': counts[columns],
+            'matched_indices': [','.join(codes[bitmap[:, col]]) for col in columns],
+        })
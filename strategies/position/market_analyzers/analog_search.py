@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史走势形态检索 (滑动窗口k近邻)
+Historical Analog Search
+
+把每个交易日表示为"截至当日最近N根K线"的形态向量:
+- 收盘价对数累计收益路径, 窗口内标准化(只保留形状, 与价格水平和波动幅度无关)
+- 成交量对数序列, 窗口内标准化(按 volume_weight 加权, 无成交量时为0)
+
+对K线仓库中所有标的的所有窗口建立矩阵索引, 查询"与最近N天走势最相似的k段历史":
+- 距离 ||x||² - 2x·q + ||q||² 分块矩阵乘法计算, 不逐窗口循环
+- 可选PCA降维 (n_components)
+- 同一标的相邻窗口高度相关, 按 min_separation 间隔去重
+- 命中窗口的后续收益/回撤由前瞻结果矩阵按位置取值
+
+用法:
+    engine = get_analog_engine(window=20)
+    matches = engine.search_frame(df, k=20)
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .forward_outcomes import DEFAULT_HORIZONS, ForwardOutcomeMatrix, get_forward_outcomes
+
+logger = logging.getLogger(__name__)
+
+# 每块参与矩阵乘法的窗口数
+DEFAULT_CHUNK_SIZE = 65536
+# PCA拟合最多使用的样本窗口数
+PCA_SAMPLE_SIZE = 50000
+
+
+def _znorm_rows(windows: np.ndarray) -> np.ndarray:
+    """逐行标准化, 常数行置0"""
+    mean = windows.mean(axis=1, keepdims=True)
+    std = windows.std(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        normed = (windows - mean) / std
+    normed[~np.isfinite(normed)] = 0.0
+    return normed
+
+
+def window_features(df: pd.DataFrame, window: int, volume_weight: float = 0.5) -> np.ndarray:
+    """
+    计算每根K线结尾的形态向量
+
+    Args:
+        df: 日线(按日期升序), 需包含close, volume可选
+        window: 窗口长度(K线数)
+        volume_weight: 成交量形态的权重, 0表示只比较价格路径
+
+    Returns:
+        (len(df) - window + 1, 2 * window) 的float32矩阵, 第i行对应以第 i+window-1 根K线结尾的窗口;
+        数据不足一个窗口时为空矩阵
+    """
+    n = len(df)
+    if n < window:
+        return np.empty((0, 2 * window), dtype=np.float32)
+
+    close = df['close'].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        path = np.log(close)
+    path = np.lib.stride_tricks.sliding_window_view(path, window)
+    price_part = _znorm_rows(path)
+
+    volume_part = np.zeros_like(price_part)
+    if volume_weight > 0 and 'volume' in df.columns:
+        volume = df['volume'].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_volume = np.where(volume > 0, np.log(volume), np.nan)
+        volume_part = _znorm_rows(np.lib.stride_tricks.sliding_window_view(log_volume, window)) * volume_weight
+
+    return np.hstack([price_part, volume_part]).astype(np.float32)
+
+
+class AnalogEngine:
+    """多标的滑动窗口形态索引"""
+
+    def __init__(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        window: int = 20,
+        volume_weight: float = 0.5,
+        n_components: Optional[int] = None
+    ):
+        """
+        Args:
+            frames: {标的名称: 日线}
+            window: 形态窗口长度
+            volume_weight: 成交量形态权重
+            n_components: PCA降维后的维数, None表示不降维
+        """
+        self.window = window
+        self.volume_weight = volume_weight
+
+        self.assets: List[str] = []
+        self._frames: List[pd.DataFrame] = []
+        self._outcomes: Dict[int, ForwardOutcomeMatrix] = {}  # 命中标的的前瞻结果矩阵
+
+        blocks, asset_ids, end_positions, end_dates = [], [], [], []
+        for name, df in frames.items():
+            if df is None or len(df) < window or 'close' not in df.columns:
+                continue
+            features = window_features(df, window, volume_weight)
+            asset_id = len(self.assets)
+            self.assets.append(name)
+            self._frames.append(df)
+            blocks.append(features)
+            asset_ids.append(np.full(len(features), asset_id, dtype=np.int32))
+            end_positions.append(np.arange(window - 1, len(df), dtype=np.int32))
+            end_dates.append(df.index.values[window - 1:])
+
+        dim = 2 * window
+        self.matrix = np.vstack(blocks) if blocks else np.empty((0, dim), dtype=np.float32)
+        self.asset_ids = np.concatenate(asset_ids) if blocks else np.empty(0, dtype=np.int32)
+        self.end_positions = np.concatenate(end_positions) if blocks else np.empty(0, dtype=np.int32)
+        self.end_dates = np.concatenate(end_dates) if blocks else np.empty(0, dtype='datetime64[ns]')
+
+        # PCA: 在(抽样)窗口上做SVD, 查询向量使用同一投影
+        self._mean = None
+        self._components = None
+        if n_components and 0 < n_components < dim and len(self.matrix) > n_components:
+            rng = np.random.default_rng(0)
+            sample = self.matrix
+            if len(sample) > PCA_SAMPLE_SIZE:
+                sample = sample[rng.choice(len(sample), PCA_SAMPLE_SIZE, replace=False)]
+            self._mean = sample.mean(axis=0)
+            _, _, vt = np.linalg.svd(sample - self._mean, full_matrices=False)
+            self._components = vt[:n_components].astype(np.float32)
+            self.matrix = self._project(self.matrix)
+
+        self._norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+        logger.info(f"形态索引构建完成: {len(self.assets)} 个标的, {len(self.matrix)} 个窗口, 维数 {self.matrix.shape[1]}")
+
+    @property
+    def size(self) -> int:
+        """窗口总数"""
+        return len(self.matrix)
+
+    def _project(self, features: np.ndarray) -> np.ndarray:
+        if self._components is None:
+            return features
+        return ((features - self._mean) @ self._components.T).astype(np.float32)
+
+    def query_vector(self, df: pd.DataFrame) -> np.ndarray:
+        """最近一个窗口的形态向量(已投影)"""
+        features = window_features(df.iloc[-self.window:], self.window, self.volume_weight)
+        if len(features) == 0:
+            raise ValueError(f"数据不足{self.window}根K线, 无法检索相似形态")
+        return self._project(features[-1])
+
+    def nearest(
+        self,
+        query: np.ndarray,
+        k: int = 20,
+        exclude_from: Optional[pd.Timestamp] = None,
+        min_separation: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k近邻检索
+
+        Args:
+            query: 查询向量(已投影)
+            k: 返回数量
+            exclude_from: 排除在该日期及之后结束的窗口(与查询窗口重叠的近期走势)
+            min_separation: 同一标的两个命中窗口的最小间隔(K线数), 默认为窗口长度
+            chunk_size: 分块大小
+
+        Returns:
+            (窗口行号, 欧氏距离), 按距离升序
+        """
+        if self.size == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        min_separation = self.window if min_separation is None else min_separation
+        query = query.astype(np.float32)
+        query_norm = float(query @ query)
+
+        distances = np.empty(self.size, dtype=np.float32)
+        for start in range(0, self.size, chunk_size):
+            block = self.matrix[start:start + chunk_size]
+            distances[start:start + len(block)] = self._norms[start:start + len(block)] - 2 * (block @ query) + query_norm
+        np.maximum(distances, 0, out=distances)
+        if exclude_from is not None:
+            distances[self.end_dates >= np.datetime64(exclude_from)] = np.inf
+
+        # 先取k的若干倍候选, 去重后不足再扩大
+        n_candidates = min(self.size, max(k * 20, 100))
+        while True:
+            candidates = np.argpartition(distances, n_candidates - 1)[:n_candidates]
+            candidates = candidates[np.argsort(distances[candidates], kind='stable')]
+            selected = self._separate(candidates, distances, k, min_separation)
+            if len(selected) >= k or n_candidates >= self.size:
+                break
+            n_candidates = min(self.size, n_candidates * 4)
+
+        selected = np.array(selected, dtype=np.int64)
+        return selected, np.sqrt(distances[selected].astype(float))
+
+    def _separate(self, candidates: np.ndarray, distances: np.ndarray, k: int, min_separation: int) -> List[int]:
+        """贪心去重: 同一标的内与已选窗口间隔不足 min_separation 的跳过"""
+        taken: Dict[int, List[int]] = {}
+        selected = []
+        for row in candidates:
+            if not np.isfinite(distances[row]):
+                break
+            asset, end = int(self.asset_ids[row]), int(self.end_positions[row])
+            ends = taken.setdefault(asset, [])
+            if any(abs(end - other) < min_separation for other in ends):
+                continue
+            ends.append(end)
+            selected.append(int(row))
+            if len(selected) >= k:
+                break
+        return selected
+
+    def describe(self, rows: np.ndarray, distances: np.ndarray, horizons=DEFAULT_HORIZONS) -> pd.DataFrame:
+        """
+        命中窗口明细及后续表现 (由各标的的前瞻结果矩阵按位置取值)
+
+        Returns:
+            DataFrame(asset, start_date, end_date, distance, return_{N}d, max_dd_{N}d ...)
+        """
+        records = []
+        for row, distance in zip(rows, distances):
+            asset_id = int(self.asset_ids[row])
+            end = int(self.end_positions[row])
+            df = self._frames[asset_id]
+            outcomes = get_forward_outcomes(self._outcomes, asset_id, df, horizons)
+            end_date = df.index[end]
+            base = float(df['close'].iloc[end])
+
+            record = {
+                'asset': self.assets[asset_id],
+                'start_date': df.index[end - self.window + 1],
+                'end_date': end_date,
+                'distance': float(distance),
+            }
+            for h in horizons:
+                record[f'return_{h}d'] = float(outcomes.future_close([end_date], h)[0] / base - 1)
+                record[f'max_dd_{h}d'] = float(outcomes.forward_drawdown([end_date], h)[0] / base)
+            records.append(record)
+        return pd.DataFrame(records)
+
+    def search_frame(
+        self,
+        df: pd.DataFrame,
+        k: int = 20,
+        horizons=DEFAULT_HORIZONS,
+        min_separation: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        检索与df最近N天走势最相似的k段历史 (排除与查询窗口时间重叠的窗口)
+        """
+        query = self.query_vector(df)
+        rows, distances = self.nearest(
+            query, k=k,
+            exclude_from=df.index[-self.window],
+            min_separation=min_separation
+        )
+        return self.describe(rows, distances, horizons)
+
+
+def summarize_outcomes(matches: pd.DataFrame, horizons) -> Dict[str, Dict]:
+    """按周期汇总相似走势的后续表现"""
+    summary = {}
+    for h in horizons:
+        col = f'return_{h}d'
+        if matches.empty or col not in matches.columns:
+            continue
+        returns = matches[col].dropna()
+        if len(returns) == 0:
+            summary[f'{h}d'] = {'sample_size': 0}
+            continue
+        drawdowns = matches[f'max_dd_{h}d'].dropna()
+        summary[f'{h}d'] = {
+            'sample_size': int(len(returns)),
+            'up_prob': float((returns > 0).mean()),
+            'mean_return': float(returns.mean()),
+            'median_return': float(returns.median()),
+            'std': float(returns.std()) if len(returns) > 1 else 0.0,
+            'avg_max_dd': float(drawdowns.mean()) if len(drawdowns) else 0.0,
+        }
+    return summary
+
+
+def load_bar_store_frames(store=None) -> Dict[str, pd.DataFrame]:
+    """读取K线仓库中的全部标的, 键为 market/source/symbol"""
+    from src.data_sources.bar_store import get_bar_store
+
+    store = store or get_bar_store()
+    frames = {}
+    for market, source, symbol in store.partitions():
+        df = store.read(market, source, symbol)
+        if not df.empty and 'close' in df.columns:
+            frames[f'{market}/{source}/{symbol}'] = df
+    return frames
+
+
+# (窗口, PCA维数) -> (构建时的仓库指纹, 索引)
+_global_engines: Dict[Tuple, Tuple[Tuple, AnalogEngine]] = {}
+_global_lock = threading.Lock()
+
+
+def get_analog_engine(window: int = 20, n_components: Optional[int] = None, refresh: bool = False) -> AnalogEngine:
+    """
+    获取基于K线仓库全部标的的形态索引(进程内按参数共享)
+
+    K线仓库的分区或文件修改时间变化(增量刷新/新增标的)后自动重建,
+    长驻进程(如Web服务)不会一直使用启动时的旧索引
+
+    Args:
+        window: 形态窗口长度
+        n_components: PCA维数
+        refresh: 重新读取K线仓库并重建
+    """
+    from src.data_sources.bar_store import get_bar_store
+
+    store = get_bar_store()
+    key = (window, n_components)
+    with _global_lock:
+        fingerprint = store.fingerprint()
+        cached = _global_engines.get(key)
+        if refresh or cached is None or cached[0] != fingerprint:
+            engine = AnalogEngine(load_bar_store_frames(store), window=window, n_components=n_components)
+            _global_engines[key] = (fingerprint, engine)
+            return engine
+        return cached[1]
+
+
+def analog_phase(
+    df: pd.DataFrame,
+    periods: List[int],
+    label: str,
+    window: int = 20,
+    k: int = 20
+) -> Dict:
+    """
+    分析器的形态检索阶段: 检索最相似的k段历史走势并汇总后续表现
+
+    K线仓库为空(如未安装pyarrow)时仅在当前标的自身历史中检索
+
+    Args:
+        df: 当前标的日线
+        periods: 统计周期
+        label: 当前标的名称
+        window: 形态窗口长度
+        k: 相似走势数量
+    """
+    engine = get_analog_engine(window=window)
+    if engine.size == 0:
+        engine = AnalogEngine({label: df}, window=window)
+
+    matches = engine.search_frame(df, k=k, horizons=periods)
+    top = matches.head(10).copy()
+    for col in ('start_date', 'end_date'):
+        if col in top.columns:
+            top[col] = top[col].dt.strftime('%Y-%m-%d')
+
+    return {
+        'window': window,
+        'universe_assets': len(engine.assets),
+        'universe_windows': engine.size,
+        'match_count': len(matches),
+        'top_matches': top.to_dict('records'),
+        'period_stats': summarize_outcomes(matches, periods),
+    }
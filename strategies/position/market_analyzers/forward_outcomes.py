@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+前瞻收益/回撤矩阵
+Forward Outcome Matrix
+
+对一条日线序列一次性预计算每根K线之后N个交易日的:
+- 前瞻收盘价 (第N个交易日的收盘)
+- 前瞻最大回撤 (未来N日内相对滚动高点的最大跌幅, 价格单位)
+
+相似点位分析只需按日期定位到行号后按位置取值,
+不再对每个相似日期、每个周期切片 df[df.index > date]。
+回撤按周期长度逐步推进滚动高点, 所有起点一次向量运算, 复杂度 O(n × 最大周期)。
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 市场分析器默认使用的周期
+DEFAULT_HORIZONS = (5, 10, 20, 30, 60)
+
+
+class ForwardOutcomeMatrix:
+    """
+    单个标的的前瞻结果矩阵
+
+    内部数组按"第一根未来K线"的位置 s 索引 (0..n), 日期 d 对应
+    s = 索引中 > d 的第一个位置, 与 df[df.index > d] 的第一行一致。
+    """
+
+    def __init__(self, df: pd.DataFrame, horizons: Iterable[int] = DEFAULT_HORIZONS):
+        """
+        Args:
+            df: 按日期升序的日线, 至少包含close列
+            horizons: 需要预计算的周期(交易日数)
+        """
+        self.source = df
+        self.index = df.index
+        self.close = df['close'].to_numpy(dtype=float)
+        self.horizons = tuple(sorted({int(h) for h in horizons if int(h) > 0}))
+
+        self._future_close: Dict[int, np.ndarray] = {}
+        self._drawdown: Dict[int, np.ndarray] = {}
+        self._build()
+
+    def _build(self) -> None:
+        close = self.close
+        n = len(close)
+
+        for h in self.horizons:
+            future = np.full(n + 1, np.nan)
+            if h <= n:
+                future[:n - h + 1] = close[h - 1:]
+            self._future_close[h] = future
+
+        if not self.horizons or n == 0:
+            for h in self.horizons:
+                self._drawdown[h] = np.full(n + 1, np.nan)
+            return
+
+        # 第k步: running_max[s] = max(close[s..s+k]), drawdown[s] = min(close[s+j] - running_max) (j<=k)
+        running_max = close.copy()
+        drawdown = np.zeros(n)
+        wanted = set(self.horizons)
+        for k in range(max(self.horizons)):
+            if k > 0:
+                m = n - k
+                if m <= 0:
+                    break
+                step = close[k:]
+                np.maximum(running_max[:m], step, out=running_max[:m])
+                np.minimum(drawdown[:m], step - running_max[:m], out=drawdown[:m])
+            if k + 1 in wanted:
+                window = k + 1
+                result = np.full(n + 1, np.nan)
+                if window <= n:
+                    result[:n - window + 1] = drawdown[:n - window + 1]
+                self._drawdown[window] = result
+
+        for h in self.horizons:
+            self._drawdown.setdefault(h, np.full(n + 1, np.nan))
+
+    def covers(self, horizons: Iterable[int]) -> bool:
+        """是否已预计算所有给定周期"""
+        return set(horizons) <= set(self.horizons)
+
+    def start_positions(self, dates) -> np.ndarray:
+        """每个日期之后第一根K线的位置"""
+        return self.index.searchsorted(dates, side='right')
+
+    def future_close(self, dates, horizon: int) -> np.ndarray:
+        """各日期之后第horizon个交易日的收盘价, 数据不足为NaN"""
+        return self._future_close[horizon][self.start_positions(dates)]
+
+    def forward_drawdown(self, dates, horizon: int) -> np.ndarray:
+        """各日期之后horizon个交易日内的最大回撤(价格单位, <=0), 数据不足为NaN"""
+        return self._drawdown[horizon][self.start_positions(dates)]
+
+    def forward_returns(self, horizons: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """每根K线以自身收盘价为基准的前瞻收益率"""
+        horizons = self.horizons if horizons is None else horizons
+        base = self.close
+        return pd.DataFrame(
+            {f'return_{h}d': self._future_close[h][1:] / base - 1 for h in horizons},
+            index=self.index
+        )
+
+    def future_returns(self, similar_periods: pd.DataFrame, periods: List[int]) -> pd.DataFrame:
+        """
+        相似时期的后续收益率 (与逐日切片实现结果一致)
+
+        Returns:
+            DataFrame(date, price, return_{N}d...)
+        """
+        if similar_periods.empty:
+            return pd.DataFrame()
+
+        current = similar_periods['close'].to_numpy(dtype=float)
+        result = pd.DataFrame({'date': similar_periods.index, 'price': similar_periods['close'].values})
+        for period in periods:
+            future = self.future_close(similar_periods.index, period)
+            result[f'return_{period}d'] = (future - current) / current
+        return result
+
+    def drawdown_stats(self, similar_periods: pd.DataFrame, period: int) -> Dict:
+        """
+        相似时期之后period日内的最大回撤统计
+
+        回撤 = 未来价格相对未来窗口内滚动高点的跌幅 / 相似日收盘价
+        """
+        if similar_periods.empty:
+            return {'max_dd': 0.0, 'avg_dd': 0.0, 'dd_prob': 0.0}
+
+        current = similar_periods['close'].to_numpy(dtype=float)
+        drawdowns = self.forward_drawdown(similar_periods.index, period) / current
+        drawdowns = pd.Series(drawdowns[~np.isnan(drawdowns)])
+
+        if len(drawdowns) == 0:
+            return {'max_dd': 0.0, 'avg_dd': 0.0, 'dd_prob': 0.0}
+
+        return {
+            'max_dd': float(drawdowns.min()),  # 最大回撤(负值)
+            'avg_dd': float(drawdowns.mean()),  # 平均回撤
+            'dd_prob': float((drawdowns < -0.05).sum() / len(drawdowns)),  # 回撤超过5%的概率
+            'dd_std': float(drawdowns.std())  # 回撤标准差
+        }
+
+
+def get_forward_outcomes(
+    cache: Dict[str, ForwardOutcomeMatrix],
+    key: str,
+    df: pd.DataFrame,
+    horizons: Iterable[int]
+) -> ForwardOutcomeMatrix:
+    """
+    从分析器的矩阵缓存取出(或构建)前瞻结果矩阵
+
+    数据重新获取(不是同一个DataFrame)或需要新的周期时重建
+
+    Args:
+        cache: 分析器持有的 {key: 矩阵} 字典
+        key: 缓存键(通常为指数代码)
+        df: 日线
+        horizons: 本次需要的周期
+    """
+    horizons = set(horizons)
+    matrix = cache.get(key)
+    if matrix is None or matrix.source is not df or not matrix.covers(horizons):
+        matrix = ForwardOutcomeMatrix(df, horizons | set(DEFAULT_HORIZONS))
+        cache[key] = matrix
+    return matrix
@@ -11,7 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from typing import Dict, List, Optional
 from dataclasses import dataclass
@@ -22,6 +22,9 @@ from src.data_sources.us_stock_source import USStockDataSource  # 可复用yfina
 from ..analyzers.market_specific.ah_premium_analyzer import AHPremiumAnalyzer
 from ..analyzers.market_specific.southbound_funds_analyzer import SouthboundFundsAnalyzer
 from ..analyzers.risk_detection.hk_market_top_detector import HKMarketTopDetector
+from ..core.price_index import select_price_band
+from .forward_outcomes import get_forward_outcomes
+from .analog_search import analog_phase
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +54,8 @@ class HKMarketAnalyzer:
     def __init__(self):
         self.data_source = USStockDataSource()  # 使用yfinance获取港股数据
         self.data_cache = {}
+        self.forward_outcomes = {}  # 前瞻收益/回撤矩阵(按指数代码)
+        self.price_indexes = {}  # 收盘价排序索引(按指数代码+周期)
 
         # Phase 3.2: 初始化机构级专业分析器
         self.ah_premium_analyzer = AHPremiumAnalyzer()
@@ -130,22 +135,10 @@ class HKMarketAnalyzer:
             logger.warning(f"{index_code}数据为空")
             return pd.DataFrame()
 
-        if current_price is None:
-            current_price = df['close'].iloc[-1]
-
-        # 定义相似区间
-        lower_bound = current_price * (1 - tolerance)
-        upper_bound = current_price * (1 + tolerance)
-
-        # 筛选相似点位
-        similar = df[
-            (df['close'] >= lower_bound) &
-            (df['close'] <= upper_bound)
-        ].copy()
-
-        # 过滤: 排除最近的数据点
-        cutoff_date = df.index[-1] - timedelta(days=min_gap_days)
-        similar = similar[similar.index <= cutoff_date]
+        # 按排序价格索引二分查找区间, 再排除最近的数据点
+        similar, lower_bound, upper_bound = select_price_band(
+            self.price_indexes, f"{index_code}_{period}", df, current_price, tolerance, min_gap_days
+        )
 
         logger.info(
             f"{HK_INDICES[index_code].name} "
@@ -155,6 +148,10 @@ class HKMarketAnalyzer:
 
         return similar
 
+    def _forward_outcomes(self, index_code: str, df: pd.DataFrame, periods: List[int]):
+        """取出(或构建)指数的前瞻收益/回撤矩阵"""
+        return get_forward_outcomes(self.forward_outcomes, index_code, df, periods)
+
     def calculate_future_returns(
         self,
         index_code: str,
@@ -167,28 +164,8 @@ class HKMarketAnalyzer:
         if df.empty:
             return pd.DataFrame()
 
-        results = []
-
-        for date in similar_periods.index:
-            row = {
-                'date': date,
-                'price': similar_periods.loc[date, 'close']
-            }
-
-            for period in periods:
-                future_data = df[df.index > date]
-
-                if len(future_data) >= period:
-                    future_price = future_data['close'].iloc[period - 1]
-                    current_price = similar_periods.loc[date, 'close']
-                    ret = (future_price - current_price) / current_price
-                    row[f'return_{period}d'] = ret
-                else:
-                    row[f'return_{period}d'] = np.nan
-
-            results.append(row)
-
-        return pd.DataFrame(results)
+        # 按位置从预计算矩阵取值, 不再逐日切片
+        return self._forward_outcomes(index_code, df, periods).future_returns(similar_periods, periods)
 
     def calculate_max_drawdown(self, index_code: str, similar_periods: pd.DataFrame, period: int = 20) -> Dict:
         """计算相似时期的最大回撤统计"""
@@ -197,32 +174,7 @@ class HKMarketAnalyzer:
         if df.empty:
             return {'max_dd': 0.0, 'avg_dd': 0.0, 'dd_prob': 0.0}
 
-        drawdowns = []
-
-        for date in similar_periods.index:
-            future_data = df[df.index > date]
-
-            if len(future_data) >= period:
-                # 获取未来N天的价格序列
-                prices = future_data['close'].iloc[:period]
-                current_price = similar_periods.loc[date, 'close']
-
-                # 计算相对于买入点的累计最大回撤
-                cummax = prices.expanding().max()
-                dd = ((prices - cummax) / current_price).min()
-                drawdowns.append(dd)
-
-        if len(drawdowns) == 0:
-            return {'max_dd': 0.0, 'avg_dd': 0.0, 'dd_prob': 0.0}
-
-        drawdowns = pd.Series(drawdowns)
-
-        return {
-            'max_dd': float(drawdowns.min()),  # 最大回撤(负值)
-            'avg_dd': float(drawdowns.mean()),  # 平均回撤
-            'dd_prob': float((drawdowns < -0.05).sum() / len(drawdowns)),  # 回撤超过5%的概率
-            'dd_std': float(drawdowns.std())  # 回撤标准差
-        }
+        return self._forward_outcomes(index_code, df, [period]).drawdown_stats(similar_periods, period)
 
     def calculate_probability_statistics(self, returns: pd.Series) -> Dict:
         """计算涨跌概率及统计指标"""
@@ -374,9 +326,10 @@ class HKMarketAnalyzer:
         self,
         index_code: str,
         tolerance: float = 0.05,
-        periods: List[int] = [5, 10, 20, 30, 60]
+        periods: List[int] = [5, 10, 20, 30, 60],
+        use_analog: bool = False
     ) -> Dict:
-        """单指数完整分析"""
+        """单指数完整分析 (use_analog: 追加历史走势形态检索)"""
         logger.info(f"开始分析港股 {HK_INDICES[index_code].name}...")
 
         result = {
@@ -447,6 +400,16 @@ class HKMarketAnalyzer:
 
                     result['period_analysis'][f'{period}d'] = stats
 
+            # 形态检索: 最近N天走势的k个最相似历史片段(跨K线仓库全部标的)
+            if use_analog:
+                try:
+                    df = self.get_index_data(index_code, period="10y")
+                    if not df.empty:
+                        result['analog_analysis'] = analog_phase(df, periods, label=index_code)
+                        logger.info("历史走势形态检索完成")
+                except Exception as e:
+                    logger.warning(f"形态检索失败: {str(e)}")
+
             # Phase 3.2: 深度分析 - 机构级专业指标
             result['phase3_analysis'] = {}
 
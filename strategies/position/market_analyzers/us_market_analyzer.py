@@ -12,12 +12,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
 from src.data_sources.us_stock_source import USStockDataSource
+from strategies.trading.signal_generators.indicator_panel import panel_key
 from ..analyzers.market_indicators.vix_analyzer import VIXAnalyzer
 from ..analyzers.market_structure.sector_analyzer import SectorRotationAnalyzer
 from ..analyzers.technical_analysis.volume_analyzer import VolumeAnalyzer
@@ -31,6 +32,9 @@ from ..analyzers.risk_detection.us_market_top_detector import USMarketTopDetecto
 from ..analyzers.valuation.us_valuation_analyzer import USValuationAnalyzer
 from ..analyzers.market_structure.us_market_breadth_analyzer import USMarketBreadthAnalyzer
 from ..analyzers.market_specific.us_margin_debt_analyzer import USMarginDebtAnalyzer
+from ..core.price_index import select_price_band
+from .forward_outcomes import get_forward_outcomes
+from .analog_search import analog_phase
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +67,8 @@ class USMarketAnalyzer:
     def __init__(self):
         self.data_source = USStockDataSource()
         self.data_cache = {}  # 数据缓存
+        self.forward_outcomes = {}  # 前瞻收益/回撤矩阵(按指数代码)
+        self.price_indexes = {}  # 收盘价排序索引(按指数代码+周期)
 
         # Phase 3: 初始化分析器
         self.vix_analyzer = VIXAnalyzer(self.data_source)
@@ -188,22 +194,10 @@ class USMarketAnalyzer:
             logger.warning(f"{index_code}数据为空")
             return pd.DataFrame()
 
-        if current_price is None:
-            current_price = df['close'].iloc[-1]
-
-        # 定义相似区间
-        lower_bound = current_price * (1 - tolerance)
-        upper_bound = current_price * (1 + tolerance)
-
-        # 筛选相似点位
-        similar = df[
-            (df['close'] >= lower_bound) &
-            (df['close'] <= upper_bound)
-        ].copy()
-
-        # 过滤: 排除最近的数据点(避免用当前预测当前)
-        cutoff_date = df.index[-1] - timedelta(days=min_gap_days)
-        similar = similar[similar.index <= cutoff_date]
+        # 按排序价格索引二分查找区间, 再排除最近的数据点(避免用当前预测当前)
+        similar, lower_bound, upper_bound = select_price_band(
+            self.price_indexes, f"{index_code}_{period}", df, current_price, tolerance, min_gap_days
+        )
 
         logger.info(
             f"{US_INDICES[index_code].name} "
@@ -265,7 +259,7 @@ class USMarketAnalyzer:
 
         # 2. 计算当前技术指标
         current_df = df_full.copy()
-        current_indicators = self.data_source.calculate_technical_indicators(current_df)
+        current_indicators = self.data_source.calculate_technical_indicators(current_df, symbol=panel_key('US', index_code))
 
         if not current_indicators:
             logger.warning("无法计算当前技术指标,跳过技术指标过滤")
@@ -299,41 +293,24 @@ class USMarketAnalyzer:
 
         logger.debug(f"技术指标预计算完成,开始过滤...")
 
-        # 向量化过滤(直接查表,无需重复计算)
-        filtered_dates = []
-
-        for date in similar.index:
-            # 直接从预计算结果中查询(O(1)操作)
-            try:
-                hist_rsi = df_full.loc[date, 'rsi']
-                hist_dist_to_high = df_full.loc[date, 'dist_to_high_pct']
-                hist_price = df_full.loc[date, 'close']
-                hist_ma20 = df_full.loc[date, 'ma20']
-                hist_ma60 = df_full.loc[date, 'ma60']
-                hist_ma250 = df_full.loc[date, 'ma250']
-
-                # 跳过NaN值
-                if pd.isna(hist_rsi) or pd.isna(hist_dist_to_high):
-                    continue
-
-                # 检查RSI相似度
-                if abs(current_rsi - hist_rsi) > rsi_tolerance:
-                    continue
-
-                # 检查距52周高点位置相似度
-                if abs(current_dist_to_high - hist_dist_to_high) > percentile_tolerance:
-                    continue
-
-                # 检查均线状态
-                hist_ma_state = self._get_ma_state_from_values(hist_price, hist_ma20, hist_ma60, hist_ma250)
-                if current_ma_state != hist_ma_state:
-                    continue
-
-                filtered_dates.append(date)
-
-            except KeyError:
-                # 日期不在df_full中,跳过
-                continue
+        # 向量化过滤(对相似日期做一次对齐查表,布尔掩码过滤)
+        # 不在df_full中的日期直接丢弃
+        candidates = df_full.reindex(similar.index[similar.index.isin(df_full.index)])
+
+        price = candidates['close']
+        ma20, ma60, ma250 = candidates['ma20'], candidates['ma60'], candidates['ma250']
+        bull = (price > ma20) & (ma20 > ma60) & (ma60 > ma250)
+        bear = (price < ma20) & (ma20 < ma60) & (ma60 < ma250)
+        ma_state = np.select([bull, bear], ['多头排列', '空头排列'], default='震荡')
+
+        mask = (
+            candidates['rsi'].notna()
+            & candidates['dist_to_high_pct'].notna()
+            & ~((current_rsi - candidates['rsi']).abs() > rsi_tolerance)
+            & ~((current_dist_to_high - candidates['dist_to_high_pct']).abs() > percentile_tolerance)
+            & (ma_state == current_ma_state)
+        )
+        filtered_dates = list(candidates.index[mask.values])
 
         # 4. 返回过滤后的结果
         if len(filtered_dates) == 0:
@@ -449,6 +426,10 @@ class USMarketAnalyzer:
         # 震荡市
         return '震荡市'
 
+    def _forward_outcomes(self, index_code: str, df: pd.DataFrame, periods: List[int]):
+        """取出(或构建)指数的前瞻收益/回撤矩阵"""
+        return get_forward_outcomes(self.forward_outcomes, index_code, df, periods)
+
     def calculate_future_returns(
         self,
         index_code: str,
@@ -471,29 +452,8 @@ class USMarketAnalyzer:
         if df.empty:
             return pd.DataFrame()
 
-        results = []
-
-        for date in similar_periods.index:
-            row = {
-                'date': date,
-                'price': similar_periods.loc[date, 'close']
-            }
-
-            for period in periods:
-                # 查找未来第N个交易日
-                future_data = df[df.index > date]
-
-                if len(future_data) >= period:
-                    future_price = future_data['close'].iloc[period - 1]
-                    current_price = similar_periods.loc[date, 'close']
-                    ret = (future_price - current_price) / current_price
-                    row[f'return_{period}d'] = ret
-                else:
-                    row[f'return_{period}d'] = np.nan
-
-            results.append(row)
-
-        return pd.DataFrame(results)
+        # 按位置从预计算矩阵取值, 不再逐日切片
+        return self._forward_outcomes(index_code, df, periods).future_returns(similar_periods, periods)
 
     def calculate_max_drawdown(self, index_code: str, similar_periods: pd.DataFrame, period: int = 20) -> Dict:
         """计算相似时期的最大回撤统计"""
@@ -502,32 +462,7 @@ class USMarketAnalyzer:
         if df.empty:
             return {'max_dd': 0.0, 'avg_dd': 0.0, 'dd_prob': 0.0}
 
-        drawdowns = []
-
-        for date in similar_periods.index:
-            future_data = df[df.index > date]
-
-            if len(future_data) >= period:
-                # 获取未来N天的价格序列
-                prices = future_data['close'].iloc[:period]
-                current_price = similar_periods.loc[date, 'close']
-
-                # 计算相对于买入点的累计最大回撤
-                cummax = prices.expanding().max()
-                dd = ((prices - cummax) / current_price).min()
-                drawdowns.append(dd)
-
-        if len(drawdowns) == 0:
-            return {'max_dd': 0.0, 'avg_dd': 0.0, 'dd_prob': 0.0}
-
-        drawdowns = pd.Series(drawdowns)
-
-        return {
-            'max_dd': float(drawdowns.min()),  # 最大回撤(负值)
-            'avg_dd': float(drawdowns.mean()),  # 平均回撤
-            'dd_prob': float((drawdowns < -0.05).sum() / len(drawdowns)),  # 回撤超过5%的概率
-            'dd_std': float(drawdowns.std())  # 回撤标准差
-        }
+        return self._forward_outcomes(index_code, df, [period]).drawdown_stats(similar_periods, period)
 
     def calculate_probability_statistics(
         self,
@@ -855,7 +790,8 @@ class USMarketAnalyzer:
         tolerance: float = 0.05,
         periods: List[int] = [5, 10, 20, 30, 60],
         use_phase2: bool = False,
-        use_phase3: bool = False
+        use_phase3: bool = False,
+        use_analog: bool = False
     ) -> Dict:
         """
         单指数完整分析
@@ -866,6 +802,7 @@ class USMarketAnalyzer:
             periods: 分析周期
             use_phase2: 是否使用Phase 2技术指标增强匹配
             use_phase3: 是否使用Phase 3深度分析(VIX/行业/成交量)
+            use_analog: 是否追加历史走势形态检索(k近邻)
 
         Returns:
             完整分析结果
@@ -904,7 +841,7 @@ class USMarketAnalyzer:
             if use_phase2:
                 df = self.get_index_data(index_code, period="5y")
                 if not df.empty:
-                    current_indicators = self.data_source.calculate_technical_indicators(df)
+                    current_indicators = self.data_source.calculate_technical_indicators(df, symbol=panel_key('US', index_code))
                     if current_indicators:
                         rsi = current_indicators.get('rsi', 50)
                         dist_to_high = current_indicators.get('dist_to_high_pct', 0)
@@ -975,6 +912,16 @@ class USMarketAnalyzer:
 
                     result['period_analysis'][f'{period}d'] = stats
 
+            # 形态检索: 最近N天走势的k个最相似历史片段(跨K线仓库全部标的)
+            if use_analog:
+                try:
+                    df = self.get_index_data(index_code, period="10y")
+                    if not df.empty:
+                        result['analog_analysis'] = analog_phase(df, periods, label=index_code)
+                        logger.info("历史走势形态检索完成")
+                except Exception as e:
+                    logger.warning(f"形态检索失败: {str(e)}")
+
             # Phase 3: 深度分析
             if use_phase3:
                 logger.info(f"Phase 3: 执行深度分析...")
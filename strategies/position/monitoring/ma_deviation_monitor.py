@@ -19,6 +19,8 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import warnings
 
+from src.data_sources.bar_store import get_bar_store
+
 warnings.filterwarnings('ignore')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -85,20 +87,12 @@ class MADeviationMonitor:
 
             logger.info(f"获取 {config['name']} 历史数据...")
 
-            if config['type'] == 'hk_stock':
-                # 港股数据
-                symbol = config['symbol']
-                df = ak.stock_hk_index_daily_em(symbol=symbol)
-                # 标准化列名
-                if 'latest' in df.columns:
-                    df = df.rename(columns={'latest': 'close'})
-                df['date'] = pd.to_datetime(df['date'])
-                df = df.set_index('date').sort_index()
-            else:
-                # A股数据
-                df = ak.stock_zh_index_daily(symbol=index_code)
-                df['date'] = pd.to_datetime(df['date'])
-                df = df.set_index('date').sort_index()
+            market = 'hk' if config['type'] == 'hk_stock' else 'cn'
+            symbol = config.get('symbol', index_code)
+            df = get_bar_store().get_bars(
+                market, 'akshare', symbol,
+                lambda since: self._download_index_data(index_code, config, since)
+            )
 
             # 缓存
             self._cache[index_code] = df
@@ -109,6 +103,30 @@ class MADeviationMonitor:
             logger.error(f"获取 {index_code} 数据失败: {str(e)}")
             return pd.DataFrame()
 
+    @staticmethod
+    def _download_index_data(
+        index_code: str,
+        config: Dict,
+        since: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        """从 akshare 下载指数日线, since 不为空时只返回该日及之后的K线(增量刷新)"""
+        if config['type'] == 'hk_stock':
+            # 港股数据
+            df = ak.stock_hk_index_daily_em(symbol=config['symbol'])
+            # 标准化列名
+            if 'latest' in df.columns:
+                df = df.rename(columns={'latest': 'close'})
+        else:
+            # A股数据
+            df = ak.stock_zh_index_daily(symbol=index_code)
+
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.set_index('date').sort_index()
+        # 两个指数接口都只能全量下载, 按 since 截取后只合并增量部分
+        if since is not None:
+            df = df[df.index >= since]
+        return df
+
     def calculate_ma_deviation(
         self,
         index_code: str,
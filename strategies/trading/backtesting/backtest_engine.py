@@ -11,6 +11,10 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from .array_backtest import (
+    backtest_arrays, backtest_basket, daily_returns_from_values, encode_signals, trade_to_dict
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,94 +70,29 @@ class BacktestEngine:
         """
         logger.info("开始回测...")
 
-        cash = self.initial_capital
-        position = 0  # 持仓数量
-        position_value = 0  # 持仓市值
-        entry_price = 0  # 入场价格
-        entry_date = None  # 入场日期
+        # 预先转换为数组, 撮合循环不经过pandas索引
+        values, raw_trades = backtest_arrays(
+            df[price_column].to_numpy(dtype=float),
+            encode_signals(signals, len(df)),
+            initial_capital=self.initial_capital,
+            commission=self.commission,
+            slippage=self.slippage,
+            stop_loss=self.stop_loss,
+            take_profit=self.take_profit
+        )
 
-        portfolio_values = []
-        daily_returns = []
         trades = []
+        for raw in raw_trades:
+            dates = {raw[0]: self._bar_date(df, raw[0]), raw[1]: self._bar_date(df, raw[1])}
+            trade = trade_to_dict(raw, dates)
+            trades.append(trade)
 
-        for i in range(len(df)):
-            date = df.index[i] if hasattr(df.index[i], 'date') else df.iloc[i].get('date', i)
-            price = df.iloc[i][price_column]
-            signal = signals.iloc[i] if i < len(signals) else 'HOLD'
-
-            # 检查止损止盈
-            if position > 0 and entry_price > 0:
-                current_return = (price - entry_price) / entry_price
-
-                # 止损
-                if self.stop_loss and current_return <= -self.stop_loss:
-                    signal = 'STOP_LOSS'
-                    logger.info(f"{date}: 触发止损 ({current_return*100:.2f}%)")
-
-                # 止盈
-                elif self.take_profit and current_return >= self.take_profit:
-                    signal = 'TAKE_PROFIT'
-                    logger.info(f"{date}: 触发止盈 ({current_return*100:.2f}%)")
-
-            # 处理交易信号
-            if signal in ['STRONG_BUY', 'BUY'] and position == 0:
-                # 买入
-                buy_price = price * (1 + self.slippage)
-                shares = int(cash / buy_price)
-
-                if shares > 0:
-                    cost = shares * buy_price
-                    commission_fee = cost * self.commission
-
-                    cash -= (cost + commission_fee)
-                    position = shares
-                    entry_price = buy_price
-                    entry_date = date
-
-                    logger.info(f"{date}: 买入 {shares} 股 @ {buy_price:.2f}, 手续费 {commission_fee:.2f}")
-
-            elif signal in ['STRONG_SELL', 'SELL', 'STOP_LOSS', 'TAKE_PROFIT'] and position > 0:
-                # 卖出
-                sell_price = price * (1 - self.slippage)
-                revenue = position * sell_price
-                commission_fee = revenue * self.commission
-
-                cash += (revenue - commission_fee)
-
-                # 记录交易
-                trade_return = (sell_price - entry_price) / entry_price
-                pnl = (sell_price - entry_price) * position - commission_fee * 2
-
-                trade = {
-                    'entry_date': entry_date,
-                    'exit_date': date,
-                    'entry_price': entry_price,
-                    'exit_price': sell_price,
-                    'shares': position,
-                    'return': trade_return,
-                    'pnl': pnl,
-                    'signal': signal
-                }
-                trades.append(trade)
-
-                logger.info(f"{date}: 卖出 {position} 股 @ {sell_price:.2f}, "
-                           f"收益率 {trade_return*100:.2f}%, 盈亏 {pnl:.2f}")
-
-                position = 0
-                entry_price = 0
-                entry_date = None
-
-            # 计算组合价值
-            position_value = position * price if position > 0 else 0
-            total_value = cash + position_value
-            portfolio_values.append(total_value)
-
-            # 计算日收益率
-            if i > 0:
-                daily_return = (total_value - portfolio_values[i-1]) / portfolio_values[i-1]
-                daily_returns.append(daily_return)
-            else:
-                daily_returns.append(0)
+            logger.info(f"{trade['entry_date']}: 买入 {trade['shares']} 股 @ {trade['entry_price']:.2f}; "
+                        f"{trade['exit_date']}: {trade['signal']} 卖出 @ {trade['exit_price']:.2f}, "
+                        f"收益率 {trade['return']*100:.2f}%, 盈亏 {trade['pnl']:.2f}")
+
+        portfolio_values = values.tolist()
+        daily_returns = daily_returns_from_values(values).tolist()
 
         # 保存结果
         self.portfolio_value = portfolio_values
@@ -172,6 +111,41 @@ class BacktestEngine:
         logger.info("回测完成")
         return result
 
+    @staticmethod
+    def _bar_date(df: pd.DataFrame, i: int):
+        """第i根K线的日期(索引为日期时取索引, 否则取date列)"""
+        return df.index[i] if hasattr(df.index[i], 'date') else df.iloc[i].get('date', i)
+
+    def run_basket_backtest(
+        self,
+        price_panel: pd.DataFrame,
+        signal_panel: pd.DataFrame
+    ) -> Dict:
+        """
+        一篮子标的批量回测 (各标的独立资金, 规则与 run_backtest 相同)
+
+        Args:
+            price_panel: 价格面板 (日期 × 标的)
+            signal_panel: 信号面板 (日期 × 标的)
+
+        Returns:
+            {
+                'portfolio_values': 各标的组合价值面板,
+                'trades': {标的: 交易记录列表},
+                'summary': 每个标的一行的汇总DataFrame
+            }
+        """
+        logger.info(f"开始批量回测: {price_panel.shape[1]} 个标的")
+        return backtest_basket(
+            price_panel,
+            signal_panel,
+            initial_capital=self.initial_capital,
+            commission=self.commission,
+            slippage=self.slippage,
+            stop_loss=self.stop_loss,
+            take_profit=self.take_profit
+        )
+
     def run_backtest_with_strategy(
         self,
         df: pd.DataFrame,
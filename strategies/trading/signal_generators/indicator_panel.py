@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标面板 - 全历史指标序列缓存
+
+同一标的的MA/MACD/RSI/KDJ/BOLL/ATR/DMI在一次运行中会被多个分析器重复计算。
+IndicatorPanel 以 (标的, 最新K线日期, 参数) 为键缓存完整指标序列:
+- 每个指标(含参数)只计算一次, 同时服务"最新值"和"完整序列"两类请求
+- 新增K线时增量更新: 滚动类指标只重算尾部窗口, EMA/Wilder类指标按递推公式续算
+- 计算口径与 TechnicalIndicators 完全一致
+- 面板键统一为 "市场:代码" (见 panel_key), 不同分析器对同一标的共享同一面板
+- 注册表返回的面板长度始终与调用方的K线一致; 新增K线时生成扩展后的新面板替换,
+  已被其他调用方持有的面板不会在其使用中变长
+"""
+
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dmi_adx import DMI_ADX_Calculator
+
+
+def _ewm_step(prev: float, x: float, alpha: float) -> float:
+    """pandas ewm(adjust=False) 的单步递推(保持与其浮点运算顺序一致)"""
+    if prev == x:
+        return prev
+    old_wt = 1.0 - alpha
+    return (old_wt * prev + alpha * x) / (old_wt + alpha)
+
+
+def _true_range(df: pd.DataFrame) -> pd.Series:
+    high_low = df['high'] - df['low']
+    high_close = abs(df['high'] - df['close'].shift(1))
+    low_close = abs(df['low'] - df['close'].shift(1))
+    return pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+
+
+# ----------------------------------------------------------------------
+# 全量计算 (与 TechnicalIndicators 口径一致)
+# ----------------------------------------------------------------------
+
+def _compute_ma(df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
+    return pd.DataFrame({f'ma{period}': df['close'].rolling(window=period).mean()})
+
+
+def _compute_ema(df: pd.DataFrame, span: int = 12) -> pd.DataFrame:
+    return pd.DataFrame({f'ema{span}': df['close'].ewm(span=span, adjust=False).mean()})
+
+
+def _compute_macd(df: pd.DataFrame, fast_period: int = 12, slow_period: int = 26,
+                  signal_period: int = 9) -> pd.DataFrame:
+    exp1 = df['close'].ewm(span=fast_period, adjust=False).mean()
+    exp2 = df['close'].ewm(span=slow_period, adjust=False).mean()
+    macd = exp1 - exp2
+    signal = macd.ewm(span=signal_period, adjust=False).mean()
+    return pd.DataFrame({
+        'macd': macd,
+        'macd_signal': signal,
+        'macd_histogram': macd - signal,
+        '_ema_fast': exp1,
+        '_ema_slow': exp2,
+    })
+
+
+def _compute_rsi(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    delta = df['close'].diff()
+    avg_gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    avg_loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return pd.DataFrame({'rsi': 100 - (100 / (1 + avg_gain / avg_loss))})
+
+
+def _compute_kdj(df: pd.DataFrame, n: int = 9, m1: int = 3, m2: int = 3) -> pd.DataFrame:
+    low_n = df['low'].rolling(window=n).min()
+    high_n = df['high'].rolling(window=n).max()
+    rsv = (df['close'] - low_n) / (high_n - low_n) * 100
+    k = rsv.ewm(span=m1, adjust=False).mean()
+    d = k.ewm(span=m2, adjust=False).mean()
+    return pd.DataFrame({'kdj_k': k, 'kdj_d': d, 'kdj_j': 3 * k - 2 * d})
+
+
+def _compute_boll(df: pd.DataFrame, period: int = 20, num_std: float = 2.0) -> pd.DataFrame:
+    mid = df['close'].rolling(window=period).mean()
+    std = df['close'].rolling(window=period).std()
+    return pd.DataFrame({
+        'boll_mid': mid,
+        'boll_upper': mid + (std * num_std),
+        'boll_lower': mid - (std * num_std),
+    })
+
+
+def _compute_atr(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    return pd.DataFrame({'atr': _true_range(df).rolling(window=period).mean()})
+
+
+def _compute_dmi_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    calc = DMI_ADX_Calculator(period=period)
+    tr = calc._calculate_true_range(df)
+    plus_dm, minus_dm = calc._calculate_directional_movement(df)
+    tr_s = calc._wilders_smoothing(tr, period)
+    pdm_s = calc._wilders_smoothing(plus_dm, period)
+    mdm_s = calc._wilders_smoothing(minus_dm, period)
+    plus_di = 100 * pdm_s / tr_s
+    minus_di = 100 * mdm_s / tr_s
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    return pd.DataFrame({
+        '+di': plus_di,
+        '-di': minus_di,
+        'adx': calc._wilders_smoothing(dx, period),
+        '_tr_s': tr_s,
+        '_pdm_s': pdm_s,
+        '_mdm_s': mdm_s,
+    })
+
+
+# ----------------------------------------------------------------------
+# 增量更新 (返回新增K线对应的行, 无法安全递推时返回None触发全量重算)
+# ----------------------------------------------------------------------
+
+def _update_macd(prev: pd.DataFrame, data: pd.DataFrame, new_count: int, fast_period: int = 12,
+                 slow_period: int = 26, signal_period: int = 9) -> Optional[pd.DataFrame]:
+    last = prev.iloc[-1]
+    ema_fast, ema_slow, signal = last['_ema_fast'], last['_ema_slow'], last['macd_signal']
+    a_fast, a_slow, a_sig = 2 / (fast_period + 1), 2 / (slow_period + 1), 2 / (signal_period + 1)
+
+    rows = []
+    for x in data['close'].values[-new_count:]:
+        ema_fast = _ewm_step(ema_fast, x, a_fast)
+        ema_slow = _ewm_step(ema_slow, x, a_slow)
+        macd = ema_fast - ema_slow
+        signal = _ewm_step(signal, macd, a_sig)
+        rows.append((macd, signal, macd - signal, ema_fast, ema_slow))
+    return pd.DataFrame(rows, columns=prev.columns, index=data.index[-new_count:])
+
+
+def _update_ema(prev: pd.DataFrame, data: pd.DataFrame, new_count: int,
+                span: int = 12) -> Optional[pd.DataFrame]:
+    value = prev.iloc[-1, 0]
+    alpha = 2 / (span + 1)
+    rows = []
+    for x in data['close'].values[-new_count:]:
+        value = _ewm_step(value, x, alpha)
+        rows.append(value)
+    return pd.DataFrame({prev.columns[0]: rows}, index=data.index[-new_count:])
+
+
+def _update_kdj(prev: pd.DataFrame, data: pd.DataFrame, new_count: int, n: int = 9,
+                m1: int = 3, m2: int = 3) -> Optional[pd.DataFrame]:
+    tail = data.iloc[-(n + new_count - 1):]
+    low_n = tail['low'].rolling(window=n).min()
+    high_n = tail['high'].rolling(window=n).max()
+    rsv = ((tail['close'] - low_n) / (high_n - low_n) * 100).values[-new_count:]
+    if not np.isfinite(rsv).all():
+        return None
+
+    k, d = prev.iloc[-1]['kdj_k'], prev.iloc[-1]['kdj_d']
+    a_k, a_d = 2 / (m1 + 1), 2 / (m2 + 1)
+    rows = []
+    for x in rsv:
+        k = _ewm_step(k, x, a_k)
+        d = _ewm_step(d, k, a_d)
+        rows.append((k, d, 3 * k - 2 * d))
+    return pd.DataFrame(rows, columns=prev.columns, index=data.index[-new_count:])
+
+
+def _update_dmi_adx(prev: pd.DataFrame, data: pd.DataFrame, new_count: int,
+                    period: int = 14) -> Optional[pd.DataFrame]:
+    calc = DMI_ADX_Calculator(period=period)
+    tail = data.iloc[-(new_count + 1):]
+    tr = calc._calculate_true_range(tail).values[-new_count:]
+    plus_dm, minus_dm = calc._calculate_directional_movement(tail)
+    plus_dm, minus_dm = plus_dm.values[-new_count:], minus_dm.values[-new_count:]
+
+    last = prev.iloc[-1]
+    tr_s, pdm_s, mdm_s, adx = last['_tr_s'], last['_pdm_s'], last['_mdm_s'], last['adx']
+    rows = []
+    for i in range(new_count):
+        # Wilder平滑: (前值 * (n-1) + 当前值) / n
+        tr_s = (tr_s * (period - 1) + tr[i]) / period
+        pdm_s = (pdm_s * (period - 1) + plus_dm[i]) / period
+        mdm_s = (mdm_s * (period - 1) + minus_dm[i]) / period
+        plus_di = 100 * pdm_s / tr_s
+        minus_di = 100 * mdm_s / tr_s
+        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = (adx * (period - 1) + dx) / period
+        rows.append((plus_di, minus_di, adx, tr_s, pdm_s, mdm_s))
+    return pd.DataFrame(rows, columns=prev.columns, index=data.index[-new_count:])
+
+
+def _tail_updater(compute: Callable, lookback: Callable[..., int]) -> Callable:
+    """滚动窗口类指标: 只对尾部 lookback + 新增数量 根K线重算"""
+    def update(prev, data, new_count, **params):
+        tail = data.iloc[-(lookback(**params) + new_count):]
+        return compute(tail, **params).iloc[-new_count:]
+    return update
+
+
+# 指标注册表: 名称 -> (全量计算, 增量更新, 默认参数)
+INDICATOR_SPECS: Dict[str, Tuple[Callable, Callable, Dict]] = {
+    'ma': (_compute_ma, _tail_updater(_compute_ma, lambda period=20: period), {'period': 20}),
+    'ema': (_compute_ema, _update_ema, {'span': 12}),
+    'macd': (_compute_macd, _update_macd, {'fast_period': 12, 'slow_period': 26, 'signal_period': 9}),
+    'rsi': (_compute_rsi, _tail_updater(_compute_rsi, lambda period=14: period + 1), {'period': 14}),
+    'kdj': (_compute_kdj, _update_kdj, {'n': 9, 'm1': 3, 'm2': 3}),
+    'boll': (_compute_boll, _tail_updater(_compute_boll, lambda period=20, num_std=2.0: period),
+             {'period': 20, 'num_std': 2.0}),
+    'atr': (_compute_atr, _tail_updater(_compute_atr, lambda period=14: period + 1), {'period': 14}),
+    'dmi_adx': (_compute_dmi_adx, _update_dmi_adx, {'period': 14}),
+}
+
+
+def panel_key(market: str, code: str) -> str:
+    """共享指标面板的标的键, 如 panel_key('US', 'SPX') -> 'US:SPX'"""
+    return f"{market.upper()}:{code}"
+
+
+class IndicatorPanel:
+    """
+    单一标的的指标面板 (通过注册表在线程间共享, 计算与增量更新加锁)
+
+    用法:
+        panel = IndicatorPanel(df, symbol='sh000001')
+        panel.series('macd')                  # 完整MACD序列(DataFrame)
+        panel.series('ma', period=60)         # 完整MA60序列
+        panel.latest('rsi')                   # 最新RSI值 {'rsi': 55.3}
+        panel.append(new_bar_df)              # 追加新K线, 已缓存指标增量更新
+        panel.extended(new_bar_df)            # 同上, 但返回新面板, 原面板不变
+        panel.head(n)                         # 前n根K线的面板(指标均为因果计算, 直接截取)
+    """
+
+    def __init__(self, df: pd.DataFrame, symbol: str = ''):
+        """
+        Args:
+            df: OHLCV数据, 需包含 open/high/low/close 列
+            symbol: 标的代码
+        """
+        self.symbol = symbol
+        self.data = df
+        self._memo: Dict[Tuple, pd.DataFrame] = {}
+        self._lock = threading.RLock()
+        self.stats = {'computed': 0, 'hits': 0, 'incremental': 0}
+
+    @staticmethod
+    def _key(name: str, params: Dict) -> Tuple:
+        if name not in INDICATOR_SPECS:
+            raise ValueError(f"不支持的指标: {name}")
+        merged = {**INDICATOR_SPECS[name][2], **params}
+        return (name, tuple(sorted(merged.items())))
+
+    @property
+    def last_date(self):
+        return self.data.index[-1] if len(self.data) else None
+
+    def _derive(self, data: pd.DataFrame, memo: Dict[Tuple, pd.DataFrame]) -> 'IndicatorPanel':
+        panel = IndicatorPanel(data, symbol=self.symbol)
+        panel._memo = memo
+        panel.stats = dict(self.stats)
+        return panel
+
+    def head(self, n: int) -> 'IndicatorPanel':
+        """前n根K线的面板 (各指标只依赖当前及之前的K线, 截取结果与重新计算一致)"""
+        with self._lock:
+            memo = {key: frame.iloc[:n] for key, frame in self._memo.items()}
+            return self._derive(self.data.iloc[:n], memo)
+
+    def extended(self, bars: pd.DataFrame) -> 'IndicatorPanel':
+        """追加K线后的新面板, 已缓存指标增量更新, 本面板不变"""
+        with self._lock:
+            panel = self._derive(self.data, dict(self._memo))
+        panel.append(bars)
+        return panel
+
+    def series(self, name: str, **params) -> pd.DataFrame:
+        """
+        获取指标完整序列
+
+        Args:
+            name: 指标名称 (ma/ema/macd/rsi/kdj/boll/atr/dmi_adx)
+            **params: 指标参数, 未提供的使用默认值
+
+        Returns:
+            与K线同索引的指标DataFrame
+        """
+        key = self._key(name, params)
+        with self._lock:
+            frame = self._memo.get(key)
+            if frame is None:
+                compute = INDICATOR_SPECS[name][0]
+                frame = compute(self.data, **dict(key[1]))
+                self._memo[key] = frame
+                self.stats['computed'] += 1
+            else:
+                self.stats['hits'] += 1
+        return frame[[c for c in frame.columns if not c.startswith('_')]]
+
+    def latest(self, name: str, **params) -> Dict[str, float]:
+        """获取指标最新值"""
+        row = self.series(name, **params).iloc[-1]
+        return {col: float(val) for col, val in row.items()}
+
+    def append(self, bars: pd.DataFrame):
+        """
+        追加新K线, 已缓存的指标增量更新
+
+        Args:
+            bars: 新增K线(索引须晚于当前最后一根)
+        """
+        if bars.empty:
+            return
+        with self._lock:
+            self.data = pd.concat([self.data, bars])
+            new_count = len(bars)
+
+            for key, frame in list(self._memo.items()):
+                name, params = key[0], dict(key[1])
+                update = INDICATOR_SPECS[name][1]
+                rows = None
+                # 预热期内或存在NaN时无法安全递推, 退回全量重算
+                if len(frame) and not frame.iloc[-1].isna().any():
+                    rows = update(frame, self.data, new_count, **params)
+                if rows is None:
+                    self._memo[key] = INDICATOR_SPECS[name][0](self.data, **params)
+                    self.stats['computed'] += 1
+                else:
+                    self._memo[key] = pd.concat([frame, rows])
+                    self.stats['incremental'] += 1
+
+
+class IndicatorPanelRegistry:
+    """
+    按标的管理指标面板, 线程安全
+
+    面板按 (标的, 首根K线日期) 存放, 同一标的的不同回溯窗口(如1y/5y)互不淘汰。
+    get(symbol, df) 的复用规则 (返回面板的K线长度始终等于 len(df)):
+    - df 与已有面板K线一致(长度/末日期/末收盘相同) -> 直接复用
+    - df 是已有面板K线追加若干根 -> 增量扩展出新面板并替换, 原面板不变
+    - df 是已有面板K线的前缀 -> 返回截取的面板, 不替换
+    - 其他情况 -> 重建面板
+    """
+
+    def __init__(self, max_symbols: int = 128):
+        self.max_symbols = max_symbols
+        self._panels: Dict[Tuple, IndicatorPanel] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, df: pd.DataFrame) -> IndicatorPanel:
+        key = (symbol, df.index[0] if len(df) else None)
+        with self._lock:
+            panel = self._panels.get(key)
+            if panel is not None:
+                size = len(panel.data)
+                if len(df) < size and self._same_prefix(df, panel.data, len(df)):
+                    return panel.head(len(df))
+                if self._same_prefix(panel.data, df, size):
+                    if len(df) == size:
+                        return panel
+                    panel = panel.extended(df.iloc[size:])
+                    self._panels[key] = panel
+                    return panel
+
+            panel = IndicatorPanel(df, symbol=symbol)
+            self._panels.pop(key, None)
+            if len(self._panels) >= self.max_symbols:
+                self._panels.pop(next(iter(self._panels)))
+            self._panels[key] = panel
+            return panel
+
+    @staticmethod
+    def _same_prefix(old: pd.DataFrame, new: pd.DataFrame, size: int) -> bool:
+        """new 的前 size 根K线是否与 old (长度为size) 一致"""
+        if size == 0 or len(new) < size:
+            return False
+        return (
+            new.index[0] == old.index[0]
+            and new.index[size - 1] == old.index[size - 1]
+            and new['close'].iloc[size - 1] == old['close'].iloc[size - 1]
+        )
+
+    def clear(self):
+        with self._lock:
+            self._panels.clear()
+
+
+# 全局单例实例
+_global_registry: Optional[IndicatorPanelRegistry] = None
+_global_registry_lock = threading.Lock()
+
+
+def get_indicator_panel(symbol: str, df: pd.DataFrame) -> IndicatorPanel:
+    """
+    获取标的的共享指标面板
+
+    Args:
+        symbol: 标的代码
+        df: 当前K线数据
+
+    Returns:
+        IndicatorPanel实例
+    """
+    global _global_registry
+
+    if _global_registry is None:
+        with _global_registry_lock:
+            if _global_registry is None:
+                _global_registry = IndicatorPanelRegistry()
+
+    return _global_registry.get(symbol, df)
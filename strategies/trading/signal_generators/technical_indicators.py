@@ -229,7 +229,8 @@ class TechnicalIndicators:
         ma_periods: list = [5, 10, 20, 60],
         include_boll: bool = True,
         include_atr: bool = True,
-        include_dmi_adx: bool = True
+        include_dmi_adx: bool = True,
+        symbol: Optional[str] = None
     ) -> pd.DataFrame:
         """
         一次性计算所有技术指标
@@ -240,6 +241,7 @@ class TechnicalIndicators:
             include_boll: 是否包含布林带
             include_atr: 是否包含ATR
             include_dmi_adx: 是否包含DMI/ADX (趋势强度指标)
+            symbol: 标的代码, 提供时从该标的的共享指标面板取指标序列(同一K线只计算一次)
 
         Returns:
             添加了所有指标的DataFrame
@@ -250,6 +252,11 @@ class TechnicalIndicators:
         if 'date' in df.columns:
             df = df.sort_values('date').reset_index(drop=True)
 
+        if symbol:
+            df = self._fill_from_panel(df, symbol, ma_periods, include_boll, include_atr, include_dmi_adx)
+            logger.info(f"技术指标计算完成(共享面板)，共 {len(df)} 条数据")
+            return df
+
         # 计算各项指标
         df = self.calculate_ma(df, periods=ma_periods)
         df = self.calculate_macd(df)
@@ -269,6 +276,37 @@ class TechnicalIndicators:
 
         return df
 
+    @staticmethod
+    def _fill_from_panel(
+        df: pd.DataFrame,
+        symbol: str,
+        ma_periods: list,
+        include_boll: bool,
+        include_atr: bool,
+        include_dmi_adx: bool
+    ) -> pd.DataFrame:
+        """从共享指标面板填充指标列, 列名与逐项计算一致"""
+        from .indicator_panel import get_indicator_panel
+
+        bars = df.set_index('date') if 'date' in df.columns else df
+        panel = get_indicator_panel(symbol, bars)
+
+        requests = [('ma', {'period': period}) for period in ma_periods]
+        requests += [('macd', {}), ('rsi', {}), ('kdj', {})]
+        if include_boll:
+            requests.append(('boll', {}))
+        if include_atr:
+            requests.append(('atr', {}))
+        if include_dmi_adx:
+            requests.append(('dmi_adx', {}))
+
+        df = df.copy()
+        for name, params in requests:
+            frame = panel.series(name, **params)
+            for col in frame.columns:
+                df[col] = frame[col].values
+        return df
+
     @staticmethod
     def identify_ma_pattern(df: pd.DataFrame, index: int = -1) -> Dict:
         """
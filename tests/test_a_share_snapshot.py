@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A股全市场行情快照单元测试
+验证刷新间隔内只下载一次、索引查询与线性过滤结果一致、刷新失败时使用旧快照
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_sources import a_share_snapshot
+from src.data_sources.a_share_snapshot import AShareSnapshot, normalize_a_share_code
+
+
+def make_spot(n: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    codes = [f"{600000 + i:06d}" if i % 2 else f"{i:06d}" for i in range(n)]
+    return pd.DataFrame({
+        '序号': np.arange(1, n + 1),
+        '代码': codes,
+        '名称': [f'股票{i}' for i in range(n)],
+        '最新价': rng.uniform(2, 200, n).round(2),
+        '涨跌幅': rng.normal(0, 3, n).round(2),
+        '成交量': rng.integers(1000, 10 ** 7, n).astype(float),
+        '成交额': rng.uniform(1e6, 1e10, n),
+        '量比': rng.uniform(0.2, 5, n).round(2),
+        '换手率': rng.uniform(0.1, 20, n).round(2),
+    })
+
+
+class CountingFetcher:
+    def __init__(self, df=None, delay: float = 0.0):
+        self.df = make_spot() if df is None else df
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError('network down')
+        return self.df
+
+
+class TestAShareSnapshot:
+
+    def test_normalize_code(self):
+        assert normalize_a_share_code('600519.SS') == '600519'
+        assert normalize_a_share_code('sz000001') == '000001'
+        assert normalize_a_share_code('000001.SZ') == '000001'
+        assert normalize_a_share_code('9988.HK') is None
+        assert normalize_a_share_code('AAPL') is None
+
+    def test_lookup_matches_linear_filter(self):
+        fetcher = CountingFetcher()
+        snapshot = AShareSnapshot(fetcher=fetcher)
+        df = fetcher.df
+
+        for code in ['000000', '600001', '004998', '604999']:
+            expected = df[df['代码'] == code].iloc[0]
+            row = snapshot.get(code)
+            assert row['名称'] == expected['名称']
+            assert row['最新价'] == expected['最新价']
+            assert snapshot.turnover_rate(code) == pytest.approx(expected['换手率'] / 100)
+
+        assert snapshot.get('999999') is None
+        assert snapshot.turnover_rate('999999') is None
+        assert fetcher.calls == 1
+
+    def test_vectorized_lookup(self):
+        snapshot = AShareSnapshot(fetcher=CountingFetcher())
+
+        result = snapshot.lookup(['600001.SS', '999999', 'sz000002'], fields=['名称', '换手率'])
+
+        assert list(result.index) == ['600001.SS', '999999', 'sz000002']
+        assert result.loc['600001.SS', '名称'] == '股票1'
+        assert result.loc['sz000002', '名称'] == '股票2'
+        assert result.loc['999999'].isna().all()
+
+    def test_ttl_and_force_refresh(self):
+        fetcher = CountingFetcher()
+        snapshot = AShareSnapshot(ttl=0.1, fetcher=fetcher)
+
+        snapshot.get_frame()
+        snapshot.get_frame()
+        assert fetcher.calls == 1
+
+        time.sleep(0.12)
+        snapshot.get_frame()
+        snapshot.get_frame(force_refresh=True)
+        assert fetcher.calls == 3
+
+    def test_concurrent_callers_share_one_fetch(self):
+        fetcher = CountingFetcher(delay=0.2)
+        snapshot = AShareSnapshot(fetcher=fetcher)
+
+        threads = [threading.Thread(target=snapshot.turnover_rate, args=('600001',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert fetcher.calls == 1
+
+    def test_reload_swaps_index_atomically(self):
+        fetcher = CountingFetcher(df=make_spot(100))
+        snapshot = AShareSnapshot(fetcher=fetcher)
+        snapshot.get_frame()
+        old = snapshot._table
+
+        # 新快照行序不同: 旧索引必须保持原样, 与旧列数组一一对应
+        fetcher.df = make_spot(100).iloc[::-1]
+        snapshot.get_frame(force_refresh=True)
+        assert snapshot._table is not old
+        position = old.code_index['600001']
+        assert old.columns['代码'][position] == '600001'
+        assert snapshot.get('600001')['代码'] == '600001'
+
+    def test_stale_snapshot_served_on_failure(self):
+        fetcher = CountingFetcher()
+        snapshot = AShareSnapshot(ttl=0, max_stale=60, fetcher=fetcher)
+        snapshot.get_frame()
+
+        fetcher.fail = True
+        assert snapshot.get('600001') is not None
+        assert snapshot.get_stats()['stale_served'] >= 1
+
+        with pytest.raises(ConnectionError):
+            AShareSnapshot(fetcher=fetcher).get_frame()
+
+    def test_single_lookup_is_fast(self):
+        snapshot = AShareSnapshot(fetcher=CountingFetcher())
+        snapshot.get_frame()
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            snapshot.get_value('604999', '换手率')
+        # 每次查询远低于一次全表线性过滤
+        assert (time.perf_counter() - start) / 1000 < 1e-4
+
+    def test_singleton_ttl(self, monkeypatch):
+        monkeypatch.setattr(a_share_snapshot, '_global_snapshot', None)
+        snapshot = a_share_snapshot.get_a_share_snapshot(ttl=30)
+        assert a_share_snapshot.get_a_share_snapshot() is snapshot
+        assert a_share_snapshot.get_a_share_snapshot(ttl=10).ttl == 10
+
+
+def test_analyzers_share_singleton(monkeypatch):
+    # russ_trading.analyzers 包初始化时导入 efinance
+    pytest.importorskip('efinance')
+    from russ_trading.analyzers.liquidity_analyzer import LiquidityAnalyzer
+    from russ_trading.analyzers.volume_price_analyzer import VolumePriceAnalyzer
+
+    fetcher = CountingFetcher()
+    monkeypatch.setattr(a_share_snapshot, '_global_snapshot', AShareSnapshot(fetcher=fetcher))
+    expected = fetcher.df.set_index('代码').loc['600001', '换手率'] / 100
+
+    assert VolumePriceAnalyzer().get_turnover_rate('600001.SS') == pytest.approx(expected)
+    assert LiquidityAnalyzer()._estimate_turnover_rate('600001.SS', 0, 0) == pytest.approx(expected)
+    assert VolumePriceAnalyzer().get_turnover_rate('AAPL') is None
+    assert fetcher.calls == 1
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alpha101 面板引擎单元测试
+验证滚动排名/极值位置内核与 rolling().apply 逐窗口实现一致, 以及面板模式的横截面排名
+"""
+
+import numpy as np
+import pandas as pd
+
+from strategies.position.analyzers.quantitative.alpha101_factors import (
+    Alpha101Engine, Alpha101PanelEngine, rolling_argext, rolling_rank, score_universe
+)
+
+
+def make_bars(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-11-14', periods=n)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.003, n)),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.integers(1_000_000, 5_000_000, n).astype(float),
+    }, index=dates)
+
+
+def single_engine(df: pd.DataFrame) -> Alpha101Engine:
+    data = df.rename(columns=str.capitalize)
+    return Alpha101Engine('TEST', data=data)
+
+
+class TestRollingKernels:
+
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        # 取整制造并列值, 插入NaN检查窗口失效
+        self.series = pd.Series(np.round(rng.normal(0, 2, 300)))
+        self.series.iloc[[10, 150, 151]] = np.nan
+
+    def test_rolling_rank_matches_apply(self):
+        for window in (1, 5, 9, 60):
+            expected = self.series.rolling(window).apply(lambda x: pd.Series(x).rank().iloc[-1] / len(x), raw=False)
+            result = rolling_rank(self.series.to_numpy().reshape(-1, 1), window)[:, 0]
+            np.testing.assert_array_equal(result, expected.to_numpy())
+
+    def test_rolling_argext_matches_apply(self):
+        for window in (1, 5, 20):
+            expected_max = self.series.rolling(window).apply(lambda x: x.argmax(), raw=True)
+            expected_min = self.series.rolling(window).apply(lambda x: x.argmin(), raw=True)
+            values = self.series.to_numpy().reshape(-1, 1)
+            np.testing.assert_array_equal(rolling_argext(values, window, 'max')[:, 0], expected_max.to_numpy())
+            np.testing.assert_array_equal(rolling_argext(values, window, 'min')[:, 0], expected_min.to_numpy())
+
+    def test_window_longer_than_series(self):
+        assert np.isnan(rolling_rank(np.ones((3, 2)), 5)).all()
+
+
+class TestPanelEngine:
+
+    def setup_method(self):
+        self.frames = {f'S{i}': make_bars(200, i) for i in range(6)}
+        # 一个标的晚上市
+        self.frames['S5'] = self.frames['S5'].iloc[50:]
+        self.engine = Alpha101PanelEngine.from_frames(self.frames, name='us')
+
+    def test_time_series_alphas_match_single_engine(self):
+        # 不含 rank 的因子: 面板每列应与单标的计算一致
+        for symbol in ('S0', 'S3'):
+            single = single_engine(self.frames[symbol])
+            for name in ('alpha006', 'alpha009', 'alpha012'):
+                panel_values = getattr(self.engine, name)()[symbol]
+                pd.testing.assert_series_equal(
+                    panel_values, getattr(single, name)(), check_names=False, check_freq=False
+                )
+
+    def test_rank_is_cross_sectional(self):
+        ranks = self.engine.rank(self.engine.close)
+        last = self.engine.close.iloc[-1]
+        np.testing.assert_allclose(ranks.iloc[-1].to_numpy(), (last.rank() / last.count()).to_numpy())
+        # 晚上市标的在上市前不参与排名
+        assert ranks['S5'].iloc[:50].isna().all()
+        assert ranks.iloc[0].max() == 1.0
+
+    def test_all_alphas_are_panels(self):
+        for name, table in self.engine.calculate_all_alphas().items():
+            assert table.shape == self.engine.close.shape, name
+
+    def test_score_universe(self):
+        scores = self.engine.score_universe()
+        assert set(scores.index) == set(self.frames)
+        assert (scores['positive_count'] + scores['negative_count'] + scores['neutral_count'] == 10).all()
+        assert scores['positive_count'].is_monotonic_decreasing
+
+    def test_latest_signals_use_last_bar_only(self):
+        frames = dict(self.frames, STALE=make_bars(200, 7).iloc[:-3])
+        engine = Alpha101PanelEngine.from_frames(frames)
+        signals = engine.get_latest_signals()
+
+        # 最后一个交易日无K线的标的不参与打分
+        assert 'STALE' not in signals.index
+        assert set(signals.index) == set(self.frames)
+        # 最后一行为NaN的因子按中性0处理, 不沿用更早的值
+        alphas = engine.calculate_all_alphas()
+        for name, table in alphas.items():
+            last = table.iloc[-1][signals.index]
+            expected = last.fillna(0.0)
+            np.testing.assert_array_equal(signals[name].to_numpy(), expected.to_numpy())
+
+    def test_missing_fields_skipped(self):
+        frames = dict(self.frames, BAD=make_bars(100, 9)[['close']])
+        engine = Alpha101PanelEngine.from_frames(frames)
+        assert 'BAD' not in engine.symbols
+
+
+class TestScoreUniverse:
+
+    def test_per_market_panels(self):
+        class FakeStore:
+            def __init__(self, frames):
+                self.frames = frames
+
+            def partitions(self):
+                return list(self.frames)
+
+            def read(self, market, source, symbol):
+                return self.frames[(market, source, symbol)]
+
+        store = FakeStore({
+            ('us', 'yfinance', 'SPY'): make_bars(150, 1),
+            ('us', 'yfinance', 'QQQ'): make_bars(150, 2),
+            ('cn', 'ashare', 'sh510300'): make_bars(150, 3),
+        })
+        scores = score_universe(markets=('cn', 'hk', 'us'), store=store)
+
+        assert sorted(scores.index) == ['ashare/sh510300', 'yfinance/QQQ', 'yfinance/SPY']
+        assert scores.loc['yfinance/SPY', 'market'] == 'us'
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史走势形态检索单元测试
+验证分块矩阵距离与暴力计算一致、已知形态可被检出、时间重叠排除与同标的去重、K线仓库变化后重建索引
+"""
+
+import numpy as np
+import pandas as pd
+
+from strategies.position.market_analyzers.analog_search import (
+    AnalogEngine, analog_phase, summarize_outcomes, window_features
+)
+
+
+def make_bars(n: int, seed: int, end: str = '2025-11-14') -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=end, periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.012, n)))
+    volume = rng.integers(1_000_000, 5_000_000, n).astype(float)
+    return pd.DataFrame({'close': close, 'volume': volume}, index=dates)
+
+
+def plant_pattern(df: pd.DataFrame, start: int, shape: np.ndarray, scale: float) -> pd.DataFrame:
+    """在start位置写入按比例缩放的形态(价格水平不同, 形状相同)"""
+    df = df.copy()
+    df.iloc[start:start + len(shape), 0] = scale * np.exp(shape)
+    df.iloc[start:start + len(shape), 1] = 2e6 * np.exp(shape * 3)
+    return df
+
+
+class TestWindowFeatures:
+
+    def test_shape_invariant_to_price_level(self):
+        df = make_bars(60, 1)
+        scaled = df.assign(close=df['close'] * 37.5, volume=df['volume'] * 10)
+        np.testing.assert_allclose(window_features(df, 20), window_features(scaled, 20), atol=1e-5)
+
+    def test_rows_per_window(self):
+        df = make_bars(60, 2)
+        assert window_features(df, 20).shape == (41, 40)
+        assert window_features(df.head(10), 20).shape == (0, 40)
+
+
+class TestAnalogEngine:
+
+    def test_chunked_distances_match_brute_force(self):
+        frames = {f'A{i}': make_bars(300, i) for i in range(3)}
+        engine = AnalogEngine(frames, window=20)
+        query = engine.query_vector(make_bars(40, 9))
+
+        rows, distances = engine.nearest(query, k=5, min_separation=0, chunk_size=97)
+        brute = np.sqrt(((engine.matrix - query) ** 2).sum(axis=1))
+        np.testing.assert_array_equal(rows, np.argsort(brute, kind='stable')[:5])
+        np.testing.assert_allclose(distances, brute[rows], rtol=1e-4, atol=1e-3)
+
+    def test_finds_planted_pattern_across_assets(self):
+        shape = np.cumsum(np.linspace(-0.03, 0.03, 20))
+        other = plant_pattern(make_bars(500, 3), 200, shape, scale=2500.0)
+        query = plant_pattern(make_bars(300, 4), 280, shape, scale=80.0)
+
+        engine = AnalogEngine({'other': other, 'query': query}, window=20)
+        matches = engine.search_frame(query, k=3)
+
+        best = matches.iloc[0]
+        assert best['asset'] == 'other'
+        assert best['end_date'] == other.index[219]
+        assert best['distance'] < 0.1
+
+    def test_overlapping_and_adjacent_windows_excluded(self):
+        df = make_bars(400, 5)
+        engine = AnalogEngine({'self': df}, window=20)
+        matches = engine.search_frame(df, k=10)
+
+        assert (matches['end_date'] < df.index[-20]).all()
+        ends = np.sort(df.index.get_indexer(matches['end_date']))
+        assert (np.diff(ends) >= 20).all()
+
+    def test_pca_projection(self):
+        frames = {f'A{i}': make_bars(300, i) for i in range(3)}
+        engine = AnalogEngine(frames, window=20, n_components=8)
+        assert engine.matrix.shape[1] == 8
+        assert len(engine.search_frame(frames['A0'], k=5)) == 5
+
+    def test_forward_outcomes_attached(self):
+        df = make_bars(300, 6)
+        engine = AnalogEngine({'a': df}, window=20)
+        matches = engine.search_frame(df, k=5, horizons=[5, 10])
+
+        for _, row in matches.iterrows():
+            end = df.index.get_loc(row['end_date'])
+            expected = df['close'].iloc[end + 5] / df['close'].iloc[end] - 1 if end + 5 < len(df) else np.nan
+            assert np.isclose(row['return_5d'], expected, equal_nan=True)
+            assert row['max_dd_10d'] <= 0 or np.isnan(row['max_dd_10d'])
+
+
+class TestAnalogPhase:
+
+    def test_falls_back_to_own_history(self, monkeypatch):
+        from strategies.position.market_analyzers import analog_search
+
+        monkeypatch.setattr(analog_search, 'get_analog_engine', lambda window: AnalogEngine({}, window=window))
+        result = analog_phase(make_bars(400, 7), [5, 20], label='SPX', k=8)
+
+        assert result['universe_assets'] == 1
+        assert result['match_count'] == 8
+        assert set(result['period_stats']) == {'5d', '20d'}
+        assert isinstance(result['top_matches'][0]['end_date'], str)
+
+    def test_engine_rebuilt_when_store_changes(self, monkeypatch):
+        from src.data_sources import bar_store
+        from strategies.position.market_analyzers import analog_search
+
+        class FakeStore:
+            def __init__(self):
+                self.frames = {('us', 'yfinance', 'SPY'): make_bars(300, 1)}
+                self.version = 0
+
+            def partitions(self):
+                return list(self.frames)
+
+            def read(self, market, source, symbol):
+                return self.frames[(market, source, symbol)]
+
+            def fingerprint(self):
+                return (self.version,)
+
+        store = FakeStore()
+        monkeypatch.setattr(bar_store, 'get_bar_store', lambda: store)
+        monkeypatch.setattr(analog_search, '_global_engines', {})
+
+        first = analog_search.get_analog_engine(window=20)
+        assert analog_search.get_analog_engine(window=20) is first
+
+        store.frames[('us', 'yfinance', 'QQQ')] = make_bars(300, 2)
+        store.version += 1
+        second = analog_search.get_analog_engine(window=20)
+        assert second is not first
+        assert second.size > first.size
+
+    def test_summarize_outcomes(self):
+        matches = pd.DataFrame({'return_5d': [0.1, -0.05, np.nan], 'max_dd_5d': [-0.01, -0.08, np.nan]})
+        stats = summarize_outcomes(matches, [5])['5d']
+        assert stats['sample_size'] == 2
+        assert stats['up_prob'] == 0.5
+        assert np.isclose(stats['avg_max_dd'], -0.045)
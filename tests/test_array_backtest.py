@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数组化回测内核单元测试
+验证交易/手续费/止损止盈规则, 以及多资产内核与单资产结果一致
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.trading.backtesting.array_backtest import (
+    backtest_arrays, backtest_basket, encode_signals
+)
+from strategies.trading.backtesting.backtest_engine import BacktestEngine
+
+
+def make_panel(n: int = 400, n_assets: int = 3):
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range('2022-01-03', periods=n)
+    symbols = [f'ETF{i}' for i in range(n_assets)]
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n, n_assets)), axis=0)),
+        index=dates, columns=symbols
+    )
+    signals = pd.DataFrame(
+        rng.choice(['BUY', 'SELL', 'HOLD', 'HOLD', 'STRONG_BUY', 'STRONG_SELL'], (n, n_assets)),
+        index=dates, columns=symbols
+    )
+    return prices, signals
+
+
+class TestArrayBacktest:
+
+    def test_encode_signals_pads_with_hold(self):
+        codes = encode_signals(pd.Series(['BUY', 'foo', 'SELL']), 5)
+        assert codes.tolist() == [1, 0, 3, 0, 0]
+
+    def test_trade_and_commission(self):
+        prices = np.array([10.0, 10.0, 12.0])
+        values, trades = backtest_arrays(
+            prices, encode_signals(['BUY', 'HOLD', 'SELL'], 3),
+            initial_capital=1000, commission=0.001, slippage=0.0
+        )
+
+        assert len(trades) == 1
+        entry_i, exit_i, entry_price, exit_price, shares, fee, code = trades[0]
+        assert (entry_i, exit_i, shares) == (0, 2, 100)
+        assert fee == pytest.approx(100 * 12 * 0.001)
+        assert values[-1] == pytest.approx(1000 - 1000 * 1.001 + 100 * 12 * 0.999)
+
+    def test_stop_loss_overrides_buy_signal(self):
+        prices = np.array([100.0, 97.0, 94.0, 94.0])
+        _, trades = backtest_arrays(
+            prices, encode_signals(['BUY', 'BUY', 'BUY', 'HOLD'], 4),
+            initial_capital=10000, commission=0, slippage=0, stop_loss=0.05
+        )
+        # 第3根K线跌幅6%触发止损, 同一根K线不再买入
+        assert [(t[0], t[1], t[6]) for t in trades] == [(0, 2, 5)]
+
+    def test_engine_result_format(self):
+        prices, signals = make_panel(200, 1)
+        df = prices.rename(columns={'ETF0': 'close'})
+        result = BacktestEngine(stop_loss=0.08, take_profit=0.15).run_backtest(df, signals['ETF0'])
+
+        assert len(result['portfolio_value']) == len(df)
+        assert result['daily_returns'].iloc[0] == 0
+        for trade in result['trades']:
+            assert trade['entry_date'] in df.index and trade['exit_date'] in df.index
+            assert trade['signal'] in ('SELL', 'STRONG_SELL', 'STOP_LOSS', 'TAKE_PROFIT')
+
+
+class TestBasketBacktest:
+
+    def test_matches_single_asset_runs(self):
+        prices, signals = make_panel()
+        engine = BacktestEngine(stop_loss=0.05, take_profit=0.1)
+        basket = engine.run_basket_backtest(prices, signals)
+
+        for symbol in prices.columns:
+            single = engine.run_backtest(prices[[symbol]].rename(columns={symbol: 'close'}), signals[symbol])
+            np.testing.assert_array_equal(basket['portfolio_values'][symbol].values, single['portfolio_value'])
+            assert basket['trades'][symbol] == single['trades']
+
+        assert list(basket['summary']['symbol']) == list(prices.columns)
+
+    def test_nan_prices_not_traded(self):
+        prices, signals = make_panel(50, 2)
+        prices.iloc[:10, 1] = np.nan  # 第二个标的第10天才上市
+        signals.iloc[:, :] = 'BUY'
+
+        result = backtest_basket(prices, signals, 10000, 0.0003, 0.0)
+        values = result['portfolio_values']['ETF1']
+
+        assert (values.iloc[:10] == 10000).all()
+        assert values.iloc[10] < 10000  # 上市当日买入并支付手续费
+        assert not values.isna().any()
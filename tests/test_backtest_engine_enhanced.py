@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强版回测引擎单元测试
+验证蒙特卡洛批量模式与逐条路径模式一致, 以及参数扫描
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from russ_trading.engines.backtest_engine_enhanced import (
+    BacktestEngineEnhanced, BacktestConfig, SimpleBacktestTask
+)
+
+
+def make_engine(returns) -> BacktestEngineEnhanced:
+    engine = BacktestEngineEnhanced(BacktestConfig(initial_capital=100000))
+    engine.daily_returns = list(returns)
+    return engine
+
+
+class TestMonteCarlo:
+
+    def test_vectorized_matches_loop_on_deterministic_returns(self):
+        # 单一收益率时所有路径相同, 两种模式结果应一致
+        engine = make_engine([0.001, 0.001])
+        loop = engine.run_monte_carlo_simulation(50, 30, vectorized=False, return_paths=True)
+        vec = engine.run_monte_carlo_simulation(50, 30, vectorized=True, return_paths=True)
+
+        np.testing.assert_allclose(vec['simulation_paths'], loop['simulation_paths'], rtol=1e-12)
+        for key, value in loop['statistics'].items():
+            assert vec['statistics'][key] == pytest.approx(value, rel=1e-12, abs=1e-6), key
+
+    def test_chunking_does_not_change_results(self):
+        rng = np.random.default_rng(0)
+        engine = make_engine(rng.normal(0.0005, 0.02, 500))
+
+        single = engine.run_monte_carlo_simulation(3000, 60, seed=7, return_paths=False)
+        chunked = engine.run_monte_carlo_simulation(3000, 60, seed=7, chunk_size=1000, return_paths=False)
+
+        for key, value in single['statistics'].items():
+            assert chunked['statistics'][key] == pytest.approx(value), key
+        assert chunked['drawdown_distribution'] == pytest.approx(single['drawdown_distribution'])
+        # 分位数带由直方图计数合并, 与分块方式无关
+        for key, band in single['percentile_bands'].items():
+            np.testing.assert_allclose(chunked['percentile_bands'][key], band, rtol=1e-12)
+
+    def test_bands_match_exact_percentiles(self):
+        engine = make_engine(np.random.default_rng(2).normal(0.0005, 0.02, 500))
+        result = engine.run_monte_carlo_simulation(5000, 60, seed=3, chunk_size=700, return_paths=True)
+
+        paths = np.array(result['simulation_paths'])
+        for pct in engine.MC_BAND_PERCENTILES:
+            np.testing.assert_allclose(
+                result['percentile_bands'][f'p{pct}'], np.percentile(paths, pct, axis=0), rtol=1e-3
+            )
+
+    def test_summary_only_output(self):
+        engine = make_engine(np.random.default_rng(1).normal(0, 0.01, 250))
+        result = engine.run_monte_carlo_simulation(2000, 40, return_paths=False, seed=1)
+
+        assert 'simulation_paths' not in result
+        assert len(result['percentile_bands']['p5']) == 41
+        assert result['statistics']['es_95'] <= result['statistics']['var_95'] < 0
+        assert 0 <= result['drawdown_distribution']['mean'] <= result['drawdown_distribution']['percentile_95']
+
+    def test_requires_backtest_first(self):
+        assert 'error' in BacktestEngineEnhanced().run_monte_carlo_simulation()
+
+    def test_rejects_empty_simulation(self):
+        engine = make_engine([0.001, -0.002])
+        with pytest.raises(ValueError):
+            engine.run_monte_carlo_simulation(n_simulations=0)
+
+
+def make_prices_and_signals(n: int = 300):
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2023-01-02', periods=n)
+    prices = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, n))), index=dates)
+    ma_short, ma_long = prices.rolling(10).mean(), prices.rolling(30).mean()
+    signals = pd.Series('HOLD', index=dates)
+    signals[ma_short > ma_long] = 'BUY'
+    signals[ma_short < ma_long] = 'SELL'
+    return prices, signals
+
+
+class TestParameterSweep:
+
+    def setup_method(self):
+        self.engine = BacktestEngineEnhanced(BacktestConfig(initial_capital=100000))
+        self.task = SimpleBacktestTask(*make_prices_and_signals())
+        self.grid = {'stop_loss': [0.03, 0.05, 0.08], 'take_profit': [0.1, 0.2], 'slippage': [0.0, 0.001]}
+
+    def test_grid_serial_matches_process_pool(self):
+        serial = self.engine.run_parameter_sweep(self.task, self.grid, n_workers=1)
+        pooled = self.engine.run_parameter_sweep(self.task, self.grid, n_workers=2)
+
+        assert len(serial) == 12
+        pd.testing.assert_frame_equal(serial, pooled)
+        # 每组参数独立配置, 不修改引擎自身配置
+        assert self.engine.config.stop_loss is None
+
+    def test_each_run_uses_own_config(self):
+        result = self.engine.run_parameter_sweep(self.task, {'stop_loss': [0.03, None]}, n_workers=1)
+        expected = BacktestEngineEnhanced(BacktestConfig(stop_loss=0.03)).run_simple_backtest(
+            self.task.prices, self.task.signals
+        )
+        assert result.loc[0, 'total_return'] == pytest.approx(expected['total_return'])
+        assert result.loc[0, 'total_return'] != result.loc[1, 'total_return']
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        checkpoint = str(tmp_path / 'sweep.csv')
+        calls = []
+
+        def counting_task(config):
+            calls.append(config.stop_loss)
+            return self.task(config)
+
+        partial = {'stop_loss': [0.03, 0.05]}
+        self.engine.run_parameter_sweep(counting_task, partial, n_workers=1, checkpoint_path=checkpoint)
+        full = self.engine.run_parameter_sweep(
+            counting_task, {'stop_loss': [0.03, 0.05, 0.08]}, n_workers=1, checkpoint_path=checkpoint
+        )
+
+        assert calls == [0.03, 0.05, 0.08]
+        assert list(full['stop_loss']) == [0.03, 0.05, 0.08]
+
+    def test_pool_failures_recorded_per_config(self, tmp_path):
+        checkpoint = str(tmp_path / 'sweep.csv')
+
+        # 局部函数无法pickle到子进程, 每组参数的 future.result() 都会抛出异常
+        def local_task(config):
+            return self.task(config)
+
+        result = self.engine.run_parameter_sweep(
+            local_task, {'stop_loss': [0.03, 0.05]}, n_workers=2, checkpoint_path=checkpoint
+        )
+
+        assert list(result['stop_loss']) == [0.03, 0.05]
+        assert result['error'].notna().all()
+        # 失败行不写入检查点, 恢复时重新运行
+        assert not (tmp_path / 'sweep.csv').exists()
+
+    def test_random_search_reproducible(self):
+        space = {'stop_loss': (0.02, 0.10), 'take_profit': [0.1, 0.2, 0.3]}
+        first = self.engine.run_parameter_sweep(self.task, space, method='random', n_samples=5, n_workers=1, seed=9)
+        second = self.engine.run_parameter_sweep(self.task, space, method='random', n_samples=5, n_workers=1, seed=9)
+
+        pd.testing.assert_frame_equal(first, second)
+        assert first['stop_loss'].between(0.02, 0.10).all()
+
+    def test_unknown_parameter(self):
+        with pytest.raises(ValueError):
+            self.engine.run_parameter_sweep(self.task, {'foo': [1]}, n_workers=1)
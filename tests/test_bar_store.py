@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K线仓库单元测试
+使用模拟数据源验证全量写入、本地命中与增量追加
+"""
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_sources.bar_store import BarStore, PARQUET_AVAILABLE, last_completed_session, slice_period
+
+pytestmark = pytest.mark.skipif(not PARQUET_AVAILABLE, reason="需要pyarrow")
+
+CN_TZ = ZoneInfo('Asia/Shanghai')
+
+
+def make_bars(end: str, periods: int) -> pd.DataFrame:
+    dates = pd.bdate_range(end=end, periods=periods)
+    close = 100 + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1000.0
+    }, index=dates)
+
+
+class FakeSource:
+    """模拟数据源, 记录每次调用的since参数"""
+
+    def __init__(self, full: pd.DataFrame):
+        self.full = full
+        self.calls = []
+
+    def __call__(self, since):
+        self.calls.append(since)
+        if since is None:
+            return self.full
+        return self.full[self.full.index >= since]
+
+
+class TestBarStore:
+
+    def test_last_completed_session(self):
+        # 周一收盘前 -> 上周五
+        monday_morning = datetime(2025, 11, 17, 10, 0, tzinfo=CN_TZ)
+        assert last_completed_session('cn', monday_morning) == pd.Timestamp('2025-11-14')
+        # 周一收盘后 -> 当天
+        monday_evening = datetime(2025, 11, 17, 15, 30, tzinfo=CN_TZ)
+        assert last_completed_session('cn', monday_evening) == pd.Timestamp('2025-11-17')
+        # 节后首日收盘前 -> 节前最后一个交易日
+        after_holiday = datetime(2025, 10, 9, 10, 0, tzinfo=CN_TZ)
+        assert last_completed_session('cn', after_holiday) == pd.Timestamp('2025-09-30')
+
+    def test_full_fetch_then_local_hit(self, tmp_path):
+        store = BarStore(root=tmp_path)
+        source = FakeSource(make_bars('2025-11-14', 300))
+        # 周六: 不在交易时段, 上周五已收盘
+        saturday = datetime(2025, 11, 15, 10, 0, tzinfo=CN_TZ)
+
+        df1 = store.get_bars('cn', 'test', 'sh000001', source, now=saturday)
+        df2 = store.get_bars('cn', 'test', 'sh000001', source, now=saturday)
+
+        assert len(df1) == 300
+        pd.testing.assert_frame_equal(df1, df2, check_freq=False)
+        assert source.calls == [None]
+        assert store.stats['local_hits'] == 1
+
+    def test_delta_append(self, tmp_path):
+        store = BarStore(root=tmp_path)
+        source = FakeSource(make_bars('2025-11-14', 300))
+        saturday = datetime(2025, 11, 15, 10, 0, tzinfo=CN_TZ)
+        store.get_bars('cn', 'test', 'sh000001', source, now=saturday)
+
+        # 下周二收盘后: 新增周一、周二两根K线
+        source.full = make_bars('2025-11-18', 302)
+        tuesday_evening = datetime(2025, 11, 18, 16, 0, tzinfo=CN_TZ)
+        df = store.get_bars('cn', 'test', 'sh000001', source, now=tuesday_evening)
+
+        assert source.calls[-1] == pd.Timestamp('2025-11-14')
+        assert len(df) == 302
+        assert df.index[-1] == pd.Timestamp('2025-11-18')
+        assert len(store.read('cn', 'test', 'sh000001')) == 302
+
+    def test_fingerprint_changes_on_write(self, tmp_path):
+        store = BarStore(root=tmp_path)
+        assert store.fingerprint() == ()
+
+        source = FakeSource(make_bars('2025-11-14', 300))
+        saturday = datetime(2025, 11, 15, 10, 0, tzinfo=CN_TZ)
+        store.get_bars('cn', 'test', 'sh000001', source, now=saturday)
+        first = store.fingerprint()
+        # 本地命中不写文件, 指纹不变
+        store.get_bars('cn', 'test', 'sh000001', source, now=saturday)
+        assert store.fingerprint() == first
+
+        store.get_bars('cn', 'test', 'sz399006', source, now=saturday)
+        assert len(store.fingerprint()) == 2
+
+    def test_rebuild_on_adjustment_change(self, tmp_path):
+        store = BarStore(root=tmp_path)
+        source = FakeSource(make_bars('2025-11-14', 300))
+        saturday = datetime(2025, 11, 15, 10, 0, tzinfo=CN_TZ)
+        store.get_bars('cn', 'test', '510300', source, now=saturday)
+
+        # 除权后历史价格整体下调 -> 重叠K线不一致, 应全量重建
+        adjusted = make_bars('2025-11-18', 302)
+        adjusted[['open', 'high', 'low', 'close']] *= 0.9
+        source.full = adjusted
+        df = store.get_bars('cn', 'test', '510300', source,
+                            now=datetime(2025, 11, 18, 16, 0, tzinfo=CN_TZ))
+
+        assert store.stats['rebuilds'] == 1
+        np.testing.assert_allclose(df['close'].values, adjusted['close'].values)
+
+    def test_pending_bar_not_persisted(self, tmp_path):
+        store = BarStore(root=tmp_path)
+        source = FakeSource(make_bars('2025-11-17', 300))
+        # 周一盘中: 当天K线尚未收盘
+        monday_noon = datetime(2025, 11, 17, 11, 0, tzinfo=CN_TZ)
+        store.get_bars('cn', 'test', 'sh000001', source, now=datetime(2025, 11, 15, tzinfo=CN_TZ))
+        df = store.get_bars('cn', 'test', 'sh000001', source, now=monday_noon)
+
+        assert df.index[-1] == pd.Timestamp('2025-11-17')
+        assert store.read('cn', 'test', 'sh000001').index[-1] == pd.Timestamp('2025-11-14')
+
+    def test_slice_period(self):
+        df = make_bars('2025-11-14', 300)
+        assert len(slice_period(df, '5d')) == 5
+        assert slice_period(df, '1y', now=datetime(2025, 11, 14)).index[0] >= pd.Timestamp('2024-11-13')
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量行情下载单元测试
+验证令牌桶限流、有界并发, 以及指数/行业ETF批量获取只发起一次下载
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance as yf
+
+from src.data_sources import us_stock_source
+from src.data_sources.bar_store import BarStore, PARQUET_AVAILABLE
+from src.data_sources.batch_downloader import (
+    TokenBucket, fetch_concurrently, split_download
+)
+from src.data_sources.us_stock_source import USStockDataSource
+from strategies.position.analyzers.market_structure.sector_analyzer import SectorRotationAnalyzer
+
+
+def make_download(symbols, periods: int = 260, **kwargs) -> pd.DataFrame:
+    """构造 yf.download(group_by='ticker') 格式的结果"""
+    dates = pd.bdate_range(end='2025-11-14', periods=periods)
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        close = 100 + i + np.arange(periods, dtype=float)
+        frames[symbol] = pd.DataFrame({
+            'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000.0
+        }, index=dates)
+    return pd.concat(frames, axis=1)
+
+
+class FakeDownload:
+    """记录 yf.download 调用"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tickers, **kwargs):
+        self.calls.append((list(tickers), kwargs))
+        return make_download(tickers)
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    download = FakeDownload()
+    monkeypatch.setattr(yf, 'download', download)
+
+    def no_single_requests(*args, **kwargs):
+        raise AssertionError("不应发起单代码请求")
+
+    monkeypatch.setattr(yf, 'Ticker', no_single_requests)
+    return download
+
+
+class TestTokenBucket:
+
+    def test_rate_limits_after_burst(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.perf_counter()
+        for _ in range(4):
+            bucket.acquire()
+        # 突发2个, 其余2个按每秒20个补充
+        assert time.perf_counter() - start >= 0.09
+
+    def test_acquire_timeout(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        assert bucket.acquire()
+        assert not bucket.acquire(timeout=0.05)
+
+
+class TestFetchConcurrently:
+
+    def test_runs_in_parallel_and_skips_failures(self):
+        def fetch(key):
+            time.sleep(0.2)
+            if key == 'bad':
+                raise ValueError('boom')
+            if key == 'empty':
+                return pd.DataFrame()
+            return key.upper()
+
+        start = time.perf_counter()
+        results = fetch_concurrently(['a', 'b', 'bad', 'empty', 'c', 'a'], fetch, max_workers=8)
+
+        assert time.perf_counter() - start < 0.6
+        assert results == {'a': 'A', 'b': 'B', 'c': 'C'}
+
+
+class TestBatchDownload:
+
+    def test_split_download_drops_calendar_gaps(self):
+        raw = make_download(['SPY', 'BTC-USD'], periods=10)
+        raw.loc[raw.index[3], 'SPY'] = np.nan
+
+        frames = split_download(raw, ['SPY', 'BTC-USD', 'MISSING'])
+
+        assert set(frames) == {'SPY', 'BTC-USD'}
+        assert len(frames['SPY']) == 9
+        assert list(frames['SPY'].columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    @pytest.mark.skipif(not PARQUET_AVAILABLE, reason="需要pyarrow")
+    def test_multiple_indices_single_round_trip(self, fake_download, monkeypatch, tmp_path):
+        store = BarStore(root=tmp_path)
+        monkeypatch.setattr(us_stock_source, 'get_bar_store', lambda: store)
+
+        results = USStockDataSource().get_multiple_indices(['SPX', 'NASDAQ', 'VIX'], period='max')
+
+        assert list(results) == ['SPX', 'NASDAQ', 'VIX']
+        assert len(fake_download.calls) == 1
+        assert fake_download.calls[0][0] == ['^GSPC', '^IXIC', '^VIX']
+        assert list(results['SPX'].columns) == ['open', 'high', 'low', 'close', 'volume']
+        assert results['NASDAQ']['close'].iloc[0] == 101
+        # 结果已写入K线仓库
+        assert not store.read('us', 'yfinance', '^GSPC').empty
+
+    def test_sector_data_single_round_trip(self, fake_download):
+        analyzer = SectorRotationAnalyzer(USStockDataSource())
+
+        sector_data = analyzer._get_all_sector_data(period='1y')
+
+        assert len(fake_download.calls) == 1
+        assert fake_download.calls[0][1]['period'] == '1y'
+        assert list(sector_data) == list(SectorRotationAnalyzer.SECTOR_ETFS)
+        assert list(sector_data['XLK'].columns) == ['open', 'high', 'low', 'close', 'volume']
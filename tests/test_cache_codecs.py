@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存文件编解码器单元测试
+验证按类型编码的无损往返、校验和与原子写入
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import cache_codecs
+from src.utils.cache_codecs import CacheCodecError, read_file, write_file
+from russ_trading.utils.data_cache_manager import DataCacheManager
+
+
+def make_bars(n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'close': close,
+        'volume': rng.integers(1_000, 5_000, n),
+        'code': ['600519'] * n,
+    }, index=pd.bdate_range('2024-01-02', periods=n, name='date'))
+
+
+class TestCodecs:
+
+    @pytest.mark.parametrize('df', [
+        make_bars(),
+        pd.DataFrame({'x': [1.0, np.nan]}, index=pd.date_range('2024-01-01', periods=2, tz='Asia/Shanghai')),
+        pd.DataFrame({'name': ['a', None, 'c'], 'flag': [True, False, True]}),
+        pd.DataFrame({'x': pd.Categorical(['a', 'b', 'a'])}, index=pd.Index([3, 1, 2], name='id')),
+        pd.DataFrame(),
+    ])
+    def test_dataframe_roundtrip_arrow(self, tmp_path, df):
+        assert write_file(tmp_path / 'df.rtc', df) == 'arrow'
+        pd.testing.assert_frame_equal(read_file(tmp_path / 'df.rtc'), df)
+
+    def test_unsupported_frame_falls_back_to_pickle(self, tmp_path):
+        df = pd.DataFrame({0: [1, 2], 'mixed': [{'a': 1}, 3]})
+        assert write_file(tmp_path / 'df.rtc', df) == 'pickle'
+        pd.testing.assert_frame_equal(read_file(tmp_path / 'df.rtc'), df)
+
+    def test_loaded_frame_is_writable(self, tmp_path):
+        write_file(tmp_path / 'df.rtc', make_bars())
+        df = read_file(tmp_path / 'df.rtc')
+        df.iloc[0, 0] = -1.0
+        df['ma'] = df['close'].rolling(5).mean()
+        assert df.iloc[0, 0] == -1.0
+
+    @pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='需要/proc')
+    def test_reads_do_not_leak_file_handles(self, tmp_path):
+        write_file(tmp_path / 'df.rtc', make_bars())
+        before = len(os.listdir('/proc/self/fd'))
+        frames = [read_file(tmp_path / 'df.rtc') for _ in range(50)]
+        assert len(os.listdir('/proc/self/fd')) <= before + 1
+        # 映射关闭后读取结果仍可用
+        pd.testing.assert_frame_equal(frames[-1], make_bars())
+
+    def test_scalar_dict_binary(self, tmp_path):
+        value = {'score': 72.5, 'rating': '偏多', 'count': 3, 'ok': True, 'none': None,
+                 'nested': {'levels': [1.0, 2.0], 'pair': (1, 'a')}}
+        assert write_file(tmp_path / 'd.rtc', value) == 'binary'
+        assert read_file(tmp_path / 'd.rtc') == value
+
+    def test_dict_with_objects_falls_back_to_pickle(self, tmp_path):
+        value = {'date': pd.Timestamp('2024-01-02'), 'bars': make_bars(5)}
+        assert write_file(tmp_path / 'd.rtc', value) == 'pickle'
+        loaded = read_file(tmp_path / 'd.rtc')
+        assert loaded['date'] == value['date']
+        pd.testing.assert_frame_equal(loaded['bars'], value['bars'])
+
+    def test_corruption_detected(self, tmp_path):
+        path = tmp_path / 'df.rtc'
+        write_file(path, make_bars())
+        raw = bytearray(path.read_bytes())
+        raw[-100] ^= 0xFF
+        path.write_bytes(bytes(raw))
+
+        with pytest.raises(CacheCodecError, match='校验和'):
+            read_file(path)
+
+    def test_truncation_detected(self, tmp_path):
+        path = tmp_path / 'd.rtc'
+        write_file(path, {'a': 1})
+        path.write_bytes(path.read_bytes()[:-1])
+
+        with pytest.raises(CacheCodecError, match='长度'):
+            read_file(path)
+
+    def test_failed_write_keeps_old_file(self, tmp_path, monkeypatch):
+        path = tmp_path / 'd.rtc'
+        write_file(path, {'v': 1})
+
+        def broken_replace(src, dst):
+            raise OSError('disk full')
+        monkeypatch.setattr(cache_codecs.os, 'replace', broken_replace)
+
+        with pytest.raises(OSError):
+            write_file(path, {'v': 2})
+        assert read_file(path) == {'v': 1}
+        assert os.listdir(tmp_path) == ['d.rtc']
+
+
+class TestDataCacheManagerFileTier:
+
+    def test_file_hit_across_instances(self, tmp_path):
+        DataCacheManager(cache_dir=tmp_path).get_or_fetch('bars:600519', make_bars)
+
+        cache = DataCacheManager(cache_dir=tmp_path)
+        df = cache.get_or_fetch('bars:600519', lambda: pytest.fail('不应重新获取'))
+        pd.testing.assert_frame_equal(df, make_bars())
+        assert cache.get_cache_stats()['file_hits'] == 1
+        assert cache.get_cache_stats()['file_cache_count'] == 1
+
+    def test_corrupt_file_refetched(self, tmp_path):
+        DataCacheManager(cache_dir=tmp_path).get_or_fetch('k', lambda: {'v': 1})
+        cache_file = next(tmp_path.rglob('*.rtc'))
+        cache_file.write_bytes(cache_file.read_bytes()[:-3])
+
+        cache = DataCacheManager(cache_dir=tmp_path)
+        assert cache.get_or_fetch('k', lambda: {'v': 2}) == {'v': 2}
+        assert cache.get_cache_stats()['fetch_calls'] == 1
+
+    def test_clear_file_cache_by_age(self, tmp_path):
+        cache = DataCacheManager(cache_dir=tmp_path)
+        cache.get_or_fetch('old', lambda: {'v': 1})
+        cache.get_or_fetch('new', lambda: {'v': 2})
+        old_file = cache._get_cache_file_path('old')
+        os.utime(old_file, (0, 0))
+
+        cache.clear_file_cache(days_to_keep=1)
+        assert not old_file.exists()
+        assert cache._get_cache_file_path('new').exists()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分层命名空间缓存服务单元测试
+验证命名空间隔离、共享内存预算、磁盘层过期和各适配器的接入
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.cache_service import NO_EXPIRY, CacheService, NamespacePolicy, set_cache_service
+from src.utils.cache_codecs import read_entry
+
+
+def make_bars(n: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        'close': 100 + rng.normal(0, 1, n).cumsum(),
+        'volume': rng.integers(1_000, 5_000, n),
+    }, index=pd.bdate_range('2024-01-02', periods=n, name='date'))
+
+
+POLICIES = {
+    'bars': NamespacePolicy(ttl=3600, persist=True),
+    'quotes': NamespacePolicy(ttl=60),
+}
+
+
+@pytest.fixture
+def service(tmp_path):
+    return CacheService(cache_dir=tmp_path, policies=POLICIES)
+
+
+class TestNamespaces:
+
+    def test_same_key_isolated_between_namespaces(self, service):
+        service.namespace('bars').set('600519', 'bars')
+        service.namespace('quotes').set('600519', 'quote')
+
+        assert service.namespace('bars').get('600519') == 'bars'
+        assert service.namespace('quotes').get('600519') == 'quote'
+
+    def test_namespace_instances_shared(self, service):
+        assert service.namespace('bars') is service.namespace('bars')
+
+    def test_memory_budget_shared_across_namespaces(self, tmp_path):
+        service = CacheService(cache_dir=tmp_path, enable_file_cache=False, memory_max_bytes=250)
+        service.memory.set('bars:a', 1, size=100)
+        service.namespace('quotes').set('b', 2)
+        service.memory.set('quotes:c', 3, size=200)
+
+        assert service.namespace('bars').get('a') is None
+        assert service.get_stats()['memory']['evictions'] >= 1
+
+    def test_clear_only_affects_namespace(self, service):
+        service.namespace('bars').set('k', 1)
+        service.namespace('quotes').set('k', 2)
+        service.namespace('bars').clear()
+
+        assert service.namespace('bars').get('k') is None
+        assert service.namespace('quotes').get('k') == 2
+
+
+class TestDiskTier:
+
+    def test_persisted_across_services(self, tmp_path, service):
+        service.namespace('bars').set('600519', make_bars())
+
+        other = CacheService(cache_dir=tmp_path, policies=POLICIES)
+        df = other.namespace('bars').get('600519')
+        pd.testing.assert_frame_equal(df, make_bars())
+        assert other.namespace('bars').get_stats()['file_hits'] == 1
+
+    def test_non_persistent_namespace_writes_no_files(self, tmp_path, service):
+        service.namespace('quotes').set('k', {'v': 1})
+        assert not list(tmp_path.rglob('*.rtc'))
+
+    def test_write_time_ttl_recorded_in_file(self, service):
+        ns = service.namespace('bars')
+        ns.set('k', {'v': 1}, ttl=10)
+        _, expire_at = read_entry(ns.file_path('k'))
+        assert expire_at == pytest.approx(time.time() + 10, abs=2)
+
+    def test_expired_file_is_miss(self, tmp_path, service):
+        service.namespace('bars').set('k', {'v': 1}, ttl=0.05)
+        time.sleep(0.1)
+
+        other = CacheService(cache_dir=tmp_path, policies=POLICIES)
+        assert other.namespace('bars').get('k') is None
+        assert not other.namespace('bars').file_path('k').exists()
+
+    def test_max_age_uses_write_time(self, tmp_path, service):
+        ns = service.namespace('bars')
+        ns.set('k', {'v': 1})
+        os.utime(ns.file_path('k'), (time.time() - 7200, time.time() - 7200))
+
+        other = CacheService(cache_dir=tmp_path, policies=POLICIES).namespace('bars')
+        assert other.get('k', max_age=3600) is None
+
+    def test_purge_expired(self, service):
+        ns = service.namespace('bars')
+        ns.set('old', 1, ttl=0.01)
+        ns.set('new', 2)
+        time.sleep(0.05)
+
+        # 内存和磁盘各清理一条
+        assert ns.purge_expired() == 2
+        assert ns.get('new') == 2
+
+
+class TestGetOrFetch:
+
+    def test_none_not_cached(self, service):
+        calls = []
+        ns = service.namespace('quotes')
+        ns.get_or_fetch('k', lambda: calls.append(1))
+        ns.get_or_fetch('k', lambda: calls.append(1))
+        assert len(calls) == 2
+
+    def test_hit_after_fetch(self, service):
+        ns = service.namespace('quotes')
+        assert ns.get_or_fetch('k', lambda: 5) == 5
+        assert ns.get_or_fetch('k', lambda: pytest.fail('不应重新获取')) == 5
+        stats = ns.get_stats()
+        assert stats['fetch_calls'] == 1
+        assert stats['memory_hits'] == 1
+
+
+class TestAdapters:
+
+    def test_simple_cache_uses_namespace(self, tmp_path):
+        from russ_trading.utils.cache_manager import SimpleCache
+
+        cache = SimpleCache(cache_dir=tmp_path)
+        cache.set('k', {'v': 1}, ttl=60)
+        assert cache.get('k') == {'v': 1}
+        assert SimpleCache(cache_dir=tmp_path).get('k', use_memory=False) == {'v': 1}
+
+        cache.delete('k')
+        assert cache.get('k') is None
+
+    def test_simple_cache_ttl_none_never_expires(self, tmp_path):
+        from russ_trading.utils.cache_manager import SimpleCache
+
+        cache = SimpleCache(cache_dir=tmp_path)
+        cache.set('forever', {'v': 1}, ttl=None)
+        _, expire_at = read_entry(cache._ns.file_path('forever'))
+        assert expire_at is None
+        assert cache._ns.resolve_ttl(NO_EXPIRY) is None
+
+    def test_index_cache_eviction_keeps_shared_entries(self, tmp_path):
+        from strategies.position.core.historical_position_analyzer import DataCache
+
+        set_cache_service(CacheService(cache_dir=tmp_path))
+        try:
+            small, other = DataCache(max_size=2), DataCache()
+            for code in ('sh000001', 'sh000300', 'sz399006'):
+                small.set(code, make_bars(20))
+
+            # 本实例只跟踪最近两个, 被淘汰的条目仍对其他实例可见
+            assert small.get_stats()['size'] == 2
+            assert other.get('sh000001') is not None
+
+            small.clear()
+            assert other.get('sh000300') is not None
+        finally:
+            set_cache_service(None)
+
+
+class TestMarketExpiry:
+
+    def test_market_policy_uses_calendar_ttl(self, tmp_path, monkeypatch):
+        from src.utils import cache_service
+
+        service = CacheService(cache_dir=tmp_path, policies={
+            'cn_bars': NamespacePolicy(ttl=300, market='cn'),
+        })
+        calls = []
+
+        class FakeCalendar:
+            def ttl(self, market, intraday_ttl=None):
+                calls.append((market, intraday_ttl))
+                return 1234.0
+
+        monkeypatch.setattr(cache_service, 'get_trading_calendar', lambda: FakeCalendar())
+        ns = service.namespace('cn_bars')
+
+        assert ns.resolve_ttl() == 1234.0
+        assert ns.resolve_ttl(market='hk') == 1234.0
+        assert ns.resolve_ttl(ttl=10) == 10
+        assert calls == [('cn', 300), ('hk', 300)]
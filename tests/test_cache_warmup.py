@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+盘前缓存预热单元测试
+验证缓存有效项跳过、过期项刷新与失败汇总、按主机并发上限、--force 删除缓存键、令牌不重复获取
+"""
+
+import threading
+import time
+
+import pandas as pd
+
+from russ_trading.runners import cache_warmup
+from russ_trading.runners.cache_warmup import CacheWarmer, WarmupTask
+
+
+def make_task(name, cached=False, result=None, error=None, host=None, calls=None, delay=0.0):
+    def fetch():
+        if calls is not None:
+            calls.append(name)
+        time.sleep(delay)
+        if error:
+            raise error
+        return pd.DataFrame({'close': [1.0, 2.0]}) if result is None else result
+    return WarmupTask(name=name, group='bars', fetch=fetch, is_cached=lambda: cached, host=host)
+
+
+class TestCacheWarmer:
+
+    def test_fresh_entries_not_fetched(self):
+        calls = []
+        report = CacheWarmer().run([
+            make_task('cached', cached=True, calls=calls),
+            make_task('stale', calls=calls),
+        ])
+
+        assert calls == ['stale']
+        assert [r.status for r in report.results] == ['fresh', 'refreshed']
+        assert [r.name for r in report.stale] == ['stale']
+
+    def test_force_refetches_cached(self):
+        calls = []
+        CacheWarmer(force=True).run([make_task('cached', cached=True, calls=calls)])
+        assert calls == ['cached']
+
+    def test_force_invalidates_before_fetch(self):
+        events = []
+        task = WarmupTask('cached', 'valuation', lambda: events.append('fetch') or {'ok': True},
+                          lambda: True, invalidate=lambda: events.append('invalidate'))
+
+        CacheWarmer().run([task])
+        assert events == []
+        CacheWarmer(force=True).run([task])
+        assert events == ['invalidate', 'fetch']
+
+    def test_namespace_invalidate(self, tmp_path):
+        from src.utils.cache_service import CacheService, set_cache_service
+
+        set_cache_service(CacheService(cache_dir=tmp_path))
+        try:
+            ns = cache_warmup.get_namespace('market_stats')
+            ns.set('margin_sh', {'v': 1})
+            assert cache_warmup._namespace_probe('market_stats', 'margin_sh')()
+            cache_warmup._namespace_invalidate('market_stats', 'margin_sh')()
+            assert not cache_warmup._namespace_probe('market_stats', 'margin_sh')()
+        finally:
+            set_cache_service(None)
+
+    def test_self_limited_host_not_double_charged(self, monkeypatch):
+        acquired = []
+
+        class FakeLimiter:
+            def __init__(self, host):
+                self.host = host
+
+            def acquire(self):
+                acquired.append(self.host)
+
+        monkeypatch.setattr(cache_warmup, 'get_rate_limiter', FakeLimiter)
+        CacheWarmer().run([make_task('yf', host='yfinance'), make_task('ak', host='akshare')])
+        assert acquired == ['akshare']
+
+    def test_failures_reported(self):
+        report = CacheWarmer().run([
+            make_task('empty', result=pd.DataFrame()),
+            make_task('error_dict', result={'error': '无法获取'}),
+            make_task('raises', error=RuntimeError('timeout')),
+        ])
+
+        assert [r.error for r in report.failed] == ['无数据', '无法获取', 'timeout']
+        summary = report.format_summary()
+        assert '失败 3 项' in summary
+        assert 'raises: timeout' in summary
+
+    def test_host_concurrency_limited(self, monkeypatch):
+        monkeypatch.setitem(cache_warmup.HOST_CONCURRENCY, 'akshare', 1)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def fetch():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {'ok': True}
+
+        tasks = [WarmupTask(f't{i}', 'valuation', fetch, lambda: False, host='akshare') for i in range(4)]
+        report = CacheWarmer(max_workers=4).run(tasks)
+
+        assert peak[0] == 1
+        assert len(report.by_status('refreshed')) == 4
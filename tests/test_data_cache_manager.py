@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据缓存管理器单元测试
+验证并发未命中时的请求合并(single-flight)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from russ_trading.utils.data_cache_manager import DataCacheManager
+
+
+class TestSingleFlight:
+    """测试同key并发请求合并"""
+
+    def setup_method(self):
+        self.cache = DataCacheManager(enable_file_cache=False)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def slow_fetcher(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return {'value': 42}
+
+    def test_concurrent_misses_fetch_once(self):
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = [
+                executor.submit(self.cache.get_or_fetch, 'market_sentiment', self.slow_fetcher)
+                for _ in range(6)
+            ]
+            results = [f.result() for f in futures]
+
+        assert self.calls == 1, f"fetcher应只执行1次,实际{self.calls}次"
+        assert all(r == {'value': 42} for r in results)
+
+        stats = self.cache.get_cache_stats()
+        assert stats['fetch_calls'] == 1
+        assert stats['coalesced_calls'] == 5
+        assert stats['inflight_calls'] == 0
+
+    def test_different_keys_not_coalesced(self):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(self.cache.get_or_fetch, f'key_{i}', self.slow_fetcher)
+                for i in range(3)
+            ]
+            [f.result() for f in futures]
+
+        assert self.calls == 3
+        assert self.cache.get_cache_stats()['coalesced_calls'] == 0
+
+    def test_error_propagates_to_waiters(self):
+        def failing_fetcher():
+            time.sleep(0.2)
+            raise RuntimeError("上游超时")
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(self.cache.get_or_fetch, 'bad_key', failing_fetcher)
+                for _ in range(4)
+            ]
+            for f in futures:
+                with pytest.raises(RuntimeError, match="上游超时"):
+                    f.result()
+
+        # 失败结果不缓存,下次调用重新获取
+        assert self.cache.get_or_fetch('bad_key', self.slow_fetcher) == {'value': 42}
+
+    def test_memory_hit_counted(self):
+        self.cache.get_or_fetch('k', self.slow_fetcher)
+        self.cache.get_or_fetch('k', self.slow_fetcher)
+
+        stats = self.cache.get_cache_stats()
+        assert self.calls == 1
+        assert stats['memory_hits'] == 1
+
+
+class TestMemoryBudget:
+    """测试内存层字节预算"""
+
+    def test_budget_evicts_least_recently_used(self):
+        df = pd.DataFrame({'close': range(10000)}, dtype=float)
+        size = int(df.memory_usage(deep=True).sum())
+        cache = DataCacheManager(enable_file_cache=False, memory_max_bytes=int(size * 2.5))
+
+        for key in ('a', 'b', 'c'):
+            cache.get_or_fetch(key, lambda: df.copy())
+
+        stats = cache.get_cache_stats()
+        assert stats['memory_cache_keys'] == ['b', 'c']
+        assert stats['memory_evictions'] == 1
+        assert stats['memory_cache_bytes'] <= stats['memory_cache_max_bytes']
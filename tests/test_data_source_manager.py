@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+板块数据源管理器单元测试
+验证健康度排序、熔断与对冲请求
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.analysis.sector_analysis.data_source_manager import DataSourceManager, SourceHealth
+
+
+def make_df(n: int = 30, price: float = 10.0) -> pd.DataFrame:
+    dates = pd.bdate_range('2025-01-02', periods=n)
+    close = price + np.arange(n) * 0.1
+    return pd.DataFrame({'close': close, 'return': pd.Series(close).pct_change().values}, index=dates)
+
+
+@pytest.fixture
+def manager():
+    manager = DataSourceManager()
+    manager.source_status.update({'ashare': True, 'akshare': True, 'yfinance': True})
+    calls = []
+
+    def fake_source(name, delay=0.0, result=None, error=None):
+        def fetch(symbol, period, market):
+            calls.append(name)
+            time.sleep(delay)
+            if error:
+                raise error
+            return result if result is not None else make_df()
+        manager._fetchers[name] = fetch
+
+    manager.fake_source = fake_source
+    manager.calls = calls
+    yield manager
+    manager.close()
+
+
+class TestSourceHealth:
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        health = SourceHealth(failure_threshold=3, cooldown=60)
+        for _ in range(2):
+            health.record(0.1, success=False)
+        assert not health.is_open
+
+        health.record(0.1, success=False)
+        assert health.is_open
+        assert health.to_dict()['state'] == 'open'
+
+    def test_half_open_after_cooldown(self):
+        health = SourceHealth(failure_threshold=1, cooldown=0.05)
+        health.record(0.1, success=False)
+        time.sleep(0.06)
+
+        assert not health.is_open
+        assert health.to_dict()['state'] == 'half_open'
+        health.record(0.1, success=True)
+        assert health.to_dict()['state'] == 'closed'
+
+    def test_latency_percentile_needs_samples(self):
+        health = SourceHealth(default_latency=3.0)
+        assert health.latency_percentile(90) == 3.0
+        for latency in [0.1, 0.2, 0.3, 0.4, 1.0]:
+            health.record(latency, success=True)
+        assert health.latency_percentile(90) == pytest.approx(0.76)
+
+
+class TestDataSourceManager:
+
+    def test_fallback_on_invalid_data(self, manager):
+        manager.fake_source('ashare', result=make_df(n=3))
+        manager.fake_source('akshare', result=make_df(price=20))
+
+        df = manager.get_stock_data('512480', period='1y', market='CN')
+
+        assert manager.calls == ['ashare', 'akshare']
+        assert df['close'].iloc[0] == 20
+        assert manager.get_source_health()['ashare']['failures'] == 1
+
+    def test_open_circuit_skipped(self, manager):
+        manager.fake_source('ashare', error=RuntimeError('down'))
+        manager.fake_source('akshare')
+
+        # 指定为优先数据源, 熔断前每次都会先尝试
+        for i in range(4):
+            manager.get_stock_data(f'51248{i}', market='CN', prefer_source='ashare')
+
+        assert manager.calls.count('ashare') == 3
+        assert manager.calls.count('akshare') == 4
+        assert manager.get_source_health()['ashare']['state'] == 'open'
+        assert manager._get_source_priority('CN')[-1] == 'ashare'
+
+    def test_failed_source_demoted(self, manager):
+        manager.fake_source('ashare', error=RuntimeError('down'))
+        manager.fake_source('akshare')
+
+        manager.get_stock_data('512480', market='CN')
+        manager.get_stock_data('512490', market='CN')
+
+        assert manager.calls == ['ashare', 'akshare', 'akshare']
+
+    def test_reorder_by_health(self, manager):
+        manager.fake_source('ashare', delay=0.05)
+        manager.fake_source('akshare')
+        for source, latency in [('ashare', 2.0), ('akshare', 0.1)]:
+            for _ in range(5):
+                manager._get_health(source).record(latency, success=True)
+
+        assert manager._get_source_priority('CN') == ['akshare', 'ashare', 'yfinance']
+        # 指定的优先数据源仍置顶
+        assert manager._get_source_priority('CN', prefer_source='ashare')[0] == 'ashare'
+
+    def test_hedged_request_takes_first_valid(self, manager):
+        manager.fake_source('ashare', delay=1.0, result=make_df(price=10))
+        manager.fake_source('akshare', result=make_df(price=20))
+        for _ in range(5):
+            manager._get_health('ashare').record(0.1, success=True)
+
+        start = time.perf_counter()
+        df = manager.get_stock_data('512480', market='CN', hedge=True)
+        elapsed = time.perf_counter() - start
+
+        assert df['close'].iloc[0] == 20
+        assert elapsed < 0.8
+        assert manager.calls == ['ashare', 'akshare']
+
+    def test_no_hedge_waits_for_primary(self, manager):
+        manager.fake_source('ashare', delay=0.3, result=make_df(price=10))
+        manager.fake_source('akshare', result=make_df(price=20))
+        for _ in range(5):
+            manager._get_health('ashare').record(0.05, success=True)
+
+        df = manager.get_stock_data('512480', market='CN')
+
+        assert df['close'].iloc[0] == 10
+        assert manager.calls == ['ashare']
+
+    def test_all_sources_fail(self, manager):
+        for source in ('ashare', 'akshare', 'yfinance'):
+            manager.fake_source(source, error=ValueError('empty'))
+
+        assert manager.get_stock_data('512480', market='CN').empty
+        assert manager.calls == ['ashare', 'akshare', 'yfinance']
+
+
+class TestDataSourceCache:
+
+    def test_cached_until_next_close(self, manager):
+        manager.fake_source('ashare')
+
+        manager.get_stock_data('512480', market='CN')
+        assert manager.is_cached('512480', market='CN')
+        manager.get_stock_data('512480', market='CN')
+
+        assert manager.calls == ['ashare']
+        assert not manager.is_cached('512480', period='1y', market='CN')
+
+    def test_shared_namespace(self, tmp_path):
+        from src.utils.cache_service import CacheService
+
+        ns = CacheService(cache_dir=tmp_path).namespace('sector_bars')
+        ns.set('512480_5y_CN', make_df())
+        with DataSourceManager(cache=ns) as manager:
+            assert manager.is_cached('512480')
+            assert len(manager.get_stock_data('512480')) == 30
+        # 退出 with 后线程池已关闭
+        with pytest.raises(RuntimeError):
+            manager._executor.submit(print)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+业绩报表仓库与批量财务分析单元测试
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from src.data_sources.earnings_table import EarningsTable, disclosure_deadline, is_report_final
+from strategies.position.analyzers.valuation.financial_analyzer import FinancialAnalyzer
+
+
+def make_report(report_date: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        '股票代码': ['600519', '000001', '300750'],
+        '股票简称': ['贵州茅台', '平安银行', '宁德时代'],
+        '每股收益': [45.0, 1.9, 8.5],
+        '净资产收益率': [25.0, 9.0, 18.0],
+        '每股净资产': [190.0, 22.0, 50.0],
+        '销售毛利率': [91.0, 0.0, 22.0],
+        '每股经营现金流量': [30.0, 3.0, 12.0],
+        '营业总收入-营业总收入': [1.2e11, 1.1e11, 2.6e11],
+        '营业总收入-同比增长': [16.0, -12.0, -12.0],
+        '营业总收入-季度环比增长': [1.0, 2.0, 3.0],
+        '净利润-净利润': [6.0e10, 3.9e10, 3.6e10],
+        '净利润-同比增长': [15.0, 0.2, 25.0],
+        '净利润-季度环比增长': [2.0, -1.0, 4.0],
+        '所处行业': ['酿酒行业', '银行', '电池'],
+    })
+
+
+class CountingFetcher:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, report_date):
+        self.calls.append(report_date)
+        if self.fail:
+            raise ConnectionError('offline')
+        return make_report(report_date)
+
+
+class TestDisclosureCalendar:
+
+    def test_deadlines(self):
+        assert disclosure_deadline('20240331') == date(2024, 4, 30)
+        assert disclosure_deadline('20240930') == date(2024, 10, 31)
+        assert disclosure_deadline('20241231') == date(2025, 4, 30)
+        assert disclosure_deadline('20240515') is None
+
+    def test_final_after_grace(self):
+        assert is_report_final('20240930', date(2025, 1, 1))
+        assert not is_report_final('20240930', date(2024, 11, 2))
+
+
+class TestEarningsTable:
+
+    def test_table_fetched_once_across_symbols(self, tmp_path):
+        fetcher = CountingFetcher()
+        table = EarningsTable(root=tmp_path, fetcher=fetcher)
+
+        assert table.get('600519', '20240930')['股票简称'] == '贵州茅台'
+        assert table.get('000001.SZ', '20240930')['股票简称'] == '平安银行'
+        assert table.get('688999', '20240930') is None
+        assert fetcher.calls == ['20240930']
+
+        rows = table.lookup(['300750', '600519'], '20240930')
+        assert rows['300750']['每股收益'] == 8.5
+        assert fetcher.calls == ['20240930']
+
+    def test_final_period_reused_across_runs(self, tmp_path):
+        EarningsTable(root=tmp_path, fetcher=CountingFetcher()).get_frame('20240930')
+
+        fetcher = CountingFetcher(fail=True)
+        table = EarningsTable(root=tmp_path, fetcher=fetcher)
+        assert table.get('600519', '20240930')['每股收益'] == 45.0
+        assert fetcher.calls == []
+        assert table.get_stats()['local_hits'] == 1
+
+    def test_open_period_refreshed_after_ttl(self, tmp_path):
+        # 远期报告期尚未过披露截止日, 本地文件只在open_ttl内有效
+        EarningsTable(root=tmp_path, fetcher=CountingFetcher()).get_frame('20990331')
+
+        fetcher = CountingFetcher()
+        EarningsTable(root=tmp_path, fetcher=fetcher).get_frame('20990331')
+        assert fetcher.calls == []
+
+        EarningsTable(root=tmp_path, fetcher=fetcher, open_ttl=0).get_frame('20990331')
+        assert fetcher.calls == ['20990331']
+
+    def test_stale_local_served_when_offline(self, tmp_path):
+        EarningsTable(root=tmp_path, fetcher=CountingFetcher()).get_frame('20990331')
+
+        offline = EarningsTable(root=tmp_path, fetcher=CountingFetcher(fail=True), open_ttl=0)
+        assert offline.get('600519', '20990331') is not None
+        assert offline.get_stats()['failures'] == 1
+
+    def test_failure_without_local_returns_none(self, tmp_path):
+        table = EarningsTable(root=tmp_path, fetcher=CountingFetcher(fail=True))
+        assert table.get('600519', '20240930') is None
+        assert table.get_frame('20240930').empty
+
+
+class TestFinancialAnalyzerBatch:
+
+    def test_indicators_from_table(self, tmp_path):
+        analyzer = FinancialAnalyzer(EarningsTable(root=tmp_path, fetcher=CountingFetcher()))
+        indicators = analyzer.get_financial_indicators('600519')
+
+        assert indicators['stock_name'] == '贵州茅台'
+        assert indicators['roe'] == 25.0
+        assert indicators['revenue_growth'] == 16.0
+        assert analyzer.calculate_growth_rate('000001')['revenue_growth'] == -12.0
+
+    def test_batch_downloads_report_once(self, tmp_path, monkeypatch):
+        fetcher = CountingFetcher()
+        analyzer = FinancialAnalyzer(EarningsTable(root=tmp_path, fetcher=fetcher))
+        monkeypatch.setattr(analyzer, 'get_valuation_metrics', lambda symbol: {'price': 100.0, 'market_cap': 1e11})
+
+        symbols = ['600519', '000001', '300750', '600519']
+        results = analyzer.batch_comprehensive_analysis(symbols, report_date='20240930')
+
+        assert list(results) == ['600519', '000001', '300750']
+        assert fetcher.calls == ['20240930']
+        for symbol, result in results.items():
+            assert result['symbol'] == symbol
+            assert 'overall_score' in result
+        assert results['600519']['financial_indicators']['stock_name'] == '贵州茅台'
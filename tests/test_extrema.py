@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+局部极值识别单元测试
+验证向量化峰谷识别与背离/量价/支撑压力分析器原逐点循环结果一致
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.utils.extrema import find_extrema, local_maxima, local_minima
+from strategies.position.analyzers.technical_analysis.divergence_analyzer import DivergenceAnalyzer
+
+
+def make_series(n: int, seed: int, plateaus: bool = False, nans: bool = False) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    values = 100 + np.cumsum(rng.normal(0, 1, n))
+    if plateaus:
+        # 取整制造相等的相邻值
+        values = np.round(values / 2)
+    if nans:
+        values[rng.choice(n, n // 20, replace=False)] = np.nan
+    return values
+
+
+def loop_divergence(series: pd.Series, window: int, min_distance: int):
+    """DivergenceAnalyzer原逐点实现"""
+    peaks, valleys = [], []
+    for i in range(window, len(series) - window):
+        is_peak = is_valley = True
+        for j in range(1, window + 1):
+            if series.iloc[i] <= series.iloc[i - j] or series.iloc[i] <= series.iloc[i + j]:
+                is_peak = False
+            if series.iloc[i] >= series.iloc[i - j] or series.iloc[i] >= series.iloc[i + j]:
+                is_valley = False
+        if is_peak and (not peaks or i - peaks[-1] >= min_distance):
+            peaks.append(i)
+        if is_valley and (not valleys or i - valleys[-1] >= min_distance):
+            valleys.append(i)
+    return peaks, valleys
+
+
+def loop_strict(data: np.ndarray, order: int, sign: int):
+    """VolumePriceAnalyzer原 _find_peaks/_find_troughs 实现 (sign=1为峰, -1为谷)"""
+    return [i for i in range(order, len(data) - order)
+            if all(sign * data[i] > sign * data[i - j] for j in range(1, order + 1))
+            and all(sign * data[i] > sign * data[i + j] for j in range(1, order + 1))]
+
+
+def loop_window_extreme(data: np.ndarray, window: int):
+    """SupportResistanceAnalyzer原局部高低点实现"""
+    highs, lows = [], []
+    for i in range(window, len(data) - window):
+        if data[i] == max(data[i - window:i + window + 1]):
+            highs.append(i)
+        if data[i] == min(data[i - window:i + window + 1]):
+            lows.append(i)
+    return highs, lows
+
+
+class TestDivergenceKernel:
+
+    def test_matches_loop(self):
+        for seed in range(4):
+            for plateaus in (False, True):
+                series = pd.Series(make_series(400, seed, plateaus=plateaus, nans=seed == 3))
+                for window, min_distance in ((5, 5), (3, 1), (2, 8)):
+                    peaks, valleys = find_extrema(series.to_numpy(), window, min_distance=min_distance,
+                                                  skip_nan=True)
+                    assert (peaks.tolist(), valleys.tolist()) == loop_divergence(series, window, min_distance)
+
+    def test_analyzer_uses_kernel(self):
+        series = pd.Series(make_series(300, 7))
+        analyzer = DivergenceAnalyzer(peak_valley_window=4, min_peak_distance=6)
+        peaks, valleys = analyzer._find_peaks_valleys(series)
+        assert (peaks, valleys) == loop_divergence(series, 4, 6)
+        assert all(isinstance(p, int) for p in peaks)
+
+
+class TestStrictExtrema:
+
+    def test_matches_loop(self):
+        for seed in range(4):
+            data = make_series(500, seed, plateaus=seed % 2 == 1, nans=seed >= 2)
+            for order in (1, 3, 6):
+                assert local_maxima(data, order).tolist() == loop_strict(data, order, 1)
+                assert local_minima(data, order).tolist() == loop_strict(data, order, -1)
+
+    def test_short_series(self):
+        assert len(local_maxima([1.0, 3.0, 2.0], 3)) == 0
+        assert local_maxima([1.0, 3.0, 2.0], 1).tolist() == [1]
+        assert local_minima([3.0, 1.0, 2.0], 0).tolist() == [0, 1, 2]
+
+
+class TestWindowExtrema:
+
+    def test_matches_loop(self):
+        for seed in range(4):
+            data = make_series(500, seed, plateaus=True)
+            highs = local_maxima(data, 5, strict=False).tolist()
+            lows = local_minima(data, 5, strict=False).tolist()
+            assert (highs, lows) == loop_window_extreme(data, 5)
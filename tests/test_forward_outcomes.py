@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+前瞻收益/回撤矩阵单元测试
+验证按位置取值与逐日切片实现结果一致, 以及矩阵缓存的重建条件
+"""
+
+import numpy as np
+import pandas as pd
+
+from strategies.position.market_analyzers.forward_outcomes import (
+    ForwardOutcomeMatrix, get_forward_outcomes
+)
+
+
+def make_bars(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-11-14', periods=n)
+    close = 3000 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    return pd.DataFrame({'close': close}, index=dates)
+
+
+def loop_future_returns(df, similar, periods):
+    """原逐日切片实现"""
+    results = []
+    for date in similar.index:
+        row = {'date': date, 'price': similar.loc[date, 'close']}
+        for period in periods:
+            future_data = df[df.index > date]
+            if len(future_data) >= period:
+                current = similar.loc[date, 'close']
+                row[f'return_{period}d'] = (future_data['close'].iloc[period - 1] - current) / current
+            else:
+                row[f'return_{period}d'] = np.nan
+        results.append(row)
+    return pd.DataFrame(results)
+
+
+def loop_drawdowns(df, similar, period):
+    drawdowns = []
+    for date in similar.index:
+        future_data = df[df.index > date]
+        if len(future_data) >= period:
+            prices = future_data['close'].iloc[:period]
+            cummax = prices.expanding().max()
+            drawdowns.append(((prices - cummax) / similar.loc[date, 'close']).min())
+    return np.array(drawdowns)
+
+
+def sample_similar(df, seed):
+    # 取历史中段和尾部(未来数据不足)的日期, 并加入一个非交易日
+    rng = np.random.default_rng(seed)
+    picks = np.sort(rng.choice(len(df), 80, replace=False))
+    similar = df.iloc[picks].copy()
+    weekend = pd.Timestamp('2024-06-08')
+    similar.loc[weekend] = df['close'].asof(weekend)
+    return similar.sort_index()
+
+
+class TestForwardOutcomeMatrix:
+
+    def test_future_returns_match_loop(self):
+        periods = [5, 10, 20, 30, 60]
+        for seed in (1, 2):
+            df = make_bars(700, seed)
+            similar = sample_similar(df, seed)
+
+            matrix = ForwardOutcomeMatrix(df, periods)
+            pd.testing.assert_frame_equal(
+                matrix.future_returns(similar, periods),
+                loop_future_returns(df, similar, periods)
+            )
+
+    def test_drawdowns_match_loop(self):
+        for seed in (3, 4):
+            df = make_bars(500, seed)
+            similar = sample_similar(df, seed)
+            matrix = ForwardOutcomeMatrix(df)
+
+            for period in (5, 20, 60):
+                expected = loop_drawdowns(df, similar, period)
+                stats = matrix.drawdown_stats(similar, period)
+                assert stats['max_dd'] == expected.min()
+                assert np.isclose(stats['avg_dd'], expected.mean())
+                assert stats['dd_prob'] == (expected < -0.05).sum() / len(expected)
+
+    def test_horizon_longer_than_history(self):
+        df = make_bars(10, 5)
+        matrix = ForwardOutcomeMatrix(df, [5, 60])
+
+        assert matrix.drawdown_stats(df, 60) == {'max_dd': 0.0, 'avg_dd': 0.0, 'dd_prob': 0.0}
+        assert matrix.future_returns(df, [60])['return_60d'].isna().all()
+
+    def test_forward_returns_per_bar(self):
+        df = make_bars(50, 6)
+        fwd = ForwardOutcomeMatrix(df, [5]).forward_returns()
+        expected = df['close'].shift(-5) / df['close'] - 1
+        np.testing.assert_allclose(fwd['return_5d'].values, expected.values)
+
+
+class TestMatrixCache:
+
+    def test_reused_for_same_frame(self):
+        df = make_bars(100, 7)
+        cache = {}
+        first = get_forward_outcomes(cache, 'SPX', df, [20])
+        assert get_forward_outcomes(cache, 'SPX', df, [5, 60]) is first
+
+    def test_rebuilt_for_new_frame_or_horizon(self):
+        df = make_bars(100, 7)
+        cache = {}
+        first = get_forward_outcomes(cache, 'SPX', df, [20])
+
+        second = get_forward_outcomes(cache, 'SPX', df, [90])
+        assert second is not first and second.covers([5, 20, 90])
+
+        refreshed = df.copy()
+        third = get_forward_outcomes(cache, 'SPX', refreshed, [20])
+        assert third is not second and third.source is refreshed
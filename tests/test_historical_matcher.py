@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HistoricalMatcher 单元测试
+验证向量化技术指标过滤与逐日重算结果一致
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data_sources.us_stock_source import USStockDataSource
+from strategies.position.analyzers.technical_analysis.historical_matcher import HistoricalMatcher
+
+
+def make_bars(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-11-14', periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    spread = np.abs(rng.normal(0, 0.008, n)) * close
+    return pd.DataFrame({
+        'open': close, 'high': close + spread, 'low': close - spread,
+        'close': close, 'volume': 1e6
+    }, index=dates)
+
+
+class TestVectorizedTechnicalFilter:
+
+    def setup_method(self):
+        self.matcher = HistoricalMatcher(USStockDataSource())
+
+    def test_matches_loop_result(self):
+        # 包含窗口不足250根(无MA250)和不足60根(跳过)的早期日期
+        for seed in (1, 2):
+            df = make_bars(600, seed)
+            kwargs = dict(tolerance=0.08, rsi_tolerance=20, percentile_tolerance=20)
+
+            loop = self.matcher.find_similar_periods_enhanced(df, vectorized=False, **kwargs)
+            vec = self.matcher.find_similar_periods_enhanced(df, vectorized=True, **kwargs)
+
+            assert list(loop.index) == list(vec.index)
+
+    def test_indicator_frame_matches_window_indicators(self):
+        df = make_bars(400, 3)
+        frame = self.matcher.get_indicator_frame(df)
+        source = USStockDataSource()
+
+        for pos in (59, 120, 249, 399):
+            window = df.iloc[:pos + 1].tail(HistoricalMatcher.TECH_WINDOW)
+            indicators = source.calculate_technical_indicators(window)
+            row = frame.iloc[pos]
+
+            assert abs(row['rsi'] - indicators['rsi']) < 1e-9
+            assert abs(row['dist_to_high_pct'] - indicators['dist_to_high_pct']) < 1e-9
+            assert row['ma_state'] == self.matcher._get_ma_state(indicators)
+
+    def test_indicator_frame_cached(self):
+        df = make_bars(300, 4)
+        assert self.matcher.get_indicator_frame(df) is self.matcher.get_indicator_frame(df)
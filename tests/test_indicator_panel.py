@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IndicatorPanel 单元测试
+验证面板指标与 TechnicalIndicators 一致, 以及增量追加与全量重算一致、并发访问只计算一次
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.trading.signal_generators.indicator_panel import (
+    IndicatorPanel, IndicatorPanelRegistry, panel_key
+)
+from strategies.trading.signal_generators.technical_indicators import TechnicalIndicators
+
+
+def make_bars(n: int, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-11-14', periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    spread = np.abs(rng.normal(0, 0.008, n)) * close
+    return pd.DataFrame({
+        'open': close, 'high': close + spread, 'low': close - spread,
+        'close': close, 'volume': 1e6
+    }, index=dates)
+
+
+ALL_INDICATORS = [
+    ('ma', {'period': 20}), ('ema', {}), ('macd', {}), ('rsi', {}),
+    ('kdj', {}), ('boll', {}), ('atr', {}), ('dmi_adx', {}),
+]
+
+
+class TestIndicatorPanel:
+
+    def test_matches_technical_indicators(self):
+        df = make_bars(300)
+        expected = TechnicalIndicators().calculate_all_indicators(df, ma_periods=[5, 20, 60])
+        panel = IndicatorPanel(df)
+
+        for name, params in [('ma', {'period': 5}), ('ma', {'period': 60}), ('macd', {}),
+                             ('rsi', {}), ('kdj', {}), ('boll', {}), ('atr', {}), ('dmi_adx', {})]:
+            frame = panel.series(name, **params)
+            for col in frame.columns:
+                pd.testing.assert_series_equal(frame[col], expected[col], check_names=False)
+
+    def test_series_memoized(self):
+        panel = IndicatorPanel(make_bars(100))
+        panel.series('macd')
+        panel.latest('macd')
+        panel.series('macd', fast_period=12)
+
+        assert panel.stats['computed'] == 1
+        assert panel.stats['hits'] == 2
+        assert '_ema_fast' not in panel.series('macd').columns
+
+    @pytest.mark.parametrize('new_bars', [1, 5])
+    def test_incremental_append_matches_full(self, new_bars):
+        df = make_bars(260, seed=2)
+        panel = IndicatorPanel(df.iloc[:-new_bars])
+        for name, params in ALL_INDICATORS:
+            panel.series(name, **params)
+
+        panel.append(df.iloc[-new_bars:])
+        full = IndicatorPanel(df)
+
+        assert panel.stats['incremental'] == len(ALL_INDICATORS)
+        for name, params in ALL_INDICATORS:
+            pd.testing.assert_frame_equal(
+                panel.series(name, **params), full.series(name, **params), rtol=1e-10
+            )
+
+    def test_append_during_warmup_recomputes(self):
+        df = make_bars(30, seed=3)
+        panel = IndicatorPanel(df.iloc[:12])
+        panel.series('ma', period=20)  # 12根K线时MA20尚未形成
+        panel.series('kdj')
+
+        panel.append(df.iloc[12:])
+        full = IndicatorPanel(df)
+
+        assert panel.stats['incremental'] == 1
+        pd.testing.assert_frame_equal(panel.series('ma', period=20), full.series('ma', period=20))
+        pd.testing.assert_frame_equal(panel.series('kdj'), full.series('kdj'), rtol=1e-10)
+
+    def test_concurrent_series_computed_once(self):
+        panel = IndicatorPanel(make_bars(500, seed=6))
+        start = threading.Barrier(8)
+
+        def worker():
+            start.wait()
+            panel.series('dmi_adx')
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert panel.stats['computed'] == 1
+        assert panel.stats['hits'] == 7
+
+    def test_unknown_indicator(self):
+        with pytest.raises(ValueError):
+            IndicatorPanel(make_bars(30)).series('cci')
+
+
+class TestIndicatorPanelRegistry:
+
+    def test_reuse_and_incremental(self):
+        registry = IndicatorPanelRegistry()
+        df = make_bars(200, seed=4)
+
+        panel = registry.get('SPX', df.iloc[:-1])
+        rsi = panel.series('rsi')
+
+        assert registry.get('SPX', df.iloc[:-1]) is panel
+        extended = registry.get('SPX', df)
+        assert extended.last_date == df.index[-1]
+        assert extended.stats['incremental'] == 1
+        assert registry.get('SPX', df) is extended
+        # 已持有的面板不随新K线变长
+        assert panel.last_date == df.index[-2]
+        pd.testing.assert_frame_equal(panel.series('rsi'), rsi)
+
+    def test_prefix_and_windows(self):
+        registry = IndicatorPanelRegistry()
+        df = make_bars(300, seed=6)
+
+        full = registry.get('SPX', df)
+        full.series('macd')
+        # 同起点的较短K线: 返回截取的面板, 长度与调用方一致
+        head = registry.get('SPX', df.iloc[:200])
+        assert len(head.data) == 200
+        pd.testing.assert_frame_equal(head.series('macd'), IndicatorPanel(df.iloc[:200]).series('macd'))
+        assert registry.get('SPX', df) is full
+
+        # 不同回溯窗口(起点不同)各自保留, 交替请求不互相淘汰
+        recent = registry.get('SPX', df.iloc[-100:])
+        assert registry.get('SPX', df) is full
+        assert registry.get('SPX', df.iloc[-100:]) is recent
+
+    def test_rebuild_on_different_history(self):
+        registry = IndicatorPanelRegistry()
+        df = make_bars(200, seed=5)
+
+        panel = registry.get('SPX', df)
+        adjusted = df.copy()
+        adjusted['close'] *= 0.98  # 复权后历史变化
+
+        assert registry.get('SPX', adjusted) is not panel
+        assert registry.get('NDX', df) is not panel
+
+    def test_panel_key_shared_across_callers(self):
+        # 资产报告 (market='US') 与美股分析器 (固定 'US') 得到同一个键
+        assert panel_key('US', 'SPX') == panel_key('us', 'SPX') == 'US:SPX'
+
+
+def test_technical_analyzer_panel_matches_direct():
+    # russ_trading.analyzers 包初始化时导入 efinance
+    pytest.importorskip('efinance')
+    from russ_trading.analyzers.technical_analyzer import TechnicalAnalyzer
+
+    bars = make_bars(120, seed=7)
+    df = bars.rename(columns={'open': '开盘', 'high': '最高', 'low': '最低', 'close': '收盘', 'volume': '成交量'})
+    df = df.rename_axis('日期').reset_index()
+    analyzer = TechnicalAnalyzer()
+
+    direct = analyzer.analyze_index('HSTECH', df.copy())
+    shared = analyzer.analyze_index('HSTECH', df.copy(), panel_key=panel_key('HK', 'HSTECH'))
+    assert shared == direct
+    assert analyzer.get_enhanced_signals(df.copy(), panel_key=panel_key('HK', 'HSTECH')) == \
+        analyzer.get_enhanced_signals(df.copy())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存缓存层单元测试
+验证字节预算LRU淘汰、TTL过期和统计计数
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.utils.memory_cache import MemoryCache, estimate_size
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'close': np.arange(rows, dtype=float),
+        'name': ['x' * 10] * rows,
+    })
+
+
+class TestEstimateSize:
+    """测试对象大小估算"""
+
+    def test_dataframe_uses_deep_memory_usage(self):
+        df = _frame(1000)
+        assert estimate_size(df) == int(df.memory_usage(deep=True).sum())
+
+    def test_ndarray_uses_nbytes(self):
+        arr = np.zeros(1000)
+        assert estimate_size(arr) == arr.nbytes
+
+    def test_container_includes_elements(self):
+        df = _frame(1000)
+        assert estimate_size({'df': df}) > estimate_size(df)
+
+
+class TestMemoryCache:
+    """测试LRU淘汰与过期"""
+
+    def test_lru_eviction_by_bytes(self):
+        cache = MemoryCache(max_bytes=250)
+        cache.set('a', 'a', size=100)
+        cache.set('b', 'b', size=100)
+        assert cache.get('a') == 'a'  # a变为最近使用
+
+        cache.set('c', 'c', size=100)
+
+        assert cache.keys() == ['a', 'c']
+        assert cache.current_bytes == 200
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_max_entries(self):
+        cache = MemoryCache(max_bytes=None, max_entries=2)
+        for key in 'abc':
+            cache.set(key, key)
+        assert cache.keys() == ['b', 'c']
+
+    def test_oversized_entry_rejected(self):
+        cache = MemoryCache(max_bytes=100)
+        cache.set('small', 1, size=50)
+        assert cache.set('big', 2, size=500) is False
+        assert 'small' in cache
+        assert cache.get_stats()['rejections'] == 1
+
+    def test_overwrite_updates_bytes(self):
+        cache = MemoryCache(max_bytes=1000)
+        cache.set('k', 1, size=300)
+        cache.set('k', 2, size=100)
+        assert cache.current_bytes == 100
+        assert cache.get('k') == 2
+
+    def test_ttl_and_max_age(self):
+        cache = MemoryCache()
+        cache.set('ttl', 1, ttl=0.05)
+        cache.set('age', 2)
+        time.sleep(0.1)
+
+        assert cache.get('ttl') is None
+        assert cache.get('age', max_age=0.05) is None
+        assert cache.current_bytes == 0
+
+        stats = cache.get_stats()
+        assert stats['expirations'] == 2
+        assert stats['misses'] == 2
+
+    def test_purge_expired(self):
+        cache = MemoryCache()
+        cache.set('a', 1, ttl=0.01)
+        cache.set('b', 2)
+        time.sleep(0.05)
+        assert cache.purge_expired() == 1
+        assert cache.keys() == ['b']
+
+    def test_hit_rate(self):
+        cache = MemoryCache()
+        cache.set('k', 1)
+        cache.get('k')
+        cache.get('missing')
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['hit_rate'] == 0.5
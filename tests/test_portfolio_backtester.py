@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+组合回测引擎单元测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from russ_trading.engines.backtest_engine_enhanced import BacktestConfig
+from russ_trading.engines.portfolio_backtester import PortfolioBacktester
+
+
+def make_prices(n: int = 250, n_assets: int = 4) -> pd.DataFrame:
+    rng = np.random.default_rng(21)
+    dates = pd.bdate_range('2024-01-02', periods=n)
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (n, n_assets)), axis=0)),
+        index=dates, columns=[f'S{i}' for i in range(n_assets)]
+    )
+
+
+def reference_equity(prices: pd.DataFrame, weights: pd.DataFrame, config: BacktestConfig) -> list:
+    """逐日循环的参考实现"""
+    cost_rate = config.commission + config.slippage
+    cash, shares, equity = config.initial_capital, np.zeros(prices.shape[1]), []
+    for date, row in prices.iterrows():
+        price = row.values
+        if date in weights.index and weights.loc[date].notna().any():
+            value = cash + (price * shares).sum()
+            target = weights.loc[date].fillna(0).values
+            cost = np.abs(target - price * shares / value).sum() * value * cost_rate
+            shares = target * (value - cost) / price
+            cash = value - cost - (price * shares).sum()
+        equity.append(cash + (price * shares).sum())
+    return equity
+
+
+class TestPortfolioBacktester:
+
+    def test_buy_and_hold_without_costs(self):
+        prices = make_prices(n_assets=1)
+        config = BacktestConfig(initial_capital=1000, commission=0, slippage=0, max_position=1.0)
+        weights = pd.DataFrame({'S0': [1.0]}, index=prices.index[:1])
+
+        result = PortfolioBacktester(config).run(prices, weights)
+        expected = 1000 * prices['S0'] / prices['S0'].iloc[0]
+
+        np.testing.assert_allclose(result['equity_curve'].values, expected.values)
+        assert result['rebalance_count'] == 1
+
+    def test_matches_reference_loop_with_costs(self):
+        prices = make_prices()
+        rng = np.random.default_rng(5)
+        monthly = prices.index[::21]
+        raw = rng.uniform(0, 1, (len(monthly), prices.shape[1]))
+        weights = pd.DataFrame(raw / raw.sum(axis=1, keepdims=True) * 0.9, index=monthly, columns=prices.columns)
+        config = BacktestConfig(initial_capital=100000, commission=0.001, slippage=0.0005)
+
+        result = PortfolioBacktester(config).run(prices, weights)
+
+        np.testing.assert_allclose(result['equity_curve'].values, reference_equity(prices, weights, config))
+        assert result['total_costs'] > 0
+        assert result['rebalance_dates'] == list(monthly)
+
+    def test_weights_capped_by_max_position(self):
+        prices = make_prices(n_assets=2)
+        weights = pd.DataFrame({'S0': [0.8], 'S1': [0.8]}, index=prices.index[:1])
+        result = PortfolioBacktester(BacktestConfig(max_position=0.8)).run(prices, weights)
+
+        assert result['weights'].iloc[0].sum() == pytest.approx(0.8, rel=1e-3)
+
+    def test_rebalance_threshold_skips_small_drift(self):
+        prices = make_prices(n_assets=2)
+        weights = pd.DataFrame(0.45, index=prices.index, columns=prices.columns)
+
+        daily = PortfolioBacktester().run(prices, weights)
+        banded = PortfolioBacktester().run(prices, weights, rebalance_threshold=0.05)
+
+        assert daily['rebalance_count'] == len(prices)
+        assert banded['rebalance_count'] < daily['rebalance_count']
+        assert banded['total_costs'] < daily['total_costs']
+
+    def test_unlisted_asset_not_bought(self):
+        prices = make_prices(n_assets=2)
+        prices.iloc[:20, 1] = np.nan
+        weights = pd.DataFrame({'S0': [0.5], 'S1': [0.5]}, index=prices.index[:1])
+
+        result = PortfolioBacktester().run(prices, weights)
+        assert (result['weights']['S1'] == 0).all()
+        assert not result['equity_curve'].isna().any()
+
+    def test_base_swing_weights(self):
+        dates = pd.bdate_range('2024-01-02', periods=5)
+        signals = pd.DataFrame({'A': [0, 1, 1, 0, 0], 'B': [1, 1, 1, 1, 1]}, index=dates)
+        weights = PortfolioBacktester.build_base_swing_weights(
+            signals, base_weights={'A': 0.3, 'B': 0.2}, swing_weights={'A': 0.2, 'B': 0.1}
+        )
+
+        rebalance = weights.dropna()
+        assert list(rebalance.index) == [dates[0], dates[1], dates[3]]
+        assert rebalance.loc[dates[1], 'A'] == pytest.approx(0.5)
+        assert rebalance.loc[dates[3], 'A'] == pytest.approx(0.3)
+        assert rebalance.loc[dates[0], 'B'] == pytest.approx(0.3)
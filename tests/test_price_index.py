@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格排序索引与日期位图单元测试
+验证二分查找区间与布尔掩码筛选一致, 多指数位图联合匹配与逐日集合判断一致
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from strategies.position.core.historical_position_analyzer import HistoricalPositionAnalyzer
+from strategies.position.core.price_index import (
+    DateBitmap, SortedPriceIndex, get_price_index, select_price_band
+)
+
+
+def make_bars(n: int, seed: int, end: str = '2025-11-14') -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=end, periods=n)
+    close = 3000 * np.exp(np.cumsum(rng.normal(0, 0.012, n)))
+    return pd.DataFrame({'close': close, 'volume': 1e6}, index=dates)
+
+
+def mask_select(df, current_price, tolerance, min_gap_days=5):
+    """原布尔掩码实现"""
+    lower = current_price * (1 - tolerance)
+    upper = current_price * (1 + tolerance)
+    similar = df[(df['close'] >= lower) & (df['close'] <= upper)].copy()
+    return similar[similar.index <= df.index[-1] - timedelta(days=min_gap_days)]
+
+
+def set_match(similar_by_index, min_match_count):
+    """原逐日集合判断实现"""
+    sets = {code: set(similar.index) for code, similar in similar_by_index.items()}
+    rows = []
+    for date in sorted(set().union(*sets.values())):
+        matched = [code for code, dates in sets.items() if date in dates]
+        if len(matched) >= min_match_count:
+            rows.append({'date': date, 'match_count': len(matched), 'matched_indices': ','.join(matched)})
+    return pd.DataFrame(rows)
+
+
+class TestSortedPriceIndex:
+
+    def test_band_matches_mask(self):
+        df = make_bars(1500, 1)
+        df.iloc[100, 0] = np.nan
+        cache = {}
+        for tolerance in (0.01, 0.05, 0.2):
+            for price in (df['close'].iloc[-1], df['close'].median(), 1.0):
+                similar, _, _ = select_price_band(cache, 'SSE', df, price, tolerance)
+                pd.testing.assert_frame_equal(similar, mask_select(df, price, tolerance), check_freq=False)
+
+    def test_boundaries_inclusive(self):
+        df = pd.DataFrame({'close': [100.0, 95.0, 105.0, 94.99]},
+                          index=pd.bdate_range('2025-01-01', periods=4))
+        positions = SortedPriceIndex(df).band_positions(95.0, 105.0)
+        assert list(positions) == [0, 1, 2]
+        assert SortedPriceIndex(df).count_in_band(95.0, 105.0) == 3
+
+    def test_rebuilt_when_data_changes(self):
+        df = make_bars(300, 2)
+        cache = {}
+        first = get_price_index(cache, 'SSE', df)
+        assert get_price_index(cache, 'SSE', df.copy()) is first
+        assert get_price_index(cache, 'SSE', make_bars(301, 2)) is not first
+
+
+class TestDateBitmap:
+
+    def test_matches_set_join(self):
+        # 不同交易日历: 部分指数缺少某些日期
+        frames = {
+            'sh000001': make_bars(800, 3),
+            'sh000300': make_bars(800, 4).drop(pd.bdate_range('2024-05-01', '2024-05-10')),
+            'sz399006': make_bars(600, 5),
+            'sh000688': make_bars(800, 6, end='2025-11-13'),
+        }
+        cache = {}
+        for tolerance in (0.03, 0.1):
+            similar = {}
+            matches = {}
+            for code, df in frames.items():
+                price = df['close'].iloc[-1]
+                similar[code] = mask_select(df, price, tolerance)
+                lower, upper = price * (1 - tolerance), price * (1 + tolerance)
+                matches[code] = get_price_index(cache, code, df).band_positions(
+                    lower, upper, df.index[-1] - timedelta(days=5)
+                )
+
+            bitmap = DateBitmap({code: df.index for code, df in frames.items()})
+            for min_count in (1, 2, 3):
+                expected = set_match(similar, min_count)
+                result = bitmap.match(matches, min_count)
+                if expected.empty:
+                    assert result.empty
+                else:
+                    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_no_match_returns_empty(self):
+        df = make_bars(50, 7)
+        bitmap = DateBitmap({'a': df.index, 'b': df.index})
+        assert bitmap.match({'a': np.array([1, 2]), 'b': np.array([3])}, 2).empty
+
+
+class TestMultiIndexMatch:
+
+    def test_analyzer_matches_reference(self):
+        frames = {code: make_bars(700, seed) for seed, code in enumerate(['sh000001', 'sh000300', 'sz399006'])}
+        analyzer = HistoricalPositionAnalyzer(cache_enabled=False)
+        analyzer.get_index_data = lambda code: frames[code].copy()
+
+        positions = {code: {'price': df['close'].iloc[-1]} for code, df in frames.items()}
+        result = analyzer.find_multi_index_match(positions, tolerance=0.08, min_match_count=2)
+
+        expected = set_match({code: mask_select(df, positions[code]['price'], 0.08)
+                              for code, df in frames.items()}, 2)
+        if expected.empty:
+            assert result.empty
+        else:
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+        # 容差扫描复用同一位图
+        analyzer.find_multi_index_match(positions, tolerance=0.03, min_match_count=2)
+        assert len(analyzer._date_bitmaps) == 1
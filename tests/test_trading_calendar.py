@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交易日历单元测试
+验证节假日/半日市处理与按收盘计算的缓存过期时间
+"""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from src.utils.trading_calendar import TradingCalendar
+
+CN_TZ = ZoneInfo('Asia/Shanghai')
+NY_TZ = ZoneInfo('America/New_York')
+
+
+class TestTradingDays:
+
+    def setup_method(self):
+        self.calendar = TradingCalendar()
+
+    def test_holidays_and_weekends(self):
+        assert not self.calendar.is_trading_day('cn', date(2025, 10, 1))
+        assert not self.calendar.is_trading_day('cn', date(2025, 11, 15))
+        assert self.calendar.is_trading_day('cn', date(2025, 11, 17))
+        assert not self.calendar.is_trading_day('us', date(2025, 11, 27))
+        assert self.calendar.is_trading_day('crypto', date(2025, 11, 15))
+
+    def test_last_completed_session_skips_holiday(self):
+        # 国庆假期中 -> 节前最后一个交易日
+        assert self.calendar.last_completed_session('cn', datetime(2025, 10, 5, 10, 0, tzinfo=CN_TZ)) == date(2025, 9, 30)
+        # 节后首日收盘前仍为节前交易日
+        assert self.calendar.last_completed_session('cn', datetime(2025, 10, 9, 10, 0, tzinfo=CN_TZ)) == date(2025, 9, 30)
+
+    def test_early_close(self):
+        # 感恩节次日13:00收盘
+        assert not self.calendar.is_in_session('us', datetime(2025, 11, 28, 14, 0, tzinfo=NY_TZ))
+        assert self.calendar.last_completed_session('us', datetime(2025, 11, 28, 14, 0, tzinfo=NY_TZ)) == date(2025, 11, 28)
+
+
+class TestExpiry:
+
+    def setup_method(self):
+        self.calendar = TradingCalendar()
+
+    def test_weekend_entry_lives_until_next_close(self):
+        saturday = datetime(2025, 11, 15, 10, 0, tzinfo=CN_TZ)
+        expire = datetime.fromtimestamp(self.calendar.expire_at('cn', saturday), CN_TZ)
+        assert expire == datetime(2025, 11, 17, 15, 15, tzinfo=CN_TZ)
+
+    def test_holiday_entry_lives_until_first_close_after(self):
+        during_holiday = datetime(2025, 10, 1, 10, 0, tzinfo=CN_TZ)
+        expire = datetime.fromtimestamp(self.calendar.expire_at('cn', during_holiday), CN_TZ)
+        assert expire == datetime(2025, 10, 9, 15, 15, tzinfo=CN_TZ)
+
+    def test_just_after_close_waits_for_publish_delay(self):
+        # 15:05写入的条目可能仍是收盘前数据, 15:15即过期
+        after_close = datetime(2025, 11, 17, 15, 5, tzinfo=CN_TZ)
+        expire = datetime.fromtimestamp(self.calendar.expire_at('cn', after_close), CN_TZ)
+        assert expire == datetime(2025, 11, 17, 15, 15, tzinfo=CN_TZ)
+
+    def test_intraday_ttl_applies_in_session(self):
+        morning = datetime(2025, 11, 17, 10, 0, tzinfo=CN_TZ)
+        assert self.calendar.ttl('cn', morning, intraday_ttl=300) == 300
+        assert self.calendar.ttl('cn', morning) == 5 * 3600 + 15 * 60
+
+    def test_pre_open_entry_capped_at_open(self):
+        # 开盘前写入的条目在 开盘 + intraday_ttl 过期, 不会沿用整个交易时段
+        hk_tz = ZoneInfo('Asia/Hong_Kong')
+        assert self.calendar.ttl('hk', datetime(2025, 11, 17, 9, 0, tzinfo=hk_tz), intraday_ttl=300) == 30 * 60 + 300
+        assert self.calendar.ttl('cn', datetime(2025, 11, 17, 9, 20, tzinfo=CN_TZ), intraday_ttl=300) == 10 * 60 + 300
+        assert self.calendar.ttl('us', datetime(2025, 11, 17, 9, 0, tzinfo=NY_TZ), intraday_ttl=300) == 30 * 60 + 300
+
+    def test_weekend_entry_capped_at_next_open(self):
+        saturday = datetime(2025, 11, 15, 10, 0, tzinfo=CN_TZ)
+        expire = datetime.fromtimestamp(self.calendar.expire_at('cn', saturday, intraday_ttl=300), CN_TZ)
+        assert expire == datetime(2025, 11, 17, 9, 35, tzinfo=CN_TZ)
+
+    def test_publish_delay_window_not_capped(self):
+        after_close = datetime(2025, 11, 17, 15, 5, tzinfo=CN_TZ)
+        expire = datetime.fromtimestamp(self.calendar.expire_at('cn', after_close, intraday_ttl=300), CN_TZ)
+        assert expire == datetime(2025, 11, 17, 15, 15, tzinfo=CN_TZ)
+
+    def test_crypto_rolls_at_utc_midnight(self):
+        now = datetime(2025, 11, 15, 23, 0, tzinfo=ZoneInfo('UTC'))
+        assert self.calendar.ttl('crypto', now) == 3600 + 5 * 60
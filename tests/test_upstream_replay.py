@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上游调用录制/回放单元测试
+验证录制后离线回放、日期参数归一化、未命中与录制异常、嵌套调用和卸载恢复
+"""
+
+import types
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from src.utils.upstream_replay import (
+    FixtureStore, MODE_RECORD, MODE_REPLAY, RecordedUpstreamError,
+    ReplayMissError, UpstreamRecorder, call_key, http_key_args
+)
+
+
+def make_provider(calls):
+    """模拟akshare风格的数据源模块"""
+    module = types.ModuleType('fake_provider')
+
+    def stock_zh_index_daily(symbol, start_date=None):
+        calls.append(symbol)
+        return pd.DataFrame({'close': [1.0, 2.0, 3.0]},
+                            index=pd.bdate_range('2025-11-10', periods=3, name='date'))
+
+    def stock_info(symbol):
+        calls.append(symbol)
+        if symbol == 'bad':
+            raise ValueError('接口返回为空')
+        return {'symbol': symbol, 'name': '贵州茅台'}
+
+    def outer(symbol):
+        calls.append('outer')
+        return module.stock_info(symbol)
+
+    module.stock_zh_index_daily = stock_zh_index_daily
+    module.stock_info = stock_info
+    module.outer = outer
+    return module
+
+
+def recorder_for(module, mode, root):
+    recorder = UpstreamRecorder(mode, FixtureStore(root))
+    recorder.wrap_module(module, 'fake')
+    return recorder
+
+
+class TestCallKey:
+
+    def test_dates_normalized(self):
+        # 录制与回放相隔30天, 参数都按各自运行日期计算
+        today = datetime(2025, 11, 14)
+        later = today + timedelta(days=30)
+        start, later_start = today - timedelta(days=1826), later - timedelta(days=1826)
+        assert call_key('ak', 'f', ['sh000001'], {'start_date': start.strftime('%Y%m%d')}, today.date())[0] == \
+            call_key('ak', 'f', ['sh000001'], {'start_date': later_start.strftime('%Y%m%d')}, later.date())[0]
+        assert call_key('ak', 'f', [today], {}, today.date())[0] == call_key('ak', 'f', [later], {}, later.date())[0]
+        assert call_key('http', 'get', [f'https://x/q?_={int(today.timestamp() * 1000)}'], {}, today.date())[0] == \
+            call_key('http', 'get', [f'https://x/q?_={int(later.timestamp() * 1000)}'], {}, later.date())[0]
+
+    def test_windows_distinguished(self):
+        # 同一运行日期下回溯窗口不同的调用不共用夹具
+        run_date = datetime(2025, 10, 16).date()
+        _, five_years = call_key('ak', 'stock_zh_index_daily_em',
+                                 [], {'symbol': 'sh000300', 'start_date': '20201016'}, run_date)
+        key_1y, one_year = call_key('ak', 'stock_zh_index_daily_em',
+                                    [], {'symbol': 'sh000300', 'start_date': '20241016'}, run_date)
+        assert '<date-1826d>' in five_years and '<date-365d>' in one_year
+        assert call_key('ak', 'stock_zh_index_daily_em',
+                        [], {'symbol': 'sh000300', 'start_date': '20201016'}, run_date)[0] != key_1y
+
+    def test_symbols_distinguished(self):
+        assert call_key('ak', 'f', ['sh000001'], {})[0] != call_key('ak', 'f', ['sz399006'], {})[0]
+
+
+class TestRecordReplay:
+
+    def test_replay_without_calling_upstream(self, tmp_path):
+        calls = []
+        module = make_provider(calls)
+        with recorder_for(module, MODE_RECORD, tmp_path) as recorder:
+            recorded = module.stock_zh_index_daily('sh000001', start_date='20251101')
+            assert module.stock_info('600519')['name'] == '贵州茅台'
+        assert recorder.get_stats()['recorded'] == 2
+
+        calls.clear()
+        with recorder_for(module, MODE_REPLAY, tmp_path) as recorder:
+            replayed = module.stock_zh_index_daily('sh000001', start_date='20251201')
+            assert module.stock_info('600519') == {'symbol': '600519', 'name': '贵州茅台'}
+
+        assert calls == []
+        pd.testing.assert_frame_equal(replayed, recorded)
+        assert recorder.get_stats()['replayed'] == 2
+        assert (tmp_path / 'manifest.jsonl').exists()
+
+    def test_miss_raises(self, tmp_path):
+        module = make_provider([])
+        with recorder_for(module, MODE_REPLAY, tmp_path) as recorder:
+            with pytest.raises(ReplayMissError):
+                module.stock_info('000001')
+        assert recorder.get_stats()['misses'] == 1
+        assert '000001' in recorder.missed[0]
+
+    def test_upstream_error_replayed(self, tmp_path):
+        module = make_provider([])
+        with recorder_for(module, MODE_RECORD, tmp_path):
+            with pytest.raises(ValueError):
+                module.stock_info('bad')
+
+        with recorder_for(module, MODE_REPLAY, tmp_path):
+            with pytest.raises(RecordedUpstreamError, match='接口返回为空'):
+                module.stock_info('bad')
+
+    def test_nested_calls_recorded_once(self, tmp_path):
+        calls = []
+        module = make_provider(calls)
+        with recorder_for(module, MODE_RECORD, tmp_path) as recorder:
+            module.outer('600519')
+        assert recorder.get_stats()['recorded'] == 1
+
+        calls.clear()
+        with recorder_for(module, MODE_REPLAY, tmp_path):
+            assert module.outer('600519')['symbol'] == '600519'
+        assert calls == []
+
+
+class TestHttpReplay:
+
+    def make_session(self, calls):
+        class Session:
+            def request(self, method, url, params=None, **kwargs):
+                calls.append(url)
+                return {'url': url, 'params': params}
+
+        return Session
+
+    def test_urls_distinguished(self, tmp_path):
+        calls = []
+        session_cls = self.make_session(calls)
+        urls = ['http://qt.gtimg.cn/q=sh000001', 'http://qt.gtimg.cn/q=sz399006']
+
+        recorder = UpstreamRecorder(MODE_RECORD, FixtureStore(tmp_path))
+        recorder.wrap_http(session_cls, encode=dict, decode=dict)
+        # requests.get(url) 以关键字形式调用 Session.request
+        for url in urls:
+            session_cls().request(method='get', url=url)
+        session_cls().request('GET', urls[0], {'_': 1})
+        recorder.uninstall()
+        assert recorder.get_stats()['recorded'] == 3
+
+        calls.clear()
+        recorder = UpstreamRecorder(MODE_REPLAY, FixtureStore(tmp_path))
+        recorder.wrap_http(session_cls, encode=dict, decode=dict)
+        for url in urls:
+            assert session_cls().request(method='GET', url=url)['url'] == url
+        assert session_cls().request('get', url=urls[0], params={'_': 1})['params'] == {'_': 1}
+        with pytest.raises(ReplayMissError):
+            session_cls().request(method='POST', url=urls[0])
+        recorder.uninstall()
+        assert calls == []
+
+    def test_dates_in_url_normalized(self):
+        first = http_key_args((), {'method': 'get', 'url': 'https://x/kline?end=20251114'})
+        second = http_key_args(('GET', 'https://x/kline?end=20251212'), {})
+        assert call_key('http', 'Session.request', *first, run_date=datetime(2025, 11, 14).date()) == \
+            call_key('http', 'Session.request', *second, run_date=datetime(2025, 12, 12).date())
+
+
+class TestInstall:
+
+    def test_uninstall_restores_functions(self, tmp_path):
+        module = make_provider([])
+        original = module.stock_info
+        recorder = recorder_for(module, MODE_RECORD, tmp_path)
+        assert module.stock_info is not original
+        recorder.uninstall()
+        assert module.stock_info is original
+
+    def test_inherited_method_restored(self, tmp_path):
+        class Base:
+            def history(self, period='1y'):
+                return period
+
+        class Ticker(Base):
+            ticker = '^GSPC'
+
+        recorder = UpstreamRecorder(MODE_RECORD, FixtureStore(tmp_path))
+        recorder.wrap_method(Ticker, 'history', 'yf', identity=lambda t: t.ticker)
+        assert Ticker().history(period='5y') == '5y'
+        recorder.uninstall()
+
+        assert 'history' not in Ticker.__dict__
+
+    def test_invalid_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            UpstreamRecorder('live', FixtureStore(tmp_path))
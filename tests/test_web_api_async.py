@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web API 异步调度单元测试
+验证重型接口在工作线程中执行, 不阻塞健康检查; 以及分组并发/超时限制
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from web.api import main
+
+
+class SlowAnalyzer:
+    """模拟耗时的同步分析器"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    def get_current_positions(self, indices):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {code: {'price': 100.0} for code in indices}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'analyzer', SlowAnalyzer(1.0))
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_health_responds_during_slow_request(client):
+    slow_response = {}
+
+    def slow_request():
+        slow_response['r'] = client.get('/api/current-positions', params={'indices': ['SPX']})
+
+    worker = threading.Thread(target=slow_request)
+    worker.start()
+    time.sleep(0.2)
+
+    start = time.perf_counter()
+    health = client.get('/api/health')
+    elapsed = time.perf_counter() - start
+    worker.join()
+
+    assert health.status_code == 200
+    assert elapsed < 0.5
+    assert slow_response['r'].status_code == 200
+    assert slow_response['r'].json()['data'] == {'SPX': {'price': 100.0}}
+
+
+def test_timeout_returns_504(client, monkeypatch):
+    monkeypatch.setitem(main.ENDPOINT_LIMITS, 'positions', (1, 0.2))
+
+    response = client.get('/api/current-positions', params={'indices': ['SPX']})
+
+    assert response.status_code == 504
+
+
+def test_concurrency_limit_returns_503_when_queue_wait_exceeds_timeout(client, monkeypatch):
+    monkeypatch.setitem(main.ENDPOINT_LIMITS, 'positions', (1, 0.3))
+
+    # 第一个请求超时后后台任务仍占用名额, 第二个请求排队超时
+    first = client.get('/api/current-positions', params={'indices': ['SPX']})
+    second = client.get('/api/current-positions', params={'indices': ['SPX']})
+
+    assert first.status_code == 504
+    assert second.status_code == 503
+    assert main.analyzer.calls == 1
+
+
+def test_queue_wait_counts_against_timeout(client, monkeypatch):
+    monkeypatch.setitem(main.ENDPOINT_LIMITS, 'positions', (1, 0.7))
+    main.analyzer.delay = 0.5
+    responses = {}
+
+    def first_request():
+        responses['first'] = client.get('/api/current-positions', params={'indices': ['SPX']})
+
+    worker = threading.Thread(target=first_request)
+    worker.start()
+    time.sleep(0.1)
+
+    # 排队约0.4秒后只剩约0.3秒执行时间, 不足以完成0.5秒的任务
+    start = time.perf_counter()
+    second = client.get('/api/current-positions', params={'indices': ['SPX']})
+    elapsed = time.perf_counter() - start
+    worker.join()
+
+    assert responses['first'].status_code == 200
+    assert second.status_code == 504
+    assert elapsed < 0.9
+
+
+def test_bad_request_not_rewrapped_as_500(client):
+    response = client.post('/api/analyze/single', params={'index_code': 'UNKNOWN'})
+    assert response.status_code == 400
+
+
+def test_backtest_runs_in_process_pool(client, monkeypatch):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2023-01-02', periods=300)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, 300)))
+    df = pd.DataFrame({
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close, 'volume': 1e6
+    }, index=dates)
+    monkeypatch.setattr(main, 'fetch_history', lambda symbol, period: df)
+
+    response = client.post('/api/backtest/run', params={'index_code': 'SPY', 'days': 300})
+
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert len(data['equity_curve']) == len(df)
+    assert data['config']['index_name'] == 'SPY'
+
+
+class TestMarketDataBroadcast:
+
+    def test_compute_delta(self):
+        old = {'sentiment': {'score': 50, 'rating': '中性'}, 'indices': {'^GSPC': {'price': 1}, '^VIX': {'price': 2}}}
+        new = {'sentiment': {'score': 55, 'rating': '中性'}, 'indices': {'^GSPC': {'price': 1}}}
+
+        assert main.compute_delta(old, new) == {'sentiment': {'score': 55}, 'indices': {'^VIX': None}}
+        assert main.compute_delta(new, new) == {}
+
+    def test_single_producer_sends_full_then_delta(self, monkeypatch):
+        calls = []
+
+        def fake_snapshot():
+            calls.append(1)
+            return {
+                'sentiment': {'score': 50, 'rating': '中性', 'emoji': ''},
+                'indices': {'^GSPC': {'name': '标普500', 'price': 5000 + len(calls)}}
+            }
+
+        monkeypatch.setattr(main, 'build_market_snapshot', fake_snapshot)
+        monkeypatch.setattr(main.market_data_producer, 'interval', 0.05)
+        monkeypatch.setattr(main.market_data_producer, 'snapshot', None)
+        monkeypatch.setattr(main.manager, 'latest_snapshot', None)
+        start_seq = main.market_data_producer.seq
+
+        with TestClient(main.app) as client:
+            with client.websocket_connect('/ws/market-data') as first, \
+                    client.websocket_connect('/ws/market-data') as second:
+                full = first.receive_json()
+                delta = first.receive_json()
+                second_messages = [second.receive_json() for _ in range(2)]
+
+        assert full['type'] == 'market_data'
+        assert full['data']['sentiment']['score'] == 50
+        assert delta['type'] == 'market_data_delta'
+        assert delta['data'] == {'indices': {'^GSPC': {'price': full['data']['indices']['^GSPC']['price'] + 1}}}
+        assert second_messages[0]['type'] == 'market_data'
+        assert second_messages[1]['type'] == 'market_data_delta'
+        # 两个连接共享同一生产者, 每个周期只获取一次快照
+        assert len(calls) <= main.market_data_producer.seq - start_seq + 1
+
+    def test_slow_client_resynced_then_dropped(self, monkeypatch):
+        monkeypatch.setattr(main, 'CLIENT_MAX_OVERFLOWS', 2)
+
+        class BlockedWebSocket:
+            def __init__(self):
+                self.closed_with = None
+
+            async def accept(self):
+                pass
+
+            async def send_text(self, message):
+                await asyncio.sleep(3600)
+
+            async def close(self, code=1000):
+                self.closed_with = code
+
+        async def scenario():
+            manager = main.ConnectionManager()
+            websocket = BlockedWebSocket()
+            await manager.connect(websocket)
+            client = manager.clients[websocket]
+            await asyncio.sleep(0)
+
+            for i in range(main.CLIENT_QUEUE_SIZE + 1):
+                await manager.broadcast(f'delta-{i}', snapshot='full')
+            queued = [client.queue.get_nowait() for _ in range(client.queue.qsize())]
+
+            for i in range(main.CLIENT_QUEUE_SIZE + 1):
+                await manager.broadcast(f'delta-{i}', snapshot='full')
+            return manager, websocket, queued
+
+        manager, websocket, queued = asyncio.run(scenario())
+
+        # 第一次溢出: 积压增量被丢弃, 改发全量快照
+        assert queued == ['full']
+        # 连续溢出达到上限后断开
+        assert websocket.closed_with == 1013
+        assert not manager.clients
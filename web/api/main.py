@@ -8,8 +8,12 @@
 from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import functools
+import logging
 import sys
 import os
 import asyncio
@@ -24,11 +28,136 @@ from strategies.position.market_analyzers.us_market_analyzer import (
     DEFAULT_US_INDICES
 )
 
+logger = logging.getLogger(__name__)
+
+
+# ==================== 工作线程/进程池 ====================
+# 分析器均为同步的akshare/yfinance调用, 直接在事件循环中执行会阻塞所有请求。
+# 重型接口统一投递到有界的线程池(I/O)或进程池(CPU密集型回测),
+# 并按接口分组限制并发数和超时, 保证 /api/health 等轻量接口在高负载下仍可响应。
+
+IO_WORKERS = int(os.environ.get('API_IO_WORKERS', 8))
+CPU_WORKERS = int(os.environ.get('API_CPU_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+
+# 接口分组: (最大并发数, 超时秒数)
+ENDPOINT_LIMITS: Dict[str, tuple] = {
+    'positions': (4, 60),
+    'analysis': (2, 180),
+    'market': (4, 90),
+    'correlation': (2, 120),
+    'kline': (4, 60),
+    'backtest': (2, 300),
+}
+
+
+class EndpointLimit:
+    """单个接口分组的并发信号量与超时"""
+
+    def __init__(self, max_concurrency: int, timeout: float):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+
+_endpoint_limits: Dict[str, EndpointLimit] = {}
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_endpoint_limit(group: str) -> EndpointLimit:
+    """获取接口分组的并发限制(懒加载)"""
+    if group not in _endpoint_limits:
+        max_concurrency, timeout = ENDPOINT_LIMITS[group]
+        _endpoint_limits[group] = EndpointLimit(max_concurrency, timeout)
+    return _endpoint_limits[group]
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """获取I/O线程池(懒加载)"""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='api-io')
+    return _io_executor
+
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """获取CPU进程池(懒加载)"""
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+    return _cpu_executor
+
+
+def shutdown_executors():
+    """关闭工作线程/进程池"""
+    global _io_executor, _cpu_executor
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=False, cancel_futures=True)
+        _io_executor = None
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
+
+
+async def _dispatch(group: str, executor, func: Callable, *args, **kwargs):
+    """
+    在指定执行器中运行同步函数, 受分组并发数和超时限制
+
+    超时后后台任务继续执行至结束, 期间仍占用并发名额, 保证实际并发不超过上限。
+    排队与执行共用一个截止时间 (总耗时不超过 timeout): 排队超时返回503, 执行超时返回504。
+    """
+    limit = get_endpoint_limit(group)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + limit.timeout
+    try:
+        await asyncio.wait_for(limit.semaphore.acquire(), timeout=limit.timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail=f"服务繁忙({group}), 请稍后重试")
+
+    try:
+        future = loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+    except Exception:
+        limit.semaphore.release()
+        raise
+
+    def on_done(f):
+        limit.semaphore.release()
+        if not f.cancelled() and f.exception() is not None:
+            logger.debug(f"{group} 任务异常: {f.exception()}")
+
+    future.add_done_callback(on_done)
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"请求超时({limit.timeout}秒)")
+
+
+async def run_io(group: str, func: Callable, *args, **kwargs):
+    """在I/O线程池中运行阻塞的数据获取/分析函数"""
+    return await _dispatch(group, get_io_executor(), func, *args, **kwargs)
+
+
+async def run_cpu(group: str, func: Callable, *args, **kwargs):
+    """在进程池中运行CPU密集型函数(函数及参数需可pickle)"""
+    return await _dispatch(group, get_cpu_executor(), func, *args, **kwargs)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 信号量绑定当前事件循环, 每次启动时重建
+    _endpoint_limits.clear()
+    yield
+    await market_data_producer.stop()
+    shutdown_executors()
+
+
 # 创建FastAPI应用
 app = FastAPI(
     title="美股市场分析API",
     description="基于历史数据的量化投资决策辅助API",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan
 )
 
 # 配置CORS(允许前端跨域访问)
@@ -131,7 +260,7 @@ async def get_current_positions(
         if indices is None:
             indices = DEFAULT_US_INDICES
 
-        positions = analyzer.get_current_positions(indices)
+        positions = await run_io('positions', analyzer.get_current_positions, indices)
 
         return {
             "success": True,
@@ -139,6 +268,8 @@ async def get_current_positions(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -149,7 +280,8 @@ async def analyze_single(
     tolerance: float = Query(0.05, ge=0.01, le=0.2, description="相似度容差"),
     periods: List[int] = Query([5, 10, 20, 60], description="分析周期"),
     use_phase2: bool = Query(False, description="是否使用Phase 2"),
-    use_phase3: bool = Query(False, description="是否使用Phase 3")
+    use_phase3: bool = Query(False, description="是否使用Phase 3"),
+    use_analog: bool = Query(False, description="是否追加历史走势形态检索")
 ):
     """
     单指数分析
@@ -160,6 +292,7 @@ async def analyze_single(
         periods: 分析周期列表
         use_phase2: 是否使用Phase 2增强分析
         use_phase3: 是否使用Phase 3深度分析
+        use_analog: 是否追加历史走势形态检索(k近邻)
 
     Returns:
         分析结果
@@ -170,12 +303,15 @@ async def analyze_single(
 
         analyzer = get_analyzer()
 
-        result = analyzer.analyze_single_index(
+        result = await run_io(
+            'analysis',
+            analyzer.analyze_single_index,
             index_code=index_code,
             tolerance=tolerance,
             periods=periods,
             use_phase2=use_phase2,
-            use_phase3=use_phase3
+            use_phase3=use_phase3,
+            use_analog=use_analog
         )
 
         # 转换datetime为字符串
@@ -187,6 +323,8 @@ async def analyze_single(
             "data": result
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -210,7 +348,9 @@ async def analyze_multiple(request: AnalysisRequest):
 
         analyzer = get_analyzer()
 
-        result = analyzer.analyze_multiple_indices(
+        result = await run_io(
+            'analysis',
+            analyzer.analyze_multiple_indices,
             indices=request.indices,
             tolerance=request.tolerance,
             periods=request.periods,
@@ -233,6 +373,8 @@ async def analyze_multiple(request: AnalysisRequest):
             "data": result
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -260,7 +402,7 @@ async def get_vix_current():
         analyzer = get_analyzer()
 
         # 获取VIX分析数据
-        vix_analysis = analyzer.vix_analyzer.analyze_vix(period="5y")
+        vix_analysis = await run_io('market', analyzer.vix_analyzer.analyze_vix, period="5y")
 
         return {
             "success": True,
@@ -268,6 +410,8 @@ async def get_vix_current():
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -286,7 +430,9 @@ async def get_sectors_current():
         analyzer = get_analyzer()
 
         # 获取行业轮动分析
-        sector_analysis = analyzer.sector_analyzer.analyze_sector_rotation(
+        sector_analysis = await run_io(
+            'market',
+            analyzer.sector_analyzer.analyze_sector_rotation,
             periods=[1, 5, 20, 60]
         )
 
@@ -296,10 +442,281 @@ async def get_sectors_current():
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================== 回测/K线计算函数 ====================
+# 以下为模块级函数, 供线程池/进程池调用(进程池要求函数与参数可pickle)
+
+def fetch_history(symbol: str, period: str, interval: str = "1d"):
+    """
+    获取yfinance历史数据并将OHLCV列名转为小写
+
+    Args:
+        symbol: 资产代码
+        period: 时间周期, 如 '500d', '3mo'
+        interval: K线间隔
+
+    Returns:
+        历史数据DataFrame(获取失败时为空)
+    """
+    import yfinance as yf
+
+    ticker = yf.Ticker(symbol)
+    df = ticker.history(period=period, interval=interval)
+
+    return df.rename(columns={
+        'Open': 'open',
+        'High': 'high',
+        'Low': 'low',
+        'Close': 'close',
+        'Volume': 'volume'
+    })
+
+
+def history_panel_key(symbol: str, interval: str = "1d") -> str:
+    """yfinance历史数据的共享指标面板键 (非日线按K线间隔区分)"""
+    from src.data_sources.bar_store import infer_market
+    from strategies.trading.signal_generators.indicator_panel import panel_key
+
+    code = symbol if interval == "1d" else f"{symbol}@{interval}"
+    return panel_key(infer_market(symbol), code)
+
+
+def compute_resonance_backtest(df, initial_capital: float, stop_loss: float, take_profit: float,
+                               symbol: Optional[str] = None):
+    """
+    计算技术指标并运行共振策略回测
+
+    symbol 提供时指标取自该标的的共享指标面板
+
+    Returns:
+        (性能报告, 权益曲线, 前20笔交易)
+    """
+    from strategies.trading.signal_generators.technical_indicators import TechnicalIndicators
+    from strategies.trading.signal_generators.resonance_signals import ResonanceSignalGenerator
+    from strategies.trading.backtesting.backtest_engine import BacktestEngine
+    from strategies.trading.backtesting.performance_metrics import PerformanceMetrics
+
+    # 计算技术指标
+    calculator = TechnicalIndicators()
+    df = calculator.calculate_all_indicators(df, symbol=history_panel_key(symbol) if symbol else None)
+
+    # 运行回测
+    generator = ResonanceSignalGenerator()
+    engine = BacktestEngine(
+        initial_capital=initial_capital,
+        commission=0.0003,
+        slippage=0.0001,
+        stop_loss=stop_loss,
+        take_profit=take_profit
+    )
+
+    result = engine.run_backtest_with_strategy(df, generator)
+
+    # 计算性能指标
+    metrics = PerformanceMetrics()
+    performance = metrics.generate_performance_report(
+        returns=result['daily_returns'],
+        trades=result['trades'],
+        initial_capital=initial_capital
+    )
+
+    # 权益曲线数据
+    equity_curve = [
+        {"date": str(df.index[i].date() if hasattr(df.index[i], 'date') else df.index[i]),
+         "value": result['portfolio_value'][i]}
+        for i in range(len(result['portfolio_value']))
+    ]
+
+    # 交易记录（前20笔）
+    trades_data = []
+    for trade in result['trades'][:20]:
+        trades_data.append({
+            'entry_date': str(trade['entry_date']),
+            'exit_date': str(trade['exit_date']),
+            'entry_price': round(trade['entry_price'], 2),
+            'exit_price': round(trade['exit_price'], 2),
+            'shares': trade['shares'],
+            'return': round(trade['return'] * 100, 2),
+            'pnl': round(trade['pnl'], 2),
+            'signal': trade.get('signal', 'SELL')
+        })
+
+    return performance, equity_curve, trades_data
+
+
+def compute_sr_breakout_backtest(
+    df,
+    initial_capital: float,
+    lookback_period: int,
+    breakout_threshold: float,
+    volume_threshold: float
+):
+    """
+    运行支撑/压力位突破策略回测
+
+    Returns:
+        (总收益率%, 最终资产, 交易记录, 权益曲线, 策略信息)
+    """
+    from strategies.trading.signal_generators.sr_breakout_strategy import SRBreakoutStrategy
+
+    # 创建策略
+    strategy = SRBreakoutStrategy(
+        lookback_period=lookback_period,
+        breakout_threshold=breakout_threshold,
+        volume_threshold=volume_threshold
+    )
+
+    # 生成信号
+    signals = strategy.generate_signals(df)
+    df['signal'] = signals
+
+    # 简单回测逻辑
+    portfolio_value = [initial_capital]
+    cash = initial_capital
+    shares = 0
+    trades = []
+
+    for i in range(1, len(df)):
+        current_price = df['close'].iloc[i]
+        signal = df['signal'].iloc[i]
+        date = df.index[i]
+
+        # 买入信号
+        if signal == 1 and shares == 0:
+            shares = int(cash / current_price)
+            cost = shares * current_price * (1 + 0.0003)
+            if cost <= cash:
+                cash -= cost
+                trades.append({
+                    'type': 'BUY',
+                    'date': str(date.date()),
+                    'price': current_price,
+                    'shares': shares
+                })
+
+        # 卖出信号
+        elif signal == -1 and shares > 0:
+            cash += shares * current_price * (1 - 0.0003)
+            trades.append({
+                'type': 'SELL',
+                'date': str(date.date()),
+                'price': current_price,
+                'shares': shares
+            })
+            shares = 0
+
+        # 计算当前总资产
+        total_value = cash + shares * current_price
+        portfolio_value.append(total_value)
+
+    # 最后平仓
+    if shares > 0:
+        final_price = df['close'].iloc[-1]
+        cash += shares * final_price * (1 - 0.0003)
+        shares = 0
+
+    final_value = cash
+    total_return = (final_value - initial_capital) / initial_capital * 100
+
+    # 准备返回数据
+    equity_curve = [
+        {"date": str(df.index[i].date()), "value": portfolio_value[i]}
+        for i in range(len(portfolio_value))
+    ]
+
+    return total_return, final_value, trades, equity_curve, strategy.get_strategy_info()
+
+
+def compute_kline_indicators(df, symbol: Optional[str] = None, interval: str = "1d"):
+    """
+    生成K线OHLC数据与技术指标序列
+
+    symbol 提供时指标取自该标的的共享指标面板 (与市场快照/回测等复用同一份指标序列)
+
+    Returns:
+        (OHLC列表, 指标序列字典, 当前最新指标值)
+    """
+    import pandas as pd
+    from strategies.trading.signal_generators.technical_indicators import TechnicalIndicators
+    from src.data_sources.us_stock_source import USStockDataSource
+
+    # 准备OHLC数据
+    ohlc_data = []
+    for idx, row in df.iterrows():
+        ohlc_data.append({
+            'date': idx.strftime('%Y-%m-%d'),
+            'open': round(float(row['open']), 2),
+            'high': round(float(row['high']), 2),
+            'low': round(float(row['low']), 2),
+            'close': round(float(row['close']), 2),
+            'volume': int(row['volume']) if not pd.isna(row['volume']) else 0
+        })
+
+    # 计算技术指标
+    key = history_panel_key(symbol, interval) if symbol else None
+    calc = TechnicalIndicators()
+    df_with_indicators = calc.calculate_all_indicators(
+        df.copy(),
+        include_dmi_adx=True,
+        symbol=key
+    )
+
+    # 逐项计算路径需单独计算KDJ (共享面板路径已包含)
+    if 'kdj_k' not in df_with_indicators.columns:
+        df_with_indicators = calc.calculate_kdj(df_with_indicators)
+
+    # 提取指标序列
+    indicators = {}
+
+    # 移动平均线
+    if 'ma5' in df_with_indicators.columns:
+        indicators['ma5'] = df_with_indicators['ma5'].round(2).fillna(0).tolist()
+    if 'ma20' in df_with_indicators.columns:
+        indicators['ma20'] = df_with_indicators['ma20'].round(2).fillna(0).tolist()
+    if 'ma60' in df_with_indicators.columns:
+        indicators['ma60'] = df_with_indicators['ma60'].round(2).fillna(0).tolist()
+
+    # KDJ指标
+    if all(col in df_with_indicators.columns for col in ['kdj_k', 'kdj_d', 'kdj_j']):
+        indicators['kdj'] = {
+            'k': df_with_indicators['kdj_k'].round(2).fillna(0).tolist(),
+            'd': df_with_indicators['kdj_d'].round(2).fillna(0).tolist(),
+            'j': df_with_indicators['kdj_j'].round(2).fillna(0).tolist()
+        }
+
+    # DMI/ADX指标
+    if all(col in df_with_indicators.columns for col in ['adx', '+di', '-di']):
+        indicators['dmi_adx'] = {
+            'adx': df_with_indicators['adx'].round(2).fillna(0).tolist(),
+            '+di': df_with_indicators['+di'].round(2).fillna(0).tolist(),
+            '-di': df_with_indicators['-di'].round(2).fillna(0).tolist()
+        }
+
+    # MACD指标
+    if all(col in df_with_indicators.columns for col in ['macd', 'macd_signal', 'macd_hist']):
+        indicators['macd'] = {
+            'macd': df_with_indicators['macd'].round(4).fillna(0).tolist(),
+            'signal': df_with_indicators['macd_signal'].round(4).fillna(0).tolist(),
+            'histogram': df_with_indicators['macd_hist'].round(4).fillna(0).tolist()
+        }
+
+    # 成交量均线
+    if 'volume' in df_with_indicators.columns:
+        volume_ma = df_with_indicators['volume'].rolling(window=20).mean()
+        indicators['volume_ma'] = volume_ma.fillna(0).tolist()
+
+    # 获取当前最新指标值
+    data_source = USStockDataSource()
+    current_indicators = data_source.calculate_technical_indicators(df, symbol=key)
+
+    return ohlc_data, indicators, current_indicators
+
+
 # ==================== 回测API ====================
 
 @app.post("/api/backtest/run")
@@ -324,17 +741,6 @@ async def run_backtest(
         回测结果
     """
     try:
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-        from strategies.trading.signal_generators.technical_indicators import TechnicalIndicators
-        from strategies.trading.signal_generators.resonance_signals import ResonanceSignalGenerator
-        from strategies.trading.backtesting.backtest_engine import BacktestEngine
-        from strategies.trading.backtesting.performance_metrics import PerformanceMetrics
-        import yfinance as yf
-        import pandas as pd
-
         # 获取数据 - 支持指数代码或直接使用symbol
         if index_code in US_INDICES:
             index_info = US_INDICES[index_code]
@@ -345,67 +751,16 @@ async def run_backtest(
             symbol = index_code
             index_name = index_code
 
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=f"{days}d")
+        df = await run_io('backtest', fetch_history, symbol, f"{days}d")
 
         if df.empty:
             raise HTTPException(status_code=500, detail="获取历史数据失败")
 
-        # 重命名列
-        df = df.rename(columns={
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        })
-
-        # 计算技术指标
-        calculator = TechnicalIndicators()
-        df = calculator.calculate_all_indicators(df)
-
-        # 运行回测
-        generator = ResonanceSignalGenerator()
-        engine = BacktestEngine(
-            initial_capital=initial_capital,
-            commission=0.0003,
-            slippage=0.0001,
-            stop_loss=stop_loss,
-            take_profit=take_profit
+        # 指标计算与回测为CPU密集型, 在进程池中执行
+        performance, equity_curve, trades_data = await run_cpu(
+            'backtest', compute_resonance_backtest, df, initial_capital, stop_loss, take_profit, symbol
         )
 
-        result = engine.run_backtest_with_strategy(df, generator)
-
-        # 计算性能指标
-        metrics = PerformanceMetrics()
-        performance = metrics.generate_performance_report(
-            returns=result['daily_returns'],
-            trades=result['trades'],
-            initial_capital=initial_capital
-        )
-
-        # 准备返回数据
-        # 权益曲线数据
-        equity_curve = [
-            {"date": str(df.index[i].date() if hasattr(df.index[i], 'date') else df.index[i]),
-             "value": result['portfolio_value'][i]}
-            for i in range(len(result['portfolio_value']))
-        ]
-
-        # 交易记录（前20笔）
-        trades_data = []
-        for trade in result['trades'][:20]:
-            trades_data.append({
-                'entry_date': str(trade['entry_date']),
-                'exit_date': str(trade['exit_date']),
-                'entry_price': round(trade['entry_price'], 2),
-                'exit_price': round(trade['exit_price'], 2),
-                'shares': trade['shares'],
-                'return': round(trade['return'] * 100, 2),
-                'pnl': round(trade['pnl'], 2),
-                'signal': trade.get('signal', 'SELL')
-            })
-
         return {
             "success": True,
             "data": {
@@ -424,6 +779,8 @@ async def run_backtest(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -444,6 +801,8 @@ async def get_hk_indices():
             }
             for code, config in HK_INDICES.items()
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -461,7 +820,7 @@ async def get_hk_current_positions(
         if indices is None:
             indices = DEFAULT_HK_INDICES
 
-        positions = analyzer.get_current_positions(indices)
+        positions = await run_io('positions', analyzer.get_current_positions, indices)
 
         return {
             "success": True,
@@ -470,6 +829,8 @@ async def get_hk_current_positions(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -490,6 +851,8 @@ async def get_cn_indices():
             }
             for code, config in CN_INDICES.items()
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -507,7 +870,7 @@ async def get_cn_current_positions(
         if indices is None:
             indices = DEFAULT_CN_INDICES
 
-        positions = analyzer.get_current_positions(indices)
+        positions = await run_io('positions', analyzer.get_current_positions, indices)
 
         return {
             "success": True,
@@ -516,6 +879,8 @@ async def get_cn_current_positions(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -563,7 +928,7 @@ async def analyze_correlation(
         }
 
         analyzer = CorrelationAnalyzer(lookback_days=lookback_days)
-        result = analyzer.comprehensive_analysis(symbols, asset_names)
+        result = await run_io('correlation', analyzer.comprehensive_analysis, symbols, asset_names)
 
         if 'error' in result:
             raise HTTPException(status_code=500, detail=result['error'])
@@ -578,6 +943,8 @@ async def analyze_correlation(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -603,7 +970,7 @@ async def analyze_support_resistance(
         from strategies.position.analyzers.technical_analysis.support_resistance import SupportResistanceAnalyzer
 
         analyzer = SupportResistanceAnalyzer(symbol, lookback_days=lookback_days)
-        result = analyzer.comprehensive_analysis()
+        result = await run_io('analysis', analyzer.comprehensive_analysis)
 
         if 'error' in result:
             raise HTTPException(status_code=500, detail=result['error'])
@@ -618,6 +985,8 @@ async def analyze_support_resistance(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -635,8 +1004,7 @@ async def analyze_market_sentiment():
     try:
         from strategies.position.analyzers.market_structure.sentiment_index import MarketSentimentIndex
 
-        analyzer = MarketSentimentIndex()
-        result = analyzer.calculate_comprehensive_sentiment()
+        result = await run_io('market', lambda: MarketSentimentIndex().calculate_comprehensive_sentiment())
 
         # 转换datetime为字符串
         if 'timestamp' in result:
@@ -648,6 +1016,8 @@ async def analyze_market_sentiment():
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -678,99 +1048,16 @@ async def run_sr_breakout_backtest(
         回测结果和性能指标
     """
     try:
-        import yfinance as yf
-        from strategies.trading.signal_generators.sr_breakout_strategy import SRBreakoutStrategy
-        from strategies.trading.backtesting.backtest_engine import BacktestEngine
-        from strategies.trading.backtesting.performance_metrics import PerformanceMetrics
-
-        # 获取数据
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=f"{days}d")
+        df = await run_io('backtest', fetch_history, symbol, f"{days}d")
 
         if df.empty:
             raise HTTPException(status_code=500, detail="获取历史数据失败")
 
-        # 重命名列
-        df = df.rename(columns={
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        })
-
-        # 创建策略
-        strategy = SRBreakoutStrategy(
-            lookback_period=lookback_period,
-            breakout_threshold=breakout_threshold,
-            volume_threshold=volume_threshold
-        )
-
-        # 生成信号
-        signals = strategy.generate_signals(df)
-        df['signal'] = signals
-
-        # 运行回测
-        engine = BacktestEngine(
-            initial_capital=initial_capital,
-            commission=0.0003,
-            slippage=0.0001
+        total_return, final_value, trades, equity_curve, strategy_info = await run_cpu(
+            'backtest', compute_sr_breakout_backtest,
+            df, initial_capital, lookback_period, breakout_threshold, volume_threshold
         )
 
-        # 简单回测逻辑
-        portfolio_value = [initial_capital]
-        cash = initial_capital
-        shares = 0
-        trades = []
-
-        for i in range(1, len(df)):
-            current_price = df['close'].iloc[i]
-            signal = df['signal'].iloc[i]
-            date = df.index[i]
-
-            # 买入信号
-            if signal == 1 and shares == 0:
-                shares = int(cash / current_price)
-                cost = shares * current_price * (1 + 0.0003)
-                if cost <= cash:
-                    cash -= cost
-                    trades.append({
-                        'type': 'BUY',
-                        'date': str(date.date()),
-                        'price': current_price,
-                        'shares': shares
-                    })
-
-            # 卖出信号
-            elif signal == -1 and shares > 0:
-                cash += shares * current_price * (1 - 0.0003)
-                trades.append({
-                    'type': 'SELL',
-                    'date': str(date.date()),
-                    'price': current_price,
-                    'shares': shares
-                })
-                shares = 0
-
-            # 计算当前总资产
-            total_value = cash + shares * current_price
-            portfolio_value.append(total_value)
-
-        # 最后平仓
-        if shares > 0:
-            final_price = df['close'].iloc[-1]
-            cash += shares * final_price * (1 - 0.0003)
-            shares = 0
-
-        final_value = cash
-        total_return = (final_value - initial_capital) / initial_capital * 100
-
-        # 准备返回数据
-        equity_curve = [
-            {"date": str(df.index[i].date()), "value": portfolio_value[i]}
-            for i in range(len(portfolio_value))
-        ]
-
         return {
             "success": True,
             "data": {
@@ -782,7 +1069,7 @@ async def run_sr_breakout_backtest(
                 },
                 "equity_curve": equity_curve,
                 "trades": trades[:20],  # 返回前20笔交易
-                "strategy_info": strategy.get_strategy_info(),
+                "strategy_info": strategy_info,
                 "config": {
                     "symbol": symbol,
                     "days": days,
@@ -795,6 +1082,8 @@ async def run_sr_breakout_backtest(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -882,10 +1171,6 @@ async def get_kline_data(
         }
     """
     try:
-        import pandas as pd
-        import yfinance as yf
-        from strategies.trading.signal_generators.technical_indicators import TechnicalIndicators
-
         # 资产名称映射 (用于显示)
         asset_names = {
             '^IXIC': '纳斯达克综合指数',
@@ -907,88 +1192,15 @@ async def get_kline_data(
         }
 
         # 获取历史数据
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=period, interval=interval)
+        df = await run_io('kline', fetch_history, symbol, period, interval)
 
         if df.empty:
             raise HTTPException(status_code=500, detail=f"无法获取{symbol}的数据")
 
-        # 重命名列为小写
-        df = df.rename(columns={
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        })
-
-        # 准备OHLC数据
-        ohlc_data = []
-        for idx, row in df.iterrows():
-            ohlc_data.append({
-                'date': idx.strftime('%Y-%m-%d'),
-                'open': round(float(row['open']), 2),
-                'high': round(float(row['high']), 2),
-                'low': round(float(row['low']), 2),
-                'close': round(float(row['close']), 2),
-                'volume': int(row['volume']) if not pd.isna(row['volume']) else 0
-            })
-
-        # 计算技术指标
-        calc = TechnicalIndicators()
-        df_with_indicators = calc.calculate_all_indicators(
-            df.copy(),
-            include_dmi_adx=True
+        ohlc_data, indicators, current_indicators = await run_io(
+            'kline', compute_kline_indicators, df, symbol, interval
         )
 
-        # 单独计算KDJ (目前不在calculate_all_indicators中)
-        df_with_indicators = calc.calculate_kdj(df_with_indicators)
-
-        # 提取指标序列
-        indicators = {}
-
-        # 移动平均线
-        if 'ma5' in df_with_indicators.columns:
-            indicators['ma5'] = df_with_indicators['ma5'].round(2).fillna(0).tolist()
-        if 'ma20' in df_with_indicators.columns:
-            indicators['ma20'] = df_with_indicators['ma20'].round(2).fillna(0).tolist()
-        if 'ma60' in df_with_indicators.columns:
-            indicators['ma60'] = df_with_indicators['ma60'].round(2).fillna(0).tolist()
-
-        # KDJ指标
-        if all(col in df_with_indicators.columns for col in ['kdj_k', 'kdj_d', 'kdj_j']):
-            indicators['kdj'] = {
-                'k': df_with_indicators['kdj_k'].round(2).fillna(0).tolist(),
-                'd': df_with_indicators['kdj_d'].round(2).fillna(0).tolist(),
-                'j': df_with_indicators['kdj_j'].round(2).fillna(0).tolist()
-            }
-
-        # DMI/ADX指标
-        if all(col in df_with_indicators.columns for col in ['adx', '+di', '-di']):
-            indicators['dmi_adx'] = {
-                'adx': df_with_indicators['adx'].round(2).fillna(0).tolist(),
-                '+di': df_with_indicators['+di'].round(2).fillna(0).tolist(),
-                '-di': df_with_indicators['-di'].round(2).fillna(0).tolist()
-            }
-
-        # MACD指标
-        if all(col in df_with_indicators.columns for col in ['macd', 'macd_signal', 'macd_hist']):
-            indicators['macd'] = {
-                'macd': df_with_indicators['macd'].round(4).fillna(0).tolist(),
-                'signal': df_with_indicators['macd_signal'].round(4).fillna(0).tolist(),
-                'histogram': df_with_indicators['macd_hist'].round(4).fillna(0).tolist()
-            }
-
-        # 成交量均线
-        if 'volume' in df_with_indicators.columns:
-            volume_ma = df_with_indicators['volume'].rolling(window=20).mean()
-            indicators['volume_ma'] = volume_ma.fillna(0).tolist()
-
-        # 获取当前最新指标值
-        from src.data_sources.us_stock_source import USStockDataSource
-        data_source = USStockDataSource()
-        current_indicators = data_source.calculate_technical_indicators(df)
-
         return {
             "success": True,
             "data": {
@@ -1004,39 +1216,274 @@ async def get_kline_data(
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== WebSocket实时数据推送 ====================
 
-# 存储所有活跃的WebSocket连接
-active_connections: List[WebSocket] = []
+# 推送间隔(秒)
+MARKET_DATA_INTERVAL = 30
+# 每个客户端待发送消息队列上限, 超出后丢弃积压的增量并改发全量快照
+CLIENT_QUEUE_SIZE = 8
+# 单条消息发送超时(秒)
+CLIENT_SEND_TIMEOUT = 10
+# 积压清空前累计溢出次数达到上限的慢客户端将被断开
+CLIENT_MAX_OVERFLOWS = 3
+
+MARKET_DATA_INDICES = [
+    ('^IXIC', '纳斯达克'),
+    ('^GSPC', '标普500'),
+    ('^VIX', 'VIX')
+]
+
+
+def build_market_snapshot() -> dict:
+    """
+    获取一次市场数据快照(同步, 在I/O线程池中执行)
+
+    Returns:
+        {'sentiment': {...}, 'indices': {symbol: {...}}}
+    """
+    from strategies.position.analyzers.market_structure.sentiment_index import MarketSentimentIndex
+    from src.data_sources.us_stock_source import USStockDataSource
+
+    # 1. 市场情绪指数
+    sentiment = MarketSentimentIndex().calculate_comprehensive_sentiment()
+
+    # 2. 主要指数当前价格
+    data_source = USStockDataSource()
+    indices_data = {}
+
+    for symbol, name in MARKET_DATA_INDICES:
+        try:
+            df = data_source.get_us_index_daily(symbol, period='5d')
+            if not df.empty:
+                indicators = data_source.calculate_technical_indicators(df, symbol=history_panel_key(symbol))
+                indices_data[symbol] = {
+                    'name': name,
+                    'price': indicators.get('latest_price', 0),
+                    'change_pct': indicators.get('change_pct', 0),
+                    'date': indicators.get('latest_date', '')
+                }
+        except Exception as e:
+            logger.warning(f"获取{symbol}数据失败: {e}")
+
+    return {
+        "sentiment": {
+            "score": sentiment.get('sentiment_score', 0),
+            "rating": sentiment.get('rating', ''),
+            "emoji": sentiment.get('emoji', ''),
+        },
+        "indices": indices_data
+    }
+
+
+def compute_delta(old: dict, new: dict) -> dict:
+    """
+    计算两个快照之间的增量(递归比较字典, 删除的键记为None)
+
+    Args:
+        old: 上一次快照
+        new: 本次快照
+
+    Returns:
+        仅包含变化字段的字典, 无变化时为空字典
+    """
+    delta = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            sub_delta = compute_delta(previous, value)
+            if sub_delta:
+                delta[key] = sub_delta
+        elif key not in old or previous != value:
+            delta[key] = value
+    for key in old:
+        if key not in new:
+            delta[key] = None
+    return delta
+
+
+class ClientConnection:
+    """单个WebSocket客户端: 有界发送队列 + 独立发送任务"""
+
+    def __init__(self, websocket: WebSocket, queue_size: int = CLIENT_QUEUE_SIZE):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflows = 0
+        self.sender: Optional[asyncio.Task] = None
+
+    def offer(self, message: str, snapshot: Optional[str] = None) -> bool:
+        """
+        非阻塞入队
+
+        队列已满时清空积压消息, 改为入队全量快照(客户端据此重新同步)。
+
+        Returns:
+            是否发生溢出
+        """
+        try:
+            self.queue.put_nowait(message)
+            return False
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(snapshot or message)
+            self.overflows += 1
+            return True
+
+    async def run_sender(self, on_failed: Callable):
+        """逐条发送队列中的消息, 发送失败或超时即视为断开"""
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(message), timeout=CLIENT_SEND_TIMEOUT)
+                # 积压已清空, 说明客户端跟上了推送节奏
+                if self.queue.empty():
+                    self.overflows = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket发送失败, 断开客户端: {e}")
+            await on_failed(self.websocket)
 
 
 class ConnectionManager:
+    """
+    WebSocket连接管理
+
+    broadcast 只向各客户端队列投递消息, 不等待发送完成,
+    慢客户端不会拖慢其他客户端或数据生产者。
+    """
+
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.latest_snapshot: Optional[str] = None
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket)
+        self.clients[websocket] = client
+        client.sender = asyncio.create_task(client.run_sender(self.close))
+
+        # 新连接先收到最近一次全量快照
+        if self.latest_snapshot is not None:
+            client.offer(self.latest_snapshot)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        client = self.clients.pop(websocket, None)
+        if client is not None and client.sender is not None and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    async def close(self, websocket: WebSocket, code: int = 1000):
+        """断开并关闭客户端连接"""
+        self.disconnect(websocket)
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+    async def broadcast(self, message: str, snapshot: Optional[str] = None):
+        """
+        向所有客户端广播消息
+
+        Args:
+            message: 消息文本
+            snapshot: 全量快照, 客户端积压溢出时用于替换被丢弃的增量
+        """
+        slow_clients = []
+        for websocket, client in list(self.clients.items()):
+            if client.offer(message, snapshot) and client.overflows >= CLIENT_MAX_OVERFLOWS:
+                slow_clients.append(websocket)
+
+        for websocket in slow_clients:
+            logger.warning("WebSocket客户端消费过慢, 断开连接")
+            await self.close(websocket, code=1013)
+
+
+class MarketDataProducer:
+    """
+    市场数据生产者
+
+    所有连接共享一个后台任务: 每个周期获取一次快照, 与上次快照比较后只广播增量。
+    首个客户端连接时启动, 最后一个客户端断开后停止, 上游请求量与连接数无关。
+    """
+
+    def __init__(self, connection_manager: ConnectionManager, interval: float = MARKET_DATA_INTERVAL):
+        self.manager = connection_manager
+        self.interval = interval
+        self.snapshot: Optional[dict] = None
+        self.seq = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def ensure_started(self):
+        """确保后台任务在运行"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台任务"""
+        if self.task is not None:
+            self.task.cancel()
             try:
-                await connection.send_text(message)
-            except:
+                await self.task
+            except asyncio.CancelledError:
                 pass
+            self.task = None
+
+    def _message(self, message_type: str, data: dict) -> str:
+        return json.dumps({
+            "type": message_type,
+            "seq": self.seq,
+            "timestamp": datetime.now().isoformat(),
+            "data": data
+        }, ensure_ascii=False, default=str)
+
+    async def publish(self, data: dict):
+        """发布新快照: 首次或客户端需要重新同步时为全量, 其余为增量"""
+        self.seq += 1
+        full_message = self._message("market_data", data)
+        self.manager.latest_snapshot = full_message
+
+        if self.snapshot is None:
+            await self.manager.broadcast(full_message)
+        else:
+            delta = compute_delta(self.snapshot, data)
+            if delta:
+                await self.manager.broadcast(self._message("market_data_delta", delta), snapshot=full_message)
+
+        self.snapshot = data
+
+    async def _run(self):
+        while self.manager.clients:
+            try:
+                data = await run_io('market', build_market_snapshot)
+                await self.publish(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"获取数据失败: {str(e)}")
+                await self.manager.broadcast(json.dumps({
+                    "type": "error",
+                    "message": "数据获取失败",
+                    "timestamp": datetime.now().isoformat()
+                }, ensure_ascii=False))
+
+            await asyncio.sleep(self.interval)
 
 
 manager = ConnectionManager()
+market_data_producer = MarketDataProducer(manager)
 
 
 @app.websocket("/ws/market-data")
@@ -1044,86 +1491,30 @@ async def websocket_market_data(websocket: WebSocket):
     """
     WebSocket端点 - 实时推送市场数据
 
-    推送频率: 每30秒
+    推送频率: 每30秒(所有连接共享同一数据生产者)
+    消息类型:
+    - market_data: 全量快照(连接时及积压溢出后)
+    - market_data_delta: 仅包含变化字段的增量
     数据内容:
     - 市场情绪指数
     - 主要指数当前价格
     - VIX当前值
     """
     await manager.connect(websocket)
-    print(f"WebSocket客户端已连接,当前连接数: {len(manager.active_connections)}")
+    market_data_producer.ensure_started()
+    logger.info(f"WebSocket客户端已连接,当前连接数: {len(manager.clients)}")
 
     try:
+        # 仅用于检测客户端断开, 忽略客户端发来的消息
         while True:
-            # 获取实时数据
-            try:
-                from strategies.position.analyzers.market_structure.sentiment_index import MarketSentimentIndex
-                from src.data_sources.us_stock_source import USStockDataSource
-
-                # 1. 市场情绪指数
-                sentiment_analyzer = MarketSentimentIndex()
-                sentiment = sentiment_analyzer.calculate_comprehensive_sentiment()
-
-                # 2. 主要指数当前价格
-                data_source = USStockDataSource()
-                indices_data = {}
-
-                for symbol, name in [
-                    ('^IXIC', '纳斯达克'),
-                    ('^GSPC', '标普500'),
-                    ('^VIX', 'VIX')
-                ]:
-                    try:
-                        df = data_source.get_us_index_daily(symbol, period='5d')
-                        if not df.empty:
-                            indicators = data_source.calculate_technical_indicators(df)
-                            indices_data[symbol] = {
-                                'name': name,
-                                'price': indicators.get('latest_price', 0),
-                                'change_pct': indicators.get('change_pct', 0),
-                                'date': indicators.get('latest_date', '')
-                            }
-                    except:
-                        pass
-
-                # 转换datetime为字符串
-                if 'timestamp' in sentiment:
-                    sentiment['timestamp'] = sentiment['timestamp'].isoformat()
-
-                # 构建推送消息
-                message = {
-                    "type": "market_data",
-                    "timestamp": datetime.now().isoformat(),
-                    "data": {
-                        "sentiment": {
-                            "score": sentiment.get('sentiment_score', 0),
-                            "rating": sentiment.get('rating', ''),
-                            "emoji": sentiment.get('emoji', ''),
-                        },
-                        "indices": indices_data
-                    }
-                }
-
-                await websocket.send_json(message)
-
-            except Exception as e:
-                print(f"获取数据失败: {str(e)}")
-                # 发送错误消息
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "数据获取失败",
-                    "timestamp": datetime.now().isoformat()
-                })
-
-            # 等待30秒
-            await asyncio.sleep(30)
-
+            await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
-        print(f"WebSocket客户端已断开,当前连接数: {len(manager.active_connections)}")
+        pass
     except Exception as e:
-        print(f"WebSocket错误: {str(e)}")
+        logger.warning(f"WebSocket错误: {str(e)}")
+    finally:
         manager.disconnect(websocket)
+        logger.info(f"WebSocket客户端已断开,当前连接数: {len(manager.clients)}")
 
 
 # ==================== 启动配置 ====================